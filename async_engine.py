@@ -0,0 +1,999 @@
+"""
+Async ECS Engine
+Starts and stops many services on one asyncio event loop instead of one
+worker thread per service, task or target group
+
+Every task wait shares one describe_tasks call per cluster per tick and every
+health wait one describe_target_health call per target group, as with the
+threaded TaskPoller and HealthWatcher, but the run_task, register, deregister
+and stop_task calls of all services are in flight together and a wait costs a
+future instead of a blocked thread, so hundreds of them fit in one invocation.
+
+The handlers talk to AWS through a small client protocol (AsyncECSClient,
+AsyncELBv2Client): any object whose methods take the boto3 keyword arguments
+and return awaitables. An aiobotocore client fits as is. ThreadedClient adapts
+the pooled boto3 clients (keeping their throttling and call counting) by
+running each call on a bounded executor, and tests use in-memory fakes.
+
+Services started here need a container port in their config or event; the
+warm pool, reuse checks and idempotency keys stay with lambda_function.
+"""
+import asyncio
+import functools
+import json
+import logging
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Protocol, Sequence, Tuple, TypeVar
+from botocore.exceptions import ClientError
+
+from aws_clients import get_client
+from config import (
+    get_all_service_names,
+    get_service_config,
+    get_target_groups,
+    AWS_REGION,
+    BOTO_MAX_POOL_CONNECTIONS,
+    STOP_TASK_CONCURRENCY,
+    TASK_WAIT_TIMEOUT,
+    LAUNCH_TYPE,
+    ASSIGN_PUBLIC_IP,
+)
+from ecs_handler import ECSTaskError, RUN_TASK_MAX_COUNT
+from health_watcher import HealthWatcher, TargetWaiter
+from lambda_function import resolve_start_request, pop_poll_stats
+from polling import PollScheduler, DEFAULT_SCHEDULER
+from resolution_cache import launch_task_definition
+from stop_engines_lambda import extract_private_ip
+from target_group_handler import TargetGroupError, HEALTH_CHECK_TIMEOUT
+from task_poller import TaskPoller, TaskWaiter, DESCRIBE_TASKS_MAX_ARNS
+from throttling import DEFAULT_THROTTLE
+
+logger = logging.getLogger()
+
+T = TypeVar('T')
+
+
+class AsyncECSClient(Protocol):
+    """ECS calls used by the async engine (boto3 keyword arguments and responses)"""
+    
+    async def run_task(self, **kwargs: Any) -> Dict[str, Any]: ...
+    
+    async def describe_tasks(self, **kwargs: Any) -> Dict[str, Any]: ...
+    
+    async def list_tasks(self, **kwargs: Any) -> Dict[str, Any]: ...
+    
+    async def stop_task(self, **kwargs: Any) -> Dict[str, Any]: ...
+
+
+class AsyncELBv2Client(Protocol):
+    """ELBv2 calls used by the async engine (boto3 keyword arguments and responses)"""
+    
+    async def register_targets(self, **kwargs: Any) -> Dict[str, Any]: ...
+    
+    async def deregister_targets(self, **kwargs: Any) -> Dict[str, Any]: ...
+    
+    async def describe_target_health(self, **kwargs: Any) -> Dict[str, Any]: ...
+
+
+class ThreadedClient:
+    """
+    Async view of a boto3 client
+    
+    Each call runs on the executor, so the executor size bounds how many
+    calls are in flight; hooks registered on the client (throttling, API
+    call counting) still apply.
+    """
+    
+    def __init__(self, client: Any, executor: Optional[Executor] = None):
+        """
+        Initialize the adapter
+        
+        Args:
+            client: boto3 client
+            executor: Executor running the calls (default: the loop's default executor)
+        """
+        self._client = client
+        self._executor = executor
+    
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self._client, name)
+        
+        async def call(**kwargs: Any) -> Any:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(method, **kwargs))
+        
+        return call
+
+
+class AsyncPollingMixin:
+    """
+    Event loop replacement for the background thread of TaskPoller and HealthWatcher
+    
+    Waiters are tracked in the same pending structure (group -> key -> waiters)
+    and resolved by the same response handling; a runner task ticks instead of
+    a thread and each waiter gets a future to await. All due groups of a tick
+    are described concurrently.
+    """
+    
+    _pending: Dict[str, Dict[Any, List[Any]]]
+    
+    def _init_async(self) -> None:
+        self._futures: Dict[Any, asyncio.Future] = {}
+        self._runner: Optional[asyncio.Task] = None
+        self._tick: Optional[asyncio.Event] = None
+    
+    def _track(self, group: str, waiters: List[Any]) -> None:
+        """Add waiters to the pending set and make sure the runner is ticking"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            group_waiters = self._pending.setdefault(group, {})
+            for waiter in waiters:
+                group_waiters.setdefault(self._key(waiter), []).append(waiter)
+                self._futures[waiter] = loop.create_future()
+        
+        if self._runner is None or self._runner.done():
+            # Events bind to the running loop, so each runner gets its own
+            self._tick = asyncio.Event()
+            self._runner = loop.create_task(self._run())
+        
+        # New waiters are due now; cut the current sleep short
+        self._tick.set()
+    
+    async def _await(self, waiters: List[Any], timeout: float) -> List[Any]:
+        """Wait until every waiter is resolved or the timeout expires, then stop tracking the rest"""
+        futures = [self._futures[waiter] for waiter in waiters if waiter in self._futures]
+        if futures:
+            await asyncio.wait(futures, timeout=timeout)
+        
+        unresolved = [waiter for waiter in waiters if not waiter.done.is_set()]
+        for waiter in unresolved:
+            self._discard(waiter)
+            self._futures.pop(waiter, None)
+        return unresolved
+    
+    def _wake(self, waiters: List[Any]) -> None:
+        """Complete the futures of resolved waiters"""
+        for waiter in waiters:
+            if waiter.done.is_set():
+                future = self._futures.pop(waiter, None)
+                if future is not None and not future.done():
+                    future.set_result(waiter)
+    
+    async def _run(self) -> None:
+        """Runner task: tick until nothing is pending"""
+        while self._pending:
+            now = time.monotonic()
+            self._tick.clear()
+            # Only keys with at least one due waiter are described
+            snapshot = {}
+            for group, keys in self._pending.items():
+                due = {
+                    key: list(waiters) for key, waiters in keys.items()
+                    if any(w.next_poll_at <= now for w in waiters)
+                }
+                if due:
+                    snapshot[group] = due
+            
+            await asyncio.gather(*(self._poll_group(group, keys) for group, keys in snapshot.items()))
+            
+            next_polls = [
+                waiter.next_poll_at
+                for keys in self._pending.values()
+                for waiters in keys.values()
+                for waiter in waiters
+            ]
+            if next_polls:
+                try:
+                    await asyncio.wait_for(self._tick.wait(), max(0.0, min(next_polls) - time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass
+
+
+class AsyncTaskPoller(AsyncPollingMixin, TaskPoller):
+    """TaskPoller driven by the event loop: one describe_tasks call per cluster and 100 ARNs per tick"""
+    
+    def __init__(
+        self,
+        ecs_client: AsyncECSClient,
+        poll_interval: Optional[float] = None,
+        scheduler: PollScheduler = DEFAULT_SCHEDULER
+    ):
+        """
+        Initialize async task poller
+        
+        Args:
+            ecs_client: Async ECS client
+            poll_interval: Default fixed time between polls (None = scheduler decides)
+            scheduler: Scheduler choosing adaptive poll intervals
+        """
+        super().__init__(ecs_client, poll_interval, scheduler)
+        self._init_async()
+    
+    async def wait_many(
+        self,
+        cluster: str,
+        task_arns: List[str],
+        timeout: float,
+        ready: Optional[Callable[[Dict], bool]] = None,
+        history_key: Optional[str] = None
+    ) -> List[TaskWaiter]:
+        """
+        Wait until every task is ready, stopped or missing, or the timeout expires
+        
+        Args:
+            cluster: ECS cluster name
+            task_arns: Task ARNs
+            timeout: Maximum time to wait in seconds (shared by all tasks)
+            ready: Predicate for RUNNING tasks (defaults to always ready)
+            history_key: Key for learned time-to-RUNNING (e.g. task definition)
+        
+        Returns:
+            Waiters in task_arns order; unresolved waiters (timeout) have
+            done unset, resolved ones hold task or error
+        """
+        waiters = [
+            TaskWaiter(cluster, task_arn, ready or (lambda task: True), self.poll_interval, history_key)
+            for task_arn in task_arns
+        ]
+        self._track(cluster, waiters)
+        await self._await(waiters, timeout)
+        return waiters
+    
+    async def _poll_group(self, cluster: str, tasks: Dict[str, List[TaskWaiter]]) -> None:
+        """Describe the due tasks of one cluster, 100 ARNs per concurrent call"""
+        task_arns = list(tasks.keys())
+        await asyncio.gather(*(
+            self._poll_chunk(cluster, tasks, task_arns[i:i + DESCRIBE_TASKS_MAX_ARNS])
+            for i in range(0, len(task_arns), DESCRIBE_TASKS_MAX_ARNS)
+        ))
+    
+    async def _poll_chunk(self, cluster: str, tasks: Dict[str, List[TaskWaiter]], chunk: List[str]) -> None:
+        try:
+            self.describe_calls += 1
+            response = await self.ecs_client.describe_tasks(cluster=cluster, tasks=chunk)
+        except Exception as e:
+            logger.error(f"Error describing {len(chunk)} tasks in cluster {cluster}: {str(e)}")
+            for task_arn in chunk:
+                self._resolve(cluster, task_arn, tasks[task_arn], error=e)
+        else:
+            self._apply_response(cluster, chunk, tasks, response)
+        
+        self._wake([waiter for task_arn in chunk for waiter in tasks[task_arn]])
+
+
+class AsyncHealthWatcher(AsyncPollingMixin, HealthWatcher):
+    """HealthWatcher driven by the event loop: one describe_target_health call per target group per tick"""
+    
+    def __init__(
+        self,
+        elbv2_client: AsyncELBv2Client,
+        poll_interval: Optional[float] = None,
+        scheduler: PollScheduler = DEFAULT_SCHEDULER
+    ):
+        """
+        Initialize async health watcher
+        
+        Args:
+            elbv2_client: Async ELBv2 client
+            poll_interval: Default fixed time between polls (None = scheduler decides)
+            scheduler: Scheduler choosing adaptive poll intervals
+        """
+        super().__init__(elbv2_client, poll_interval, scheduler)
+        self._init_async()
+    
+    async def wait_many(
+        self,
+        target_group_arn: str,
+        targets: List[Tuple[str, int]],
+        timeout: float
+    ) -> List[TargetWaiter]:
+        """
+        Wait until every target is healthy or unhealthy, or the timeout expires
+        
+        Args:
+            target_group_arn: ARN of the target group
+            targets: List of (private_ip, port) pairs
+            timeout: Maximum time to wait in seconds (shared by all targets)
+        
+        Returns:
+            Waiters in targets order; unresolved waiters (timeout) hold the
+            last observed state
+        """
+        waiters = [TargetWaiter(target_group_arn, ip, port, self.poll_interval) for ip, port in targets]
+        self._track(target_group_arn, waiters)
+        for waiter in await self._await(waiters, timeout):
+            self._record(waiter)
+        return waiters
+    
+    async def _poll_group(self, target_group_arn: str, targets: Dict[Tuple[str, int], List[TargetWaiter]]) -> None:
+        """Describe all due targets of one target group and resolve finished waiters"""
+        try:
+            self.describe_calls += 1
+            response = await self.elbv2_client.describe_target_health(
+                TargetGroupArn=target_group_arn,
+                Targets=[{'Id': ip, 'Port': port} for ip, port in targets]
+            )
+        except Exception as e:
+            # Transient errors keep the targets pending until their caller's timeout
+            logger.warning(f"Error checking health of {len(targets)} targets in {target_group_arn}: {str(e)}")
+            response = {}
+        
+        self._apply_response(targets, response)
+        self._wake([waiter for waiters in targets.values() for waiter in waiters])
+
+
+class AsyncECSHandler:
+    """Async counterpart of ECSHandler for launching, waiting on and stopping tasks"""
+    
+    def __init__(
+        self,
+        ecs_client: AsyncECSClient,
+        poll_interval: Optional[float] = None,
+        scheduler: PollScheduler = DEFAULT_SCHEDULER
+    ):
+        """
+        Initialize async ECS handler
+        
+        Args:
+            ecs_client: Async ECS client
+            poll_interval: Fixed time between task polls (None = scheduler decides)
+            scheduler: Scheduler choosing adaptive poll intervals
+        """
+        self.ecs_client = ecs_client
+        self.task_poller = AsyncTaskPoller(ecs_client, poll_interval, scheduler)
+    
+    async def launch_tasks(
+        self,
+        cluster: str,
+        task_definition: str,
+        subnets: Sequence[str],
+        security_groups: Sequence[str],
+        count: int = 1
+    ) -> List[str]:
+        """
+        Launch tasks without waiting for them (concurrent run_task calls of up to 10)
+        
+        Args:
+            cluster: ECS cluster name
+            task_definition: Task definition family:revision or ARN
+            subnets: List of subnet IDs
+            security_groups: List of security group IDs
+            count: Number of tasks to launch
+        
+        Returns:
+            ARNs of the launched tasks (may be fewer than count)
+        
+        Raises:
+            ECSTaskError: If no task could be launched
+        """
+        params = {
+            'cluster': cluster,
+            'taskDefinition': task_definition,
+            'launchType': LAUNCH_TYPE,
+            'networkConfiguration': {
+                'awsvpcConfiguration': {
+                    'subnets': list(subnets),
+                    'securityGroups': list(security_groups),
+                    'assignPublicIp': ASSIGN_PUBLIC_IP
+                }
+            }
+        }
+        
+        responses = await asyncio.gather(
+            *(
+                self.ecs_client.run_task(count=min(RUN_TASK_MAX_COUNT, count - i), **params)
+                for i in range(0, count, RUN_TASK_MAX_COUNT)
+            ),
+            return_exceptions=True
+        )
+        
+        task_arns: List[str] = []
+        failures: List[Any] = []
+        for response in responses:
+            if isinstance(response, BaseException):
+                logger.error(f"AWS API error starting tasks: {str(response)}")
+                failures.append(str(response))
+                continue
+            failures.extend(response.get('failures', []))
+            task_arns.extend(task['taskArn'] for task in response.get('tasks', []))
+        
+        if failures:
+            logger.error(f"Failed to start {count - len(task_arns)} of {count} tasks: {failures}")
+        
+        if not task_arns:
+            raise ECSTaskError(f"No tasks started. Failures: {failures}")
+        
+        return task_arns
+    
+    async def start_tasks(
+        self,
+        cluster: str,
+        task_definition: str,
+        subnets: Sequence[str],
+        security_groups: Sequence[str],
+        count: int = 1,
+        timeout: float = TASK_WAIT_TIMEOUT
+    ) -> List[Tuple[str, str]]:
+        """
+        Launch tasks and wait until they are RUNNING with a private IP
+        
+        Args:
+            cluster: ECS cluster name
+            task_definition: Task definition family:revision or ARN
+            subnets: List of subnet IDs
+            security_groups: List of security group IDs
+            count: Number of tasks to start
+            timeout: Maximum time to wait for RUNNING in seconds
+        
+        Returns:
+            List of (task_arn, private_ip_address) for tasks that reached RUNNING
+        
+        Raises:
+            ECSTaskError: If no task could be started or none reached RUNNING
+        """
+        task_arns = await self.launch_tasks(cluster, task_definition, subnets, security_groups, count)
+        
+        waiters = await self.task_poller.wait_many(
+            cluster,
+            task_arns,
+            timeout,
+            ready=lambda task: bool(extract_private_ip(task)),
+            history_key=task_definition
+        )
+        
+        running = []
+        for waiter in waiters:
+            task_id = waiter.task_arn.split('/')[-1]
+            if not waiter.done.is_set():
+                logger.error(f"Task {task_id} did not reach RUNNING state within {timeout}s")
+            elif waiter.error is not None:
+                logger.error(f"Error waiting for task {task_id}: {str(waiter.error)}")
+            elif waiter.task.get('lastStatus') == 'STOPPED':
+                logger.error(f"Task {task_id} stopped. Reason: {waiter.task.get('stoppedReason', 'Unknown')}")
+            else:
+                running.append((waiter.task_arn, extract_private_ip(waiter.task)))
+        
+        if not running:
+            raise ECSTaskError(f"None of the {len(task_arns)} started tasks reached RUNNING state")
+        
+        logger.info(f"{len(running)} of {count} tasks are RUNNING in cluster {cluster}")
+        return running
+    
+    async def list_running_tasks(self, cluster: str) -> List[str]:
+        """
+        List every running task ARN in a cluster, following nextToken pages
+        
+        Args:
+            cluster: ECS cluster name
+        
+        Returns:
+            List of task ARNs
+        """
+        task_arns: List[str] = []
+        params = {'cluster': cluster, 'desiredStatus': 'RUNNING'}
+        while True:
+            page = await self.ecs_client.list_tasks(**params)
+            task_arns.extend(page.get('taskArns', []))
+            if not page.get('nextToken'):
+                return task_arns
+            params['nextToken'] = page['nextToken']
+    
+    async def describe_tasks(self, cluster: str, task_arns: List[str]) -> List[Dict]:
+        """
+        Describe tasks with concurrent calls of up to 100 ARNs
+        
+        Args:
+            cluster: ECS cluster name
+            task_arns: Task ARNs to describe
+        
+        Returns:
+            List of task descriptions
+        """
+        responses = await asyncio.gather(*(
+            self.ecs_client.describe_tasks(cluster=cluster, tasks=task_arns[i:i + DESCRIBE_TASKS_MAX_ARNS])
+            for i in range(0, len(task_arns), DESCRIBE_TASKS_MAX_ARNS)
+        ))
+        return [task for response in responses for task in response.get('tasks', [])]
+    
+    async def stop_tasks(
+        self,
+        cluster: str,
+        task_arns: List[str],
+        reason: str = 'Stopped by async engine',
+        concurrency: int = STOP_TASK_CONCURRENCY
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Stop tasks with at most `concurrency` stop_task calls in flight
+        
+        Args:
+            cluster: ECS cluster name
+            task_arns: Task ARNs to stop
+            reason: Stop reason recorded by ECS
+            concurrency: Maximum concurrent stop_task calls
+        
+        Returns:
+            Tuple of (stopped task IDs, task ARNs that failed to stop)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def stop_one(task_arn: str) -> bool:
+            async with semaphore:
+                try:
+                    await self.ecs_client.stop_task(cluster=cluster, task=task_arn, reason=reason)
+                    logger.info(f"Stopped task: {task_arn.split('/')[-1]}")
+                    return True
+                except ClientError as e:
+                    logger.error(f"Error stopping task {task_arn}: {str(e)}")
+                    return False
+        
+        outcomes = await asyncio.gather(*(stop_one(task_arn) for task_arn in task_arns))
+        stopped = [arn.split('/')[-1] for arn, ok in zip(task_arns, outcomes) if ok]
+        failed = [arn for arn, ok in zip(task_arns, outcomes) if not ok]
+        return stopped, failed
+
+
+class AsyncTargetGroupHandler:
+    """Async counterpart of TargetGroupHandler for batched registration and health waits"""
+    
+    def __init__(
+        self,
+        elbv2_client: AsyncELBv2Client,
+        poll_interval: Optional[float] = None,
+        scheduler: PollScheduler = DEFAULT_SCHEDULER
+    ):
+        """
+        Initialize async target group handler
+        
+        Args:
+            elbv2_client: Async ELBv2 client
+            poll_interval: Fixed time between health polls (None = scheduler decides)
+            scheduler: Scheduler choosing adaptive poll intervals
+        """
+        self.elbv2_client = elbv2_client
+        self.health_watcher = AsyncHealthWatcher(elbv2_client, poll_interval, scheduler)
+    
+    async def register_targets(self, target_group_arn: str, targets: List[Tuple[str, int]]) -> None:
+        """
+        Register several targets with a target group in a single call
+        
+        Raises:
+            TargetGroupError: If registration fails
+        """
+        logger.info(f"Registering {len(targets)} targets with target group {target_group_arn}")
+        try:
+            await self.elbv2_client.register_targets(
+                TargetGroupArn=target_group_arn,
+                Targets=[{'Id': ip, 'Port': port} for ip, port in targets]
+            )
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            raise TargetGroupError(
+                f"Failed to register targets: {error.get('Code', '')} - {error.get('Message', '')}"
+            ) from e
+    
+    async def deregister_targets(self, target_group_arn: str, targets: List[Tuple[str, int]]) -> None:
+        """
+        Deregister several targets from a target group in a single call
+        
+        Raises:
+            TargetGroupError: If deregistration fails
+        """
+        logger.info(f"Deregistering {len(targets)} targets from target group {target_group_arn}")
+        try:
+            await self.elbv2_client.deregister_targets(
+                TargetGroupArn=target_group_arn,
+                Targets=[{'Id': ip, 'Port': port} for ip, port in targets]
+            )
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            raise TargetGroupError(
+                f"Failed to deregister targets: {error.get('Code', '')} - {error.get('Message', '')}"
+            ) from e
+    
+    async def get_targets_health(self, target_group_arn: str, targets: List[Tuple[str, int]]) -> List[dict]:
+        """
+        Get the current health of several targets with one describe_target_health call
+        
+        Returns:
+            Target health dictionaries in targets order ('unknown' if not reported or on error)
+        """
+        waiters = [TargetWaiter(target_group_arn, ip, port) for ip, port in targets]
+        await self.health_watcher._poll_group(
+            target_group_arn,
+            {waiter.target: [waiter] for waiter in waiters}
+        )
+        return [waiter.health for waiter in waiters]
+    
+    async def wait_for_targets_healthy(
+        self,
+        target_group_arn: str,
+        targets: List[Tuple[str, int]],
+        timeout: float = HEALTH_CHECK_TIMEOUT
+    ) -> List[dict]:
+        """
+        Wait for several targets to pass (or fail) their health checks
+        
+        Returns:
+            Final target health dictionaries, in targets order (the last
+            observed state for targets still initializing at the timeout)
+        """
+        waiters = await self.health_watcher.wait_many(target_group_arn, targets, timeout)
+        for waiter in waiters:
+            if waiter.state not in ('healthy', 'unhealthy'):
+                ip, port = waiter.target
+                logger.warning(f"Timeout waiting for target {ip}:{port} to become healthy after {timeout}s")
+        return [waiter.health for waiter in waiters]
+
+
+async def gather_target_groups(
+    func: Callable[[str, int], Awaitable[T]],
+    target_groups: List[Tuple[str, int]]
+) -> List[T]:
+    """Async map_target_groups: run func(arn, port) for every target group concurrently, in order"""
+    return list(await asyncio.gather(*(func(arn, port) for arn, port in target_groups)))
+
+
+async def start_service(
+    request: Dict[str, Any],
+    ecs_handler: AsyncECSHandler,
+    tg_handler: AsyncTargetGroupHandler
+) -> Dict[str, Any]:
+    """
+    Start count tasks of one service and register them with all its target groups
+    
+    Args:
+        request: Resolved start parameters from resolve_start_request
+        ecs_handler: Async ECS handler
+        tg_handler: Async target group handler
+    
+    Returns:
+        Response body in the format of lambda_function.start_service_replicas
+    
+    Raises:
+        ECSTaskError: If no container port is configured or no task reaches RUNNING
+        TargetGroupError: If target registration fails
+    """
+    service_name = request['service']
+    container_port = request['container_port']
+    if container_port is None:
+        raise ECSTaskError(f"No container port configured for service {service_name}")
+    
+    target_groups = get_target_groups(request)
+    count = request['count']
+    
+    logger.info(f"[{service_name}] Starting {count} tasks in cluster {request['cluster']}")
+    started = await ecs_handler.start_tasks(
+        cluster=request['cluster'],
+        task_definition=launch_task_definition(request),
+        subnets=request['subnets'],
+        security_groups=request['security_groups'],
+        count=count
+    )
+    private_ips = [private_ip for _, private_ip in started]
+    
+    await gather_target_groups(
+        lambda arn, port: tg_handler.register_targets(arn, [(ip, port) for ip in private_ips]),
+        target_groups
+    )
+    
+    if request['wait_for_healthy']:
+        group_statuses = await gather_target_groups(
+            lambda arn, port: tg_handler.wait_for_targets_healthy(arn, [(ip, port) for ip in private_ips]),
+            target_groups
+        )
+    else:
+        group_statuses = await gather_target_groups(
+            lambda arn, port: tg_handler.get_targets_health(arn, [(ip, port) for ip in private_ips]),
+            target_groups
+        )
+    
+    tasks = [
+        {
+            'taskArn': task_arn,
+            'taskId': task_arn.split('/')[-1],
+            'privateIp': private_ip,
+            'healthStatus': health_status,
+            'polls': pop_poll_stats(task_arn, private_ip, container_port)
+        }
+        for (task_arn, private_ip), health_status in zip(started, group_statuses[0])
+    ]
+    
+    body = {
+        'message': f'Successfully started and registered {len(started)} of {count} {service_name} tasks',
+        'service': service_name,
+        'taskArn': tasks[0]['taskArn'],
+        'taskId': tasks[0]['taskId'],
+        'privateIp': tasks[0]['privateIp'],
+        'port': container_port,
+        'targetGroupArn': request['target_group_arn'],
+        'healthStatus': tasks[0]['healthStatus'],
+        'source': 'run_task',
+        'desiredCount': count,
+        'runningCount': len(tasks),
+        'tasks': tasks
+    }
+    
+    if len(target_groups) > 1:
+        body['targetGroups'] = [
+            {'targetGroupArn': arn, 'port': port, 'healthStatuses': statuses}
+            for (arn, port), statuses in zip(target_groups, group_statuses)
+        ]
+    
+    return body
+
+
+async def start_services(
+    requests: List[Dict[str, Any]],
+    ecs_handler: AsyncECSHandler,
+    tg_handler: AsyncTargetGroupHandler
+) -> List[Dict[str, Any]]:
+    """
+    Start every requested service concurrently on the running loop
+    
+    Args:
+        requests: Resolved start parameters, one per service
+        ecs_handler: Async ECS handler
+        tg_handler: Async target group handler
+    
+    Returns:
+        One result per request, in request order, with status success or error
+    """
+    outcomes = await asyncio.gather(
+        *(start_service(request, ecs_handler, tg_handler) for request in requests),
+        return_exceptions=True
+    )
+    
+    results = []
+    for request, outcome in zip(requests, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error starting service {request['service']}: {str(outcome)}")
+            results.append({'service': request['service'], 'status': 'error', 'error': str(outcome)})
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            outcome['status'] = 'success'
+            results.append(outcome)
+    return results
+
+
+async def stop_cluster(
+    ecs_handler: AsyncECSHandler,
+    tg_handler: AsyncTargetGroupHandler,
+    cluster: str,
+    services: List[Tuple[str, Dict]],
+    deregister_targets: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Deregister and stop every running task of one cluster
+    
+    Args:
+        ecs_handler: Async ECS handler
+        tg_handler: Async target group handler
+        cluster: ECS cluster name
+        services: (service_name, config) pairs that use this cluster
+        deregister_targets: Whether to deregister task IPs from target groups
+    
+    Returns:
+        One result dictionary per service, in the format of stop_engines_lambda
+    """
+    task_arns = await ecs_handler.list_running_tasks(cluster)
+    if not task_arns:
+        return [
+            {'service': service_name, 'cluster': cluster, 'tasks_stopped': 0, 'status': 'no_tasks'}
+            for service_name, _ in services
+        ]
+    
+    logger.info(f"Found {len(task_arns)} running tasks in cluster {cluster}")
+    
+    task_ips: List[str] = []
+    if deregister_targets:
+        task_ips = [ip for ip in map(extract_private_ip, await ecs_handler.describe_tasks(cluster, task_arns)) if ip]
+    
+    async def deregister(target_group_arn: str, port: int) -> int:
+        try:
+            await tg_handler.deregister_targets(target_group_arn, [(ip, port) for ip in task_ips])
+            return len(task_ips)
+        except TargetGroupError as e:
+            logger.warning(f"Error deregistering targets from {target_group_arn}: {str(e)}")
+            return 0
+    
+    async def deregister_service(service_name: str, config: Dict) -> int:
+        if not task_ips:
+            return 0
+        if config.get('container_port') is None:
+            logger.warning(f"Not deregistering {service_name}: no container port configured")
+            return 0
+        return sum(await gather_target_groups(deregister, get_target_groups(config)))
+    
+    deregistered, (stopped, failed) = await asyncio.gather(
+        asyncio.gather(*(deregister_service(name, config) for name, config in services)),
+        ecs_handler.stop_tasks(cluster, task_arns)
+    )
+    if failed:
+        logger.error(f"{len(failed)} tasks in cluster {cluster} could not be stopped")
+    
+    # Tasks are attributed to the first service of a shared cluster
+    return [
+        {
+            'service': service_name,
+            'cluster': cluster,
+            'tasks_stopped': len(stopped) if index == 0 else 0,
+            'targets_deregistered': count,
+            'task_ids': stopped if index == 0 else [],
+            'status': 'success'
+        }
+        for index, ((service_name, _), count) in enumerate(zip(services, deregistered))
+    ]
+
+
+async def stop_services(
+    service_names: List[str],
+    ecs_handler: AsyncECSHandler,
+    tg_handler: AsyncTargetGroupHandler,
+    deregister_targets: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Stop the tasks of every service, all clusters concurrently on the running loop
+    
+    Args:
+        service_names: Services to stop
+        ecs_handler: Async ECS handler
+        tg_handler: Async target group handler
+        deregister_targets: Whether to deregister task IPs from target groups
+    
+    Returns:
+        One result per service, in request order
+    """
+    results: List[Dict[str, Any]] = []
+    clusters: Dict[str, List[Tuple[str, Dict]]] = {}
+    for service_name in service_names:
+        try:
+            config = get_service_config(service_name)
+        except ValueError as e:
+            results.append({'service': service_name, 'status': 'skipped', 'reason': str(e)})
+            continue
+        clusters.setdefault(config['cluster'], []).append((service_name, config))
+    
+    outcomes = await asyncio.gather(
+        *(
+            stop_cluster(ecs_handler, tg_handler, cluster, services, deregister_targets)
+            for cluster, services in clusters.items()
+        ),
+        return_exceptions=True
+    )
+    
+    for services, outcome in zip(clusters.values(), outcomes):
+        if isinstance(outcome, Exception):
+            for service_name, _ in services:
+                logger.error(f"Error processing service {service_name}: {str(outcome)}")
+                results.append({'service': service_name, 'status': 'error', 'error': str(outcome)})
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results.extend(outcome)
+    
+    order = list(service_names)
+    results.sort(key=lambda r: order.index(r['service']) if r['service'] in order else len(order))
+    return results
+
+
+async def run_with_clients(
+    func: Callable[[AsyncECSHandler, AsyncTargetGroupHandler], Awaitable[T]]
+) -> T:
+    """
+    Run func with handlers over the pooled boto3 clients
+    
+    Calls run on an executor sized like the client connection pool, so the
+    loop never has more calls in flight than the pool has connections.
+    """
+    with ThreadPoolExecutor(max_workers=BOTO_MAX_POOL_CONNECTIONS) as executor:
+        ecs_handler = AsyncECSHandler(ThreadedClient(get_client('ecs', AWS_REGION), executor))
+        tg_handler = AsyncTargetGroupHandler(ThreadedClient(get_client('elbv2', AWS_REGION), executor))
+        return await func(ecs_handler, tg_handler)
+
+
+def start_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler starting services on one event loop
+    
+    Event format (same entries as the start Lambda's "services" list mode):
+    {
+        "detail": {
+            "services": ["auth", {"service": "fa", "count": 20}],
+            "waitForHealthy": false
+        }
+    }
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
+    
+    detail = event.get('detail', {})
+    entries = detail.get('services') or []
+    if not isinstance(entries, list) or not entries:
+        return {'statusCode': 400, 'body': {'error': "Field 'services' must be a non-empty list"}}
+    
+    results: List[Dict[str, Any]] = []
+    requests: List[Dict[str, Any]] = []
+    seen: Dict[str, None] = {}
+    for entry in entries:
+        entry_detail = {'waitForHealthy': detail.get('waitForHealthy', False)}
+        entry_detail.update(entry if isinstance(entry, dict) else {'service': entry})
+        service_name = str(entry_detail.get('service', '')).lower()
+        if service_name in seen:
+            logger.warning(f"Ignoring duplicate entry for service '{service_name}'")
+            continue
+        seen[service_name] = None
+        try:
+            if not service_name:
+                raise ValueError("Missing required field: 'service'")
+            requests.append(resolve_start_request(service_name, entry_detail))
+        except ValueError as e:
+            results.append({'service': service_name, 'status': 'error', 'error': str(e)})
+    
+    if requests:
+        try:
+            results.extend(asyncio.run(run_with_clients(
+                lambda ecs_handler, tg_handler: start_services(requests, ecs_handler, tg_handler)
+            )))
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+            return {'statusCode': 500, 'body': {'error': f"Unexpected error: {str(e)}"}}
+    
+    # Keep results in request order
+    order = list(seen)
+    results.sort(key=lambda r: order.index(r['service']))
+    
+    succeeded = sum(1 for r in results if r['status'] == 'success')
+    response = {
+        'statusCode': 200 if succeeded == len(results) else 207,
+        'body': {
+            'message': f'Started {succeeded} of {len(results)} services',
+            'services_requested': len(results),
+            'services_started': succeeded,
+            'results': results
+        }
+    }
+    logger.info(f"Completed: {json.dumps(response)}")
+    return response
+
+
+def stop_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler stopping services on one event loop
+    
+    Event format (same as stop_engines_lambda without drain):
+    {
+        "detail": {
+            "services": ["auth", "pdf"],   # Optional: default all
+            "deregister_targets": true
+        }
+    }
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
+    
+    detail = event.get('detail', {})
+    service_names = detail.get('services') or get_all_service_names()
+    deregister_targets = detail.get('deregister_targets', True)
+    
+    try:
+        results = asyncio.run(run_with_clients(
+            lambda ecs_handler, tg_handler: stop_services(service_names, ecs_handler, tg_handler, deregister_targets)
+        ))
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+        return {'statusCode': 500, 'body': {'error': f"Unexpected error: {str(e)}"}}
+    
+    total_stopped = sum(r.get('tasks_stopped', 0) for r in results)
+    response = {
+        'statusCode': 200,
+        'body': {
+            'message': f'Successfully stopped {total_stopped} tasks across {len(service_names)} services',
+            'total_tasks_stopped': total_stopped,
+            'services_processed': len(service_names),
+            'results': results
+        }
+    }
+    logger.info(f"Completed: {json.dumps(response)}")
+    return response
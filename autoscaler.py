@@ -0,0 +1,487 @@
+"""
+Replica Autoscaler
+Sizes the standalone (run_task) tasks of each service to its target group load
+
+The engines are not ECS services, so nothing else scales them. On a schedule
+(or on demand) the autoscaler reads the last AUTOSCALE_WINDOW_MINUTES of
+RequestCount and TargetResponseTime for every target group in one metrics
+call, computes each service's desired replica count and then, per service
+and concurrently:
+
+  1. Adds replicas through the start path (batched run_task plus one
+     register_targets call per target group), or
+  2. Removes the newest replicas: deregisters them, waits for the drain and
+     stops them.
+
+Counts stay within the service's min_tasks/max_tasks (services with max_tasks
+0 are not autoscaled). After a task is added no more are added for
+scale_out_cooldown seconds and none are removed for scale_in_cooldown seconds;
+the scale-in cooldown also runs from the last scale-in of this container.
+
+The autoscaler never starts a stopped service or stops its last task: the
+front door (front_door.py) and the idle reaper (stop_engines_lambda.py) own
+scaling from and to zero.
+
+Usage (CLI):
+    python autoscaler.py                      # autoscale every service
+    python autoscaler.py --services pdf batch
+    python autoscaler.py --dry-run            # only print the decisions
+"""
+import argparse
+import json
+import logging
+import math
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from config import (
+    AUTOSCALE_WINDOW_MINUTES,
+    AWS_REGION,
+    LOG_LEVEL,
+    MAX_TASKS_PER_START,
+    STOP_TASK_CONCURRENCY,
+    get_all_service_names,
+    get_service_config,
+    get_target_groups,
+)
+from ecs_handler import ECSHandler
+from lambda_function import resolve_start_request, start_service
+from metrics_source import get_metrics_source, series_average, series_sum
+from resolution_cache import ResolutionError, with_container_port
+from stop_engines_lambda import (
+    deregister_service_targets,
+    describe_tasks,
+    drain_wait_budget,
+    extract_private_ip,
+    list_running_tasks,
+    stop_tasks,
+    wait_for_service_drained,
+)
+from target_group_handler import TargetGroupHandler
+from throttling import DEFAULT_THROTTLE
+from warm_pool import is_warm
+
+logger = logging.getLogger()
+logger.setLevel(getattr(logging, LOG_LEVEL))
+
+# Target group metrics the desired count is computed from
+LOAD_METRIC = 'RequestCount'
+LATENCY_METRIC = 'TargetResponseTime'
+
+# Task states that still count as capacity (a stopping task does not)
+ACTIVE_STATES = ('PROVISIONING', 'PENDING', 'ACTIVATING', 'RUNNING')
+
+# Last scale-in per service in this container
+_scale_ins: Dict[str, datetime] = {}
+_scale_ins_lock = threading.Lock()
+
+
+def desired_count(
+    config: Dict[str, Any],
+    current: int,
+    request_rate: float,
+    response_ms: Optional[float]
+) -> int:
+    """
+    Compute the replica count a service should run
+    
+    The count carries request_rate at target_requests_per_task per task. When
+    the response time is above target_response_ms, the current count is also
+    grown in proportion to the overshoot. The result stays between
+    max(min_tasks, 1) and max_tasks.
+    
+    Args:
+        config: Service configuration
+        current: Replicas running or starting now
+        request_rate: Requests per minute across the service's target groups
+        response_ms: Slowest average target response time (None without traffic)
+    
+    Returns:
+        Desired replica count
+    """
+    lower = max(config.get('min_tasks', 0), 1)
+    upper = max(config.get('max_tasks', 0), lower)
+    
+    desired = math.ceil(request_rate / max(config.get('target_requests_per_task', 0), 1))
+    target_ms = config.get('target_response_ms', 0)
+    if response_ms is not None and target_ms > 0 and response_ms > target_ms:
+        desired = max(desired, math.ceil(current * response_ms / target_ms))
+    
+    return min(max(desired, lower), upper)
+
+
+def read_load(
+    series: Dict[Tuple[str, str], List[Tuple[datetime, float]]],
+    config: Dict[str, Any],
+    window_minutes: int
+) -> Tuple[float, Optional[float]]:
+    """
+    Get the load of a service from its target group series
+    
+    Args:
+        series: Series from metrics_source get_series
+        config: Service configuration with container_port
+        window_minutes: Minutes the series cover
+    
+    Returns:
+        Tuple of (requests per minute summed over target groups, slowest
+        average response time in ms or None)
+    """
+    arns = [arn for arn, _ in get_target_groups(config)]
+    requests = sum(series_sum(series.get((arn, LOAD_METRIC), [])) for arn in arns)
+    averages = [
+        average for average in (series_average(series.get((arn, LATENCY_METRIC), [])) for arn in arns)
+        if average is not None
+    ]
+    return requests / max(window_minutes, 1), max(averages) * 1000 if averages else None
+
+
+def cooldown_left(
+    service_name: str,
+    config: Dict[str, Any],
+    tasks: List[Dict],
+    scale_out: bool,
+    now: datetime
+) -> float:
+    """
+    Get the seconds left before a service may scale in the given direction
+    
+    Args:
+        service_name: Service name
+        config: Service configuration
+        tasks: Active tasks of the service
+        scale_out: Whether the change adds replicas
+        now: Current time
+    
+    Returns:
+        Seconds of cooldown left (0 when the change may go ahead)
+    """
+    changes = [task['createdAt'] for task in tasks if task.get('createdAt') is not None]
+    if not scale_out:
+        with _scale_ins_lock:
+            if service_name in _scale_ins:
+                changes.append(_scale_ins[service_name])
+    if not changes:
+        return 0.0
+    
+    cooldown = config.get('scale_out_cooldown' if scale_out else 'scale_in_cooldown', 0)
+    return max(0.0, cooldown - (now - max(changes)).total_seconds())
+
+
+def autoscale(
+    service_names: Optional[List[str]] = None,
+    dry_run: bool = False,
+    ecs_handler: Optional[ECSHandler] = None,
+    tg_handler: Optional[TargetGroupHandler] = None,
+    metrics_source: Optional[Any] = None,
+    drain_deadline: Optional[float] = None,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Scale each service to its desired replica count
+    
+    Args:
+        service_names: Services to autoscale (default: all configured services)
+        dry_run: Only report the decisions
+        ecs_handler: ECS handler (defaults to a new one)
+        tg_handler: Target group handler (defaults to a new one)
+        metrics_source: Source of target group metrics (default: METRICS_SOURCE)
+        drain_deadline: time.monotonic() deadline for drain waits (default:
+            DRAIN_MAX_WAIT from now)
+        now: Current time (defaults to now)
+    
+    Returns:
+        One result per service, in request order
+    
+    Raises:
+        ClientError: If the metrics cannot be read
+    """
+    ecs_handler = ecs_handler or ECSHandler(region=AWS_REGION)
+    tg_handler = tg_handler or TargetGroupHandler(region=AWS_REGION)
+    metrics_source = metrics_source or get_metrics_source()
+    drain_deadline = drain_deadline if drain_deadline is not None else time.monotonic() + drain_wait_budget(None)
+    now = now or datetime.now(timezone.utc)
+    service_names = [name.lower() for name in (service_names or get_all_service_names())]
+    
+    results: Dict[str, Dict[str, Any]] = {}
+    enabled: Dict[str, Dict[str, Any]] = {}
+    for name in service_names:
+        try:
+            config = get_service_config(name)
+        except ValueError as e:
+            results[name] = {'service': name, 'action': 'skipped', 'reason': str(e)}
+            continue
+        
+        if config.get('max_tasks', 0) <= 0:
+            results[name] = {'service': name, 'action': 'disabled', 'reason': 'max_tasks is 0'}
+            continue
+        
+        try:
+            enabled[name] = dict(with_container_port(config, ecs_handler.ecs_client))
+        except (ResolutionError, ClientError) as e:
+            logger.error(f"[{name}] Error resolving container port: {str(e)}")
+            results[name] = {'service': name, 'action': 'error', 'error': str(e)}
+    
+    if enabled:
+        # One metrics read for every target group of every service
+        target_group_arns = [arn for config in enabled.values() for arn, _ in get_target_groups(config)]
+        series = metrics_source.get_series(
+            target_group_arns,
+            [LOAD_METRIC, LATENCY_METRIC],
+            now - timedelta(minutes=AUTOSCALE_WINDOW_MINUTES),
+            now
+        )
+        
+        with ThreadPoolExecutor(max_workers=STOP_TASK_CONCURRENCY) as stop_pool, \
+                ThreadPoolExecutor(max_workers=len(enabled)) as service_pool:
+            futures = {
+                name: service_pool.submit(
+                    scale_service,
+                    name,
+                    config,
+                    *read_load(series, config, AUTOSCALE_WINDOW_MINUTES),
+                    ecs_handler,
+                    tg_handler,
+                    stop_pool,
+                    drain_deadline,
+                    now,
+                    dry_run
+                )
+                for name, config in enabled.items()
+            }
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error(f"[{name}] Error autoscaling: {str(e)}")
+                    results[name] = {'service': name, 'action': 'error', 'error': str(e)}
+    
+    return [results[name] for name in service_names]
+
+
+def scale_service(
+    service_name: str,
+    config: Dict[str, Any],
+    request_rate: float,
+    response_ms: Optional[float],
+    ecs_handler: ECSHandler,
+    tg_handler: TargetGroupHandler,
+    stop_pool: ThreadPoolExecutor,
+    drain_deadline: float,
+    now: datetime,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Decide and apply the replica change of one service
+    
+    Args:
+        service_name: Service name
+        config: Service configuration with container_port
+        request_rate: Requests per minute across the service's target groups
+        response_ms: Slowest average target response time (None without traffic)
+        ecs_handler: ECS handler used to list, start and stop tasks
+        tg_handler: Target group handler used to register and drain targets
+        stop_pool: Shared worker pool for stop_task calls
+        drain_deadline: time.monotonic() deadline for drain waits
+        now: Current time
+        dry_run: Only report the decision
+    
+    Returns:
+        Result dictionary of the service
+    
+    Raises:
+        ECSTaskError: If replicas fail to start
+        TargetGroupError: If new replicas cannot be registered
+        ClientError: If the tasks cannot be listed
+    """
+    ecs_client = ecs_handler.ecs_client
+    cluster = config['cluster']
+    family = config['task_definition'].split('/')[-1].split(':')[0]
+    tasks = [
+        task for task in describe_tasks(ecs_client, cluster, list_running_tasks(ecs_client, cluster, family), include=['TAGS'])
+        if not is_warm(task) and task.get('lastStatus') in ACTIVE_STATES
+    ]
+    
+    current = len(tasks)
+    result = {
+        'service': service_name,
+        'cluster': cluster,
+        'current': current,
+        'requestRate': round(request_rate, 2),
+        'responseTimeMs': round(response_ms, 1) if response_ms is not None else None,
+    }
+    if not current:
+        return {**result, 'desired': 0, 'action': 'skipped', 'reason': 'No tasks running (started on demand)'}
+    
+    desired = desired_count(config, current, request_rate, response_ms)
+    result['desired'] = desired
+    if desired == current:
+        return {**result, 'action': 'none'}
+    
+    scale_out = desired > current
+    wait = cooldown_left(service_name, config, tasks, scale_out, now)
+    if wait > 0:
+        logger.info(f"[{service_name}] Holding at {current} replicas (wants {desired}) for {wait:.0f}s cooldown")
+        return {**result, 'action': 'cooldown', 'cooldownSeconds': round(wait)}
+    
+    logger.info(
+        f"[{service_name}] Scaling from {current} to {desired} replicas "
+        f"({request_rate:.1f} requests/min, response time {result['responseTimeMs']} ms)"
+    )
+    if scale_out:
+        result['action'] = 'scale_out'
+        if not dry_run:
+            result['tasksStarted'] = add_replicas(service_name, min(desired - current, MAX_TASKS_PER_START), ecs_handler, tg_handler)
+        return result
+    
+    result['action'] = 'scale_in'
+    if not dry_run:
+        result.update(remove_replicas(service_name, config, tasks, current - desired, tg_handler, ecs_client, stop_pool, drain_deadline))
+        with _scale_ins_lock:
+            _scale_ins[service_name] = now
+    return result
+
+
+def add_replicas(
+    service_name: str,
+    count: int,
+    ecs_handler: ECSHandler,
+    tg_handler: TargetGroupHandler
+) -> int:
+    """
+    Start and register new replicas of a service through the start path
+    
+    Args:
+        service_name: Service name
+        count: Replicas to add (at most MAX_TASKS_PER_START)
+        ecs_handler: ECS handler used to start the tasks
+        tg_handler: Target group handler used to register the tasks
+    
+    Returns:
+        Number of replicas started
+    
+    Raises:
+        ValueError: If the service has no networking configured
+        ECSTaskError: If no replica reaches RUNNING
+        TargetGroupError: If target registration fails
+    """
+    # Scaled replicas are always new tasks: never reuse serving ones or claim warm ones
+    request = resolve_start_request(service_name, {'desiredCount': count, 'reuseRunning': False, 'useWarmPool': False})
+    body = start_service(request, ecs_handler, tg_handler)
+    return body.get('runningCount', 1)
+
+
+def remove_replicas(
+    service_name: str,
+    config: Dict[str, Any],
+    tasks: List[Dict],
+    count: int,
+    tg_handler: TargetGroupHandler,
+    ecs_client: Any,
+    stop_pool: ThreadPoolExecutor,
+    drain_deadline: float
+) -> Dict[str, Any]:
+    """
+    Drain and stop the newest running replicas of a service
+    
+    Older replicas keep serving; replicas still starting are left alone.
+    
+    Args:
+        service_name: Service name
+        config: Service configuration with container_port
+        tasks: Active tasks of the service
+        count: Replicas to remove
+        tg_handler: Target group handler used for deregistration and drains
+        ecs_client: boto3 ECS client
+        stop_pool: Shared worker pool for stop_task calls
+        drain_deadline: time.monotonic() deadline for drain waits
+    
+    Returns:
+        Result fields with tasksStopped, taskIds and drained
+    """
+    running = sorted(
+        (task for task in tasks if task.get('lastStatus') == 'RUNNING' and extract_private_ip(task)),
+        key=lambda task: task.get('createdAt') or datetime.min.replace(tzinfo=timezone.utc),
+        reverse=True
+    )
+    victims = running[:count]
+    task_ips = [extract_private_ip(task) for task in victims]
+    
+    drained = False
+    if task_ips and deregister_service_targets(tg_handler, config, task_ips):
+        drained = wait_for_service_drained(tg_handler, config, task_ips, drain_deadline)
+    
+    stopped, failed = stop_tasks(ecs_client, config['cluster'], [task['taskArn'] for task in victims], stop_pool)
+    if failed:
+        logger.error(f"[{service_name}] {len(failed)} replicas could not be stopped")
+    
+    return {'tasksStopped': len(stopped), 'taskIds': stopped, 'drained': drained}
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Scheduled (or on-demand) autoscaling handler
+    
+    Event format:
+    {
+        "detail": {
+            "services": ["pdf", "batch"],  # Optional: default all services
+            "dryRun": false                # Optional: only report the decisions
+        }
+    }
+    
+    Args:
+        event: EventBridge event
+        context: Lambda context
+    
+    Returns:
+        Response with one result per service
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
+    
+    detail = event.get('detail') or {}
+    dry_run = bool(detail.get('dryRun', False))
+    try:
+        results = autoscale(
+            detail.get('services'),
+            dry_run=dry_run,
+            drain_deadline=time.monotonic() + drain_wait_budget(context)
+        )
+    except ClientError as e:
+        logger.error(f"Error reading metrics: {str(e)}")
+        return {'statusCode': 500, 'body': {'error': f"Error reading metrics: {str(e)}"}}
+    
+    failed = sum(1 for r in results if r['action'] == 'error')
+    changed = sum(1 for r in results if r['action'] in ('scale_out', 'scale_in'))
+    
+    return {
+        'statusCode': 200 if not failed else 207,
+        'body': {
+            'message': f"{'Would scale' if dry_run else 'Scaled'} {changed} of {len(results)} services",
+            'dryRun': dry_run,
+            'results': results
+        }
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Scale engine replicas to target group load')
+    parser.add_argument('--services', nargs='*', help='Services to autoscale (default: all)')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the decisions')
+    args = parser.parse_args(argv)
+    
+    results = autoscale(args.services, dry_run=args.dry_run)
+    print(json.dumps(results, indent=2, default=str))
+    return 1 if any(r['action'] == 'error' for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
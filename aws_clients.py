@@ -0,0 +1,113 @@
+"""
+Shared AWS Client Pool
+Creates boto3 clients once per container, keyed by service and region, so warm
+Lambda invocations reuse clients and their open HTTPS connections
+
+boto3 is imported on first client creation rather than at module import: it is
+the largest part of cold-start init, and requests that fail validation or only
+need some services should not pay for it. Set PRELOAD_CLIENTS to move client
+creation back into the init phase (useful with provisioned concurrency).
+
+Every client is registered with the throttling layer (throttling.py), which
+paces and retries its calls unless THROTTLE_ENABLED is false.
+"""
+import logging
+import threading
+from typing import Any, Dict, List, Tuple
+
+from config import (
+    AWS_REGION,
+    BOTO_MAX_POOL_CONNECTIONS,
+    BOTO_MAX_ATTEMPTS,
+    BOTO_RETRY_MODE,
+    BOTO_CONNECT_TIMEOUT,
+    BOTO_READ_TIMEOUT,
+    THROTTLE_ENABLED,
+)
+from throttling import DEFAULT_THROTTLE
+from timing import count_api_call
+
+logger = logging.getLogger()
+
+_clients: Dict[Tuple[str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def client_config() -> Any:
+    """
+    Build the botocore configuration shared by all pooled clients
+    
+    max_pool_connections is sized for the concurrent fan-out (multi-service
+    starts, parallel stops) so threads do not queue for a connection. With
+    THROTTLE_ENABLED, botocore makes a single attempt and the throttling
+    layer decides on retries.
+    
+    Returns:
+        botocore Config
+    """
+    from botocore.config import Config
+    
+    return Config(
+        max_pool_connections=BOTO_MAX_POOL_CONNECTIONS,
+        retries={
+            'total_max_attempts': 1,
+            'mode': BOTO_RETRY_MODE
+        } if THROTTLE_ENABLED else {
+            'max_attempts': BOTO_MAX_ATTEMPTS,
+            'mode': BOTO_RETRY_MODE
+        },
+        connect_timeout=BOTO_CONNECT_TIMEOUT,
+        read_timeout=BOTO_READ_TIMEOUT
+    )
+
+
+def get_client(service_name: str, region: str = AWS_REGION) -> Any:
+    """
+    Get the pooled boto3 client for a service and region, creating it on first use
+    
+    boto3 clients are thread-safe, so one client per (service, region) is
+    shared by every handler and worker thread in the container.
+    
+    Args:
+        service_name: AWS service name (ecs, elbv2, ec2, ...)
+        region: AWS region
+    
+    Returns:
+        boto3 client
+    """
+    key = (service_name, region)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import boto3
+            
+            logger.debug(f"Creating {service_name} client for {region}")
+            client = boto3.client(service_name, region_name=region, config=client_config())
+            # Attribute every call to the start being timed in the calling thread
+            client.meta.events.register('before-parameter-build', count_api_call)
+            if THROTTLE_ENABLED:
+                DEFAULT_THROTTLE.register(client, service_name)
+            _clients[key] = client
+        return client
+
+
+def preload(service_names: List[str], region: str = AWS_REGION) -> None:
+    """
+    Create clients ahead of the first request (e.g. during Lambda init)
+    
+    Args:
+        service_names: AWS service names to create clients for
+        region: AWS region
+    """
+    for service_name in service_names:
+        get_client(service_name, region)
+
+
+def clear_clients() -> None:
+    """Drop all pooled clients (used by tests and after credential changes)"""
+    with _lock:
+        _clients.clear()
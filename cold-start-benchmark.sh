@@ -0,0 +1,52 @@
+#!/bin/bash
+# Cold-start benchmark for both Lambda entry points
+# Measures module import (Lambda init phase) with python -X importtime and the
+# cost of creating the pooled AWS clients on the first real request.
+#
+# Usage: ./cold-start-benchmark.sh [runs]
+
+set -e
+
+# Colors
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+NC='\033[0m'
+
+RUNS=${1:-5}
+export AWS_DEFAULT_REGION=${AWS_REGION:-us-east-2}
+
+cd "$(dirname "$0")"
+
+echo -e "${GREEN}Cold-Start Benchmark${NC} (${RUNS} runs each, cumulative import time)"
+echo ""
+
+for module in lambda_function stop_engines_lambda; do
+    total=0
+    for _ in $(seq "$RUNS"); do
+        us=$(python -X importtime -c "import ${module}" 2>&1 | grep -E "\| ${module}$" | awk -F'|' '{gsub(/ /, "", $2); print $2}')
+        total=$((total + us))
+    done
+    echo -e "Init (import ${YELLOW}${module}${NC}): $((total / RUNS / 1000)) ms"
+done
+
+echo ""
+python - <<'PYEOF'
+import sys
+import time
+
+import aws_clients
+
+print(f"boto3 loaded after import: {'boto3' in sys.modules}")
+
+start = time.perf_counter()
+aws_clients.get_client('ecs')
+first = time.perf_counter()
+aws_clients.get_client('elbv2')
+second = time.perf_counter()
+aws_clients.get_client('ecs')
+warm = time.perf_counter()
+
+print(f"First client (imports boto3): {1000 * (first - start):.1f} ms")
+print(f"Second client:                {1000 * (second - first):.1f} ms")
+print(f"Warm lookup:                  {1000 * (warm - second):.3f} ms")
+PYEOF
@@ -1,9 +1,20 @@
 """
 Configuration for ECS Task Starter Lambda
 Maps service names to their ECS clusters, task definitions, and target groups
+
+SERVICE_MAPPINGS holds the built-in services. get_service_config() reads a
+compiled registry built from it (plus the optional CONFIG_SOURCE file) once
+per container, so lookups neither copy nor re-validate configuration.
 """
+import json
 import os
-from typing import Dict, TypedDict
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, TypedDict
+
+
+class TargetGroupConfig(TypedDict):
+    """Type definition for an additional target group of a service"""
+    arn: str
+    port: int
 
 
 class ServiceConfig(TypedDict):
@@ -11,10 +22,19 @@ class ServiceConfig(TypedDict):
     cluster: str
     task_definition: str
     target_group_arn: str
-    container_name: str
-    container_port: int
+    container_name: Optional[str]
+    container_port: Optional[int]
     subnets: list[str]
     security_groups: list[str]
+    warm_pool_size: int
+    idle_stop_minutes: int
+    min_tasks: int
+    max_tasks: int
+    target_requests_per_task: int
+    target_response_ms: int
+    scale_out_cooldown: int
+    scale_in_cooldown: int
+    additional_target_groups: list[TargetGroupConfig]
 
 
 # AWS Configuration
@@ -25,6 +45,24 @@ AWS_ACCOUNT_ID = os.environ.get('AWS_ACCOUNT_ID', '486151888818')
 DEFAULT_SUBNETS = os.environ.get('SUBNETS', '').split(',') if os.environ.get('SUBNETS') else []
 DEFAULT_SECURITY_GROUPS = os.environ.get('SECURITY_GROUPS', '').split(',') if os.environ.get('SECURITY_GROUPS') else []
 
+# Default number of warm (pre-started, unregistered) tasks kept per service
+WARM_POOL_SIZE = int(os.environ.get('WARM_POOL_SIZE', '0'))
+
+# Default minutes without target group requests before the idle reaper stops a
+# service's tasks (0 = never stopped for being idle; the reaper is opt-in)
+IDLE_STOP_MINUTES = int(os.environ.get('IDLE_STOP_MINUTES', '0'))
+
+# Default autoscaler settings (autoscaler.py): replica bounds (max 0 = not
+# autoscaled), requests per task per minute and target response time (ms) to
+# size for, and seconds to wait after a task was added before adding more /
+# before removing any
+AUTOSCALE_MIN_TASKS = int(os.environ.get('AUTOSCALE_MIN_TASKS', '1'))
+AUTOSCALE_MAX_TASKS = int(os.environ.get('AUTOSCALE_MAX_TASKS', '0'))
+AUTOSCALE_TARGET_REQUESTS = int(os.environ.get('AUTOSCALE_TARGET_REQUESTS', '600'))
+AUTOSCALE_TARGET_RESPONSE_MS = int(os.environ.get('AUTOSCALE_TARGET_RESPONSE_MS', '1000'))
+AUTOSCALE_SCALE_OUT_COOLDOWN = int(os.environ.get('AUTOSCALE_SCALE_OUT_COOLDOWN', '120'))
+AUTOSCALE_SCALE_IN_COOLDOWN = int(os.environ.get('AUTOSCALE_SCALE_IN_COOLDOWN', '600'))
+
 # Service to ECS/Target Group Mappings
 # Based on your existing services: AuthAPI, PDFCreator, FaEngine, UserManagement, BatchEngineCall
 SERVICE_MAPPINGS: Dict[str, ServiceConfig] = {
@@ -36,6 +74,9 @@ SERVICE_MAPPINGS: Dict[str, ServiceConfig] = {
         'container_port': 8080,
         'subnets': os.environ.get('AUTH_SUBNETS', '').split(',') if os.environ.get('AUTH_SUBNETS') else DEFAULT_SUBNETS,
         'security_groups': os.environ.get('AUTH_SECURITY_GROUPS', '').split(',') if os.environ.get('AUTH_SECURITY_GROUPS') else DEFAULT_SECURITY_GROUPS,
+        'warm_pool_size': int(os.environ.get('AUTH_WARM_POOL_SIZE', WARM_POOL_SIZE)),
+        'idle_stop_minutes': int(os.environ.get('AUTH_IDLE_STOP_MINUTES', IDLE_STOP_MINUTES)),
+        'max_tasks': int(os.environ.get('AUTH_MAX_TASKS', AUTOSCALE_MAX_TASKS)),
     },
     'pdf': {
         'cluster': os.environ.get('PDF_CLUSTER', 'pdfcreator-cluster'),
@@ -45,6 +86,13 @@ SERVICE_MAPPINGS: Dict[str, ServiceConfig] = {
         'container_port': 9080,
         'subnets': os.environ.get('PDF_SUBNETS', '').split(',') if os.environ.get('PDF_SUBNETS') else DEFAULT_SUBNETS,
         'security_groups': os.environ.get('PDF_SECURITY_GROUPS', '').split(',') if os.environ.get('PDF_SECURITY_GROUPS') else DEFAULT_SECURITY_GROUPS,
+        'warm_pool_size': int(os.environ.get('PDF_WARM_POOL_SIZE', WARM_POOL_SIZE)),
+        'idle_stop_minutes': int(os.environ.get('PDF_IDLE_STOP_MINUTES', IDLE_STOP_MINUTES)),
+        # Bursty engine: autoscaler.py keeps 1-10 replicas by default
+        'min_tasks': int(os.environ.get('PDF_MIN_TASKS', AUTOSCALE_MIN_TASKS)),
+        'max_tasks': int(os.environ.get('PDF_MAX_TASKS', '10')),
+        'scale_out_cooldown': int(os.environ.get('PDF_SCALE_OUT_COOLDOWN', AUTOSCALE_SCALE_OUT_COOLDOWN)),
+        'scale_in_cooldown': int(os.environ.get('PDF_SCALE_IN_COOLDOWN', AUTOSCALE_SCALE_IN_COOLDOWN)),
     },
     'fa': {
         'cluster': os.environ.get('FA_CLUSTER', 'fa-engine-cluster'),
@@ -54,6 +102,16 @@ SERVICE_MAPPINGS: Dict[str, ServiceConfig] = {
         'container_port': 2531,
         'subnets': os.environ.get('FA_SUBNETS', '').split(',') if os.environ.get('FA_SUBNETS') else DEFAULT_SUBNETS,
         'security_groups': os.environ.get('FA_SECURITY_GROUPS', '').split(',') if os.environ.get('FA_SECURITY_GROUPS') else DEFAULT_SECURITY_GROUPS,
+        'warm_pool_size': int(os.environ.get('FA_WARM_POOL_SIZE', WARM_POOL_SIZE)),
+        'idle_stop_minutes': int(os.environ.get('FA_IDLE_STOP_MINUTES', IDLE_STOP_MINUTES)),
+        'max_tasks': int(os.environ.get('FA_MAX_TASKS', AUTOSCALE_MAX_TASKS)),
+        # FA is also served through its own ALB target group (set FA_ENGINE_TARGET_GROUP_ARN='' to disable)
+        'additional_target_groups': [
+            {
+                'arn': os.environ.get('FA_ENGINE_TARGET_GROUP_ARN', f"arn:aws:elasticloadbalancing:{AWS_REGION}:{AWS_ACCOUNT_ID}:targetgroup/fa-engine-tg/dbcce8724f4dc4bd"),
+                'port': 2531,
+            },
+        ],
     },
     'users': {
         'cluster': os.environ.get('USERS_CLUSTER', 'user-management-cluster'),
@@ -63,6 +121,9 @@ SERVICE_MAPPINGS: Dict[str, ServiceConfig] = {
         'container_port': 8080,
         'subnets': os.environ.get('USERS_SUBNETS', '').split(',') if os.environ.get('USERS_SUBNETS') else DEFAULT_SUBNETS,
         'security_groups': os.environ.get('USERS_SECURITY_GROUPS', '').split(',') if os.environ.get('USERS_SECURITY_GROUPS') else DEFAULT_SECURITY_GROUPS,
+        'warm_pool_size': int(os.environ.get('USERS_WARM_POOL_SIZE', WARM_POOL_SIZE)),
+        'idle_stop_minutes': int(os.environ.get('USERS_IDLE_STOP_MINUTES', IDLE_STOP_MINUTES)),
+        'max_tasks': int(os.environ.get('USERS_MAX_TASKS', AUTOSCALE_MAX_TASKS)),
     },
     'batch': {
         'cluster': os.environ.get('BATCH_CLUSTER', 'batch-engine'),
@@ -72,14 +133,116 @@ SERVICE_MAPPINGS: Dict[str, ServiceConfig] = {
         'container_port': 8080,
         'subnets': os.environ.get('BATCH_SUBNETS', '').split(',') if os.environ.get('BATCH_SUBNETS') else DEFAULT_SUBNETS,
         'security_groups': os.environ.get('BATCH_SECURITY_GROUPS', '').split(',') if os.environ.get('BATCH_SECURITY_GROUPS') else DEFAULT_SECURITY_GROUPS,
+        'warm_pool_size': int(os.environ.get('BATCH_WARM_POOL_SIZE', WARM_POOL_SIZE)),
+        'idle_stop_minutes': int(os.environ.get('BATCH_IDLE_STOP_MINUTES', IDLE_STOP_MINUTES)),
+        # Bursty engine: autoscaler.py keeps 1-10 replicas by default
+        'min_tasks': int(os.environ.get('BATCH_MIN_TASKS', AUTOSCALE_MIN_TASKS)),
+        'max_tasks': int(os.environ.get('BATCH_MAX_TASKS', '10')),
+        'scale_out_cooldown': int(os.environ.get('BATCH_SCALE_OUT_COOLDOWN', AUTOSCALE_SCALE_OUT_COOLDOWN)),
+        'scale_in_cooldown': int(os.environ.get('BATCH_SCALE_IN_COOLDOWN', AUTOSCALE_SCALE_IN_COOLDOWN)),
     }
 }
 
 # Lambda Configuration
 TASK_WAIT_TIMEOUT = int(os.environ.get('TASK_WAIT_TIMEOUT', '300'))  # 5 minutes
 TASK_POLL_INTERVAL = int(os.environ.get('TASK_POLL_INTERVAL', '5'))  # 5 seconds
+
+# Polling strategy for task/target waits:
+# "adaptive" picks intervals from the observed phase and learned start times,
+# "fixed" always sleeps TASK_POLL_INTERVAL
+POLL_STRATEGY = os.environ.get('POLL_STRATEGY', 'adaptive').lower()
+POLL_MIN_INTERVAL = float(os.environ.get('POLL_MIN_INTERVAL', '1'))
+POLL_MAX_INTERVAL = float(os.environ.get('POLL_MAX_INTERVAL', '15'))
+POLL_JITTER = float(os.environ.get('POLL_JITTER', '0.2'))  # +/-20%
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
 
+# CloudWatch Embedded Metric Format output for per-phase start timings
+EMIT_METRICS = os.environ.get('EMIT_METRICS', 'true').lower() == 'true'
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'ECSEngines')
+
+# Maximum number of services started concurrently in multi-service mode
+MAX_PARALLEL_STARTS = int(os.environ.get('MAX_PARALLEL_STARTS', '10'))
+
+# Maximum concurrent stop_task calls in the stop Lambda
+STOP_TASK_CONCURRENCY = int(os.environ.get('STOP_TASK_CONCURRENCY', '10'))
+
+# Maximum concurrent reads/writes in the target group reconciler
+RECONCILE_CONCURRENCY = int(os.environ.get('RECONCILE_CONCURRENCY', '10'))
+
+# Drain mode for the stop Lambda: deregister and wait for draining before stopping
+DRAIN_ON_STOP = os.environ.get('DRAIN_ON_STOP', 'false').lower() == 'true'
+DRAIN_MAX_WAIT = int(os.environ.get('DRAIN_MAX_WAIT', '240'))  # seconds
+
+# Two-stage starts: return after run_task and register when ECS reports RUNNING
+DEFER_REGISTRATION = os.environ.get('DEFER_REGISTRATION', 'false').lower() == 'true'
+
+# How long a start response is remembered for its idempotencyKey (seconds)
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', '900'))
+
+# How long a resolved task definition ARN and checked network are reused (seconds)
+RESOLUTION_CACHE_TTL = int(os.environ.get('RESOLUTION_CACHE_TTL', '300'))
+
+# Upper bound for desiredCount/count on a single start event
+MAX_TASKS_PER_START = int(os.environ.get('MAX_TASKS_PER_START', '50'))
+
+# Schedule planner (schedule_planner.py): history slot size, minutes without
+# requests before a scheduled stop, share of past days of a weekday a slot
+# must have requests on to be kept warm, seconds started ahead on top of the
+# measured start latency, and the latency assumed without start history
+PLANNER_SLOT_MINUTES = int(os.environ.get('PLANNER_SLOT_MINUTES', '15'))
+PLANNER_IDLE_MINUTES = int(os.environ.get('PLANNER_IDLE_MINUTES', '30'))
+PLANNER_ACTIVE_RATIO = float(os.environ.get('PLANNER_ACTIVE_RATIO', '0.5'))
+PLANNER_LEAD_MARGIN = int(os.environ.get('PLANNER_LEAD_MARGIN', '60'))
+PLANNER_DEFAULT_START_LATENCY = int(os.environ.get('PLANNER_DEFAULT_START_LATENCY', '300'))
+PLANNER_TIMEZONE = os.environ.get('PLANNER_TIMEZONE', 'UTC')
+
+# On-demand front door (front_door.py): start Lambda invoked asynchronously
+# (empty runs the start in the front door's own container), Retry-After sent
+# while a service starts, how long a "Prefer: wait" request is held, how long
+# a probed service state is reused, how long a triggered start is joined
+# instead of started again, and the poll interval of held requests (seconds)
+FRONT_DOOR_START_FUNCTION = os.environ.get('FRONT_DOOR_START_FUNCTION', '')
+FRONT_DOOR_RETRY_AFTER = int(os.environ.get('FRONT_DOOR_RETRY_AFTER', '30'))
+FRONT_DOOR_HOLD_TIMEOUT = float(os.environ.get('FRONT_DOOR_HOLD_TIMEOUT', '25'))
+FRONT_DOOR_PROBE_TTL = float(os.environ.get('FRONT_DOOR_PROBE_TTL', '5'))
+FRONT_DOOR_START_GRACE = float(os.environ.get('FRONT_DOOR_START_GRACE', '120'))
+FRONT_DOOR_POLL_INTERVAL = float(os.environ.get('FRONT_DOOR_POLL_INTERVAL', '2'))
+
+# Load balancer metrics for the idle reaper: "cloudwatch", or "file:<path>" to a
+# JSON file of {target_group_arn: {metric: [[iso_time, value], ...]}} (local runs)
+METRICS_SOURCE = os.environ.get('METRICS_SOURCE', 'cloudwatch')
+
+# Minutes of load balancer metrics the autoscaler sizes services from
+AUTOSCALE_WINDOW_MINUTES = int(os.environ.get('AUTOSCALE_WINDOW_MINUTES', '5'))
+
+# AWS client pool configuration (shared botocore Config for all clients)
+BOTO_MAX_POOL_CONNECTIONS = int(os.environ.get('BOTO_MAX_POOL_CONNECTIONS', '50'))
+BOTO_MAX_ATTEMPTS = int(os.environ.get('BOTO_MAX_ATTEMPTS', '5'))
+BOTO_RETRY_MODE = os.environ.get('BOTO_RETRY_MODE', 'standard')
+BOTO_CONNECT_TIMEOUT = float(os.environ.get('BOTO_CONNECT_TIMEOUT', '5'))
+BOTO_READ_TIMEOUT = float(os.environ.get('BOTO_READ_TIMEOUT', '30'))
+
+# Rate-limited call layer for pooled clients (throttling.py). When enabled it
+# replaces botocore's retries: BOTO_MAX_ATTEMPTS is then the retries per call.
+THROTTLE_ENABLED = os.environ.get('THROTTLE_ENABLED', 'true').lower() == 'true'
+# Token bucket overrides as "<service>[.<Operation>]=<rate>:<burst>,...",
+# e.g. "ecs.RunTask=10:40,elbv2=5:10"
+THROTTLE_RATES = os.environ.get('THROTTLE_RATES', '')
+# Retries allowed across all calls of one Lambda invocation
+THROTTLE_RETRY_BUDGET = int(os.environ.get('THROTTLE_RETRY_BUDGET', '50'))
+# Full-jitter exponential backoff bounds for retries (seconds)
+THROTTLE_BACKOFF_BASE = float(os.environ.get('THROTTLE_BACKOFF_BASE', '0.25'))
+THROTTLE_BACKOFF_MAX = float(os.environ.get('THROTTLE_BACKOFF_MAX', '10'))
+
+# Clients to create during Lambda init instead of on first use (e.g. "ecs,elbv2")
+PRELOAD_CLIENTS = [s for s in os.environ.get('PRELOAD_CLIENTS', '').split(',') if s]
+
+# Optional service configuration file merged over SERVICE_MAPPINGS:
+# a .json/.yaml/.yml file of {service: {field: value}}, or "ssm:<file>" with the
+# JSON output of "aws ssm get-parameters-by-path --recursive" below SSM_CONFIG_PREFIX
+CONFIG_SOURCE = os.environ.get('CONFIG_SOURCE', '')
+SSM_CONFIG_PREFIX = os.environ.get('SSM_CONFIG_PREFIX', '/engines/')
+
 # ECS Task Launch Type (FARGATE or EC2)
 LAUNCH_TYPE = os.environ.get('LAUNCH_TYPE', 'FARGATE')
 
@@ -89,42 +252,319 @@ LAUNCH_TYPE = os.environ.get('LAUNCH_TYPE', 'FARGATE')
 ASSIGN_PUBLIC_IP = os.environ.get('ASSIGN_PUBLIC_IP', 'ENABLED')
 
 
-def get_service_config(service_name: str) -> ServiceConfig:
+SERVICE_FIELDS = (
+    'cluster',
+    'task_definition',
+    'target_group_arn',
+    'container_name',
+    'container_port',
+    'subnets',
+    'security_groups',
+    'warm_pool_size',
+    'idle_stop_minutes',
+    'min_tasks',
+    'max_tasks',
+    'target_requests_per_task',
+    'target_response_ms',
+    'scale_out_cooldown',
+    'scale_in_cooldown',
+    'additional_target_groups',
+)
+
+# Fields a service defined only in CONFIG_SOURCE must set; container_name and
+# container_port default to the task definition's first port mapping
+REQUIRED_FIELDS = ('cluster', 'task_definition', 'target_group_arn')
+
+LIST_FIELDS = ('subnets', 'security_groups')
+INT_FIELDS = (
+    'container_port',
+    'warm_pool_size',
+    'idle_stop_minutes',
+    'min_tasks',
+    'max_tasks',
+    'target_requests_per_task',
+    'target_response_ms',
+    'scale_out_cooldown',
+    'scale_in_cooldown',
+)
+
+
+class CompiledServiceConfig(Mapping):
     """
-    Get configuration for a specific service
+    Immutable, validated configuration of one service
     
-    Args:
-        service_name: Name of the service (auth, pdf, fa, users, batch)
+    Built once per container by build_registry(). Fields are attributes, and
+    the object is also a read-only mapping with the ServiceConfig keys, so
+    callers using config['cluster'] or config.get(...) work unchanged.
+    """
+    
+    __slots__ = SERVICE_FIELDS + ('name', 'error')
+    
+    def __init__(self, name: str, fields: Mapping[str, Any]):
+        """
+        Initialize compiled service config
         
-    Returns:
-        ServiceConfig dictionary
+        Args:
+            name: Service name
+            fields: Merged ServiceConfig fields
+        """
+        set_field = super().__setattr__
+        set_field('name', name)
+        set_field('cluster', fields['cluster'])
+        set_field('task_definition', fields['task_definition'])
+        set_field('target_group_arn', fields['target_group_arn'])
+        set_field('container_name', fields.get('container_name'))
+        set_field('container_port', None if fields.get('container_port') is None else int(fields['container_port']))
+        set_field('subnets', tuple(fields.get('subnets') or ()))
+        set_field('security_groups', tuple(fields.get('security_groups') or ()))
+        set_field('warm_pool_size', int(fields.get('warm_pool_size') or 0))
+        set_field('idle_stop_minutes', int(fields.get('idle_stop_minutes') or 0))
+        set_field('min_tasks', int(fields.get('min_tasks') or 0))
+        set_field('max_tasks', int(fields.get('max_tasks') or 0))
+        set_field('target_requests_per_task', int(fields.get('target_requests_per_task') or 0))
+        set_field('target_response_ms', int(fields.get('target_response_ms') or 0))
+        set_field('scale_out_cooldown', int(fields.get('scale_out_cooldown') or 0))
+        set_field('scale_in_cooldown', int(fields.get('scale_in_cooldown') or 0))
+        set_field('additional_target_groups', tuple(dict(g) for g in fields.get('additional_target_groups') or ()))
+        set_field('error', validation_error(name, self))
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Service configuration is read-only (tried to set {name})")
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in SERVICE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(SERVICE_FIELDS)
+    
+    def __len__(self) -> int:
+        return len(SERVICE_FIELDS)
+    
+    def __repr__(self) -> str:
+        return f"CompiledServiceConfig({self.name!r}, {dict(self)!r})"
+
+
+def validation_error(service_name: str, config: Mapping[str, Any]) -> Optional[str]:
+    """Get the error that makes a service unusable for starts, if any"""
+    if not config['target_group_arn']:
+        return f"Target group ARN not configured for service: {service_name}"
+    if not config['subnets']:
+        return f"Subnets not configured for service: {service_name}"
+    if not config['security_groups']:
+        return f"Security groups not configured for service: {service_name}"
+    return None
+
+
+class ServiceRegistry:
+    """Compiled configuration of all services, keyed by lower-case name"""
+    
+    __slots__ = ('services', 'names', '_unknown_hint')
+    
+    def __init__(self, services: Dict[str, CompiledServiceConfig]):
+        """
+        Initialize service registry
         
+        Args:
+            services: Compiled configuration per service name
+        """
+        self.services = services
+        self.names = tuple(services)
+        self._unknown_hint = f"Valid services: {', '.join(self.names)}"
+    
+    def get(self, service_name: str) -> CompiledServiceConfig:
+        """
+        Get the validated configuration of a service
+        
+        Args:
+            service_name: Service name (case-insensitive)
+        
+        Returns:
+            CompiledServiceConfig
+        
+        Raises:
+            ValueError: If the service is unknown or misconfigured
+        """
+        service_name = service_name.lower()
+        config = self.services.get(service_name)
+        if config is None:
+            raise ValueError(f"Unknown service: {service_name}. {self._unknown_hint}")
+        if config.error:
+            raise ValueError(config.error)
+        return config
+
+
+def load_config_source(source: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read service overlays from a CONFIG_SOURCE file
+    
+    Args:
+        source: Path to a .json/.yaml/.yml file, or "ssm:<path>" to an SSM
+            get-parameters-by-path dump (parameters named
+            <SSM_CONFIG_PREFIX><service>/<field>)
+    
+    Returns:
+        Fields per service name
+    
     Raises:
-        ValueError: If service name is not found
+        ValueError: If the file cannot be parsed or names unknown fields
     """
-    service_name = service_name.lower()
-    if service_name not in SERVICE_MAPPINGS:
-        raise ValueError(
-            f"Unknown service: {service_name}. "
-            f"Valid services: {', '.join(SERVICE_MAPPINGS.keys())}"
-        )
+    if source.startswith('ssm:'):
+        with open(source[len('ssm:'):]) as f:
+            overlays = parse_ssm_parameters(json.load(f).get('Parameters', []))
+    elif source.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ValueError(f"PyYAML is required to load {source}") from e
+        with open(source) as f:
+            overlays = yaml.safe_load(f) or {}
+    else:
+        with open(source) as f:
+            overlays = json.load(f)
     
-    config = SERVICE_MAPPINGS[service_name]
+    if not isinstance(overlays, dict):
+        raise ValueError(f"{source} must map service names to their fields")
     
-    # Validate required fields
-    if not config['target_group_arn']:
-        raise ValueError(f"Target group ARN not configured for service: {service_name}")
+    for service_name, fields in overlays.items():
+        unknown = set(fields) - set(SERVICE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields for service {service_name} in {source}: {', '.join(sorted(unknown))}")
     
-    if not config['subnets']:
-        raise ValueError(f"Subnets not configured for service: {service_name}")
+    return {service_name.lower(): fields for service_name, fields in overlays.items()}
+
+
+def parse_ssm_parameters(parameters: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Turn SSM parameters below SSM_CONFIG_PREFIX into service overlays
     
-    if not config['security_groups']:
-        raise ValueError(f"Security groups not configured for service: {service_name}")
+    StringList values become lists, additional_target_groups is JSON, and
+    parameters outside the prefix are ignored.
+    
+    Args:
+        parameters: "Parameters" of a get-parameters-by-path response
+    
+    Returns:
+        Fields per service name
+    """
+    overlays: Dict[str, Dict[str, Any]] = {}
+    for parameter in parameters:
+        name = parameter['Name']
+        if not name.startswith(SSM_CONFIG_PREFIX):
+            continue
+        service_name, _, field = name[len(SSM_CONFIG_PREFIX):].partition('/')
+        value = parameter['Value']
+        if field == 'additional_target_groups':
+            value = json.loads(value)
+        elif field in LIST_FIELDS or parameter.get('Type') == 'StringList':
+            value = [item for item in value.split(',') if item]
+        overlays.setdefault(service_name, {})[field] = value
+    return overlays
+
+
+def build_registry(
+    base: Mapping[str, Mapping[str, Any]],
+    source: str = ''
+) -> ServiceRegistry:
+    """
+    Compile and validate service configuration
+    
+    Fields from the source file are merged over the built-in service of the
+    same name; services only in the file must set REQUIRED_FIELDS and fall
+    back to SUBNETS/SECURITY_GROUPS for networking.
+    
+    Args:
+        base: Built-in services (normally SERVICE_MAPPINGS)
+        source: Optional CONFIG_SOURCE
+    
+    Returns:
+        ServiceRegistry
+    
+    Raises:
+        ValueError: If the source is invalid or a new service lacks required fields
+    """
+    overlays = load_config_source(source) if source else {}
+    defaults = {
+        'subnets': DEFAULT_SUBNETS,
+        'security_groups': DEFAULT_SECURITY_GROUPS,
+        'warm_pool_size': WARM_POOL_SIZE,
+        'idle_stop_minutes': IDLE_STOP_MINUTES,
+        'min_tasks': AUTOSCALE_MIN_TASKS,
+        'max_tasks': AUTOSCALE_MAX_TASKS,
+        'target_requests_per_task': AUTOSCALE_TARGET_REQUESTS,
+        'target_response_ms': AUTOSCALE_TARGET_RESPONSE_MS,
+        'scale_out_cooldown': AUTOSCALE_SCALE_OUT_COOLDOWN,
+        'scale_in_cooldown': AUTOSCALE_SCALE_IN_COOLDOWN,
+    }
     
-    return config
+    services: Dict[str, CompiledServiceConfig] = {}
+    for service_name in list(base) + [name for name in overlays if name not in base]:
+        fields = {**defaults, **base.get(service_name, {}), **overlays.get(service_name, {})}
+        missing = [field for field in REQUIRED_FIELDS if field not in fields]
+        if missing:
+            raise ValueError(f"Service {service_name} is missing {', '.join(missing)}")
+        for field in INT_FIELDS:
+            if fields.get(field) is not None:
+                fields[field] = int(fields[field])
+        services[service_name] = CompiledServiceConfig(service_name, fields)
+    
+    return ServiceRegistry(services)
+
+
+_registry: Optional[ServiceRegistry] = None
+
+
+def get_registry() -> ServiceRegistry:
+    """Get the compiled service registry, building it on first use"""
+    global _registry
+    if _registry is None:
+        _registry = build_registry(SERVICE_MAPPINGS, CONFIG_SOURCE)
+    return _registry
+
+
+def invalidate_registry() -> None:
+    """Drop the compiled registry so the next lookup rebuilds it (after changing SERVICE_MAPPINGS)"""
+    global _registry
+    _registry = None
+
+
+def get_service_config(service_name: str) -> CompiledServiceConfig:
+    """
+    Get configuration for a specific service
+    
+    Args:
+        service_name: Name of the service (auth, pdf, fa, users, batch)
+    
+    Returns:
+        Compiled (read-only) service configuration
+    
+    Raises:
+        ValueError: If service name is not found or its configuration is incomplete
+    """
+    return get_registry().get(service_name)
+
+
+def get_target_groups(config: Mapping[str, Any]) -> List[Tuple[str, int]]:
+    """
+    Get every target group a service (or resolved start request) registers with
+    
+    Args:
+        config: ServiceConfig or start request with target_group_arn,
+            container_port and optional additional_target_groups
+    
+    Returns:
+        (target_group_arn, port) pairs, the primary target group first;
+        additional target groups without an ARN are skipped
+    """
+    target_groups = [(config['target_group_arn'], config['container_port'])]
+    for group in config.get('additional_target_groups') or []:
+        if group.get('arn'):
+            target_groups.append((group['arn'], group.get('port', config['container_port'])))
+    return target_groups
 
 
 def get_all_service_names() -> list[str]:
     """Get list of all configured service names"""
-    return list(SERVICE_MAPPINGS.keys())
+    return list(get_registry().names)
 
@@ -2,22 +2,101 @@
 ECS Task Management
 Handles starting ECS tasks and waiting for them to reach RUNNING state
 """
-import time
 import logging
-from typing import Dict, List, Optional, Tuple
-import boto3
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple, Union
 from botocore.exceptions import ClientError
 
-from config import TASK_WAIT_TIMEOUT, TASK_POLL_INTERVAL, LAUNCH_TYPE, ASSIGN_PUBLIC_IP
+from aws_clients import get_client
+from config import TASK_WAIT_TIMEOUT, LAUNCH_TYPE, ASSIGN_PUBLIC_IP
+from resolution_cache import DEFAULT_RESOLUTION_CACHE, ResolutionError
+from task_poller import TaskPoller, TaskWaiter, TaskNotFoundError, DESCRIBE_TASKS_MAX_ARNS
+from timing import phase, add_api_calls, record_status_phases
 
 logger = logging.getLogger()
 
+# run_task launches at most 10 tasks per call
+RUN_TASK_MAX_COUNT = 10
+
 
 class ECSTaskError(Exception):
     """Custom exception for ECS task operations"""
     pass
 
 
+def matches_task_definition(task_definition_arn: str, requested: str) -> bool:
+    """
+    Check whether a running task uses the requested task definition
+    
+    Args:
+        task_definition_arn: taskDefinitionArn of the task
+        requested: Task definition ARN, family:revision or family
+    
+    Returns:
+        True if the task matches (any revision when only a family is given)
+    """
+    if requested.startswith('arn:'):
+        return task_definition_arn == requested
+    
+    family_revision = task_definition_arn.split('/')[-1]
+    if ':' in requested:
+        return family_revision == requested
+    
+    return family_revision.split(':')[0] == requested
+
+
+def stopped_message(task: Dict) -> str:
+    """
+    Build an error message for a task that stopped before RUNNING
+    
+    Args:
+        task: Task description from describe_tasks
+        
+    Returns:
+        Error message with stop and container reasons
+    """
+    task_id = task.get('taskArn', '').split('/')[-1]
+    stop_reason = task.get('stoppedReason', 'Unknown')
+    containers = task.get('containers', [])
+    container_reasons = [
+        f"{c.get('name')}: {c.get('reason', 'N/A')}"
+        for c in containers if c.get('reason')
+    ]
+    return f"Task {task_id} stopped. Reason: {stop_reason}. Container reasons: {container_reasons}"
+
+
+def extract_private_ip(task: Dict) -> Optional[str]:
+    """
+    Extract private IP address from task details (awsvpc mode)
+    
+    Args:
+        task: Task description from describe_tasks
+        
+    Returns:
+        Private IP address or None if not found
+    """
+    # For awsvpc network mode, the task has network interfaces attached
+    attachments = task.get('attachments', [])
+    
+    for attachment in attachments:
+        # describe_tasks reports 'ElasticNetworkInterface', task state change events 'eni'
+        if attachment.get('type') in ('ElasticNetworkInterface', 'eni'):
+            details = attachment.get('details', [])
+            for detail in details:
+                if detail.get('name') == 'privateIPv4Address':
+                    return detail.get('value')
+    
+    # Alternative: check containers for network bindings (for bridge/host mode)
+    containers = task.get('containers', [])
+    for container in containers:
+        network_interfaces = container.get('networkInterfaces', [])
+        if network_interfaces:
+            return network_interfaces[0].get('privateIpv4Address')
+    
+    return None
+
+
 class ECSHandler:
     """Handles ECS task operations"""
     
@@ -28,9 +107,83 @@ class ECSHandler:
         Args:
             region: AWS region
         """
-        self.ecs_client = boto3.client('ecs', region_name=region)
-        self.ec2_client = boto3.client('ec2', region_name=region)
         self.region = region
+        
+        # Clients and poller are created on first use
+        self._ecs_client = None
+        self._ec2_client = None
+        self._task_poller = None
+        self._task_poller_lock = threading.Lock()
+        self.resolution_cache = DEFAULT_RESOLUTION_CACHE
+    
+    @property
+    def ecs_client(self):
+        """ECS client (pooled, created on first use)"""
+        if self._ecs_client is None:
+            self._ecs_client = get_client('ecs', self.region)
+        return self._ecs_client
+    
+    @ecs_client.setter
+    def ecs_client(self, client) -> None:
+        self._ecs_client = client
+    
+    @property
+    def ec2_client(self):
+        """EC2 client (pooled, created on first use)"""
+        if self._ec2_client is None:
+            self._ec2_client = get_client('ec2', self.region)
+        return self._ec2_client
+    
+    @ec2_client.setter
+    def ec2_client(self, client) -> None:
+        self._ec2_client = client
+    
+    @property
+    def task_poller(self) -> TaskPoller:
+        """Poller shared by every wait on this handler so concurrent starts batch their polls"""
+        # start_services shares one handler across threads; only one of them may create the poller
+        if self._task_poller is None:
+            with self._task_poller_lock:
+                if self._task_poller is None:
+                    self._task_poller = TaskPoller(self.ecs_client)
+        return self._task_poller
+    
+    def resolve_task_definition(self, task_definition: str, container_name: Optional[str] = None) -> Dict:
+        """
+        Resolve a task definition to a pinned ARN and its serving container (cached)
+        
+        Args:
+            task_definition: Task definition family, family:revision or ARN
+            container_name: Container to use (default: first container with a port mapping)
+            
+        Returns:
+            Dictionary with taskDefinitionArn, containerName and containerPort
+            
+        Raises:
+            ECSTaskError: If the task definition or container does not exist, or cannot be described
+        """
+        try:
+            return self.resolution_cache.task_definition(self.ecs_client, task_definition, container_name)
+        except (ResolutionError, ClientError) as e:
+            logger.error(f"Error resolving task definition: {str(e)}")
+            raise ECSTaskError(str(e)) from e
+    
+    def check_network(self, subnets: List[str], security_groups: List[str]) -> None:
+        """
+        Check that subnets and security groups exist and share a VPC (cached)
+        
+        Args:
+            subnets: List of subnet IDs
+            security_groups: List of security group IDs
+            
+        Raises:
+            ECSTaskError: If the network configuration is invalid
+        """
+        try:
+            self.resolution_cache.check_network(self.ec2_client, subnets, security_groups)
+        except ResolutionError as e:
+            logger.error(f"Error checking network configuration: {str(e)}")
+            raise ECSTaskError(str(e)) from e
     
     def start_task(
         self,
@@ -62,19 +215,20 @@ class ECSHandler:
         
         try:
             # Start the task
-            response = self.ecs_client.run_task(
-                cluster=cluster,
-                taskDefinition=task_definition,
-                launchType=LAUNCH_TYPE,
-                count=1,
-                networkConfiguration={
-                    'awsvpcConfiguration': {
-                        'subnets': subnets,
-                        'securityGroups': security_groups,
-                        'assignPublicIp': ASSIGN_PUBLIC_IP
+            with phase('run_task'):
+                response = self.ecs_client.run_task(
+                    cluster=cluster,
+                    taskDefinition=task_definition,
+                    launchType=LAUNCH_TYPE,
+                    count=1,
+                    networkConfiguration={
+                        'awsvpcConfiguration': {
+                            'subnets': subnets,
+                            'securityGroups': security_groups,
+                            'assignPublicIp': ASSIGN_PUBLIC_IP
+                        }
                     }
-                }
-            )
+                )
             
             # Check for failures
             if response.get('failures'):
@@ -95,7 +249,12 @@ class ECSHandler:
             logger.info(f"Task started: {task_id}")
             
             # Wait for task to reach RUNNING state
-            private_ip = self._wait_for_task_running(cluster, task_arn, container_name)
+            private_ip = self._wait_for_task_running(
+                cluster,
+                task_arn,
+                container_name,
+                history_key=task_definition
+            )
             
             logger.info(f"Task {task_id} is RUNNING with IP {private_ip}")
             
@@ -110,13 +269,148 @@ class ECSHandler:
             logger.error(error_msg)
             raise ECSTaskError(error_msg) from e
     
+    def start_tasks(
+        self,
+        cluster: str,
+        task_definition: str,
+        subnets: List[str],
+        security_groups: List[str],
+        container_name: str,
+        container_port: int,
+        count: int = 1,
+    ) -> List[Tuple[str, str]]:
+        """
+        Start several copies of a task and wait for all of them together
+        
+        run_task launches at most 10 tasks per call, so larger counts are split
+        into chunks. All launched tasks are then tracked by the shared poller in
+        the same describe_tasks calls.
+        
+        Args:
+            cluster: ECS cluster name
+            task_definition: Task definition family:revision or ARN
+            subnets: List of subnet IDs
+            security_groups: List of security group IDs
+            container_name: Name of the container in the task definition
+            container_port: Port the container listens on
+            count: Number of tasks to start
+            
+        Returns:
+            List of (task_arn, private_ip_address) for tasks that reached RUNNING
+            
+        Raises:
+            ECSTaskError: If no task could be started or none reached RUNNING
+        """
+        logger.info(f"Starting {count} ECS tasks: cluster={cluster}, task_def={task_definition}")
+        
+        task_arns = self.launch_tasks(
+            cluster=cluster,
+            task_definition=task_definition,
+            subnets=subnets,
+            security_groups=security_groups,
+            count=count
+        )
+        
+        logger.info(f"Started {len(task_arns)} of {count} tasks, waiting for RUNNING state...")
+        
+        results = self._wait_for_tasks_running(
+            cluster,
+            task_arns,
+            container_name,
+            history_key=task_definition
+        )
+        
+        running = [(arn, result) for arn, result in results.items() if isinstance(result, str)]
+        for arn, result in results.items():
+            if isinstance(result, ECSTaskError):
+                logger.error(str(result))
+        
+        if not running:
+            raise ECSTaskError(f"None of the {len(task_arns)} started tasks reached RUNNING state")
+        
+        logger.info(f"{len(running)} of {count} tasks are RUNNING")
+        return running
+    
+    def launch_tasks(
+        self,
+        cluster: str,
+        task_definition: str,
+        subnets: List[str],
+        security_groups: List[str],
+        count: int = 1,
+        started_by: Optional[str] = None,
+        tags: Optional[List[Dict[str, str]]] = None,
+    ) -> List[str]:
+        """
+        Launch tasks without waiting for them (run_task in chunks of 10)
+        
+        Args:
+            cluster: ECS cluster name
+            task_definition: Task definition family:revision or ARN
+            subnets: List of subnet IDs
+            security_groups: List of security group IDs
+            count: Number of tasks to launch
+            started_by: Optional startedBy value (filterable in list_tasks)
+            tags: Optional task tags ([{'key': ..., 'value': ...}])
+            
+        Returns:
+            ARNs of the launched tasks (may be fewer than count)
+            
+        Raises:
+            ECSTaskError: If no task could be launched
+        """
+        params = {
+            'cluster': cluster,
+            'taskDefinition': task_definition,
+            'launchType': LAUNCH_TYPE,
+            'networkConfiguration': {
+                'awsvpcConfiguration': {
+                    'subnets': subnets,
+                    'securityGroups': security_groups,
+                    'assignPublicIp': ASSIGN_PUBLIC_IP
+                }
+            }
+        }
+        if started_by:
+            params['startedBy'] = started_by
+        if tags:
+            params['tags'] = tags
+        
+        task_arns: List[str] = []
+        failures: List[Dict] = []
+        
+        try:
+            for i in range(0, count, RUN_TASK_MAX_COUNT):
+                with phase('run_task'):
+                    response = self.ecs_client.run_task(
+                        count=min(RUN_TASK_MAX_COUNT, count - i),
+                        **params
+                    )
+                failures.extend(response.get('failures', []))
+                task_arns.extend(task['taskArn'] for task in response.get('tasks', []))
+        except ClientError as e:
+            if not task_arns:
+                error_msg = f"AWS API error starting tasks: {str(e)}"
+                logger.error(error_msg)
+                raise ECSTaskError(error_msg) from e
+            logger.error(f"AWS API error after starting {len(task_arns)} of {count} tasks: {str(e)}")
+        
+        if failures:
+            logger.error(f"Failed to start {len(failures)} tasks: {failures}")
+        
+        if not task_arns:
+            raise ECSTaskError(f"No tasks started. Failures: {failures}")
+        
+        return task_arns
+    
     def _wait_for_task_running(
         self,
         cluster: str,
         task_arn: str,
         container_name: str,
         timeout: int = TASK_WAIT_TIMEOUT,
-        poll_interval: int = TASK_POLL_INTERVAL
+        poll_interval: Optional[float] = None,
+        history_key: Optional[str] = None
     ) -> str:
         """
         Wait for task to reach RUNNING state and extract private IP
@@ -126,7 +420,8 @@ class ECSHandler:
             task_arn: Task ARN
             container_name: Container name
             timeout: Maximum time to wait in seconds
-            poll_interval: Time between polls in seconds
+            poll_interval: Fixed time between polls in seconds (None = POLL_STRATEGY decides)
+            history_key: Key for learned time-to-RUNNING (task definition)
             
         Returns:
             Private IP address of the task
@@ -135,87 +430,173 @@ class ECSHandler:
             ECSTaskError: If task fails to reach RUNNING state within timeout
         """
         task_id = task_arn.split('/')[-1]
-        start_time = time.time()
         
         logger.info(f"Waiting for task {task_id} to reach RUNNING state...")
         
-        while (time.time() - start_time) < timeout:
+        def has_private_ip(task: Dict) -> bool:
+            if extract_private_ip(task):
+                return True
+            logger.warning(f"Task {task_id} is RUNNING but IP not yet available")
+            return False
+        
+        try:
+            with phase('task_wait'):
+                waiter = self.task_poller.wait(
+                    cluster,
+                    task_arn,
+                    timeout=timeout,
+                    ready=has_private_ip,
+                    poll_interval=poll_interval,
+                    history_key=history_key
+                )
+                # describe_tasks calls are made by the poller thread
+                add_api_calls(waiter.polls)
+        except TimeoutError:
+            raise ECSTaskError(f"Timeout waiting for task {task_id} to reach RUNNING state after {timeout}s")
+        except TaskNotFoundError:
+            raise ECSTaskError(f"Task {task_id} not found")
+        except ClientError as e:
+            logger.error(f"Error describing task: {str(e)}")
+            raise ECSTaskError(f"Error checking task status: {str(e)}") from e
+        
+        task = waiter.task
+        logger.info(f"Task {task_id} resolved after {waiter.polls} polls")
+        record_status_phases(waiter.transitions, waiter.started_at, waiter.resolved_at)
+        
+        # Check if task stopped
+        if task.get('lastStatus') == 'STOPPED':
+            error_msg = stopped_message(task)
+            logger.error(error_msg)
+            raise ECSTaskError(error_msg)
+        
+        return extract_private_ip(task)
+    
+    def _wait_for_tasks_running(
+        self,
+        cluster: str,
+        task_arns: List[str],
+        container_name: str,
+        timeout: int = TASK_WAIT_TIMEOUT,
+        poll_interval: Optional[float] = None,
+        history_key: Optional[str] = None
+    ) -> Dict[str, Union[str, ECSTaskError]]:
+        """
+        Wait for several tasks of one cluster to reach RUNNING state
+        
+        Args:
+            cluster: ECS cluster name
+            task_arns: Task ARNs
+            container_name: Container name
+            timeout: Maximum time to wait in seconds (shared by all tasks)
+            poll_interval: Fixed time between polls in seconds (None = POLL_STRATEGY decides)
+            history_key: Key for learned time-to-RUNNING (task definition)
+            
+        Returns:
+            Mapping of task ARN to its private IP, or to the ECSTaskError
+            explaining why it did not reach RUNNING
+        """
+        deadline = time.monotonic() + timeout
+        waiters = self.task_poller.submit_many(
+            cluster,
+            task_arns,
+            ready=lambda task: bool(extract_private_ip(task)),
+            poll_interval=poll_interval,
+            history_key=history_key
+        )
+        
+        with phase('task_wait'):
+            results = self._collect_waiters(waiters, deadline, timeout)
+            # Waiters share the poller's batched describe_tasks calls
+            add_api_calls(max(waiter.polls for waiter in waiters))
+        
+        # The last task to resolve determines how long the start waited
+        resolved = [waiter for waiter in waiters if waiter.resolved_at is not None]
+        if resolved:
+            slowest = max(resolved, key=lambda waiter: waiter.resolved_at)
+            record_status_phases(slowest.transitions, slowest.started_at, slowest.resolved_at)
+        
+        return results
+    
+    def _collect_waiters(
+        self,
+        waiters: List[TaskWaiter],
+        deadline: float,
+        timeout: int
+    ) -> Dict[str, Union[str, ECSTaskError]]:
+        """Wait for submitted waiters and map each task ARN to its IP or error"""
+        results: Dict[str, Union[str, ECSTaskError]] = {}
+        for waiter in waiters:
+            task_id = waiter.task_arn.split('/')[-1]
             try:
-                # Describe the task
-                response = self.ecs_client.describe_tasks(
-                    cluster=cluster,
-                    tasks=[task_arn]
+                self.task_poller.result(waiter, max(0.0, deadline - time.monotonic()))
+            except TimeoutError:
+                results[waiter.task_arn] = ECSTaskError(
+                    f"Timeout waiting for task {task_id} to reach RUNNING state after {timeout}s"
                 )
-                
-                tasks = response.get('tasks', [])
-                if not tasks:
-                    raise ECSTaskError(f"Task {task_id} not found")
-                
-                task = tasks[0]
-                last_status = task.get('lastStatus', '')
-                desired_status = task.get('desiredStatus', '')
-                
-                logger.debug(f"Task {task_id} status: lastStatus={last_status}, desiredStatus={desired_status}")
-                
-                # Check if task stopped
-                if last_status == 'STOPPED':
-                    stop_reason = task.get('stoppedReason', 'Unknown')
-                    containers = task.get('containers', [])
-                    container_reasons = [
-                        f"{c.get('name')}: {c.get('reason', 'N/A')}"
-                        for c in containers if c.get('reason')
-                    ]
-                    error_msg = f"Task {task_id} stopped. Reason: {stop_reason}. Container reasons: {container_reasons}"
-                    logger.error(error_msg)
-                    raise ECSTaskError(error_msg)
-                
-                # Check if task is running
-                if last_status == 'RUNNING':
-                    # Extract private IP from network interface
-                    private_ip = self._extract_private_ip(task)
-                    if private_ip:
-                        return private_ip
-                    else:
-                        logger.warning(f"Task {task_id} is RUNNING but IP not yet available")
-                
-                # Wait before next poll
-                time.sleep(poll_interval)
-                
+                continue
+            except TaskNotFoundError:
+                results[waiter.task_arn] = ECSTaskError(f"Task {task_id} not found")
+                continue
             except ClientError as e:
-                logger.error(f"Error describing task: {str(e)}")
-                raise ECSTaskError(f"Error checking task status: {str(e)}") from e
+                results[waiter.task_arn] = ECSTaskError(f"Error checking task status: {str(e)}")
+                continue
+            
+            if waiter.task.get('lastStatus') == 'STOPPED':
+                results[waiter.task_arn] = ECSTaskError(stopped_message(waiter.task))
+            else:
+                results[waiter.task_arn] = extract_private_ip(waiter.task)
         
-        # Timeout reached
-        raise ECSTaskError(f"Timeout waiting for task {task_id} to reach RUNNING state after {timeout}s")
+        return results
     
-    def _extract_private_ip(self, task: Dict) -> Optional[str]:
+    def find_running_tasks(
+        self,
+        cluster: str,
+        task_definition: str,
+        private_ips: Optional[Set[str]] = None
+    ) -> List[Tuple[str, str]]:
         """
-        Extract private IP address from task details (awsvpc mode)
+        Find RUNNING tasks of a task definition, optionally only those with given IPs
         
         Args:
-            task: Task description from describe_tasks
+            cluster: ECS cluster name
+            task_definition: Task definition family:revision, family or ARN
+            private_ips: Only return tasks with one of these private IPs
             
         Returns:
-            Private IP address or None if not found
+            List of (task_arn, private_ip) tuples
+            
+        Raises:
+            ECSTaskError: If the tasks cannot be listed or described
         """
-        # For awsvpc network mode, the task has network interfaces attached
-        attachments = task.get('attachments', [])
-        
-        for attachment in attachments:
-            if attachment.get('type') == 'ElasticNetworkInterface':
-                details = attachment.get('details', [])
-                for detail in details:
-                    if detail.get('name') == 'privateIPv4Address':
-                        return detail.get('value')
-        
-        # Alternative: check containers for network bindings (for bridge/host mode)
-        containers = task.get('containers', [])
-        for container in containers:
-            network_interfaces = container.get('networkInterfaces', [])
-            if network_interfaces:
-                return network_interfaces[0].get('privateIpv4Address')
-        
-        return None
+        family = task_definition.split('/')[-1].split(':')[0]
+        
+        try:
+            task_arns: List[str] = []
+            paginator = self.ecs_client.get_paginator('list_tasks')
+            for page in paginator.paginate(cluster=cluster, family=family, desiredStatus='RUNNING'):
+                task_arns.extend(page.get('taskArns', []))
+            
+            found: List[Tuple[str, str]] = []
+            for i in range(0, len(task_arns), DESCRIBE_TASKS_MAX_ARNS):
+                response = self.ecs_client.describe_tasks(
+                    cluster=cluster,
+                    tasks=task_arns[i:i + DESCRIBE_TASKS_MAX_ARNS]
+                )
+                for task in response.get('tasks', []):
+                    private_ip = extract_private_ip(task)
+                    if (
+                        task.get('lastStatus') == 'RUNNING'
+                        and private_ip
+                        and (private_ips is None or private_ip in private_ips)
+                        and matches_task_definition(task.get('taskDefinitionArn', ''), task_definition)
+                    ):
+                        found.append((task['taskArn'], private_ip))
+            
+            return found
+            
+        except ClientError as e:
+            logger.error(f"Error listing running tasks: {str(e)}")
+            raise ECSTaskError(f"Error listing running tasks: {str(e)}") from e
     
     def get_task_details(self, cluster: str, task_arn: str) -> Dict:
         """
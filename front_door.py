@@ -0,0 +1,476 @@
+"""
+On-Demand Front Door
+HTTP entry point (ALB Lambda target or API Gateway proxy integration) that
+starts a scaled-to-zero engine when a request for it arrives
+
+A request for /<service> (or ?service=<service>) is answered with:
+
+- 200 when the service has a healthy target,
+- 503 with Retry-After while it starts. The first request for a service that
+  is down triggers the start; every other request joins it,
+- 404 for an unknown service and 502 when AWS cannot be read or the start fails.
+
+With ?wait=true or a "Prefer: wait" header the request is held until the
+service is healthy or FRONT_DOOR_HOLD_TIMEOUT passes.
+
+Concurrent requests in one container share a single start (StartCoalescer).
+Across containers a start in flight is seen in ECS and the target group: a
+service with an "initial" target or a recently created task is reported as
+starting and not started again.
+
+Starts are sent to the start Lambda (FRONT_DOOR_START_FUNCTION) as
+asynchronous invocations, or run in this container with lambda_function's
+handler when no function is configured (local runs).
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from aws_clients import get_client
+from config import (
+    AWS_REGION,
+    FRONT_DOOR_HOLD_TIMEOUT,
+    FRONT_DOOR_POLL_INTERVAL,
+    FRONT_DOOR_PROBE_TTL,
+    FRONT_DOOR_RETRY_AFTER,
+    FRONT_DOOR_START_FUNCTION,
+    FRONT_DOOR_START_GRACE,
+    LOG_LEVEL,
+    get_all_service_names,
+    get_service_config,
+)
+from ecs_handler import ECSHandler, ECSTaskError
+from lambda_function import lambda_handler as start_lambda_handler
+from resolution_cache import ResolutionError, with_container_port
+from target_group_handler import TargetGroupHandler, TargetGroupError
+from task_poller import DESCRIBE_TASKS_MAX_ARNS
+from throttling import DEFAULT_THROTTLE
+from warm_pool import WARM_POOL_STARTED_BY
+
+logger = logging.getLogger()
+logger.setLevel(getattr(logging, LOG_LEVEL))
+
+# Service states reported by FrontDoor.service_state
+READY = 'ready'
+STARTING = 'starting'
+DOWN = 'down'
+
+# lastStatus values of a task that is still being started
+PENDING_TASK_STATES = ('PROVISIONING', 'PENDING', 'ACTIVATING')
+
+STATUS_DESCRIPTIONS = {
+    200: '200 OK',
+    400: '400 Bad Request',
+    404: '404 Not Found',
+    500: '500 Internal Server Error',
+    502: '502 Bad Gateway',
+    503: '503 Service Unavailable',
+}
+
+
+class FrontDoorError(Exception):
+    """Raised when a start triggered by the front door fails"""
+    pass
+
+
+def start_event(service: str) -> Dict[str, Any]:
+    """
+    Build the start event sent for a service
+    
+    The idempotency key changes once per start grace period, so starts sent
+    by several containers within one period collapse into one on a warm
+    start Lambda container.
+    """
+    return {
+        'source': 'custom.app',
+        'detail-type': 'Start ECS Task',
+        'detail': {
+            'service': service,
+            'idempotencyKey': f"front-door-{int(time.time() // FRONT_DOOR_START_GRACE)}",
+        }
+    }
+
+
+def launch_start(service: str) -> Dict[str, Any]:
+    """
+    Start a service: invoke the start Lambda asynchronously, or start it here
+    
+    Args:
+        service: Service name
+    
+    Returns:
+        {"invoked": function} or the body of the in-process start
+    
+    Raises:
+        FrontDoorError: If the in-process start fails
+        ClientError: If the start Lambda cannot be invoked
+    """
+    event = start_event(service)
+    
+    if FRONT_DOOR_START_FUNCTION:
+        get_client('lambda').invoke(
+            FunctionName=FRONT_DOOR_START_FUNCTION,
+            InvocationType='Event',
+            Payload=json.dumps(event).encode()
+        )
+        logger.info(f"Invoked {FRONT_DOOR_START_FUNCTION} to start {service}")
+        return {'invoked': FRONT_DOOR_START_FUNCTION}
+    
+    response = start_lambda_handler(event, None)
+    if response['statusCode'] >= 400:
+        raise FrontDoorError(f"Start of {service} failed: {response['body'].get('error')}")
+    return response['body']
+
+
+class StartCoalescer:
+    """
+    Keeps at most one start per service in flight in this container
+    
+    The first caller for a service submits the launch; callers arriving
+    while it runs, or within grace seconds after it was triggered, get the
+    same future instead of launching again. A failed launch is joined (and
+    its error reported) for retry_delay seconds, then the next request tries
+    again.
+    """
+    
+    def __init__(
+        self,
+        launch: Callable[[str], Any] = launch_start,
+        grace: float = FRONT_DOOR_START_GRACE,
+        retry_delay: float = FRONT_DOOR_RETRY_AFTER,
+        max_workers: int = 4
+    ):
+        """
+        Initialize start coalescer
+        
+        Args:
+            launch: Function starting a service by name
+            grace: Seconds a triggered start is joined instead of started again
+            retry_delay: Seconds a failed start is joined before it is retried
+            max_workers: Launches run concurrently for different services
+        """
+        self.launch = launch
+        self.grace = grace
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='front-door')
+        self._starts: Dict[str, Tuple[float, Future]] = {}
+        self._lock = threading.Lock()
+    
+    def start(self, service: str) -> Tuple[Future, bool]:
+        """
+        Join the start of a service in flight, or trigger one
+        
+        Args:
+            service: Service name
+        
+        Returns:
+            (future of the launch, True if this call triggered it)
+        """
+        with self._lock:
+            entry = self._starts.get(service)
+            if entry is not None and not self._expired(*entry):
+                return entry[1], False
+            
+            future = self._executor.submit(self.launch, service)
+            self._starts[service] = (time.monotonic(), future)
+            logger.info(f"Triggered start of {service}")
+            return future, True
+    
+    def failure(self, service: str) -> Optional[BaseException]:
+        """Get the error of the service's last launch if it failed"""
+        with self._lock:
+            entry = self._starts.get(service)
+        if entry is None or not entry[1].done():
+            return None
+        return entry[1].exception()
+    
+    def _expired(self, triggered_at: float, future: Future) -> bool:
+        elapsed = time.monotonic() - triggered_at
+        if future.done() and future.exception() is not None:
+            return elapsed >= self.retry_delay
+        return elapsed >= self.grace
+    
+    def clear(self) -> None:
+        """Forget all starts (used by tests)"""
+        with self._lock:
+            self._starts.clear()
+
+
+class FrontDoor:
+    """
+    Probes services and starts those that are down
+    
+    Probed states are cached for probe_ttl seconds, so a burst of requests
+    costs one describe_target_health call per service. Held requests share a
+    probe per poll interval.
+    """
+    
+    def __init__(
+        self,
+        ecs_handler: Optional[ECSHandler] = None,
+        tg_handler: Optional[TargetGroupHandler] = None,
+        coalescer: Optional[StartCoalescer] = None,
+        probe_ttl: float = FRONT_DOOR_PROBE_TTL,
+        poll_interval: float = FRONT_DOOR_POLL_INTERVAL
+    ):
+        """
+        Initialize front door
+        
+        Args:
+            ecs_handler: ECS handler used to look for tasks being started
+            tg_handler: Target group handler used to read target health
+            coalescer: Coalescer the starts go through
+            probe_ttl: Seconds a probed state is reused
+            poll_interval: Seconds between probes of a held request
+        """
+        self.ecs_handler = ecs_handler or ECSHandler(region=AWS_REGION)
+        self.tg_handler = tg_handler or TargetGroupHandler(region=AWS_REGION)
+        self.coalescer = coalescer or StartCoalescer()
+        self.probe_ttl = probe_ttl
+        self.poll_interval = poll_interval
+        self._states: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+    
+    def open(self, service: str, hold_timeout: float = 0.0) -> Dict[str, Any]:
+        """
+        Make sure a service is up or being started
+        
+        Args:
+            service: Service name
+            hold_timeout: Seconds to wait for the service to become ready
+        
+        Returns:
+            {"service", "state", "triggered", "waitedSeconds"} dictionary
+        
+        Raises:
+            ValueError: If the service is unknown
+            FrontDoorError: If a start this container triggered failed
+            ECSTaskError, TargetGroupError, ResolutionError: If AWS cannot be read
+        """
+        config = with_container_port(get_service_config(service), self.ecs_handler.ecs_client)
+        started = time.monotonic()
+        triggered = False
+        
+        state = self.service_state(service, config)
+        if state == DOWN:
+            _, triggered = self.coalescer.start(service)
+            state = STARTING
+            self._remember(service, STARTING)
+        
+        deadline = started + hold_timeout
+        while state != READY and time.monotonic() < deadline:
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+            self._raise_if_failed(service)
+            state = self.service_state(service, config, max_age=self.poll_interval)
+            if state == DOWN:
+                # The start was lost (e.g. its tasks stopped); join or trigger another
+                self.coalescer.start(service)
+                state = STARTING
+        
+        if state != READY:
+            self._raise_if_failed(service)
+        
+        return {
+            'service': service,
+            'state': state,
+            'triggered': triggered,
+            'waitedSeconds': round(time.monotonic() - started, 3),
+        }
+    
+    def service_state(self, service: str, config: Dict[str, Any], max_age: Optional[float] = None) -> str:
+        """
+        Get whether a service is ready, starting or down
+        
+        Args:
+            service: Service name
+            config: Service configuration with container_port
+            max_age: Oldest cached state accepted in seconds (defaults to probe_ttl)
+        
+        Returns:
+            READY, STARTING or DOWN
+        """
+        max_age = self.probe_ttl if max_age is None else max_age
+        with self._lock:
+            cached = self._states.get(service)
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        
+        state = self._probe(config)
+        self._remember(service, state)
+        return state
+    
+    def _remember(self, service: str, state: str) -> None:
+        with self._lock:
+            self._states[service] = (time.monotonic(), state)
+    
+    def _raise_if_failed(self, service: str) -> None:
+        error = self.coalescer.failure(service)
+        if error is not None:
+            raise FrontDoorError(str(error)) from error
+    
+    def _probe(self, config: Dict[str, Any]) -> str:
+        """Read target health, then ECS when no target is serving"""
+        health = self.tg_handler.get_target_health(config['target_group_arn'])
+        states = {
+            target.get('state') for target in health.get('targets', [])
+            if target.get('port') == config['container_port']
+        }
+        if 'healthy' in states:
+            return READY
+        if 'initial' in states or self._tasks_starting(config):
+            return STARTING
+        return DOWN
+    
+    def _tasks_starting(self, config: Dict[str, Any]) -> bool:
+        """
+        Check for a task of the service that is pending or was created within
+        the start grace period, ignoring warm pool tasks
+        
+        Raises:
+            ECSTaskError: If the tasks cannot be listed or described
+        """
+        ecs_client = self.ecs_handler.ecs_client
+        cluster = config['cluster']
+        family = config['task_definition'].split('/')[-1].split(':')[0]
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.coalescer.grace)
+        
+        try:
+            task_arns = []
+            paginator = ecs_client.get_paginator('list_tasks')
+            for page in paginator.paginate(cluster=cluster, family=family, desiredStatus='RUNNING'):
+                task_arns.extend(page.get('taskArns', []))
+            
+            for i in range(0, len(task_arns), DESCRIBE_TASKS_MAX_ARNS):
+                response = ecs_client.describe_tasks(cluster=cluster, tasks=task_arns[i:i + DESCRIBE_TASKS_MAX_ARNS])
+                for task in response.get('tasks', []):
+                    if task.get('startedBy') == WARM_POOL_STARTED_BY:
+                        continue
+                    created_at = task.get('createdAt')
+                    if task.get('lastStatus') in PENDING_TASK_STATES or (created_at and created_at >= cutoff):
+                        return True
+            return False
+        
+        except ClientError as e:
+            logger.error(f"Error listing tasks of {family}: {str(e)}")
+            raise ECSTaskError(f"Error listing tasks of {family}: {str(e)}") from e
+
+
+def parse_request(event: Dict[str, Any]) -> Tuple[Optional[str], bool]:
+    """
+    Get the service and hold flag of an ALB, API Gateway REST or HTTP API event
+    
+    The service is the "service" path parameter, the "service" query
+    parameter, or the last path segment.
+    
+    Returns:
+        (service name or None, True if the request asks to be held)
+    """
+    query = event.get('queryStringParameters') or {
+        key: values[-1] for key, values in (event.get('multiValueQueryStringParameters') or {}).items() if values
+    }
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+    if not headers:
+        headers = {
+            key.lower(): values[-1] for key, values in (event.get('multiValueHeaders') or {}).items() if values
+        }
+    
+    path = event.get('rawPath') or event.get('path') or ''
+    segments = [segment for segment in path.split('/') if segment]
+    service = (
+        (event.get('pathParameters') or {}).get('service')
+        or query.get('service')
+        or (segments[-1] if segments else None)
+    )
+    
+    hold = query.get('wait', '').lower() in ('1', 'true') or 'wait' in headers.get('prefer', '').lower()
+    return (service.lower() if service else None), hold
+
+
+def http_response(
+    event: Dict[str, Any],
+    status_code: int,
+    body: Dict[str, Any],
+    retry_after: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Build a proxy response in the shape the invoking ALB or API Gateway expects
+    
+    Args:
+        event: Request event
+        status_code: HTTP status code
+        body: JSON body
+        retry_after: Optional Retry-After header in seconds
+    
+    Returns:
+        Response dictionary
+    """
+    headers = {'Content-Type': 'application/json'}
+    if retry_after is not None:
+        headers['Retry-After'] = str(retry_after)
+    
+    response: Dict[str, Any] = {
+        'statusCode': status_code,
+        'body': json.dumps(body),
+        'isBase64Encoded': False,
+    }
+    if 'multiValueHeaders' in event:
+        response['multiValueHeaders'] = {key: [value] for key, value in headers.items()}
+    else:
+        response['headers'] = headers
+    if 'elb' in event.get('requestContext', {}):
+        response['statusDescription'] = STATUS_DESCRIPTIONS.get(status_code, str(status_code))
+    return response
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for ALB target group and API Gateway proxy requests
+    
+    Expected request:
+        GET /<service>[?wait=true]
+        GET /engines?service=<service>     (with "Prefer: wait" to hold)
+    
+    Args:
+        event: ALB or API Gateway proxy event
+        context: Lambda context
+    
+    Returns:
+        Proxy response; 503 with Retry-After while the service starts
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
+    
+    service, hold = parse_request(event)
+    if not service:
+        return http_response(event, 400, {
+            'error': f"Missing service. Valid services: {', '.join(get_all_service_names())}"
+        })
+    
+    try:
+        result = DEFAULT_FRONT_DOOR.open(service, FRONT_DOOR_HOLD_TIMEOUT if hold else 0.0)
+    
+    except ValueError as e:
+        return http_response(event, 404, {'error': str(e)})
+    
+    except (FrontDoorError, ECSTaskError, TargetGroupError, ResolutionError, ClientError) as e:
+        logger.error(f"Front door error for {service}: {str(e)}")
+        return http_response(event, 502, {'service': service, 'error': str(e)})
+    
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
+        return http_response(event, 500, {'service': service, 'error': f"Unexpected error: {str(e)}"})
+    
+    logger.info(f"Front door: {json.dumps(result)}")
+    if result['state'] == READY:
+        return http_response(event, 200, result)
+    return http_response(event, 503, result, retry_after=FRONT_DOOR_RETRY_AFTER)
+
+
+# Shared by all invocations in this container so concurrent requests coalesce
+DEFAULT_FRONT_DOOR = FrontDoor()
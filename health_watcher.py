@@ -0,0 +1,221 @@
+"""
+Batched Target Health Watching
+Tracks every target waiting to become healthy per target group and checks them
+with one describe_target_health call per target group per tick, handing each
+final state back to the caller waiting on it
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from polling import BatchedPoller, PollScheduler, DEFAULT_SCHEDULER
+
+logger = logging.getLogger()
+
+# Target states that end a wait; anything else (initial, unused, draining, ...) keeps polling
+FINAL_STATES = ('healthy', 'unhealthy')
+
+
+class TargetWaiter:
+    """State for one caller waiting on one target"""
+    
+    def __init__(
+        self,
+        target_group_arn: str,
+        private_ip: str,
+        port: int,
+        poll_interval: Optional[float] = None
+    ):
+        """
+        Initialize target waiter
+        
+        Args:
+            target_group_arn: ARN of the target group
+            private_ip: Private IP of the target
+            port: Target port
+            poll_interval: Fixed time between polls in seconds (None = scheduler decides)
+        """
+        self.target_group_arn = target_group_arn
+        self.target = (private_ip, port)
+        self.poll_interval = poll_interval
+        self.history_key = f"health:{target_group_arn}"
+        self.started_at = time.monotonic()
+        self.next_poll_at = self.started_at
+        self.polls = 0
+        self.health: Dict[str, Any] = {'ip': private_ip, 'port': port, 'state': 'unknown'}
+        self.done = threading.Event()
+    
+    @property
+    def state(self) -> str:
+        """Last observed target health state"""
+        return self.health.get('state', 'unknown')
+    
+    def resolve(self) -> None:
+        """Wake the caller; health holds the final state"""
+        self.done.set()
+
+
+class HealthWatcher(BatchedPoller):
+    """
+    Shared watcher for targets waiting on their health checks
+    
+    Callers block in wait_many() while a single background thread polls all
+    pending targets. Each tick groups due targets by target group and issues
+    one describe_target_health call per group covering all of them. A target
+    is resolved as soon as it reports healthy or unhealthy. The thread exits
+    as soon as nothing is pending (see BatchedPoller).
+    """
+    
+    thread_name = 'target-health-watcher'
+    
+    def __init__(
+        self,
+        elbv2_client: Any,
+        poll_interval: Optional[float] = None,
+        scheduler: PollScheduler = DEFAULT_SCHEDULER
+    ):
+        """
+        Initialize health watcher
+        
+        Args:
+            elbv2_client: boto3 ELBv2 client
+            poll_interval: Default fixed time between polls (None = scheduler decides)
+            scheduler: Scheduler choosing adaptive poll intervals
+        """
+        super().__init__(poll_interval, scheduler)
+        self.elbv2_client = elbv2_client
+    
+    @staticmethod
+    def _group(waiter: TargetWaiter) -> str:
+        return waiter.target_group_arn
+    
+    @staticmethod
+    def _key(waiter: TargetWaiter) -> Tuple[str, int]:
+        return waiter.target
+    
+    def wait_many(
+        self,
+        target_group_arn: str,
+        targets: List[Tuple[str, int]],
+        timeout: float,
+        poll_interval: Optional[float] = None
+    ) -> List[TargetWaiter]:
+        """
+        Block until every target is healthy or unhealthy, or the timeout expires
+        
+        Args:
+            target_group_arn: ARN of the target group
+            targets: List of (private_ip, port) pairs
+            timeout: Maximum time to wait in seconds (shared by all targets)
+            poll_interval: Fixed time between polls (None = scheduler decides)
+        
+        Returns:
+            Waiters in targets order; unresolved waiters (timeout) hold the
+            last observed state
+        """
+        waiters = self.submit_many(target_group_arn, targets, poll_interval=poll_interval)
+        deadline = time.monotonic() + timeout
+        
+        for waiter in waiters:
+            if not waiter.done.wait(max(0.0, deadline - time.monotonic())):
+                self._discard(waiter)
+                if not waiter.done.is_set():
+                    self._record(waiter)
+        
+        return waiters
+    
+    def submit_many(
+        self,
+        target_group_arn: str,
+        targets: List[Tuple[str, int]],
+        poll_interval: Optional[float] = None
+    ) -> List[TargetWaiter]:
+        """
+        Start tracking several targets of one target group without blocking
+        
+        Args:
+            target_group_arn: ARN of the target group
+            targets: List of (private_ip, port) pairs
+            poll_interval: Fixed time between polls (None = scheduler decides)
+        
+        Returns:
+            Waiters in targets order
+        """
+        waiters = [
+            TargetWaiter(
+                target_group_arn,
+                ip,
+                port,
+                poll_interval if poll_interval is not None else self.poll_interval
+            )
+            for ip, port in targets
+        ]
+        self._track(target_group_arn, waiters)
+        return waiters
+    
+    def _poll_group(
+        self,
+        target_group_arn: str,
+        targets: Dict[Tuple[str, int], List[TargetWaiter]]
+    ) -> None:
+        """Describe all pending targets of one target group and resolve finished waiters"""
+        try:
+            self.describe_calls += 1
+            response = self.elbv2_client.describe_target_health(
+                TargetGroupArn=target_group_arn,
+                Targets=[{'Id': ip, 'Port': port} for ip, port in targets]
+            )
+        except Exception as e:
+            # Transient errors keep the targets pending until their caller's timeout
+            logger.warning(f"Error checking health of {len(targets)} targets in {target_group_arn}: {str(e)}")
+            response = {}
+        
+        self._apply_response(targets, response)
+    
+    def _apply_response(self, targets: Dict[Tuple[str, int], List[TargetWaiter]], response: Dict[str, Any]) -> None:
+        """Record one describe_target_health response and resolve targets in a final state"""
+        now = time.monotonic()
+        by_target = {
+            (t.get('Target', {}).get('Id'), t.get('Target', {}).get('Port')): t.get('TargetHealth', {})
+            for t in response.get('TargetHealthDescriptions', [])
+        }
+        
+        for target, waiters in targets.items():
+            health = by_target.get(target)
+            for waiter in waiters:
+                waiter.polls += 1
+                if health is not None:
+                    waiter.health = {
+                        'ip': target[0],
+                        'port': target[1],
+                        'state': health.get('State'),
+                        'reason': health.get('Reason'),
+                        'description': health.get('Description')
+                    }
+            
+            state = waiters[0].state
+            logger.debug(f"Target {target[0]}:{target[1]} state: {state}")
+            
+            if state in FINAL_STATES:
+                if state == 'unhealthy':
+                    logger.warning(
+                        f"Target {target[0]}:{target[1]} is unhealthy. "
+                        f"Reason: {waiters[0].health.get('reason')}, "
+                        f"Description: {waiters[0].health.get('description')}"
+                    )
+                for waiter in waiters:
+                    self._discard(waiter)
+                    self._record(waiter)
+                    waiter.resolve()
+            else:
+                for waiter in waiters:
+                    waiter.next_poll_at = now + self._next_interval(waiter, waiter.state, now)
+    
+    def _record(self, waiter: TargetWaiter) -> None:
+        """Record poll stats (and the learned duration for healthy targets)"""
+        elapsed = time.monotonic() - waiter.started_at
+        ip, port = waiter.target
+        self.scheduler.record_wait(f"{ip}:{port}", waiter.polls, elapsed)
+        if waiter.state == 'healthy':
+            self.scheduler.record_duration(waiter.history_key, elapsed)
@@ -0,0 +1,187 @@
+"""
+Idempotent Start Support
+Remembers start responses by idempotency key and finds tasks that already
+serve a service, so duplicate or retried start events do not launch new tasks
+"""
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import IDEMPOTENCY_TTL
+
+logger = logging.getLogger()
+
+# Target states that count as an existing task serving the service.
+# "initial" covers a retry that arrives while the first start's health checks run.
+SERVING_STATES = ('healthy', 'initial')
+
+# Key locks and known targets kept per container. Keys such as the front
+# door's change every grace period, so the least recently used entries are
+# dropped instead of piling up across warm invocations.
+MAX_KEY_LOCKS = 1000
+MAX_KNOWN_TASKS = 1000
+
+
+class IdempotencyStore:
+    """
+    Container-local store of start responses and known target tasks
+    
+    Responses are kept for ttl seconds per idempotency key. The store also
+    remembers which task ARN was registered at each target so a reuse check
+    can skip listing ECS tasks when every serving target is already known.
+    Lambda containers do not share memory, so the key only deduplicates
+    events that land on the same warm container; the target health check in
+    find_serving_tasks covers the rest.
+    """
+    
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL):
+        """
+        Initialize idempotency store
+        
+        Args:
+            ttl: Time in seconds a response is remembered
+        """
+        self.ttl = ttl
+        self._responses: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._key_locks: 'OrderedDict[str, threading.Lock]' = OrderedDict()
+        self._tasks: 'OrderedDict[Tuple[str, str, int], str]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def lock(self, key: str) -> threading.Lock:
+        """Get the lock serializing starts that share an idempotency key"""
+        with self._lock:
+            key_lock = self._key_locks.pop(key, None) or threading.Lock()
+            self._key_locks[key] = key_lock
+            if len(self._key_locks) > MAX_KEY_LOCKS:
+                # Only idle locks are dropped so a start in progress keeps its lock
+                idle = [k for k, l in self._key_locks.items() if k != key and not l.locked()]
+                for stale in idle[:len(self._key_locks) - MAX_KEY_LOCKS]:
+                    del self._key_locks[stale]
+            return key_lock
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the remembered response for a key
+        
+        Args:
+            key: Idempotency key
+        
+        Returns:
+            Copy of the response body, or None if unknown or expired
+        """
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._responses[key]
+                return None
+            return copy.deepcopy(entry[1])
+    
+    def put(self, key: str, body: Dict[str, Any]) -> None:
+        """
+        Remember the response for a key
+        
+        Args:
+            key: Idempotency key
+            body: Response body of the completed start
+        """
+        with self._lock:
+            now = time.monotonic()
+            # Drop expired entries so long-lived containers do not grow unbounded
+            for expired in [k for k, (expires, _) in self._responses.items() if expires <= now]:
+                del self._responses[expired]
+            self._responses[key] = (now + self.ttl, copy.deepcopy(body))
+    
+    def remember_task(self, target_group_arn: str, private_ip: str, port: int, task_arn: str) -> None:
+        """Record which task was registered at a target"""
+        with self._lock:
+            self._tasks.pop((target_group_arn, private_ip, port), None)
+            self._tasks[(target_group_arn, private_ip, port)] = task_arn
+            while len(self._tasks) > MAX_KNOWN_TASKS:
+                self._tasks.popitem(last=False)
+    
+    def known_task(self, target_group_arn: str, private_ip: str, port: int) -> Optional[str]:
+        """Get the task recorded for a target, if any"""
+        with self._lock:
+            return self._tasks.get((target_group_arn, private_ip, port))
+    
+    def clear(self) -> None:
+        """Forget all responses and targets (used by tests)"""
+        with self._lock:
+            self._responses.clear()
+            self._key_locks.clear()
+            self._tasks.clear()
+
+
+def find_serving_tasks(
+    request: Dict[str, Any],
+    ecs_handler: Any,
+    tg_handler: Any,
+    store: Optional[IdempotencyStore] = None
+) -> List[Dict[str, Any]]:
+    """
+    Find tasks of a service that are registered and serving in its target group
+    
+    Costs one describe_target_health call when the target group has no
+    serving target or every serving target is known to the store, plus
+    list_tasks/describe_tasks otherwise.
+    
+    Args:
+        request: Resolved start parameters
+        ecs_handler: ECS handler used to look up running tasks
+        tg_handler: Target group handler used to read target health
+        store: Store of known target tasks (defaults to DEFAULT_STORE)
+    
+    Returns:
+        List of {"taskArn", "privateIp", "healthStatus"} dictionaries,
+        healthy targets first
+    
+    Raises:
+        ECSTaskError: If running tasks cannot be listed
+        TargetGroupError: If target health cannot be read
+    """
+    store = store or DEFAULT_STORE
+    target_group_arn = request['target_group_arn']
+    port = request['container_port']
+    
+    health = tg_handler.get_target_health(target_group_arn)
+    serving = [
+        target for target in health.get('targets', [])
+        if target.get('port') == port and target.get('state') in SERVING_STATES
+    ]
+    if not serving:
+        return []
+    
+    serving.sort(key=lambda target: SERVING_STATES.index(target['state']))
+    
+    task_by_ip = {
+        target['ip']: store.known_task(target_group_arn, target['ip'], port)
+        for target in serving
+    }
+    if not all(task_by_ip.values()):
+        running = ecs_handler.find_running_tasks(
+            request['cluster'],
+            request['task_definition'],
+            private_ips=set(task_by_ip)
+        )
+        task_by_ip = {}
+        for task_arn, private_ip in running:
+            task_by_ip[private_ip] = task_arn
+            store.remember_task(target_group_arn, private_ip, port, task_arn)
+    
+    return [
+        {
+            'taskArn': task_by_ip[target['ip']],
+            'privateIp': target['ip'],
+            'healthStatus': target
+        }
+        for target in serving if task_by_ip.get(target['ip'])
+    ]
+
+
+# Shared by all invocations in this container
+DEFAULT_STORE = IdempotencyStore()
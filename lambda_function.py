@@ -6,16 +6,40 @@ Triggered by EventBridge events
 import json
 import logging
 import os
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional
 
-from config import get_service_config, get_all_service_names, LOG_LEVEL, AWS_REGION
+from aws_clients import preload
+from config import (
+    get_service_config,
+    get_all_service_names,
+    get_target_groups,
+    LOG_LEVEL,
+    AWS_REGION,
+    DEFER_REGISTRATION,
+    MAX_PARALLEL_STARTS,
+    MAX_TASKS_PER_START,
+    PRELOAD_CLIENTS,
+)
 from ecs_handler import ECSHandler, ECSTaskError
-from target_group_handler import TargetGroupHandler, TargetGroupError
+from idempotency import DEFAULT_STORE, find_serving_tasks
+from polling import DEFAULT_SCHEDULER
+from resolution_cache import launch_task_definition
+from target_group_handler import TargetGroupHandler, TargetGroupError, map_target_groups
+from task_state_handler import start_pending_tasks
+from throttling import DEFAULT_THROTTLE
+from timing import phase, start_trace
+from warm_pool import WarmPool
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(getattr(logging, LOG_LEVEL))
 
+# Optional: create AWS clients during init instead of on the first request
+if PRELOAD_CLIENTS:
+    preload(PRELOAD_CLIENTS, AWS_REGION)
+
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -35,6 +59,22 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             "subnets": ["subnet-xxx"],
             "securityGroups": ["sg-xxx"],
             "port": 8080,
+            "waitForHealthy": false,
+            "desiredCount": 1,
+            "useWarmPool": true,
+            "reuseRunning": true,
+            "deferRegistration": false,
+            "refreshConfig": false,
+            "idempotencyKey": "optional-client-request-id"
+        }
+    }
+    
+    Multi-service format (services are started concurrently):
+    {
+        "source": "custom.app",
+        "detail-type": "Start ECS Task",
+        "detail": {
+            "services": ["auth", "pdf", {"service": "fa", "port": 2531}],
             "waitForHealthy": false
         }
     }
@@ -47,6 +87,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         Response dictionary with status and details
     """
     logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
     
     try:
         # Parse event
@@ -58,6 +99,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 status_code=400
             )
         
+        # Multi-service fan-out mode
+        if 'services' in detail:
+            return start_services(detail)
+        
         # Get service name
         service_name = detail.get('service', '').lower()
         
@@ -68,96 +113,22 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 status_code=400
             )
         
-        # Get service configuration (with optional overrides from event)
+        # Resolve configuration (with optional overrides from event)
         try:
-            config = get_service_config(service_name)
+            request = resolve_start_request(service_name, detail)
         except ValueError as e:
             return error_response(str(e), status_code=400)
         
-        # Apply overrides from event if provided
-        cluster = detail.get('cluster', config['cluster'])
-        task_definition = detail.get('taskDefinition', config['task_definition'])
-        target_group_arn = detail.get('targetGroupArn', config['target_group_arn'])
-        subnets = detail.get('subnets', config['subnets'])
-        security_groups = detail.get('securityGroups', config['security_groups'])
-        container_name = detail.get('containerName', config['container_name'])
-        container_port = detail.get('port', config['container_port'])
-        wait_for_healthy = detail.get('waitForHealthy', False)
-        
-        # Validate required fields
-        if not target_group_arn:
-            return error_response(
-                f"Target group ARN not configured for service: {service_name}",
-                status_code=400
-            )
-        
-        if not subnets:
-            return error_response(
-                f"Subnets not configured for service: {service_name}",
-                status_code=400
-            )
-        
-        if not security_groups:
-            return error_response(
-                f"Security groups not configured for service: {service_name}",
-                status_code=400
-            )
-        
-        logger.info(
-            f"Starting task for service '{service_name}': "
-            f"cluster={cluster}, task_def={task_definition}, "
-            f"port={container_port}"
-        )
-        
         # Initialize handlers
         ecs_handler = ECSHandler(region=AWS_REGION)
         tg_handler = TargetGroupHandler(region=AWS_REGION)
         
-        # Step 1: Start ECS task
-        logger.info("Step 1: Starting ECS task...")
-        task_arn, private_ip = ecs_handler.start_task(
-            cluster=cluster,
-            task_definition=task_definition,
-            subnets=subnets,
-            security_groups=security_groups,
-            container_name=container_name,
-            container_port=container_port
-        )
-        
-        task_id = task_arn.split('/')[-1]
-        logger.info(f"Task started successfully: {task_id} with IP {private_ip}")
-        
-        # Step 2: Register with target group
-        logger.info("Step 2: Registering task with target group...")
-        tg_handler.register_target(
-            target_group_arn=target_group_arn,
-            private_ip=private_ip,
-            port=container_port,
-            wait_for_healthy=wait_for_healthy
-        )
-        
-        logger.info(f"Task registered with target group successfully")
-        
-        # Get final target health status
-        health_status = tg_handler.get_target_health(
-            target_group_arn,
-            private_ip,
-            container_port
-        )
+        body = start_service(request, ecs_handler, tg_handler)
         
         # Success response
         response = {
             'statusCode': 200,
-            'body': {
-                'message': f'Successfully started and registered {service_name} task',
-                'service': service_name,
-                'taskArn': task_arn,
-                'taskId': task_id,
-                'privateIp': private_ip,
-                'port': container_port,
-                'targetGroupArn': target_group_arn,
-                'healthStatus': health_status
-            }
+            'body': body
         }
         
         logger.info(f"Success: {json.dumps(response)}")
@@ -176,6 +147,641 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return error_response(f"Unexpected error: {str(e)}", status_code=500)
 
 
+def resolve_start_request(service_name: str, detail: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the start parameters for a service from config plus event overrides
+    
+    Args:
+        service_name: Name of the service (auth, pdf, fa, users, batch)
+        detail: Event detail containing optional overrides
+        
+    Returns:
+        Dictionary of resolved start parameters
+        
+    Raises:
+        ValueError: If the service is unknown or required fields are missing
+    """
+    config = get_service_config(service_name)
+    
+    # Apply overrides from event if provided
+    request = {
+        'service': service_name,
+        'cluster': detail.get('cluster', config['cluster']),
+        'task_definition': detail.get('taskDefinition', config['task_definition']),
+        'target_group_arn': detail.get('targetGroupArn', config['target_group_arn']),
+        # An explicit targetGroupArn replaces all of the service's target groups
+        'additional_target_groups': [] if 'targetGroupArn' in detail else config.get('additional_target_groups', []),
+        'subnets': detail.get('subnets', config['subnets']),
+        'security_groups': detail.get('securityGroups', config['security_groups']),
+        'container_name': detail.get('containerName', config['container_name']),
+        'container_port': detail.get('port', config['container_port']),
+        'wait_for_healthy': detail.get('waitForHealthy', False),
+        'count': detail.get('desiredCount', detail.get('count', 1)),
+        'warm_pool_size': config.get('warm_pool_size', 0),
+        'use_warm_pool': detail.get('useWarmPool', True),
+        'reuse_running': detail.get('reuseRunning', True),
+        'defer_registration': detail.get('deferRegistration', DEFER_REGISTRATION),
+        'refresh_config': detail.get('refreshConfig', False),
+        'idempotency_key': f"{service_name}:{detail['idempotencyKey']}" if detail.get('idempotencyKey') else None,
+    }
+    
+    # Validate required fields
+    if not request['target_group_arn']:
+        raise ValueError(f"Target group ARN not configured for service: {service_name}")
+    
+    if not request['subnets']:
+        raise ValueError(f"Subnets not configured for service: {service_name}")
+    
+    if not request['security_groups']:
+        raise ValueError(f"Security groups not configured for service: {service_name}")
+    
+    if not isinstance(request['count'], int) or not 1 <= request['count'] <= MAX_TASKS_PER_START:
+        raise ValueError(
+            f"Invalid task count for service {service_name}: {request['count']}. "
+            f"Must be between 1 and {MAX_TASKS_PER_START}"
+        )
+    
+    return request
+
+
+def resolve_launch_config(request: Dict[str, Any], ecs_handler: ECSHandler) -> Dict[str, Any]:
+    """
+    Pin the task definition and check the network of a start request
+    
+    Lookups are cached per container for RESOLUTION_CACHE_TTL, so warm starts
+    make no extra API calls; "refreshConfig": true drops the cached entries
+    first. container_name and container_port are taken from the task
+    definition when the config and event leave them unset.
+    
+    Args:
+        request: Resolved start parameters from resolve_start_request
+        ecs_handler: ECS handler used for the lookups
+        
+    Returns:
+        Copy of the request with task_definition_arn (task_definition keeps
+        the configured value, so reuse checks still match any revision)
+        
+    Raises:
+        ECSTaskError: If the task definition, container or network configuration is invalid
+    """
+    if request.get('refresh_config'):
+        ecs_handler.resolution_cache.invalidate()
+    
+    resolved = ecs_handler.resolve_task_definition(request['task_definition'], request['container_name'])
+    port = request['container_port'] if request['container_port'] is not None else resolved['containerPort']
+    if port is None:
+        raise ECSTaskError(
+            f"No container port configured for service {request['service']} "
+            f"and container {resolved['containerName']} has no port mapping"
+        )
+    ecs_handler.check_network(request['subnets'], request['security_groups'])
+    
+    return {
+        **request,
+        'task_definition_arn': resolved['taskDefinitionArn'],
+        'container_name': request['container_name'] or resolved['containerName'],
+        'container_port': port,
+    }
+
+
+def start_service(
+    request: Dict[str, Any],
+    ecs_handler: ECSHandler,
+    tg_handler: TargetGroupHandler
+) -> Dict[str, Any]:
+    """
+    Start a service unless the request was already handled or is already served
+    
+    A request with an idempotency key that completed in this container within
+    IDEMPOTENCY_TTL returns the remembered response. Otherwise, unless the
+    event sets "reuseRunning": false, tasks that are already registered and
+    serving in the target group are returned instead of starting new ones.
+    
+    The body includes a "timings" block with per-phase durations and API call
+    counts, which are also written to the log as EMF metrics.
+    
+    Args:
+        request: Resolved start parameters from resolve_start_request
+        ecs_handler: ECS handler used to start the task
+        tg_handler: Target group handler used to register the task
+        
+    Returns:
+        Response body describing the started (or reused) task
+        
+    Raises:
+        ECSTaskError: If the task fails to start
+        TargetGroupError: If target registration fails
+    """
+    idempotency_key = request.get('idempotency_key')
+    
+    with start_trace(request['service'], request['cluster']) as trace:
+        try:
+            with DEFAULT_STORE.lock(idempotency_key) if idempotency_key else nullcontext():
+                body = DEFAULT_STORE.get(idempotency_key) if idempotency_key else None
+                if body is not None:
+                    logger.info(f"[{request['service']}] Returning response for idempotency key {idempotency_key}")
+                    body['source'] = 'idempotency_key'
+                else:
+                    body = serve_start(request, ecs_handler, tg_handler)
+                    if idempotency_key:
+                        DEFAULT_STORE.put(idempotency_key, body)
+            
+            # Timings are not stored with the response, so a replay reports its own
+            body['timings'] = trace.timings()
+            return body
+        finally:
+            trace.emit()
+
+
+def serve_start(
+    request: Dict[str, Any],
+    ecs_handler: ECSHandler,
+    tg_handler: TargetGroupHandler
+) -> Dict[str, Any]:
+    """
+    Reuse serving tasks or launch new ones for a start request
+    
+    Args:
+        request: Resolved start parameters from resolve_start_request
+        ecs_handler: ECS handler used to start the task
+        tg_handler: Target group handler used to register the task
+        
+    Returns:
+        Response body describing the started (or reused) task
+    """
+    with phase('resolve_config'):
+        request = resolve_launch_config(request, ecs_handler)
+    
+    if request.get('reuse_running', True):
+        with phase('reuse_check'):
+            body = reuse_running_tasks(request, ecs_handler, tg_handler)
+        if body is not None:
+            return body
+    
+    try:
+        body = launch_service(request, ecs_handler, tg_handler)
+    except ECSTaskError:
+        # The cached revision may have been deregistered; look it up again next time
+        ecs_handler.resolution_cache.invalidate(request['task_definition'])
+        raise
+    # Deferred starts have no IP yet; the reuse check looks them up later
+    for task in body.get('tasks') or ([body] if body.get('privateIp') else []):
+        DEFAULT_STORE.remember_task(
+            request['target_group_arn'],
+            task['privateIp'],
+            request['container_port'],
+            task['taskArn']
+        )
+    return body
+
+
+def reuse_running_tasks(
+    request: Dict[str, Any],
+    ecs_handler: ECSHandler,
+    tg_handler: TargetGroupHandler
+) -> Optional[Dict[str, Any]]:
+    """
+    Build a response from tasks already serving the service, if there are enough
+    
+    Lookup errors are logged and treated as "nothing to reuse" so they never
+    block a start.
+    
+    Args:
+        request: Resolved start parameters from resolve_start_request
+        ecs_handler: ECS handler used to look up running tasks
+        tg_handler: Target group handler used to read target health
+        
+    Returns:
+        Response body describing the existing tasks, or None to start new ones
+    """
+    service_name = request['service']
+    count = request.get('count', 1)
+    
+    try:
+        serving = find_serving_tasks(request, ecs_handler, tg_handler, DEFAULT_STORE)
+    except Exception as e:
+        logger.warning(f"[{service_name}] Could not check for running tasks: {str(e)}")
+        return None
+    
+    if len(serving) < count:
+        if serving:
+            logger.info(f"[{service_name}] {len(serving)} tasks serving, {count} requested; starting new tasks")
+        return None
+    
+    tasks = [
+        {
+            'taskArn': task['taskArn'],
+            'taskId': task['taskArn'].split('/')[-1],
+            'privateIp': task['privateIp'],
+            'healthStatus': task['healthStatus']
+        }
+        for task in serving[:count]
+    ]
+    
+    logger.info(
+        f"[{service_name}] Reusing {len(tasks)} running task(s): "
+        f"{', '.join(t['taskId'] for t in tasks)}"
+    )
+    
+    body = {
+        'message': f'{service_name} is already running',
+        'service': service_name,
+        'taskArn': tasks[0]['taskArn'],
+        'taskId': tasks[0]['taskId'],
+        'privateIp': tasks[0]['privateIp'],
+        'port': request['container_port'],
+        'targetGroupArn': request['target_group_arn'],
+        'healthStatus': tasks[0]['healthStatus'],
+        'source': 'existing'
+    }
+    
+    if count > 1:
+        body['desiredCount'] = count
+        body['runningCount'] = len(tasks)
+        body['tasks'] = tasks
+    
+    return body
+
+
+def launch_service(
+    request: Dict[str, Any],
+    ecs_handler: ECSHandler,
+    tg_handler: TargetGroupHandler
+) -> Dict[str, Any]:
+    """
+    Start a task for one service and register it with its target groups
+    
+    Uses a warm pool task when the service has a pool, otherwise run_task.
+    With defer_registration the new tasks are only launched; task_state_handler
+    registers them when ECS reports RUNNING.
+    
+    Args:
+        request: Resolved start parameters from resolve_start_request
+        ecs_handler: ECS handler used to start the task
+        tg_handler: Target group handler used to register the task
+        
+    Returns:
+        Response body describing the started task
+        
+    Raises:
+        ECSTaskError: If the task fails to start
+        TargetGroupError: If target registration fails
+    """
+    service_name = request['service']
+    container_port = request['container_port']
+    target_group_arn = request['target_group_arn']
+    target_groups = get_target_groups(request)
+    count = request.get('count', 1)
+    
+    logger.info(
+        f"Starting task for service '{service_name}': "
+        f"cluster={request['cluster']}, task_def={request['task_definition']}, "
+        f"port={container_port}, count={count}"
+    )
+    
+    if count > 1 and not request.get('defer_registration'):
+        return start_service_replicas(request, ecs_handler, tg_handler)
+    
+    claimed = None
+    refill = None
+    if count == 1 and request.get('use_warm_pool', True) and request.get('warm_pool_size', 0) > 0:
+        warm_pool = WarmPool(ecs_handler)
+        with phase('warm_pool_claim'):
+            claimed = warm_pool.claim(service_name, request)
+        # Top the pool back up while this start registers and health checks
+        refill = ThreadPoolExecutor(max_workers=1)
+        refill_future = refill.submit(warm_pool.refill, service_name, request)
+    
+    if not claimed and request.get('defer_registration'):
+        # Step 1 only; task_state_handler does step 2 on the RUNNING event
+        body = start_pending_tasks(request, ecs_handler)
+        if refill is not None:
+            body['warmPool'] = finish_refill(service_name, refill, refill_future)
+        return body
+    
+    if claimed:
+        task_arn, private_ip = claimed
+        task_id = task_arn.split('/')[-1]
+        logger.info(f"[{service_name}] Step 1: Using warm pool task {task_id} with IP {private_ip}")
+    else:
+        # Step 1: Start ECS task
+        logger.info(f"[{service_name}] Step 1: Starting ECS task...")
+        task_arn, private_ip = ecs_handler.start_task(
+            cluster=request['cluster'],
+            task_definition=launch_task_definition(request),
+            subnets=request['subnets'],
+            security_groups=request['security_groups'],
+            container_name=request['container_name'],
+            container_port=container_port
+        )
+        
+        task_id = task_arn.split('/')[-1]
+        logger.info(f"[{service_name}] Task started successfully: {task_id} with IP {private_ip}")
+    
+    # Step 2: Register with every target group of the service at once
+    logger.info(f"[{service_name}] Step 2: Registering task with {len(target_groups)} target group(s)...")
+    map_target_groups(
+        lambda arn, port: tg_handler.register_target(target_group_arn=arn, private_ip=private_ip, port=port),
+        target_groups
+    )
+    
+    logger.info(f"[{service_name}] Task registered with target group successfully")
+    
+    # Get final target health status (the health wait already returns it)
+    if request['wait_for_healthy']:
+        with phase('health_check'):
+            health_statuses = map_target_groups(
+                lambda arn, port: tg_handler.wait_for_targets_healthy(arn, [(private_ip, port)])[0],
+                target_groups
+            )
+    else:
+        with phase('health_status'):
+            health_statuses = map_target_groups(
+                lambda arn, port: tg_handler.get_target_health(arn, private_ip, port),
+                target_groups
+            )
+    health_status = health_statuses[0]
+    
+    body = {
+        'message': f'Successfully started and registered {service_name} task',
+        'service': service_name,
+        'taskArn': task_arn,
+        'taskId': task_id,
+        'privateIp': private_ip,
+        'port': container_port,
+        'targetGroupArn': target_group_arn,
+        'healthStatus': health_status,
+        'source': 'warm_pool' if claimed else 'run_task'
+    }
+    
+    if len(target_groups) > 1:
+        body['targetGroups'] = [
+            {'targetGroupArn': arn, 'port': port, 'healthStatus': status}
+            for (arn, port), status in zip(target_groups, health_statuses)
+        ]
+    
+    polls = pop_poll_stats(task_arn, private_ip, container_port)
+    if polls:
+        body['polls'] = polls
+    
+    if refill is not None:
+        body['warmPool'] = finish_refill(service_name, refill, refill_future)
+    
+    return body
+
+
+def finish_refill(service_name: str, executor: ThreadPoolExecutor, future: Any) -> Dict[str, Any]:
+    """
+    Wait for a warm pool refill started alongside a start request
+    
+    Refill only issues run_task calls, so it finishes well before the
+    registration it overlaps with. A failed refill never fails the start.
+    
+    Args:
+        service_name: Service whose pool was refilled
+        executor: Executor running the refill
+        future: Future of WarmPool.refill
+        
+    Returns:
+        Dictionary with the number of tasks launched, or the refill error
+    """
+    try:
+        return {'launched': len(future.result())}
+    except Exception as e:
+        logger.error(f"[{service_name}] Warm pool refill failed: {str(e)}")
+        return {'launched': 0, 'error': str(e)}
+    finally:
+        executor.shutdown(wait=False)
+
+
+def start_service_replicas(
+    request: Dict[str, Any],
+    ecs_handler: ECSHandler,
+    tg_handler: TargetGroupHandler
+) -> Dict[str, Any]:
+    """
+    Start several replicas of one service with batched API calls
+    
+    Tasks are launched with chunked run_task calls, waited on together and
+    registered with one register_targets call per target group (all target
+    groups of the service concurrently).
+    
+    Args:
+        request: Resolved start parameters with count > 1
+        ecs_handler: ECS handler used to start the tasks
+        tg_handler: Target group handler used to register the tasks
+        
+    Returns:
+        Response body describing the started tasks
+        
+    Raises:
+        ECSTaskError: If no task reaches RUNNING
+        TargetGroupError: If target registration fails
+    """
+    service_name = request['service']
+    container_port = request['container_port']
+    target_group_arn = request['target_group_arn']
+    target_groups = get_target_groups(request)
+    count = request['count']
+    
+    # Step 1: Start ECS tasks
+    logger.info(f"[{service_name}] Step 1: Starting {count} ECS tasks...")
+    started = ecs_handler.start_tasks(
+        cluster=request['cluster'],
+        task_definition=launch_task_definition(request),
+        subnets=request['subnets'],
+        security_groups=request['security_groups'],
+        container_name=request['container_name'],
+        container_port=container_port,
+        count=count
+    )
+    
+    # Step 2: Register all tasks with every target group, one call per group
+    logger.info(
+        f"[{service_name}] Step 2: Registering {len(started)} tasks with {len(target_groups)} target group(s)..."
+    )
+    private_ips = [private_ip for _, private_ip in started]
+    map_target_groups(
+        lambda arn, port: tg_handler.register_targets(
+            target_group_arn=arn,
+            targets=[(ip, port) for ip in private_ips]
+        ),
+        target_groups
+    )
+    
+    if request['wait_for_healthy']:
+        with phase('health_check'):
+            group_statuses = map_target_groups(
+                lambda arn, port: tg_handler.wait_for_targets_healthy(arn, [(ip, port) for ip in private_ips]),
+                target_groups
+            )
+    else:
+        with phase('health_status'):
+            group_statuses = map_target_groups(
+                lambda arn, port: tg_handler.get_targets_health(arn, [(ip, port) for ip in private_ips]),
+                target_groups
+            )
+    health_statuses = group_statuses[0]
+    
+    tasks = [
+        {
+            'taskArn': task_arn,
+            'taskId': task_arn.split('/')[-1],
+            'privateIp': private_ip,
+            'healthStatus': health_status,
+            'polls': pop_poll_stats(task_arn, private_ip, container_port)
+        }
+        for (task_arn, private_ip), health_status in zip(started, health_statuses)
+    ]
+    
+    body = {
+        'message': f'Successfully started and registered {len(started)} of {count} {service_name} tasks',
+        'service': service_name,
+        'taskArn': tasks[0]['taskArn'],
+        'taskId': tasks[0]['taskId'],
+        'privateIp': tasks[0]['privateIp'],
+        'port': container_port,
+        'targetGroupArn': target_group_arn,
+        'healthStatus': tasks[0]['healthStatus'],
+        'source': 'run_task',
+        'desiredCount': count,
+        'runningCount': len(tasks),
+        'tasks': tasks
+    }
+    
+    if len(target_groups) > 1:
+        body['targetGroups'] = [
+            {'targetGroupArn': arn, 'port': port, 'healthStatuses': statuses}
+            for (arn, port), statuses in zip(target_groups, group_statuses)
+        ]
+    
+    return body
+
+
+def pop_poll_stats(task_arn: str, private_ip: str, port: int) -> Dict[str, Any]:
+    """
+    Collect how many polls the RUNNING and healthy waits of a task used
+    
+    Args:
+        task_arn: Task ARN
+        private_ip: Private IP of the task
+        port: Target port
+        
+    Returns:
+        Dictionary with "taskRunning"/"targetHealthy" stats that were recorded
+    """
+    stats = {
+        'taskRunning': DEFAULT_SCHEDULER.pop_wait_stats(task_arn),
+        'targetHealthy': DEFAULT_SCHEDULER.pop_wait_stats(f"{private_ip}:{port}"),
+    }
+    return {name: value for name, value in stats.items() if value}
+
+
+def start_services(detail: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Start several services concurrently (detail.services list mode)
+    
+    Each entry in detail.services is either a service name or an object with
+    a "service" key plus the same per-service overrides as the single-service
+    event. Top-level "waitForHealthy" applies to every entry unless the entry
+    sets its own. Task starts, RUNNING waits and target group registrations
+    for all services overlap, so the invocation takes as long as the slowest
+    service rather than the sum of all of them.
+    
+    Args:
+        detail: Event detail containing the "services" list
+        
+    Returns:
+        Response with one result per requested service
+    """
+    entries = detail.get('services') or []
+    
+    if not isinstance(entries, list) or not entries:
+        return error_response(
+            "Field 'services' must be a non-empty list. "
+            f"Valid services: {', '.join(get_all_service_names())}",
+            status_code=400
+        )
+    
+    # Normalize entries into per-service details, dropping duplicates
+    service_details: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        entry_detail = {'waitForHealthy': detail.get('waitForHealthy', False)}
+        if isinstance(entry, dict):
+            entry_detail.update(entry)
+        else:
+            entry_detail['service'] = entry
+        
+        service_name = str(entry_detail.get('service', '')).lower()
+        if service_name in service_details:
+            logger.warning(f"Ignoring duplicate entry for service '{service_name}'")
+            continue
+        service_details[service_name] = entry_detail
+    
+    results: List[Dict[str, Any]] = []
+    requests: List[Dict[str, Any]] = []
+    
+    for service_name, entry_detail in service_details.items():
+        try:
+            if not service_name:
+                raise ValueError("Missing required field: 'service'")
+            requests.append(resolve_start_request(service_name, entry_detail))
+        except ValueError as e:
+            results.append({
+                'service': service_name,
+                'status': 'error',
+                'error': str(e)
+            })
+    
+    if requests:
+        ecs_handler = ECSHandler(region=AWS_REGION)
+        tg_handler = TargetGroupHandler(region=AWS_REGION)
+        
+        logger.info(
+            f"Starting {len(requests)} services concurrently: "
+            f"{', '.join(r['service'] for r in requests)}"
+        )
+        
+        with ThreadPoolExecutor(max_workers=min(len(requests), MAX_PARALLEL_STARTS)) as executor:
+            futures = {
+                executor.submit(start_service, request, ecs_handler, tg_handler): request['service']
+                for request in requests
+            }
+            
+            for future in as_completed(futures):
+                service_name = futures[future]
+                try:
+                    result = future.result()
+                    result['status'] = 'success'
+                    results.append(result)
+                except Exception as e:
+                    logger.error(f"Error starting service {service_name}: {str(e)}")
+                    results.append({
+                        'service': service_name,
+                        'status': 'error',
+                        'error': str(e)
+                    })
+    
+    # Keep results in request order
+    order = list(service_details.keys())
+    results.sort(key=lambda r: order.index(r['service']))
+    
+    succeeded = sum(1 for r in results if r['status'] == 'success')
+    
+    response = {
+        'statusCode': 200 if succeeded == len(results) else 207,
+        'body': {
+            'message': f'Started {succeeded} of {len(results)} services',
+            'services_requested': len(results),
+            'services_started': succeeded,
+            'results': results
+        }
+    }
+    
+    logger.info(f"Completed: {json.dumps(response)}")
+    return response
+
+
 def error_response(message: str, status_code: int = 500) -> Dict[str, Any]:
     """
     Create error response
@@ -0,0 +1,450 @@
+"""
+End-to-End Latency and API-Call Benchmark
+Runs the start and stop Lambda handlers against moto's ECS/ELBv2/EC2 with a
+simulated clock and records, per scenario:
+
+- simulated wall time of the invocation
+- AWS API calls by operation
+- time spent sleeping between polls
+
+moto starts tasks RUNNING and targets healthy immediately, so a small latency
+model (after-call hooks on describe_tasks / describe_target_health) replays the
+PROVISIONING -> PENDING -> ACTIVATING -> RUNNING progression and the "initial"
+health check period against the simulated clock.
+
+The clock runs SPEEDUP times faster than real time: sleeps and poller waits
+are shortened by that factor while threads keep running concurrently, so
+fan-out behaves as it does in Lambda. Real moto call latency is scaled up by
+the same factor (a 5 ms moto call counts as 0.1 s at 20x), which stands in for
+AWS API latency. Poll jitter is disabled for repeatable API-call counts.
+
+Usage:
+    python latency_benchmark.py                          # run all scenarios
+    python latency_benchmark.py --scenario start_services_1 --scenario stop_services_5
+    python latency_benchmark.py --save benchmark-baseline.json
+    python latency_benchmark.py --compare benchmark-baseline.json
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+
+import aws_clients
+import config
+import ecs_handler
+import health_watcher
+import lambda_function
+import polling
+import stop_engines_lambda
+import target_group_handler
+import task_poller
+import throttling
+from idempotency import DEFAULT_STORE
+from polling import DEFAULT_SCHEDULER
+from resolution_cache import DEFAULT_RESOLUTION_CACHE
+
+# Simulated seconds per real second
+SPEEDUP = 20.0
+
+# Simulated task lifecycle: seconds after run_task at which each phase ends
+TASK_PHASES = [
+    (15.0, 'PROVISIONING'),
+    (35.0, 'PENDING'),
+    (40.0, 'ACTIVATING'),
+]
+
+# Seconds a newly registered target reports "initial" before "healthy"
+HEALTH_CHECK_SECONDS = 20.0
+
+# Relative increase over the baseline that counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+REGION = 'us-east-2'
+
+
+class SimClock:
+    """
+    Simulated monotonic clock running speedup times faster than real time
+    
+    Provides the monotonic/time/sleep functions of the time module and an
+    Event class whose timeouts are in simulated seconds, so it can replace
+    the time and threading modules seen by the handlers.
+    """
+    
+    def __init__(self, speedup: float = SPEEDUP):
+        self.speedup = speedup
+        self._real_start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.sleep_seconds = 0.0
+        self.sleeps = 0
+        
+        clock = self
+        
+        class Event(threading.Event):
+            """threading.Event with timeouts in simulated seconds"""
+            
+            def wait(self, timeout: Optional[float] = None) -> bool:
+                if timeout is None:
+                    return super().wait()
+                # The poller threads' waits are their sleeps between polls
+                polling = threading.current_thread().name in ('ecs-task-poller', 'target-health-watcher')
+                start = clock.monotonic()
+                result = super().wait(timeout / clock.speedup)
+                if polling:
+                    clock.record_sleep(clock.monotonic() - start)
+                return result
+        
+        self.Event = Event
+        self.Lock = threading.Lock
+        self.Thread = threading.Thread
+    
+    def monotonic(self) -> float:
+        """Simulated seconds since the clock was created"""
+        return (time.perf_counter() - self._real_start) * self.speedup
+    
+    def time(self) -> float:
+        """Simulated wall clock"""
+        return 1_700_000_000.0 + self.monotonic()
+    
+    def sleep(self, seconds: float) -> None:
+        """Sleep for simulated seconds"""
+        self.record_sleep(seconds)
+        time.sleep(max(0.0, seconds) / self.speedup)
+    
+    def record_sleep(self, seconds: float) -> None:
+        """Add to the total time spent sleeping"""
+        with self._lock:
+            self.sleep_seconds += seconds
+            self.sleeps += 1
+
+
+class AwsRecorder:
+    """
+    Counts API calls and applies the latency model through botocore event hooks
+    """
+    
+    def __init__(self, clock: SimClock):
+        self.clock = clock
+        self.calls: Counter = Counter()
+        self.launched_at: Dict[str, float] = {}
+        self.registered_at: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+    
+    def attach(self, client: Any, service_name: str) -> None:
+        """Register the hooks on a pooled client"""
+        client.meta.events.register('before-parameter-build', self._before_call(service_name))
+        client.meta.events.register('after-call', self._after_call)
+    
+    def _before_call(self, service_name: str) -> Callable:
+        def handler(model: Any, params: Dict, context: Dict, **kwargs: Any) -> None:
+            with self._lock:
+                self.calls[f"{service_name}.{model.name}"] += 1
+            # after-call does not receive the request parameters
+            context['benchmark_params'] = params
+        return handler
+    
+    def _after_call(self, model: Any, parsed: Dict, context: Dict, **kwargs: Any) -> None:
+        now = self.clock.monotonic()
+        params = context.get('benchmark_params', {})
+        if model.name == 'RunTask':
+            for task in parsed.get('tasks', []):
+                self.launched_at[task['taskArn']] = now
+                task['lastStatus'] = TASK_PHASES[0][1]
+        elif model.name == 'DescribeTasks':
+            for task in parsed.get('tasks', []):
+                if task.get('lastStatus') == 'RUNNING':
+                    task['lastStatus'] = self.task_phase(task['taskArn'], now)
+        elif model.name == 'RegisterTargets':
+            for target in params.get('Targets', []):
+                self.registered_at[(params['TargetGroupArn'], target['Id'])] = now
+        elif model.name == 'DescribeTargetHealth':
+            tg_arn = params.get('TargetGroupArn')
+            for description in parsed.get('TargetHealthDescriptions', []):
+                registered = self.registered_at.get((tg_arn, description['Target']['Id']))
+                health = description.get('TargetHealth', {})
+                if health.get('State') == 'healthy' and registered is not None \
+                        and now - registered < HEALTH_CHECK_SECONDS:
+                    health['State'] = 'initial'
+    
+    def task_phase(self, task_arn: str, now: float) -> str:
+        """Simulated lastStatus of a RUNNING moto task"""
+        launched = self.launched_at.get(task_arn)
+        if launched is None:
+            return 'RUNNING'
+        age = now - launched
+        for ends_at, phase in TASK_PHASES:
+            if age < ends_at:
+                return phase
+        return 'RUNNING'
+
+
+class Environment:
+    """moto resources for a set of synthetic services"""
+    
+    def __init__(self, service_count: int):
+        import boto3
+        
+        self.ec2 = boto3.client('ec2', region_name=REGION)
+        self.ecs = boto3.client('ecs', region_name=REGION)
+        self.elbv2 = boto3.client('elbv2', region_name=REGION)
+        
+        vpc_id = self.ec2.create_vpc(CidrBlock='10.0.0.0/16')['Vpc']['VpcId']
+        # moto needs DNS hostnames to build the ENI attachment of awsvpc tasks
+        self.ec2.modify_vpc_attribute(VpcId=vpc_id, EnableDnsHostnames={'Value': True})
+        subnet_id = self.ec2.create_subnet(VpcId=vpc_id, CidrBlock='10.0.1.0/24')['Subnet']['SubnetId']
+        sg_id = self.ec2.create_security_group(
+            GroupName='engines', Description='engines', VpcId=vpc_id
+        )['GroupId']
+        
+        self.services: Dict[str, Dict] = {}
+        for i in range(service_count):
+            name = f'svc{i:02d}'
+            self.ecs.create_cluster(clusterName=f'{name}-cluster')
+            self.ecs.register_task_definition(
+                family=f'{name}-task',
+                networkMode='awsvpc',
+                requiresCompatibilities=['FARGATE'],
+                cpu='256',
+                memory='512',
+                containerDefinitions=[{
+                    'name': f'{name}-container',
+                    'image': 'engine:latest',
+                    'cpu': 256,
+                    'memory': 512,
+                    'portMappings': [{'containerPort': 8080}]
+                }]
+            )
+            tg_arn = self.elbv2.create_target_group(
+                Name=f'{name}-tg', Protocol='HTTP', Port=8080, VpcId=vpc_id, TargetType='ip'
+            )['TargetGroups'][0]['TargetGroupArn']
+            self.services[name] = {
+                'cluster': f'{name}-cluster',
+                'task_definition': f'{name}-task',
+                'target_group_arn': tg_arn,
+                'container_name': f'{name}-container',
+                'container_port': 8080,
+                'subnets': [subnet_id],
+                'security_groups': [sg_id],
+                'warm_pool_size': 0,
+            }
+    
+    def run_tasks(self, service: str, count: int) -> None:
+        """Start and register tasks outside the measured window (setup for stops)"""
+        svc = self.services[service]
+        arns = []
+        for i in range(0, count, 10):
+            response = self.ecs.run_task(
+                cluster=svc['cluster'],
+                taskDefinition=svc['task_definition'],
+                launchType='FARGATE',
+                count=min(10, count - i),
+                networkConfiguration={'awsvpcConfiguration': {
+                    'subnets': svc['subnets'], 'securityGroups': svc['security_groups']
+                }}
+            )
+            arns.extend(t['taskArn'] for t in response['tasks'])
+        tasks = self.ecs.describe_tasks(cluster=svc['cluster'], tasks=arns)['tasks']
+        self.elbv2.register_targets(
+            TargetGroupArn=svc['target_group_arn'],
+            Targets=[{'Id': stop_engines_lambda.extract_private_ip(t), 'Port': 8080} for t in tasks]
+        )
+
+
+def start_event(detail: Dict) -> Dict:
+    return {'source': 'custom.app', 'detail-type': 'Start ECS Task', 'detail': detail}
+
+
+def stop_event(services: List[str]) -> Dict:
+    return {'source': 'custom.app', 'detail-type': 'Stop ECS Tasks', 'detail': {'services': services}}
+
+
+def _start_services(count: int) -> Callable:
+    def scenario(env: Environment) -> Callable:
+        names = list(env.services)[:count]
+        if count == 1:
+            event = start_event({'service': names[0], 'waitForHealthy': True})
+        else:
+            event = start_event({'services': names, 'waitForHealthy': True})
+        return lambda: lambda_function.lambda_handler(event, None)
+    scenario.services = count
+    return scenario
+
+
+def _start_tasks(count: int) -> Callable:
+    def scenario(env: Environment) -> Callable:
+        event = start_event({'service': 'svc00', 'desiredCount': count, 'waitForHealthy': True})
+        return lambda: lambda_function.lambda_handler(event, None)
+    scenario.services = 1
+    return scenario
+
+
+def _repeat_start(env: Environment) -> Callable:
+    event = start_event({'service': 'svc00', 'waitForHealthy': True})
+    env.run_tasks('svc00', 1)
+    return lambda: lambda_function.lambda_handler(event, None)
+
+
+_repeat_start.services = 1
+
+
+def _stop_services(count: int, tasks_per_service: int = 1) -> Callable:
+    def scenario(env: Environment) -> Callable:
+        names = list(env.services)[:count]
+        for name in names:
+            env.run_tasks(name, tasks_per_service)
+        return lambda: stop_engines_lambda.lambda_handler(stop_event(names), None)
+    scenario.services = count
+    return scenario
+
+
+SCENARIOS: Dict[str, Callable] = {
+    'start_services_1': _start_services(1),
+    'start_services_5': _start_services(5),
+    'start_services_50': _start_services(50),
+    'start_tasks_50': _start_tasks(50),
+    'start_already_running': _repeat_start,
+    'stop_services_1': _stop_services(1),
+    'stop_services_5': _stop_services(5),
+    'stop_services_50': _stop_services(50),
+    'stop_tasks_50': _stop_services(1, tasks_per_service=50),
+}
+
+
+def run_scenario(name: str, speedup: float = SPEEDUP) -> Dict[str, Any]:
+    """
+    Run one scenario in a fresh moto account
+    
+    Args:
+        name: Key of SCENARIOS
+        speedup: Simulated seconds per real second
+    
+    Returns:
+        Metrics dictionary for the scenario
+    """
+    from moto import mock_aws
+    from moto.moto_api import state_manager
+    
+    scenario = SCENARIOS[name]
+    clock = SimClock(speedup)
+    recorder = AwsRecorder(clock)
+    
+    with ExitStack() as stack:
+        stack.enter_context(mock_aws())
+        # moto otherwise moves a task towards STOPPED on every describe_tasks;
+        # the latency model above decides the phases instead
+        state_manager.set_transition('ecs::task', {'progression': 'manual', 'times': 10 ** 9})
+        stack.callback(state_manager.unset_transition, 'ecs::task')
+        aws_clients.clear_clients()
+        DEFAULT_STORE.clear()
+        DEFAULT_RESOLUTION_CACHE.clear()
+        DEFAULT_SCHEDULER.reset()
+        throttling.DEFAULT_THROTTLE.reset()
+        
+        env = Environment(scenario.services)
+        stack.enter_context(patch.dict(config.SERVICE_MAPPINGS, env.services, clear=True))
+        config.invalidate_registry()
+        stack.callback(config.invalidate_registry)
+        stack.enter_context(patch.object(DEFAULT_SCHEDULER, 'jitter', 0.0))
+        for module in (polling, task_poller, health_watcher, ecs_handler, target_group_handler, stop_engines_lambda, throttling):
+            stack.enter_context(patch.object(module, 'time', clock))
+        for module in (polling, task_poller, health_watcher):
+            stack.enter_context(patch.object(module, 'threading', clock))
+        
+        invoke = scenario(env)
+        
+        for service_name in ('ecs', 'elbv2', 'ec2'):
+            recorder.attach(aws_clients.get_client(service_name, REGION), service_name)
+        
+        real_start = time.perf_counter()
+        sim_start = clock.monotonic()
+        response = invoke()
+        sim_elapsed = clock.monotonic() - sim_start
+        real_elapsed = time.perf_counter() - real_start
+        
+        aws_clients.clear_clients()
+    
+    return {
+        'statusCode': response.get('statusCode'),
+        'wallSeconds': round(sim_elapsed, 1),
+        'realSeconds': round(real_elapsed, 3),
+        'sleepSeconds': round(clock.sleep_seconds, 1),
+        'sleeps': clock.sleeps,
+        'apiCallsTotal': sum(recorder.calls.values()),
+        'apiCalls': dict(sorted(recorder.calls.items())),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """
+    Find regressions against a saved baseline
+    
+    Args:
+        results: Metrics of this run
+        baseline: Metrics loaded from a baseline file
+        tolerance: Allowed relative increase (0.25 = 25%)
+    
+    Returns:
+        Human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if metrics['statusCode'] != base['statusCode']:
+            regressions.append(f"{name}: statusCode {base['statusCode']} -> {metrics['statusCode']}")
+        for metric in ('apiCallsTotal', 'wallSeconds', 'sleepSeconds'):
+            # Small absolute slack keeps near-zero baselines from flapping
+            limit = base[metric] * (1 + tolerance) + 1
+            if metrics[metric] > limit:
+                regressions.append(f"{name}: {metric} {base[metric]} -> {metrics[metric]}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Moto-backed latency and API-call benchmark')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--speedup', type=float, default=SPEEDUP,
+                        help=f'Simulated seconds per real second (default: {SPEEDUP:g})')
+    parser.add_argument('--save', metavar='FILE', help='Write results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='Fail on regressions against a JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed relative increase for --compare (default: {DEFAULT_TOLERANCE})')
+    args = parser.parse_args(argv)
+    
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        results[name] = run_scenario(name, args.speedup)
+        metrics = results[name]
+        print(
+            f"{name:<24} status={metrics['statusCode']} wall={metrics['wallSeconds']:>6.1f}s "
+            f"sleep={metrics['sleepSeconds']:>7.1f}s calls={metrics['apiCallsTotal']:>4} "
+            f"real={metrics['realSeconds']:.2f}s"
+        )
+    
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline to {args.save}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
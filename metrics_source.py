@@ -0,0 +1,251 @@
+"""
+Target Group Metrics Sources
+Per-minute Application Load Balancer metrics of target groups, read from
+CloudWatch or from an in-memory / file stand-in
+
+A metrics source has one method:
+
+    get_series(target_group_arns, metric_names, start, end)
+        -> {(target_group_arn, metric_name): [(timestamp, value), ...]}
+
+Series hold one point per minute with data, oldest first. Minutes without
+requests have no point, so sums over a series count requests and an empty
+series means no traffic.
+
+CloudWatchMetricsSource reads every series of a pass with batched
+get_metric_data calls. InMemoryMetricsSource holds recorded series (tests),
+and FileMetricsSource loads them from a JSON file (local runs).
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aws_clients import get_client
+from config import AWS_REGION, METRICS_SOURCE
+
+logger = logging.getLogger()
+
+# Statistic read for each supported metric (AWS/ApplicationELB namespace)
+METRIC_STATISTICS = {
+    'RequestCount': 'Sum',
+    'RequestCountPerTarget': 'Sum',
+    'TargetResponseTime': 'Average',
+    'HTTPCode_Target_5XX_Count': 'Sum',
+}
+
+# get_metric_data accepts at most 500 queries per call
+MAX_QUERIES_PER_CALL = 500
+
+# describe_target_groups ARNs per call
+DESCRIBE_TARGET_GROUPS_MAX_ARNS = 20
+
+Series = List[Tuple[datetime, float]]
+
+
+def series_sum(series: Series, since: Optional[datetime] = None) -> float:
+    """Sum the points of a series, optionally only those at or after since"""
+    return sum(value for timestamp, value in series if since is None or timestamp >= since)
+
+
+def series_average(series: Series, since: Optional[datetime] = None) -> Optional[float]:
+    """Average the points of a series (None when it has no points)"""
+    values = [value for timestamp, value in series if since is None or timestamp >= since]
+    return sum(values) / len(values) if values else None
+
+
+class CloudWatchMetricsSource:
+    """
+    Reads target group metrics from CloudWatch
+    
+    Target groups attached to a load balancer are queried with the
+    TargetGroup and LoadBalancer dimensions (TargetResponseTime is only
+    published with both), others with TargetGroup alone. The load balancer
+    of each target group is looked up once per container.
+    """
+    
+    def __init__(self, region: str = AWS_REGION, period: int = 60):
+        """
+        Initialize CloudWatch metrics source
+        
+        Args:
+            region: AWS region
+            period: Seconds per point (a multiple of 60)
+        """
+        self.region = region
+        self.period = period
+        self._load_balancers: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+    
+    def get_series(
+        self,
+        target_group_arns: Sequence[str],
+        metric_names: Sequence[str],
+        start: datetime,
+        end: datetime
+    ) -> Dict[Tuple[str, str], Series]:
+        """
+        Read metric series for target groups
+        
+        Args:
+            target_group_arns: Target group ARNs
+            metric_names: Metric names from METRIC_STATISTICS
+            start: Start of the window
+            end: End of the window
+        
+        Returns:
+            Series per (target_group_arn, metric_name)
+        
+        Raises:
+            ClientError: If the metrics or target groups cannot be read
+        """
+        load_balancers = self.load_balancers(target_group_arns)
+        keys = [(arn, metric) for arn in dict.fromkeys(target_group_arns) for metric in metric_names]
+        
+        queries = []
+        for index, (arn, metric) in enumerate(keys):
+            dimensions = [{'Name': 'TargetGroup', 'Value': arn.split(':')[-1]}]
+            if load_balancers.get(arn):
+                dimensions.append({'Name': 'LoadBalancer', 'Value': load_balancers[arn].split(':loadbalancer/')[-1]})
+            queries.append({
+                'Id': f'm{index}',
+                'MetricStat': {
+                    'Metric': {'Namespace': 'AWS/ApplicationELB', 'MetricName': metric, 'Dimensions': dimensions},
+                    'Period': self.period,
+                    'Stat': METRIC_STATISTICS[metric],
+                },
+                'ReturnData': True,
+            })
+        
+        logger.debug(f"Reading {len(queries)} metric series for {len(load_balancers)} target groups")
+        client = get_client('cloudwatch', self.region)
+        series: Dict[Tuple[str, str], Series] = {key: [] for key in keys}
+        for i in range(0, len(queries), MAX_QUERIES_PER_CALL):
+            params = {
+                'MetricDataQueries': queries[i:i + MAX_QUERIES_PER_CALL],
+                'StartTime': start,
+                'EndTime': end,
+                'ScanBy': 'TimestampAscending',
+            }
+            while True:
+                response = client.get_metric_data(**params)
+                for result in response.get('MetricDataResults', []):
+                    key = keys[int(result['Id'][1:])]
+                    series[key].extend(zip(result.get('Timestamps', []), result.get('Values', [])))
+                if not response.get('NextToken'):
+                    break
+                params['NextToken'] = response['NextToken']
+        
+        for points in series.values():
+            points.sort()
+        return series
+    
+    def load_balancers(self, target_group_arns: Sequence[str]) -> Dict[str, Optional[str]]:
+        """Get the first load balancer ARN of each target group (None when unattached)"""
+        with self._lock:
+            missing = [arn for arn in dict.fromkeys(target_group_arns) if arn not in self._load_balancers]
+        
+        if missing:
+            client = get_client('elbv2', self.region)
+            found = {}
+            for i in range(0, len(missing), DESCRIBE_TARGET_GROUPS_MAX_ARNS):
+                response = client.describe_target_groups(TargetGroupArns=missing[i:i + DESCRIBE_TARGET_GROUPS_MAX_ARNS])
+                for group in response.get('TargetGroups', []):
+                    found[group['TargetGroupArn']] = next(iter(group.get('LoadBalancerArns', [])), None)
+            with self._lock:
+                self._load_balancers.update(found)
+        
+        with self._lock:
+            return {arn: self._load_balancers.get(arn) for arn in target_group_arns}
+
+
+class InMemoryMetricsSource:
+    """Metrics source over recorded series (stand-in for CloudWatch in tests)"""
+    
+    def __init__(self, series: Optional[Dict[Tuple[str, str], Series]] = None):
+        """
+        Initialize in-memory metrics source
+        
+        Args:
+            series: Initial series per (target_group_arn, metric_name)
+        """
+        self.series: Dict[Tuple[str, str], Series] = {key: sorted(points) for key, points in (series or {}).items()}
+        self.calls: List[Tuple[Tuple[str, ...], Tuple[str, ...]]] = []
+    
+    def record(self, target_group_arn: str, metric_name: str, value: float, timestamp: Optional[datetime] = None) -> None:
+        """Add a point to a series (now by default)"""
+        points = self.series.setdefault((target_group_arn, metric_name), [])
+        points.append((timestamp or datetime.now(timezone.utc), value))
+        points.sort()
+    
+    def get_series(
+        self,
+        target_group_arns: Sequence[str],
+        metric_names: Sequence[str],
+        start: datetime,
+        end: datetime
+    ) -> Dict[Tuple[str, str], Series]:
+        """Get the recorded points inside the window (see CloudWatchMetricsSource.get_series)"""
+        self.calls.append((tuple(target_group_arns), tuple(metric_names)))
+        return {
+            (arn, metric): [point for point in self.series.get((arn, metric), []) if start <= point[0] < end]
+            for arn in target_group_arns
+            for metric in metric_names
+        }
+
+
+class FileMetricsSource(InMemoryMetricsSource):
+    """Metrics source reading {target_group_arn: {metric: [[iso_time, value], ...]}} from a JSON file"""
+    
+    def __init__(self, path: str):
+        """
+        Initialize file metrics source
+        
+        Args:
+            path: JSON file path
+        
+        Raises:
+            ValueError: If a timestamp cannot be parsed
+        """
+        with open(path) as f:
+            data = json.load(f)
+        
+        series = {}
+        for arn, metrics in data.items():
+            for metric, points in metrics.items():
+                series[(arn, metric)] = [(parse_timestamp(timestamp), float(value)) for timestamp, value in points]
+        super().__init__(series)
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp, treating naive times as UTC"""
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+_source: Optional[Any] = None
+
+
+def get_metrics_source(source: str = METRICS_SOURCE) -> Any:
+    """
+    Get the metrics source configured by METRICS_SOURCE, creating it on first use
+    
+    Args:
+        source: "cloudwatch" or "file:<path>"
+    
+    Returns:
+        Metrics source with a get_series method
+    
+    Raises:
+        ValueError: If the source is unknown
+    """
+    global _source
+    if _source is None:
+        if source == 'cloudwatch':
+            _source = CloudWatchMetricsSource()
+        elif source.startswith('file:'):
+            _source = FileMetricsSource(source[len('file:'):])
+        else:
+            raise ValueError(f"Unknown metrics source: {source}. Use 'cloudwatch' or 'file:<path>'")
+    return _source
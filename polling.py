@@ -0,0 +1,296 @@
+"""
+Adaptive Poll Scheduling
+Picks the delay before the next status poll from the observed phase of the task
+or target, with jitter, and learns each service's typical time-to-RUNNING
+"""
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from config import (
+    POLL_STRATEGY,
+    POLL_MIN_INTERVAL,
+    POLL_MAX_INTERVAL,
+    POLL_JITTER,
+    TASK_POLL_INTERVAL,
+)
+
+logger = logging.getLogger()
+
+# Base interval per phase, as a fraction of the way from min to max interval.
+# ECS task phases come from lastStatus, target phases from TargetHealth.State.
+PHASE_WEIGHTS: Dict[str, float] = {
+    # Image pull and ENI provisioning take tens of seconds to minutes
+    'PROVISIONING': 1.0,
+    'PENDING': 0.75,
+    # Containers are starting, RUNNING is imminent
+    'ACTIVATING': 0.0,
+    'RUNNING': 0.0,
+    # Health checks need several intervals before a verdict
+    'initial': 0.5,
+    'unhealthy': 0.5,
+    'draining': 0.75,
+    'unused': 0.0,
+    'not_found': 0.0,
+}
+
+# Weight for phases we have not seen before (including the first poll)
+DEFAULT_PHASE_WEIGHT = 0.25
+
+# Smoothing factor for the learned time-to-RUNNING average
+HISTORY_ALPHA = 0.3
+
+# Finished waits whose stats are kept until popped; callers that never read
+# them (error paths, stops) push out the oldest entries instead of piling up
+# across warm invocations
+MAX_WAIT_STATS = 1000
+
+
+class PollScheduler:
+    """
+    Chooses poll intervals for ECS task and target health waits
+
+    With the "fixed" strategy every interval is the configured poll interval,
+    matching the original behaviour. With the "adaptive" strategy the interval
+    depends on the current phase (short while ACTIVATING, long while
+    PROVISIONING/PENDING) and, when the service has history, on how far the
+    wait is from its expected completion: we sleep about halfway to the
+    expected time and then poll at the minimum interval until done.
+    """
+
+    def __init__(
+        self,
+        strategy: str = POLL_STRATEGY,
+        min_interval: float = POLL_MIN_INTERVAL,
+        max_interval: float = POLL_MAX_INTERVAL,
+        jitter: float = POLL_JITTER,
+        fixed_interval: float = TASK_POLL_INTERVAL
+    ):
+        """
+        Initialize poll scheduler
+
+        Args:
+            strategy: "adaptive" or "fixed"
+            min_interval: Shortest adaptive interval in seconds
+            max_interval: Longest adaptive interval in seconds
+            jitter: Random spread applied to adaptive intervals (0.2 = +/-20%)
+            fixed_interval: Interval used by the fixed strategy
+        """
+        if strategy not in ('adaptive', 'fixed'):
+            raise ValueError(f"Unknown poll strategy: {strategy}. Valid strategies: adaptive, fixed")
+
+        self.strategy = strategy
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.jitter = jitter
+        self.fixed_interval = fixed_interval
+        self._history: Dict[str, float] = {}
+        self._wait_stats: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def next_interval(
+        self,
+        phase: Optional[str],
+        elapsed: float,
+        history_key: Optional[str] = None
+    ) -> float:
+        """
+        Get the delay before the next poll
+
+        Args:
+            phase: Last observed lastStatus / target health state (None before the first poll)
+            elapsed: Seconds since the wait started
+            history_key: Key of the learned duration to use (e.g. task definition)
+
+        Returns:
+            Delay in seconds
+        """
+        if self.strategy == 'fixed':
+            return self.fixed_interval
+
+        weight = PHASE_WEIGHTS.get(phase, DEFAULT_PHASE_WEIGHT) if phase else DEFAULT_PHASE_WEIGHT
+        interval = self.min_interval + weight * (self.max_interval - self.min_interval)
+
+        expected = self.expected_duration(history_key)
+        if expected is not None and weight > 0:
+            remaining = expected - elapsed
+            if remaining <= 0.2 * expected:
+                interval = self.min_interval
+            else:
+                interval = min(interval, max(self.min_interval, remaining / 2))
+
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+
+        return max(self.min_interval * (1 - self.jitter), min(interval, self.max_interval))
+
+    def expected_duration(self, history_key: Optional[str]) -> Optional[float]:
+        """Get the learned wait duration for a key, if any"""
+        if not history_key:
+            return None
+        with self._lock:
+            return self._history.get(history_key)
+
+    def record_duration(self, history_key: Optional[str], seconds: float) -> None:
+        """
+        Feed an observed wait duration into the learned average
+
+        Args:
+            history_key: Key to learn under (e.g. task definition)
+            seconds: Observed duration in seconds
+        """
+        if not history_key:
+            return
+        with self._lock:
+            previous = self._history.get(history_key)
+            if previous is None:
+                self._history[history_key] = seconds
+            else:
+                self._history[history_key] = HISTORY_ALPHA * seconds + (1 - HISTORY_ALPHA) * previous
+
+    def record_wait(self, wait_key: str, polls: int, seconds: float) -> None:
+        """
+        Record how many polls a finished wait used
+
+        Args:
+            wait_key: Task ARN or "ip:port" target key
+            polls: Number of polls made
+            seconds: Duration of the wait
+        """
+        with self._lock:
+            self._wait_stats.pop(wait_key, None)
+            self._wait_stats[wait_key] = {'polls': polls, 'waitSeconds': round(seconds, 3)}
+            while len(self._wait_stats) > MAX_WAIT_STATS:
+                self._wait_stats.popitem(last=False)
+
+    def pop_wait_stats(self, wait_key: str) -> Optional[Dict]:
+        """Get and forget the recorded stats of a finished wait"""
+        with self._lock:
+            return self._wait_stats.pop(wait_key, None)
+
+    def reset(self) -> None:
+        """Forget learned durations and wait stats (used by tests and benchmarks)"""
+        with self._lock:
+            self._history.clear()
+            self._wait_stats.clear()
+
+
+# Shared by all handlers in this container so learned history survives warm invocations
+DEFAULT_SCHEDULER = PollScheduler()
+
+
+class BatchedPoller:
+    """
+    Base for pollers that check many waiters with one call per group per tick
+
+    Waiters are tracked per group (ECS cluster, target group) and per key
+    (task ARN, target) and each carries its own next poll time. A single
+    background thread, started when the first waiter arrives, describes the
+    due keys of every group with _poll_group() and sleeps until the earliest
+    next poll. The thread exits as soon as nothing is pending, so nothing keeps
+    running between Lambda invocations.
+
+    Subclasses implement _group(), _key() and _poll_group(). Waiters need
+    poll_interval, history_key, started_at and next_poll_at attributes.
+    """
+
+    # Name of the background thread
+    thread_name = 'batched-poller'
+
+    def __init__(self, poll_interval: Optional[float], scheduler: PollScheduler):
+        """
+        Initialize batched poller
+
+        Args:
+            poll_interval: Default fixed time between polls (None = scheduler decides)
+            scheduler: Scheduler choosing adaptive poll intervals
+        """
+        self.poll_interval = poll_interval
+        self.scheduler = scheduler
+        self._pending: Dict[str, Dict[Hashable, List[Any]]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.describe_calls = 0
+
+    @staticmethod
+    def _group(waiter: Any) -> str:
+        """Group a waiter is described in"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _key(waiter: Any) -> Hashable:
+        """Key a waiter waits on within its group"""
+        raise NotImplementedError
+
+    def _poll_group(self, group: str, keys: Dict[Hashable, List[Any]]) -> None:
+        """Describe the due keys of one group and resolve finished waiters"""
+        raise NotImplementedError
+
+    def _track(self, group: str, waiters: List[Any]) -> None:
+        """Add waiters of one group to the pending set and make sure the thread runs"""
+        with self._lock:
+            group_waiters = self._pending.setdefault(group, {})
+            for waiter in waiters:
+                group_waiters.setdefault(self._key(waiter), []).append(waiter)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+
+        # New waiters are due now; cut the current sleep short
+        self._wakeup.set()
+
+    def _discard(self, waiter: Any) -> None:
+        """Stop tracking a waiter (e.g. after its caller timed out)"""
+        group, key = self._group(waiter), self._key(waiter)
+        with self._lock:
+            group_waiters = self._pending.get(group, {})
+            waiters = group_waiters.get(key, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+            if not waiters:
+                group_waiters.pop(key, None)
+            if not group_waiters:
+                self._pending.pop(group, None)
+
+    def _run(self) -> None:
+        """Background loop: tick until nothing is pending"""
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                self._wakeup.clear()
+                # Only keys with at least one due waiter are described
+                snapshot = {}
+                for group, keys in self._pending.items():
+                    due = {
+                        key: list(waiters) for key, waiters in keys.items()
+                        if any(w.next_poll_at <= now for w in waiters)
+                    }
+                    if due:
+                        snapshot[group] = due
+
+            for group, keys in snapshot.items():
+                self._poll_group(group, keys)
+
+            with self._lock:
+                next_polls = [
+                    waiter.next_poll_at
+                    for keys in self._pending.values()
+                    for waiters in keys.values()
+                    for waiter in waiters
+                ]
+
+            if next_polls:
+                self._wakeup.wait(max(0.0, min(next_polls) - time.monotonic()))
+
+    def _next_interval(self, waiter: Any, phase: Optional[str], now: float) -> float:
+        """Get the delay before a waiter's next poll from its last observed phase"""
+        if waiter.poll_interval is not None:
+            return waiter.poll_interval
+        return self.scheduler.next_interval(phase, now - waiter.started_at, waiter.history_key)
@@ -0,0 +1,276 @@
+"""
+Target Group Reconciler
+Compares the RUNNING tasks of every service with the targets registered in
+its target group and fixes drift with the fewest batched calls
+
+For each target group of each service the desired targets are the private
+IPs of RUNNING tasks of its task definition on the target group's port, minus
+warm pool tasks (which are kept out of the target group until claimed).
+Targets already draining are left alone. All clusters and target groups are read concurrently, then each
+target group gets at most one register_targets and one deregister_targets
+call. With dry_run nothing is changed and the diff is returned.
+
+Usage:
+    python reconciler.py --dry-run              # show drift for all services
+    python reconciler.py --services fa pdf      # fix drift for two services
+"""
+import argparse
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from botocore.exceptions import ClientError
+
+from config import AWS_REGION, LOG_LEVEL, RECONCILE_CONCURRENCY, get_registry, get_target_groups
+from ecs_handler import ECSHandler, ECSTaskError, extract_private_ip
+from resolution_cache import ResolutionError, with_container_port
+from target_group_handler import TargetGroupHandler, TargetGroupError
+from throttling import DEFAULT_THROTTLE
+from warm_pool import WarmPool
+
+logger = logging.getLogger()
+logger.setLevel(getattr(logging, LOG_LEVEL))
+
+# Target states that no longer need a deregister call
+LEAVING_STATES = ('draining',)
+
+
+def read_service(
+    service_name: str,
+    ecs_handler: ECSHandler,
+    pool: ThreadPoolExecutor
+) -> Dict[str, Any]:
+    """
+    Submit the reads for one service
+    
+    Args:
+        service_name: Service name
+        ecs_handler: ECS handler used to list tasks
+        pool: Executor the reads run on
+    
+    Returns:
+        Dictionary of futures for the running tasks and warm tasks
+    """
+    config = get_registry().services[service_name]
+    return {
+        'running': pool.submit(ecs_handler.find_running_tasks, config['cluster'], config['task_definition']),
+        'warm': pool.submit(WarmPool(ecs_handler).list_tasks, service_name, config),
+    }
+
+
+def diff_targets(
+    running_ips: Set[str],
+    registered: List[Dict[str, Any]],
+    port: int
+) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]:
+    """
+    Compute the targets to register and deregister
+    
+    Args:
+        running_ips: Private IPs of the tasks that should be registered
+        registered: Targets from get_target_health (ip, port, state)
+        port: Container port of the service
+    
+    Returns:
+        Tuple of (to_register, to_deregister) (ip, port) lists, sorted
+    """
+    # Targets on other ports belong to someone else (e.g. a shared target group)
+    targets = [target for target in registered if target['port'] == port]
+    
+    # A draining task may still be RUNNING: leave it alone rather than undo the drain
+    leaving = {target['ip'] for target in targets if target.get('state') in LEAVING_STATES}
+    desired = {(ip, port) for ip in running_ips - leaving}
+    current = {
+        (target['ip'], target['port'])
+        for target in targets
+        if target.get('state') not in LEAVING_STATES
+    }
+    return sorted(desired - current), sorted(current - desired)
+
+
+def reconcile(
+    service_names: Optional[List[str]] = None,
+    dry_run: bool = False,
+    ecs_handler: Optional[ECSHandler] = None,
+    tg_handler: Optional[TargetGroupHandler] = None
+) -> List[Dict[str, Any]]:
+    """
+    Reconcile target groups with RUNNING tasks
+    
+    Args:
+        service_names: Services to reconcile (default: all configured services)
+        dry_run: Only report the diff
+        ecs_handler: ECS handler (defaults to a new one)
+        tg_handler: Target group handler (defaults to a new one)
+    
+    Returns:
+        One result per service and target group with the targets
+        registered/deregistered (or that would be, with dry_run)
+    """
+    ecs_handler = ecs_handler or ECSHandler(region=AWS_REGION)
+    tg_handler = tg_handler or TargetGroupHandler(region=AWS_REGION)
+    # Networking is not needed here, so services without subnets are reconciled too
+    services = get_registry().services
+    service_names = [name.lower() for name in (service_names or list(services))]
+    
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    target_groups: Dict[str, List[Tuple[str, int]]] = {}
+    for name in service_names:
+        if name not in services:
+            results[name] = [{'service': name, 'status': 'skipped', 'reason': f'Unknown service: {name}'}]
+            continue
+        try:
+            target_groups[name] = get_target_groups(with_container_port(services[name], ecs_handler.ecs_client))
+        except (ResolutionError, ClientError) as e:
+            logger.error(f"[{name}] Error resolving container port: {str(e)}")
+            results[name] = [{'service': name, 'status': 'error', 'error': str(e)}]
+    known = list(target_groups)
+    
+    with ThreadPoolExecutor(max_workers=RECONCILE_CONCURRENCY) as pool:
+        # Step 1: read every cluster and target group at once
+        reads = {name: read_service(name, ecs_handler, pool) for name in known}
+        health = {
+            arn: pool.submit(tg_handler.get_target_health, arn)
+            for groups in target_groups.values()
+            for arn, _ in groups
+        }
+        
+        # Step 2: diff and submit the batched writes
+        writes = []
+        for name in known:
+            results[name] = []
+            for target_group_arn, port in target_groups[name]:
+                result = {'service': name, 'targetGroupArn': target_group_arn}
+                results[name].append(result)
+                
+                try:
+                    running = reads[name]['running'].result()
+                    warm_ips = {extract_private_ip(task) for task in reads[name]['warm'].result()}
+                    registered = health[target_group_arn].result().get('targets', [])
+                except (ClientError, ECSTaskError, TargetGroupError) as e:
+                    logger.error(f"[{name}] Error reading tasks or targets: {str(e)}")
+                    result.update({'status': 'error', 'error': str(e)})
+                    continue
+                
+                running_ips = {ip for _, ip in running} - warm_ips
+                writes.extend(diff_target_group(name, result, running_ips, registered, port, dry_run, tg_handler, pool))
+        
+        for result, futures in writes:
+            try:
+                for future in futures:
+                    if future is not None:
+                        future.result()
+                result['status'] = 'reconciled'
+            except TargetGroupError as e:
+                logger.error(f"[{result['service']}] Error fixing drift: {str(e)}")
+                result.update({'status': 'error', 'error': str(e)})
+    
+    return [result for name in service_names for result in results[name]]
+
+
+def diff_target_group(
+    service_name: str,
+    result: Dict[str, Any],
+    running_ips: Set[str],
+    registered: List[Dict[str, Any]],
+    port: int,
+    dry_run: bool,
+    tg_handler: TargetGroupHandler,
+    pool: ThreadPoolExecutor
+) -> List[Tuple[Dict[str, Any], List[Any]]]:
+    """
+    Fill in the diff of one target group and submit its batched writes
+    
+    Args:
+        service_name: Service name
+        result: Result dictionary of this service and target group (updated)
+        running_ips: Private IPs that should be registered
+        registered: Targets from get_target_health
+        port: Port of the target group
+        dry_run: Only report the diff
+        tg_handler: Target group handler used for the writes
+        pool: Executor the writes run on
+    
+    Returns:
+        (result, futures) for the submitted writes, if any
+    """
+    target_group_arn = result['targetGroupArn']
+    to_register, to_deregister = diff_targets(running_ips, registered, port)
+    result.update({
+        'runningTasks': len(running_ips),
+        'register': [f'{ip}:{target_port}' for ip, target_port in to_register],
+        'deregister': [f'{ip}:{target_port}' for ip, target_port in to_deregister],
+    })
+    
+    if not to_register and not to_deregister:
+        result['status'] = 'in_sync'
+        return []
+    
+    logger.info(
+        f"[{service_name}] Drift in {target_group_arn}: "
+        f"register {result['register']}, deregister {result['deregister']}"
+    )
+    if dry_run:
+        result['status'] = 'drift'
+        return []
+    
+    return [(result, [
+        pool.submit(tg_handler.register_targets, target_group_arn, to_register) if to_register else None,
+        pool.submit(tg_handler.deregister_targets, target_group_arn, to_deregister) if to_deregister else None,
+    ])]
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Scheduled (or on-demand) reconciliation handler
+    
+    Event format:
+    {
+        "detail": {
+            "services": ["fa", "pdf"],  # Optional: default all services
+            "dryRun": false             # Optional: only report drift
+        }
+    }
+    
+    Args:
+        event: EventBridge event
+        context: Lambda context
+    
+    Returns:
+        Response with one result per service and target group
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
+    
+    detail = event.get('detail') or {}
+    results = reconcile(detail.get('services'), dry_run=detail.get('dryRun', False))
+    
+    failed = sum(1 for r in results if r['status'] == 'error')
+    changed = sum(1 for r in results if r['status'] in ('reconciled', 'drift'))
+    
+    return {
+        'statusCode': 200 if not failed else 207,
+        'body': {
+            'message': f"{'Found' if detail.get('dryRun') else 'Fixed'} drift in {changed} of {len(results)} target groups",
+            'dryRun': bool(detail.get('dryRun', False)),
+            'results': results
+        }
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point (replaces sync-target-groups.ps1)"""
+    parser = argparse.ArgumentParser(description='Sync target groups with RUNNING ECS tasks')
+    parser.add_argument('--services', nargs='*', help='Services to reconcile (default: all)')
+    parser.add_argument('--dry-run', action='store_true', help='Only print the diff')
+    args = parser.parse_args(argv)
+    
+    results = reconcile(args.services, dry_run=args.dry_run)
+    print(json.dumps(results, indent=2))
+    return 1 if any(r['status'] == 'error' for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Launch Configuration Resolution Cache
+Resolves a service's task definition to a pinned ARN with its container
+name/port, and checks that its subnets and security groups exist, once per
+TTL instead of on every start
+
+A start passes the pinned ARN to run_task, so every task of a warm container
+runs the same revision, and a typo in a task definition, container name,
+subnet or security group fails in one describe call instead of after a
+wasted run_task. Entries expire after RESOLUTION_CACHE_TTL seconds (so a new
+revision is picked up) and can be dropped explicitly with invalidate().
+Network checks are only cached when they pass; transient errors (throttling,
+missing permissions) are logged and the start goes ahead unchecked.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from botocore.exceptions import ClientError
+
+from config import RESOLUTION_CACHE_TTL
+
+logger = logging.getLogger()
+
+# describe_task_definition error codes caused by the requested task definition
+TASK_DEFINITION_ERRORS = ('ClientException', 'InvalidParameterException')
+
+# EC2 error codes caused by a subnet or security group ID in the config
+NETWORK_ERRORS = (
+    'InvalidSubnetID.NotFound',
+    'InvalidSubnetID.Malformed',
+    'InvalidGroup.NotFound',
+    'InvalidGroupId.NotFound',
+    'InvalidGroupId.Malformed',
+)
+
+
+class ResolutionError(Exception):
+    """Raised when a task definition or network configuration is invalid"""
+    pass
+
+
+class ResolutionCache:
+    """
+    Container-local cache of resolved task definitions and checked networks
+    
+    Lambda containers do not share memory, so each warm container pays for
+    one lookup per task definition and network per TTL.
+    """
+    
+    def __init__(self, ttl: float = RESOLUTION_CACHE_TTL):
+        """
+        Initialize resolution cache
+        
+        Args:
+            ttl: Time in seconds a resolved entry is kept
+        """
+        self.ttl = ttl
+        self._task_definitions: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._networks: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], float] = {}
+        self._lock = threading.Lock()
+    
+    def task_definition(
+        self,
+        ecs_client: Any,
+        task_definition: str,
+        container_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Resolve a task definition and the container that serves traffic
+        
+        Args:
+            ecs_client: boto3 ECS client
+            task_definition: Task definition family, family:revision or ARN
+            container_name: Container to use (default: first container with a port mapping)
+        
+        Returns:
+            Dictionary with taskDefinitionArn, containerName and containerPort
+            (None if the container has no port mapping)
+        
+        Raises:
+            ResolutionError: If the task definition or container does not exist
+            ClientError: If describe_task_definition fails for another reason
+        """
+        with self._lock:
+            entry = self._task_definitions.get(task_definition)
+        
+        if entry is None or entry[0] <= time.monotonic():
+            try:
+                response = ecs_client.describe_task_definition(taskDefinition=task_definition)
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') in TASK_DEFINITION_ERRORS:
+                    raise ResolutionError(f"Cannot resolve task definition {task_definition}: {str(e)}") from e
+                raise
+            
+            definition = response['taskDefinition']
+            resolved = {
+                'taskDefinitionArn': definition['taskDefinitionArn'],
+                # Container name -> first containerPort (None without port mappings)
+                'containers': {
+                    container['name']: next(
+                        (mapping.get('containerPort') for mapping in container.get('portMappings', [])), None
+                    )
+                    for container in definition.get('containerDefinitions', [])
+                },
+            }
+            logger.info(f"Resolved task definition {task_definition} to {resolved['taskDefinitionArn']}")
+            entry = (time.monotonic() + self.ttl, resolved)
+            with self._lock:
+                self._task_definitions[task_definition] = entry
+        
+        resolved = entry[1]
+        containers = resolved['containers']
+        if container_name is None:
+            container_name = next((name for name, port in containers.items() if port is not None), None)
+            if container_name is None:
+                raise ResolutionError(f"Task definition {task_definition} has no container with a port mapping")
+        elif container_name not in containers:
+            raise ResolutionError(
+                f"Container {container_name} not found in task definition {resolved['taskDefinitionArn']}. "
+                f"Containers: {', '.join(containers)}"
+            )
+        
+        return {
+            'taskDefinitionArn': resolved['taskDefinitionArn'],
+            'containerName': container_name,
+            'containerPort': containers[container_name],
+        }
+    
+    def check_network(self, ec2_client: Any, subnets: Sequence[str], security_groups: Sequence[str]) -> None:
+        """
+        Check that subnets and security groups exist and share a VPC
+        
+        Args:
+            ec2_client: boto3 EC2 client
+            subnets: Subnet IDs
+            security_groups: Security group IDs
+        
+        Raises:
+            ResolutionError: If an ID does not exist or the VPCs differ
+        """
+        key = (tuple(sorted(subnets)), tuple(sorted(security_groups)))
+        with self._lock:
+            expires = self._networks.get(key)
+        if expires is not None and expires > time.monotonic():
+            return
+        
+        try:
+            subnet_vpcs = self._vpc_ids(ec2_client.describe_subnets(SubnetIds=list(subnets))['Subnets'])
+            group_vpcs = self._vpc_ids(
+                ec2_client.describe_security_groups(GroupIds=list(security_groups))['SecurityGroups']
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in NETWORK_ERRORS:
+                raise ResolutionError(f"Invalid network configuration: {str(e)}") from e
+            logger.warning(f"Could not check subnets and security groups: {str(e)}")
+            return
+        
+        if len(subnet_vpcs) > 1 or not group_vpcs <= subnet_vpcs:
+            raise ResolutionError(
+                f"Subnets ({', '.join(sorted(subnet_vpcs))}) and security groups "
+                f"({', '.join(sorted(group_vpcs))}) are not in one VPC"
+            )
+        
+        with self._lock:
+            self._networks[key] = time.monotonic() + self.ttl
+    
+    @staticmethod
+    def _vpc_ids(resources: List[Dict[str, Any]]) -> Set[str]:
+        """Get the VPC IDs of described subnets or security groups"""
+        return {resource['VpcId'] for resource in resources if resource.get('VpcId')}
+    
+    def invalidate(self, task_definition: Optional[str] = None) -> None:
+        """
+        Drop cached entries so the next start looks them up again
+        
+        Args:
+            task_definition: Only drop this task definition (default: everything)
+        """
+        with self._lock:
+            if task_definition is None:
+                self._task_definitions.clear()
+                self._networks.clear()
+            else:
+                self._task_definitions.pop(task_definition, None)
+    
+    def clear(self) -> None:
+        """Forget everything (used by tests)"""
+        self.invalidate()
+
+
+def with_container_port(
+    config: Mapping[str, Any],
+    ecs_client: Any,
+    cache: Optional[ResolutionCache] = None
+) -> Mapping[str, Any]:
+    """
+    Fill in the container of a service that leaves it to the task definition
+    
+    Args:
+        config: Service configuration
+        ecs_client: boto3 ECS client
+        cache: Resolution cache (defaults to DEFAULT_RESOLUTION_CACHE)
+    
+    Returns:
+        The config itself if container_port is set, else a copy with
+        container_name and container_port from the task definition
+    
+    Raises:
+        ResolutionError: If the task definition or container does not exist
+        ClientError: If describe_task_definition fails for another reason
+    """
+    if config.get('container_port') is not None:
+        return config
+    resolved = (cache or DEFAULT_RESOLUTION_CACHE).task_definition(
+        ecs_client, config['task_definition'], config.get('container_name')
+    )
+    return {**config, 'container_name': resolved['containerName'], 'container_port': resolved['containerPort']}
+
+
+def launch_task_definition(request: Mapping[str, Any]) -> str:
+    """Get the task definition to launch: the pinned ARN when resolved, else the configured one"""
+    return request.get('task_definition_arn') or request['task_definition']
+
+
+# Shared by all invocations in this container
+DEFAULT_RESOLUTION_CACHE = ResolutionCache()
@@ -0,0 +1,470 @@
+"""
+Scale-to-Zero and Pre-Warm Schedule Planner
+Turns a history of start/stop events and request counts into a weekly
+schedule per service: start each engine early enough to be serving when its
+traffic usually begins, and stop it once its traffic usually ends
+
+The history is a local file (.json list, {"events": [...]} or .jsonl) of:
+
+    {"time": "2026-10-05T08:57:00Z", "service": "fa", "type": "start", "latency": 142.5}
+    {"time": "2026-10-05T19:02:00Z", "service": "fa", "type": "stop"}
+    {"time": "2026-10-05T09:00:00Z", "service": "fa", "type": "requests", "count": 37}
+
+latency is the seconds a start took until the engine was serving (the
+"timings" total of the start response); request counts are summed into
+PLANNER_SLOT_MINUTES slots.
+
+A slot of the week is active when it had requests on at least
+PLANNER_ACTIVE_RATIO of the observed days of that weekday. Active slots are
+joined into windows (gaps shorter than the idle time plus the start lead are
+bridged, since stopping would not pay off), each window is started ahead by
+the 90th percentile start latency plus PLANNER_LEAD_MARGIN, and stopped
+PLANNER_IDLE_MINUTES after its last active slot. Services without active
+slots get no schedule and stay scaled to zero.
+
+The output holds EventBridge Scheduler schedule definitions that send the
+start and stop Lambdas their usual events, plus a report replaying the
+history under the plan: requests served warm, engine hours and idle hours,
+next to the same figures for what actually ran.
+
+Usage:
+    python schedule_planner.py --history usage-history.json
+    python schedule_planner.py --history usage-history.jsonl --services fa pdf --timezone Europe/Berlin
+    python schedule_planner.py --history usage-history.json --output schedules.json
+"""
+import argparse
+import json
+import logging
+import math
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from config import (
+    AWS_ACCOUNT_ID,
+    AWS_REGION,
+    PLANNER_ACTIVE_RATIO,
+    PLANNER_DEFAULT_START_LATENCY,
+    PLANNER_IDLE_MINUTES,
+    PLANNER_LEAD_MARGIN,
+    PLANNER_SLOT_MINUTES,
+    PLANNER_TIMEZONE,
+)
+
+logger = logging.getLogger()
+
+# datetime.weekday() order, as used in cron day-of-week fields
+DAYS = ('MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN')
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Percentile of measured start latencies used as the start lead
+LATENCY_PERCENTILE = 0.9
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp; naive timestamps are taken as UTC"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    """
+    Load a usage history file
+    
+    Args:
+        path: .json file with a list or {"events": [...]}, or .jsonl file
+    
+    Returns:
+        Events sorted by time, with "time" parsed to an aware datetime
+    
+    Raises:
+        ValueError: If an event has no time, service or known type
+    """
+    with open(path) as f:
+        if path.endswith('.jsonl'):
+            raw = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw = json.load(f)
+            raw = raw.get('events', []) if isinstance(raw, dict) else raw
+    
+    events = []
+    for index, event in enumerate(raw):
+        if not event.get('time') or not event.get('service') or event.get('type') not in ('start', 'stop', 'requests'):
+            raise ValueError(f"Invalid history event {index}: {event}")
+        events.append({**event, 'service': event['service'].lower(), 'time': parse_time(event['time'])})
+    
+    return sorted(events, key=lambda e: e['time'])
+
+
+def minute_of_week(moment: datetime) -> int:
+    """Minutes since Monday 00:00 in the moment's own timezone"""
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def format_minute(minute: int) -> str:
+    """Format a minute of the week as e.g. 'MON 08:45'"""
+    minute %= MINUTES_PER_WEEK
+    return f"{DAYS[minute // MINUTES_PER_DAY]} {minute % MINUTES_PER_DAY // 60:02d}:{minute % 60:02d}"
+
+
+def day_slots(start: datetime, end: datetime, tz: ZoneInfo, slot_minutes: int) -> Iterator[datetime]:
+    """Yield the local start of every slot from the day of start to the end of the day of end"""
+    day = start.astimezone(tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    last = end.astimezone(tz).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    while day < last:
+        for index in range(MINUTES_PER_DAY // slot_minutes):
+            yield day + timedelta(minutes=index * slot_minutes)
+        day += timedelta(days=1)
+
+
+def start_latency(events: List[Dict[str, Any]]) -> Optional[float]:
+    """Get the LATENCY_PERCENTILE start latency in seconds (None without measured starts)"""
+    latencies = sorted(float(e['latency']) for e in events if e['type'] == 'start' and e.get('latency') is not None)
+    if not latencies:
+        return None
+    return latencies[min(len(latencies) - 1, math.ceil(LATENCY_PERCENTILE * len(latencies)) - 1)]
+
+
+def request_counts(events: List[Dict[str, Any]], tz: ZoneInfo, slot_minutes: int) -> Dict[datetime, int]:
+    """Sum request counts per local slot start"""
+    counts: Dict[datetime, int] = {}
+    for event in events:
+        if event['type'] != 'requests':
+            continue
+        local = event['time'].astimezone(tz)
+        slot = local.replace(minute=local.minute - local.minute % slot_minutes, second=0, microsecond=0)
+        counts[slot] = counts.get(slot, 0) + int(event.get('count', 1))
+    return counts
+
+
+def active_slots(
+    counts: Dict[datetime, int],
+    first: datetime,
+    last: datetime,
+    tz: ZoneInfo,
+    slot_minutes: int,
+    active_ratio: float
+) -> Set[int]:
+    """
+    Find the slots of the week that usually have requests
+    
+    Args:
+        counts: Requests per local slot start
+        first: Start of the observed history
+        last: End of the observed history
+        tz: Timezone schedules run in
+        slot_minutes: Slot size in minutes
+        active_ratio: Share of observed days of a weekday a slot needs requests on
+    
+    Returns:
+        Minutes of the week at which active slots start
+    """
+    observed_days = [0] * 7
+    day = first.astimezone(tz).date()
+    while day <= last.astimezone(tz).date():
+        observed_days[day.weekday()] += 1
+        day += timedelta(days=1)
+    
+    active_days: Dict[int, int] = {}
+    for slot, count in counts.items():
+        if count > 0:
+            active_days[minute_of_week(slot)] = active_days.get(minute_of_week(slot), 0) + 1
+    
+    return {
+        minute for minute, days in active_days.items()
+        if days >= active_ratio * observed_days[minute // MINUTES_PER_DAY]
+    }
+
+
+def plan_windows(slots: Set[int], slot_minutes: int, bridge_minutes: int) -> List[Tuple[int, int]]:
+    """
+    Join active slots into windows
+    
+    Args:
+        slots: Minutes of the week at which active slots start
+        slot_minutes: Slot size in minutes
+        bridge_minutes: Longest gap between slots that does not end a window
+    
+    Returns:
+        (first minute, end minute) of each window; the end may pass the end
+        of the week for a window that wraps into Monday
+    """
+    windows: List[List[int]] = []
+    for minute in sorted(slots):
+        if windows and minute - windows[-1][1] <= bridge_minutes:
+            windows[-1][1] = minute + slot_minutes
+        else:
+            windows.append([minute, minute + slot_minutes])
+    
+    # A window running into Sunday midnight continues with Monday's first one
+    if len(windows) > 1 and windows[0][0] + MINUTES_PER_WEEK - windows[-1][1] <= bridge_minutes:
+        first = windows.pop(0)
+        windows[-1][1] = first[1] + MINUTES_PER_WEEK
+    
+    return [(start, end) for start, end in windows]
+
+
+def schedule_definitions(
+    service: str,
+    windows: List[Tuple[int, int]],
+    lead_minutes: int,
+    idle_minutes: int,
+    tz_name: str,
+    start_target: str,
+    stop_target: str
+) -> List[Dict[str, Any]]:
+    """
+    Build EventBridge Scheduler schedules for a service's windows
+    
+    Starts (and stops) at the same time of day on several weekdays share one
+    cron schedule.
+    
+    Returns:
+        Schedule definitions (Name, ScheduleExpression, ScheduleExpressionTimezone,
+        FlexibleTimeWindow, Target) in start, stop order
+    """
+    actions = {
+        'start': (
+            start_target,
+            {'source': 'custom.app', 'detail-type': 'Start ECS Task', 'detail': {'service': service}},
+            [start - lead_minutes for start, _ in windows]
+        ),
+        'stop': (
+            stop_target,
+            {'source': 'custom.app', 'detail-type': 'Stop ECS Tasks', 'detail': {'services': [service], 'drain': True}},
+            [end + idle_minutes for _, end in windows]
+        ),
+    }
+    
+    schedules = []
+    for action, (target, event, minutes) in actions.items():
+        days_by_time: Dict[int, Set[int]] = {}
+        for minute in minutes:
+            minute %= MINUTES_PER_WEEK
+            days_by_time.setdefault(minute % MINUTES_PER_DAY, set()).add(minute // MINUTES_PER_DAY)
+        
+        for time_of_day, days in sorted(days_by_time.items()):
+            hour, minute = divmod(time_of_day, 60)
+            schedules.append({
+                'Name': f"{service}-{action}-{hour:02d}{minute:02d}",
+                'ScheduleExpression': f"cron({minute} {hour} ? * {','.join(DAYS[d] for d in sorted(days))} *)",
+                'ScheduleExpressionTimezone': tz_name,
+                'FlexibleTimeWindow': {'Mode': 'OFF'},
+                'Target': {'Arn': target, 'Input': json.dumps(event)},
+            })
+    
+    return schedules
+
+
+def in_windows(minute: int, windows: List[Tuple[int, int]]) -> bool:
+    """Check whether a minute of the week falls into any [start, end) window"""
+    return any(
+        start <= shifted < end
+        for start, end in windows
+        for shifted in (minute - MINUTES_PER_WEEK, minute, minute + MINUTES_PER_WEEK)
+    )
+
+
+def running_intervals(events: List[Dict[str, Any]], end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Pair start and stop events into running intervals (an unmatched start runs until end)"""
+    intervals = []
+    started: Optional[datetime] = None
+    for event in events:
+        if event['type'] == 'start' and started is None:
+            started = event['time']
+        elif event['type'] == 'stop' and started is not None:
+            intervals.append((started, event['time']))
+            started = None
+    if started is not None:
+        intervals.append((started, end))
+    return intervals
+
+
+def simulate(
+    service: str,
+    events: List[Dict[str, Any]],
+    counts: Dict[datetime, int],
+    first: datetime,
+    last: datetime,
+    tz: ZoneInfo,
+    slot_minutes: int,
+    warm: List[Tuple[int, int]],
+    running: List[Tuple[int, int]]
+) -> Dict[str, Any]:
+    """
+    Replay a service's history under a plan
+    
+    Args:
+        service: Service name
+        events: The service's history events
+        counts: Requests per local slot start
+        first: Start of the observed history
+        last: End of the observed history
+        tz: Timezone schedules run in
+        slot_minutes: Slot size in minutes
+        warm: Windows in which the planned engine is serving
+        running: Windows in which the planned engine is billed (start to stop)
+    
+    Returns:
+        Report with request coverage, engine hours and idle hours for the
+        plan, and for the actual history if it has start/stop events
+    """
+    intervals = running_intervals(events, last)
+    has_history = bool(intervals)
+    hours = slot_minutes / 60
+    report = {
+        'service': service,
+        'requests': 0,
+        'warmRequests': 0,
+        'plannedHours': 0.0,
+        'plannedIdleHours': 0.0,
+        'historyHours': 0.0 if has_history else None,
+        'historyIdleHours': 0.0 if has_history else None,
+        'historyWarmRequests': 0 if has_history else None,
+    }
+    
+    for slot in day_slots(first, last, tz, slot_minutes):
+        minute = minute_of_week(slot)
+        requests = counts.get(slot, 0)
+        report['requests'] += requests
+        if in_windows(minute, warm):
+            report['warmRequests'] += requests
+        if in_windows(minute, running):
+            report['plannedHours'] += hours
+            report['plannedIdleHours'] += hours if not requests else 0
+        if has_history and any(start <= slot < end for start, end in intervals):
+            report['historyHours'] += hours
+            report['historyIdleHours'] += hours if not requests else 0
+            report['historyWarmRequests'] += requests
+    
+    report['coverage'] = round(report['warmRequests'] / report['requests'], 3) if report['requests'] else None
+    for key in ('plannedHours', 'plannedIdleHours', 'historyHours', 'historyIdleHours'):
+        if report[key] is not None:
+            report[key] = round(report[key], 2)
+    return report
+
+
+def plan(
+    events: List[Dict[str, Any]],
+    services: Optional[List[str]] = None,
+    tz_name: str = PLANNER_TIMEZONE,
+    slot_minutes: int = PLANNER_SLOT_MINUTES,
+    idle_minutes: int = PLANNER_IDLE_MINUTES,
+    active_ratio: float = PLANNER_ACTIVE_RATIO,
+    lead_margin: int = PLANNER_LEAD_MARGIN,
+    environment: str = 'dev'
+) -> Dict[str, Any]:
+    """
+    Plan start and stop schedules for services from their usage history
+    
+    Args:
+        events: History events from load_history
+        services: Services to plan (default: every service in the history)
+        tz_name: IANA timezone the schedules run in
+        slot_minutes: Slot size in minutes (must divide a day)
+        idle_minutes: Minutes without requests before a scheduled stop
+        active_ratio: Share of observed days of a weekday a slot needs requests on
+        lead_margin: Seconds started ahead on top of the measured start latency
+        environment: Environment suffix of the start and stop Lambda names
+    
+    Returns:
+        Dictionary with "schedules" (all services), "services" (windows and
+        lead per service) and "report" (simulation per service)
+    
+    Raises:
+        ValueError: If the history is empty or slot_minutes does not divide a day
+    """
+    if not events:
+        raise ValueError("Usage history is empty")
+    if MINUTES_PER_DAY % slot_minutes:
+        raise ValueError(f"Slot size must divide a day, got {slot_minutes} minutes")
+    
+    tz = ZoneInfo(tz_name)
+    first, last = events[0]['time'], events[-1]['time']
+    lambda_arn = f"arn:aws:lambda:{AWS_REGION}:{AWS_ACCOUNT_ID}:function"
+    
+    result: Dict[str, Any] = {'schedules': [], 'services': [], 'report': []}
+    for service in services or sorted({e['service'] for e in events}):
+        service_events = [e for e in events if e['service'] == service.lower()]
+        
+        latency = start_latency(service_events)
+        lead_minutes = math.ceil(((latency if latency is not None else PLANNER_DEFAULT_START_LATENCY) + lead_margin) / 60)
+        counts = request_counts(service_events, tz, slot_minutes)
+        slots = active_slots(counts, first, last, tz, slot_minutes, active_ratio)
+        windows = plan_windows(slots, slot_minutes, idle_minutes + lead_minutes)
+        
+        result['schedules'].extend(schedule_definitions(
+            service,
+            windows,
+            lead_minutes,
+            idle_minutes,
+            tz_name,
+            f"{lambda_arn}:start-engines-lambda-{environment}",
+            f"{lambda_arn}:stop-engines-lambda-{environment}"
+        ))
+        result['services'].append({
+            'service': service,
+            'startLatency': latency,
+            'leadMinutes': lead_minutes,
+            'windows': [
+                {
+                    'start': format_minute(start - lead_minutes),
+                    'serving': format_minute(start),
+                    'stop': format_minute(end + idle_minutes)
+                }
+                for start, end in windows
+            ]
+        })
+        result['report'].append(simulate(
+            service,
+            service_events,
+            counts,
+            first,
+            last,
+            tz,
+            slot_minutes,
+            warm=[(start, end + idle_minutes) for start, end in windows],
+            running=[(start - lead_minutes, end + idle_minutes) for start, end in windows]
+        ))
+        logger.info(f"Planned {len(windows)} windows for {service} with a {lead_minutes} minute start lead")
+    
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Plan engine start/stop schedules from usage history')
+    parser.add_argument('--history', required=True, help='Usage history file (.json or .jsonl)')
+    parser.add_argument('--services', nargs='*', help='Services to plan (default: all in the history)')
+    parser.add_argument('--timezone', default=PLANNER_TIMEZONE, help='Timezone schedules run in')
+    parser.add_argument('--slot-minutes', type=int, default=PLANNER_SLOT_MINUTES)
+    parser.add_argument('--idle-minutes', type=int, default=PLANNER_IDLE_MINUTES)
+    parser.add_argument('--active-ratio', type=float, default=PLANNER_ACTIVE_RATIO)
+    parser.add_argument('--environment', default='dev', help='Suffix of the start/stop Lambda names')
+    parser.add_argument('--output', help='Write the schedule definitions to this file')
+    args = parser.parse_args(argv)
+    
+    result = plan(
+        load_history(args.history),
+        services=args.services,
+        tz_name=args.timezone,
+        slot_minutes=args.slot_minutes,
+        idle_minutes=args.idle_minutes,
+        active_ratio=args.active_ratio,
+        environment=args.environment
+    )
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result['schedules'], f, indent=2)
+        print(json.dumps({'services': result['services'], 'report': result['report']}, indent=2))
+    else:
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
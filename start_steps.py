@@ -0,0 +1,410 @@
+"""
+Resumable Start Steps
+Splits a service start into short, stateless steps (start, poll_task,
+register, poll_health) that hand a continuation token to the next step, so a
+Step Functions state machine can wait between polls instead of a Lambda
+sleeping through them
+
+Every step makes at most a couple of API calls and returns immediately. The
+token is a JSON-serializable dictionary holding everything the next step
+needs: "step" names the step to run next ("done" and "failed" are terminal)
+and "waitSeconds" is how long to wait before running it. The state machine in
+start-engine-state-machine.asl.json loops lambda_handler through a Wait state;
+run_local() drives the same steps in-process for tests and scripts.
+"""
+import json
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from config import AWS_REGION, TASK_WAIT_TIMEOUT, get_target_groups
+from ecs_handler import ECSHandler, ECSTaskError, extract_private_ip, stopped_message
+from lambda_function import resolve_launch_config, resolve_start_request, reuse_running_tasks
+from polling import DEFAULT_SCHEDULER
+from resolution_cache import launch_task_definition
+from target_group_handler import TargetGroupHandler, TargetGroupError, HEALTH_CHECK_TIMEOUT, map_target_groups
+from throttling import DEFAULT_THROTTLE
+
+logger = logging.getLogger()
+
+STEP_DONE = 'done'
+STEP_FAILED = 'failed'
+
+
+def wait_seconds(interval: float) -> int:
+    """Round a poll interval up to the whole seconds a Wait state accepts"""
+    return max(1, math.ceil(interval))
+
+
+def step_start(token: Dict[str, Any], ecs_handler: ECSHandler, tg_handler: TargetGroupHandler) -> Dict[str, Any]:
+    """
+    Resolve the request and launch its tasks (or reuse serving ones)
+    
+    Args:
+        token: Token with the event "detail"
+        ecs_handler: ECS handler used to launch the tasks
+        tg_handler: Target group handler used for the reuse check
+    
+    Returns:
+        Token for poll_task, or a terminal token
+    """
+    detail = token.get('detail') or {}
+    service_name = str(detail.get('service', '')).lower()
+    if not service_name:
+        return failed(token, "Missing required field: 'service'")
+    
+    try:
+        request = resolve_launch_config(resolve_start_request(service_name, detail), ecs_handler)
+    except (ValueError, ECSTaskError) as e:
+        return failed(token, str(e))
+    
+    if request['reuse_running']:
+        body = reuse_running_tasks(request, ecs_handler, tg_handler)
+        if body is not None:
+            return {**token, 'step': STEP_DONE, 'waitSeconds': 0, 'result': body}
+    
+    task_arns = ecs_handler.launch_tasks(
+        cluster=request['cluster'],
+        task_definition=launch_task_definition(request),
+        subnets=request['subnets'],
+        security_groups=request['security_groups'],
+        count=request['count']
+    )
+    logger.info(f"[{service_name}] Launched {len(task_arns)} task(s); polling from the state machine")
+    
+    # Steps may run in different containers, so deadlines use wall-clock time
+    return {
+        **token,
+        'step': 'poll_task',
+        'request': request,
+        'taskArns': task_arns,
+        'startedAt': time.time(),
+        'deadline': time.time() + TASK_WAIT_TIMEOUT,
+        'polls': 0,
+        'waitSeconds': wait_seconds(DEFAULT_SCHEDULER.next_interval(None, 0, request['task_definition']))
+    }
+
+
+def step_poll_task(token: Dict[str, Any], ecs_handler: ECSHandler, tg_handler: TargetGroupHandler) -> Dict[str, Any]:
+    """
+    Describe the launched tasks once
+    
+    Tasks that stopped are dropped; when every remaining task is RUNNING with
+    an IP the start moves on to register. At the deadline, tasks that are not
+    ready are dropped too.
+    
+    Args:
+        token: Token from step_start or a previous poll_task
+        ecs_handler: ECS handler used to describe the tasks
+        tg_handler: Unused
+    
+    Returns:
+        Token for poll_task (with a wait), register, or failed
+    """
+    request = token['request']
+    task_arns: List[str] = token['taskArns']
+    
+    try:
+        response = ecs_handler.ecs_client.describe_tasks(cluster=request['cluster'], tasks=task_arns)
+    except ClientError as e:
+        raise ECSTaskError(f"Error checking task status: {str(e)}") from e
+    
+    tasks = {task['taskArn']: task for task in response.get('tasks', [])}
+    errors = list(token.get('errors', []))
+    ready: Dict[str, str] = {}
+    waiting: List[str] = []
+    phase: Optional[str] = None
+    
+    for task_arn in task_arns:
+        task = tasks.get(task_arn)
+        if task is None:
+            errors.append(f"Task {task_arn.split('/')[-1]} not found")
+        elif task.get('lastStatus') == 'STOPPED':
+            errors.append(stopped_message(task))
+        elif task.get('lastStatus') == 'RUNNING' and extract_private_ip(task):
+            ready[task_arn] = extract_private_ip(task)
+        else:
+            waiting.append(task_arn)
+            phase = phase or task.get('lastStatus')
+    
+    polls = token['polls'] + 1
+    elapsed = time.time() - token['startedAt']
+    
+    if waiting and time.time() < token['deadline']:
+        return {
+            **token,
+            'taskArns': list(ready) + waiting,
+            'errors': errors,
+            'polls': polls,
+            'waitSeconds': wait_seconds(DEFAULT_SCHEDULER.next_interval(phase, elapsed, request['task_definition']))
+        }
+    
+    for task_arn in waiting:
+        errors.append(
+            f"Timeout waiting for task {task_arn.split('/')[-1]} to reach RUNNING state after {TASK_WAIT_TIMEOUT}s"
+        )
+    
+    if not ready:
+        return failed({**token, 'errors': errors, 'polls': polls}, f"No tasks reached RUNNING: {'; '.join(errors)}")
+    
+    DEFAULT_SCHEDULER.record_duration(request['task_definition'], elapsed)
+    logger.info(f"[{request['service']}] {len(ready)} task(s) RUNNING after {polls} polls")
+    
+    return {
+        **token,
+        'step': 'register',
+        'taskArns': list(ready),
+        'targets': [[ip, request['container_port']] for ip in ready.values()],
+        'errors': errors,
+        'polls': polls,
+        'waitSeconds': 0
+    }
+
+
+def step_register(token: Dict[str, Any], ecs_handler: ECSHandler, tg_handler: TargetGroupHandler) -> Dict[str, Any]:
+    """
+    Register the RUNNING tasks with one register_targets call per target group
+    
+    Args:
+        token: Token from poll_task
+        ecs_handler: Unused
+        tg_handler: Target group handler used to register the targets
+    
+    Returns:
+        Token for poll_health when waitForHealthy is set, otherwise done
+    """
+    request = token['request']
+    private_ips = [ip for ip, _ in token['targets']]
+    
+    map_target_groups(
+        lambda arn, port: tg_handler.register_targets(
+            target_group_arn=arn,
+            targets=[(ip, port) for ip in private_ips]
+        ),
+        get_target_groups(request)
+    )
+    
+    if not request['wait_for_healthy']:
+        return finish(token, get_groups_health(request, private_ips, tg_handler))
+    
+    return {
+        **token,
+        'step': 'poll_health',
+        'healthDeadline': time.time() + HEALTH_CHECK_TIMEOUT,
+        'healthStartedAt': time.time(),
+        'healthPolls': 0,
+        'waitSeconds': wait_seconds(DEFAULT_SCHEDULER.next_interval(None, 0, f"health:{request['target_group_arn']}"))
+    }
+
+
+def step_poll_health(token: Dict[str, Any], ecs_handler: ECSHandler, tg_handler: TargetGroupHandler) -> Dict[str, Any]:
+    """
+    Check the health of all registered targets with one call per target group
+    
+    As with the synchronous wait, a health check timeout does not fail the
+    start: the targets may still become healthy after the state machine ends.
+    
+    Args:
+        token: Token from register or a previous poll_health
+        ecs_handler: Unused
+        tg_handler: Target group handler used to read target health
+    
+    Returns:
+        Token for poll_health (with a wait) or done
+    """
+    request = token['request']
+    history_key = f"health:{request['target_group_arn']}"
+    
+    health = get_groups_health(request, [ip for ip, _ in token['targets']], tg_handler)
+    polls = token['healthPolls'] + 1
+    elapsed = time.time() - token['healthStartedAt']
+    pending = [target for group in health for target in group if target.get('state') != 'healthy']
+    
+    if not pending:
+        DEFAULT_SCHEDULER.record_duration(history_key, elapsed)
+        return finish({**token, 'healthPolls': polls}, health)
+    
+    if time.time() >= token['healthDeadline']:
+        logger.warning(
+            f"[{request['service']}] Timeout waiting for {len(pending)} target(s) to become healthy "
+            f"after {HEALTH_CHECK_TIMEOUT}s ({polls} polls). Targets may still be initializing."
+        )
+        return finish({**token, 'healthPolls': polls}, health)
+    
+    return {
+        **token,
+        'healthPolls': polls,
+        'waitSeconds': wait_seconds(DEFAULT_SCHEDULER.next_interval(pending[0].get('state'), elapsed, history_key))
+    }
+
+
+def get_groups_health(
+    request: Dict[str, Any],
+    private_ips: List[str],
+    tg_handler: TargetGroupHandler
+) -> List[List[dict]]:
+    """Read the health of the targets in every target group (primary first)"""
+    return map_target_groups(
+        lambda arn, port: tg_handler.get_targets_health(arn, [(ip, port) for ip in private_ips]),
+        get_target_groups(request)
+    )
+
+
+def finish(token: Dict[str, Any], group_health: List[List[dict]]) -> Dict[str, Any]:
+    """Build the done token with the same response body as a synchronous start"""
+    request = token['request']
+    service_name = request['service']
+    count = request['count']
+    target_groups = get_target_groups(request)
+    health = group_health[0]
+    
+    tasks = [
+        {
+            'taskArn': task_arn,
+            'taskId': task_arn.split('/')[-1],
+            'privateIp': health_status['ip'],
+            'healthStatus': health_status
+        }
+        for task_arn, health_status in zip(token['taskArns'], health)
+    ]
+    
+    body = {
+        'message': f'Successfully started and registered {service_name} task',
+        'service': service_name,
+        'taskArn': tasks[0]['taskArn'],
+        'taskId': tasks[0]['taskId'],
+        'privateIp': tasks[0]['privateIp'],
+        'port': request['container_port'],
+        'targetGroupArn': request['target_group_arn'],
+        'healthStatus': tasks[0]['healthStatus'],
+        'source': 'run_task',
+        'polls': {'running': token['polls'], 'healthy': token.get('healthPolls', 0)}
+    }
+    
+    if count > 1:
+        body['message'] = f'Successfully started and registered {len(tasks)} of {count} {service_name} tasks'
+        body['desiredCount'] = count
+        body['runningCount'] = len(tasks)
+        body['tasks'] = tasks
+    
+    if len(target_groups) > 1:
+        body['targetGroups'] = [
+            {'targetGroupArn': arn, 'port': port, 'healthStatuses': statuses}
+            for (arn, port), statuses in zip(target_groups, group_health)
+        ]
+    
+    if token.get('errors'):
+        body['errors'] = token['errors']
+    
+    return {**token, 'step': STEP_DONE, 'waitSeconds': 0, 'result': body}
+
+
+def failed(token: Dict[str, Any], error: str) -> Dict[str, Any]:
+    """Build the failed token"""
+    logger.error(f"Start failed: {error}")
+    return {**token, 'step': STEP_FAILED, 'waitSeconds': 0, 'error': error}
+
+
+STEPS: Dict[str, Callable[[Dict[str, Any], ECSHandler, TargetGroupHandler], Dict[str, Any]]] = {
+    'start': step_start,
+    'poll_task': step_poll_task,
+    'register': step_register,
+    'poll_health': step_poll_health,
+}
+
+
+def run_step(
+    token: Dict[str, Any],
+    ecs_handler: ECSHandler,
+    tg_handler: TargetGroupHandler
+) -> Dict[str, Any]:
+    """
+    Run the step named by a token
+    
+    ECS and target group errors end the start with a failed token rather
+    than an exception, so the state machine can route on "step".
+    
+    Args:
+        token: Continuation token
+        ecs_handler: ECS handler
+        tg_handler: Target group handler
+    
+    Returns:
+        Next continuation token
+    
+    Raises:
+        ValueError: If the token names an unknown step
+    """
+    step = token.get('step')
+    if step in (STEP_DONE, STEP_FAILED):
+        return token
+    if step not in STEPS:
+        raise ValueError(f"Unknown step: {step}. Valid steps: {', '.join(STEPS)}")
+    
+    try:
+        return STEPS[step](token, ecs_handler, tg_handler)
+    except (ECSTaskError, TargetGroupError) as e:
+        return failed(token, str(e))
+
+
+def initial_token(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the first token from a start event (or its detail)"""
+    return {'step': 'start', 'detail': event.get('detail', event), 'waitSeconds': 0}
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    State machine task handler: run one step and return the next token
+    
+    Accepts either a token from the previous step or a start event (the
+    first state of the execution).
+    
+    Args:
+        event: Continuation token or start event
+        context: Lambda context
+    
+    Returns:
+        Next continuation token
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
+    
+    token = event if 'step' in event else initial_token(event)
+    return run_step(token, ECSHandler(region=AWS_REGION), TargetGroupHandler(region=AWS_REGION))
+
+
+def run_local(
+    event: Dict[str, Any],
+    ecs_handler: Optional[ECSHandler] = None,
+    tg_handler: Optional[TargetGroupHandler] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    max_steps: int = 1000
+) -> Dict[str, Any]:
+    """
+    Drive the steps in-process, sleeping where the state machine would wait
+    
+    Args:
+        event: Start event (or its detail)
+        ecs_handler: ECS handler (defaults to a new one)
+        tg_handler: Target group handler (defaults to a new one)
+        sleep: Function used for the waits (tests pass a no-op)
+        max_steps: Safety limit on the number of steps
+    
+    Returns:
+        Terminal token ("done" with "result", or "failed" with "error")
+    """
+    ecs_handler = ecs_handler or ECSHandler(region=AWS_REGION)
+    tg_handler = tg_handler or TargetGroupHandler(region=AWS_REGION)
+    
+    token = initial_token(event)
+    for _ in range(max_steps):
+        if token.get('waitSeconds'):
+            sleep(token['waitSeconds'])
+        token = run_step(token, ecs_handler, tg_handler)
+        if token['step'] in (STEP_DONE, STEP_FAILED):
+            return token
+    
+    return failed(token, f"Start did not finish within {max_steps} steps")
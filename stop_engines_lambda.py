@@ -1,19 +1,52 @@
 """
 Stop All ECS Tasks Lambda
-Stops all running tasks in configured ECS clusters and optionally deregisters from target groups
+Stops all running tasks in configured ECS clusters and optionally deregisters from target groups,
+or only the tasks of services whose target groups had no requests for a while (idle reaper)
 """
 import json
 import logging
-from typing import Dict, Any, List
-import boto3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
 from botocore.exceptions import ClientError
 
-from config import get_all_service_names, get_service_config, AWS_REGION, LOG_LEVEL
+from aws_clients import get_client, preload
+from config import (
+    get_all_service_names,
+    get_service_config,
+    get_target_groups,
+    AWS_REGION,
+    LOG_LEVEL,
+    PRELOAD_CLIENTS,
+    STOP_TASK_CONCURRENCY,
+    DRAIN_ON_STOP,
+    DRAIN_MAX_WAIT,
+)
+from metrics_source import get_metrics_source, series_sum
+from resolution_cache import ResolutionError, with_container_port
+from target_group_handler import TargetGroupHandler, TargetGroupError, DRAIN_TIMEOUT_MARGIN, map_target_groups
+from task_poller import DESCRIBE_TASKS_MAX_ARNS
+from throttling import DEFAULT_THROTTLE
+from warm_pool import is_warm
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(getattr(logging, LOG_LEVEL))
 
+# Stop passes per cluster: the initial stop plus one sweep for stragglers
+MAX_STOP_PASSES = 2
+
+# Seconds of Lambda time kept free for stopping tasks after drain waits
+DRAIN_STOP_RESERVE = 30
+
+# Target group metric the idle reaper sums over each service's idle window
+IDLE_METRIC = 'RequestCountPerTarget'
+
+# Optional: create AWS clients during init instead of on the first request
+if PRELOAD_CLIENTS:
+    preload(PRELOAD_CLIENTS, AWS_REGION)
+
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -25,13 +58,29 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         "detail-type": "Stop ECS Tasks",
         "detail": {
             "services": ["auth", "pdf", "fa"],  # Optional: specific services, or empty for all
-            "deregister_targets": true           # Optional: deregister from target groups (default: true)
+            "deregister_targets": true,          # Optional: deregister from target groups (default: true)
+            "drain": false,                      # Optional: deregister and drain before stopping (default: false)
+            "idle_only": false                   # Optional: only stop idle tasks (drain defaults to true)
         }
     }
     
     Or trigger without detail to stop all services
+    
+    With "idle_only": true (the idle reaper, e.g. on a schedule) a service is
+    only stopped when its target groups had no requests for its
+    idle_stop_minutes, and only tasks that have run at least that long are
+    stopped (see reap_idle_services).
+    
+    Clusters are processed concurrently and stop_task calls go through a
+    bounded worker pool (STOP_TASK_CONCURRENCY).
+    
+    With "drain": true the targets are deregistered first (one batched call per
+    target group), the Lambda waits for them to leave the draining state (up to
+    the target group's deregistration delay), and only then stops the tasks, so
+    the ALB stops routing to tasks before they die.
     """
     logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
     
     try:
         # Parse event
@@ -40,122 +89,38 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Get list of services to stop (default: all)
         services_to_stop = detail.get('services', get_all_service_names())
         deregister_targets = detail.get('deregister_targets', True)
+        idle_only = detail.get('idle_only', False)
+        drain = detail.get('drain', True if idle_only else DRAIN_ON_STOP)
         
         if not services_to_stop:
             services_to_stop = get_all_service_names()
         
-        logger.info(f"Stopping tasks for services: {services_to_stop}")
+        logger.info(f"Stopping {'idle ' if idle_only else ''}tasks for services: {services_to_stop}")
         
-        # Initialize AWS clients
-        ecs_client = boto3.client('ecs', region_name=AWS_REGION)
-        elbv2_client = boto3.client('elbv2', region_name=AWS_REGION)
+        # Shared AWS clients (reused across warm invocations)
+        ecs_client = get_client('ecs', AWS_REGION)
+        tg_handler = TargetGroupHandler(region=AWS_REGION)
         
-        results = []
-        total_stopped = 0
+        # Drain waits must finish early enough to leave time for stopping
+        drain_deadline = time.monotonic() + drain_wait_budget(context) if drain else None
         
-        # Process each service
-        for service_name in services_to_stop:
-            try:
-                logger.info(f"Processing service: {service_name}")
-                
-                # Get service configuration
-                try:
-                    config = get_service_config(service_name)
-                except ValueError as e:
-                    logger.warning(f"Skipping unknown service: {service_name}")
-                    results.append({
-                        'service': service_name,
-                        'status': 'skipped',
-                        'reason': str(e)
-                    })
-                    continue
-                
-                cluster = config['cluster']
-                target_group_arn = config['target_group_arn']
-                container_port = config['container_port']
-                
-                # List all running tasks in the cluster
-                list_response = ecs_client.list_tasks(
-                    cluster=cluster,
-                    desiredStatus='RUNNING'
-                )
-                
-                task_arns = list_response.get('taskArns', [])
-                
-                if not task_arns:
-                    logger.info(f"No running tasks found for {service_name} in cluster {cluster}")
-                    results.append({
-                        'service': service_name,
-                        'cluster': cluster,
-                        'tasks_stopped': 0,
-                        'status': 'no_tasks'
-                    })
-                    continue
-                
-                logger.info(f"Found {len(task_arns)} running tasks for {service_name}")
-                
-                # Get task details to extract IPs (for deregistration)
-                task_ips = []
-                if deregister_targets:
-                    describe_response = ecs_client.describe_tasks(
-                        cluster=cluster,
-                        tasks=task_arns
-                    )
-                    
-                    for task in describe_response.get('tasks', []):
-                        ip = extract_private_ip(task)
-                        if ip:
-                            task_ips.append(ip)
-                
-                # Stop all tasks
-                stopped_tasks = []
-                for task_arn in task_arns:
-                    try:
-                        ecs_client.stop_task(
-                            cluster=cluster,
-                            task=task_arn,
-                            reason='Stopped by stop-engines-lambda'
-                        )
-                        stopped_tasks.append(task_arn.split('/')[-1])
-                        total_stopped += 1
-                        logger.info(f"Stopped task: {task_arn.split('/')[-1]}")
-                    except ClientError as e:
-                        logger.error(f"Error stopping task {task_arn}: {str(e)}")
-                
-                # Deregister from target group
-                deregistered_count = 0
-                if deregister_targets and task_ips:
-                    try:
-                        targets = [
-                            {'Id': ip, 'Port': container_port}
-                            for ip in task_ips
-                        ]
-                        
-                        elbv2_client.deregister_targets(
-                            TargetGroupArn=target_group_arn,
-                            Targets=targets
-                        )
-                        deregistered_count = len(task_ips)
-                        logger.info(f"Deregistered {deregistered_count} targets from {target_group_arn}")
-                    except ClientError as e:
-                        logger.warning(f"Error deregistering targets: {str(e)}")
-                
-                results.append({
-                    'service': service_name,
-                    'cluster': cluster,
-                    'tasks_stopped': len(stopped_tasks),
-                    'targets_deregistered': deregistered_count,
-                    'task_ids': stopped_tasks,
-                    'status': 'success'
-                })
-                
-            except Exception as e:
-                logger.error(f"Error processing service {service_name}: {str(e)}")
-                results.append({
-                    'service': service_name,
-                    'status': 'error',
-                    'error': str(e)
-                })
+        if idle_only:
+            results = reap_idle_services(
+                services_to_stop,
+                ecs_client,
+                tg_handler,
+                get_metrics_source(),
+                deregister_targets,
+                drain_deadline
+            )
+        else:
+            results = stop_services(services_to_stop, ecs_client, tg_handler, deregister_targets, drain_deadline)
+        
+        # Keep results in request order
+        order = list(services_to_stop)
+        results.sort(key=lambda r: order.index(r['service']) if r['service'] in order else len(order))
+        
+        total_stopped = sum(r.get('tasks_stopped', 0) for r in results)
         
         # Success response
         response = {
@@ -170,7 +135,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         logger.info(f"Completed: {json.dumps(response)}")
         return response
-        
+    
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
         return {
@@ -181,13 +146,590 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
 
 
+def stop_services(
+    services_to_stop: List[str],
+    ecs_client: Any,
+    tg_handler: TargetGroupHandler,
+    deregister_targets: bool,
+    drain_deadline: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Stop every running task in the clusters of the given services
+    
+    Args:
+        services_to_stop: Service names
+        ecs_client: boto3 ECS client
+        tg_handler: Target group handler used for deregistration and drains
+        deregister_targets: Whether to deregister task IPs from target groups
+        drain_deadline: If set, drain targets (until this time.monotonic()
+            deadline at most) before stopping tasks
+    
+    Returns:
+        One result dictionary per service (unordered)
+    """
+    results = []
+    
+    # Group services by cluster so each cluster is listed and stopped once
+    clusters: Dict[str, List[Tuple[str, Dict]]] = {}
+    for service_name in services_to_stop:
+        try:
+            config = get_service_config(service_name)
+        except ValueError as e:
+            logger.warning(f"Skipping unknown service: {service_name}")
+            results.append({
+                'service': service_name,
+                'status': 'skipped',
+                'reason': str(e)
+            })
+            continue
+        clusters.setdefault(config['cluster'], []).append((service_name, config))
+    
+    if clusters:
+        with ThreadPoolExecutor(max_workers=STOP_TASK_CONCURRENCY) as stop_pool, \
+                ThreadPoolExecutor(max_workers=len(clusters)) as cluster_pool:
+            futures = {
+                cluster_pool.submit(
+                    stop_cluster,
+                    ecs_client,
+                    tg_handler,
+                    cluster,
+                    services,
+                    deregister_targets,
+                    stop_pool,
+                    drain_deadline
+                ): services
+                for cluster, services in clusters.items()
+            }
+            
+            for future in as_completed(futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    for service_name, _ in futures[future]:
+                        logger.error(f"Error processing service {service_name}: {str(e)}")
+                        results.append({
+                            'service': service_name,
+                            'status': 'error',
+                            'error': str(e)
+                        })
+    
+    return results
+
+
+def reap_idle_services(
+    service_names: List[str],
+    ecs_client: Any,
+    tg_handler: TargetGroupHandler,
+    metrics_source: Any,
+    deregister_targets: bool,
+    drain_deadline: Optional[float] = None,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Stop the tasks of services whose target groups had no requests for their idle time
+    
+    A service is idle when the sum of IDLE_METRIC over all its target groups
+    is zero for its last idle_stop_minutes (services with 0 are skipped).
+    All target groups are read in one metrics call, then the idle services
+    are handled concurrently: only tasks of the service's task definition
+    family that have run for the whole idle window are stopped, so tasks
+    just started (e.g. by the front door) and warm pool tasks are kept.
+    
+    Args:
+        service_names: Service names to check
+        ecs_client: boto3 ECS client
+        tg_handler: Target group handler used for deregistration and drains
+        metrics_source: Source of target group metrics (see metrics_source.py)
+        deregister_targets: Whether to deregister task IPs from target groups
+        drain_deadline: If set, drain targets (until this time.monotonic()
+            deadline at most) before stopping tasks
+        now: Current time (defaults to now)
+    
+    Returns:
+        One result dictionary per service (unordered)
+    
+    Raises:
+        ClientError: If the metrics cannot be read
+    """
+    now = now or datetime.now(timezone.utc)
+    results = []
+    
+    candidates: List[Tuple[str, Dict, int]] = []
+    for service_name in service_names:
+        try:
+            config = get_service_config(service_name)
+        except ValueError as e:
+            logger.warning(f"Skipping unknown service: {service_name}")
+            results.append({'service': service_name, 'status': 'skipped', 'reason': str(e)})
+            continue
+        
+        idle_minutes = config.get('idle_stop_minutes', 0)
+        if idle_minutes <= 0:
+            results.append({'service': service_name, 'status': 'skipped', 'reason': 'Idle stop disabled'})
+            continue
+        
+        try:
+            candidates.append((service_name, with_container_port(config, ecs_client), idle_minutes))
+        except (ResolutionError, ClientError) as e:
+            logger.error(f"Error resolving service {service_name}: {str(e)}")
+            results.append({'service': service_name, 'status': 'error', 'error': str(e)})
+    
+    if not candidates:
+        return results
+    
+    # One metrics read for every target group of every service
+    target_group_arns = [arn for _, config, _ in candidates for arn, _ in get_target_groups(config)]
+    longest = max(idle_minutes for _, _, idle_minutes in candidates)
+    series = metrics_source.get_series(target_group_arns, [IDLE_METRIC], now - timedelta(minutes=longest), now)
+    
+    idle: List[Tuple[str, Dict, int]] = []
+    for service_name, config, idle_minutes in candidates:
+        since = now - timedelta(minutes=idle_minutes)
+        requests = sum(
+            series_sum(series.get((arn, IDLE_METRIC), []), since)
+            for arn, _ in get_target_groups(config)
+        )
+        if requests > 0:
+            results.append({
+                'service': service_name,
+                'cluster': config['cluster'],
+                'requests': requests,
+                'idle_stop_minutes': idle_minutes,
+                'tasks_stopped': 0,
+                'status': 'active'
+            })
+        else:
+            idle.append((service_name, config, idle_minutes))
+    
+    if not idle:
+        return results
+    
+    logger.info(f"Idle services: {[name for name, _, _ in idle]}")
+    with ThreadPoolExecutor(max_workers=STOP_TASK_CONCURRENCY) as stop_pool, \
+            ThreadPoolExecutor(max_workers=len(idle)) as service_pool:
+        futures = {
+            service_pool.submit(
+                stop_idle_service,
+                ecs_client,
+                tg_handler,
+                service_name,
+                config,
+                now - timedelta(minutes=idle_minutes),
+                deregister_targets,
+                stop_pool,
+                drain_deadline
+            ): (service_name, idle_minutes)
+            for service_name, config, idle_minutes in idle
+        }
+        
+        for future in as_completed(futures):
+            service_name, idle_minutes = futures[future]
+            try:
+                results.append({**future.result(), 'requests': 0, 'idle_stop_minutes': idle_minutes})
+            except Exception as e:
+                logger.error(f"Error processing service {service_name}: {str(e)}")
+                results.append({'service': service_name, 'status': 'error', 'error': str(e)})
+    
+    return results
+
+
+def stop_idle_service(
+    ecs_client: Any,
+    tg_handler: TargetGroupHandler,
+    service_name: str,
+    config: Dict,
+    idle_since: datetime,
+    deregister_targets: bool,
+    stop_pool: ThreadPoolExecutor,
+    drain_deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Drain and stop the tasks of one idle service that started before idle_since
+    
+    Args:
+        ecs_client: boto3 ECS client
+        tg_handler: Target group handler used for deregistration and drains
+        service_name: Service name
+        config: Service configuration with container_port
+        idle_since: Start of the idle window
+        deregister_targets: Whether to deregister task IPs from target groups
+        stop_pool: Shared worker pool for stop_task calls
+        drain_deadline: If set, drain targets before stopping tasks
+    
+    Returns:
+        Result dictionary of the service
+    """
+    cluster = config['cluster']
+    family = config['task_definition'].split('/')[-1].split(':')[0]
+    
+    tasks = [
+        task for task in describe_tasks(ecs_client, cluster, list_running_tasks(ecs_client, cluster, family), include=['TAGS'])
+        if not is_warm(task)
+        and task.get('startedAt') is not None
+        and task['startedAt'] <= idle_since
+    ]
+    
+    if not tasks:
+        logger.info(f"No idle tasks of {service_name} in cluster {cluster}")
+        return {'service': service_name, 'cluster': cluster, 'tasks_stopped': 0, 'status': 'no_tasks'}
+    
+    drain = drain_deadline is not None
+    task_ips = [ip for ip in (extract_private_ip(task) for task in tasks) if ip]
+    logger.info(f"Stopping {len(tasks)} idle tasks of {service_name} in cluster {cluster} (drain={drain})")
+    
+    deregistered = 0
+    drained = not task_ips
+    error = None
+    try:
+        if drain and task_ips:
+            deregistered = deregister_service_targets(tg_handler, config, task_ips)
+            drained = bool(deregistered) and wait_for_service_drained(tg_handler, config, task_ips, drain_deadline)
+    except Exception as e:
+        logger.error(f"Error draining idle tasks of {service_name}: {str(e)}")
+        error = str(e)
+    
+    stopped, failed = stop_tasks(ecs_client, cluster, [task['taskArn'] for task in tasks], stop_pool)
+    if failed:
+        logger.error(f"{len(failed)} idle tasks of {service_name} could not be stopped")
+    
+    try:
+        if not drain and deregister_targets and task_ips:
+            deregistered = deregister_service_targets(tg_handler, config, task_ips)
+    except Exception as e:
+        logger.error(f"Error deregistering idle tasks of {service_name}: {str(e)}")
+        error = error or str(e)
+    
+    result = {
+        'service': service_name,
+        'cluster': cluster,
+        'tasks_stopped': len(stopped),
+        'targets_deregistered': deregistered,
+        'task_ids': stopped,
+        'status': 'success' if error is None else 'error'
+    }
+    if drain:
+        result['drained'] = drained
+    if error is not None:
+        result['error'] = error
+    return result
+
+
+def drain_wait_budget(context: Any) -> float:
+    """
+    Get how many seconds drain waits may take in this invocation
+    
+    Args:
+        context: Lambda context (may be None when run locally)
+    
+    Returns:
+        Seconds available for waiting on drains
+    """
+    budget = float(DRAIN_MAX_WAIT)
+    get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    if callable(get_remaining):
+        remaining = get_remaining()
+        if isinstance(remaining, (int, float)):
+            budget = min(budget, remaining / 1000 - DRAIN_STOP_RESERVE)
+    return max(0.0, budget)
+
+
+def stop_cluster(
+    ecs_client: Any,
+    tg_handler: TargetGroupHandler,
+    cluster: str,
+    services: List[Tuple[str, Dict]],
+    deregister_targets: bool,
+    stop_pool: ThreadPoolExecutor,
+    drain_deadline: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Stop every running task of one cluster and deregister them
+    
+    Tasks are listed with the list_tasks paginator. After stopping, the cluster
+    is listed again and anything still running (a failed stop_task or a task
+    launched meanwhile) is stopped in one more pass.
+    
+    Args:
+        ecs_client: boto3 ECS client
+        tg_handler: Target group handler used for deregistration and drains
+        cluster: ECS cluster name
+        services: (service_name, config) pairs that use this cluster
+        deregister_targets: Whether to deregister task IPs from target groups
+        stop_pool: Shared worker pool for stop_task calls
+        drain_deadline: If set, deregister and wait for draining (until this
+            time.monotonic() deadline at most) before stopping tasks
+    
+    Returns:
+        One result dictionary per service
+    """
+    service_names = [name for name, _ in services]
+    drain = drain_deadline is not None
+    logger.info(f"Processing cluster {cluster} for services: {service_names} (drain={drain})")
+    
+    task_arns = list_running_tasks(ecs_client, cluster)
+    
+    if not task_arns:
+        logger.info(f"No running tasks found for {', '.join(service_names)} in cluster {cluster}")
+        return [
+            {
+                'service': service_name,
+                'cluster': cluster,
+                'tasks_stopped': 0,
+                'status': 'no_tasks'
+            }
+            for service_name in service_names
+        ]
+    
+    logger.info(f"Found {len(task_arns)} running tasks in cluster {cluster}")
+    
+    # Errors of one service are reported for it; the cluster's tasks are still stopped
+    errors: Dict[str, str] = {}
+    
+    def service_step(service_name: str, step: Any, *args: Any) -> Any:
+        try:
+            return step(*args)
+        except Exception as e:
+            logger.error(f"Error processing service {service_name}: {str(e)}")
+            errors.setdefault(service_name, str(e))
+            return None
+    
+    # Get task details to extract IPs (for deregistration)
+    task_ips = []
+    if deregister_targets or drain:
+        services = [
+            (name, service_step(name, with_container_port, config, ecs_client) or config)
+            for name, config in services
+        ]
+        for task in describe_tasks(ecs_client, cluster, task_arns):
+            ip = extract_private_ip(task)
+            if ip:
+                task_ips.append(ip)
+    
+    deregistered: Dict[str, int] = {}
+    drained: Dict[str, bool] = {}
+    
+    # Drain mode: take targets out of the ALB before their tasks stop
+    if drain and task_ips:
+        for service_name, config in services:
+            if service_name not in errors:
+                deregistered[service_name] = service_step(
+                    service_name, deregister_service_targets, tg_handler, config, task_ips
+                ) or 0
+        
+        for service_name, config in services:
+            if not deregistered.get(service_name):
+                drained[service_name] = False
+                continue
+            drained[service_name] = bool(service_step(
+                service_name, wait_for_service_drained, tg_handler, config, task_ips, drain_deadline
+            ))
+    
+    # Stop all tasks, then sweep up anything still running
+    stopped_tasks: List[str] = []
+    pending = task_arns
+    for stop_pass in range(1, MAX_STOP_PASSES + 1):
+        stopped, failed = stop_tasks(ecs_client, cluster, pending, stop_pool)
+        stopped_tasks.extend(stopped)
+        
+        if stop_pass == MAX_STOP_PASSES:
+            if failed:
+                logger.error(f"{len(failed)} tasks in cluster {cluster} could not be stopped")
+            break
+        
+        still_running = set(list_running_tasks(ecs_client, cluster))
+        pending = [arn for arn in still_running if arn.split('/')[-1] not in stopped_tasks]
+        if not pending:
+            break
+        logger.warning(f"{len(pending)} tasks still running in cluster {cluster}, retrying")
+    
+    results = []
+    for index, (service_name, config) in enumerate(services):
+        # Deregister from target group
+        if not drain and deregister_targets and task_ips and service_name not in errors:
+            deregistered[service_name] = service_step(
+                service_name, deregister_service_targets, tg_handler, config, task_ips
+            ) or 0
+        
+        # Tasks are attributed to the first service of a shared cluster
+        result = {
+            'service': service_name,
+            'cluster': cluster,
+            'tasks_stopped': len(stopped_tasks) if index == 0 else 0,
+            'targets_deregistered': deregistered.get(service_name, 0),
+            'task_ids': stopped_tasks if index == 0 else [],
+            'status': 'success'
+        }
+        if drain:
+            result['drained'] = drained.get(service_name, not task_ips)
+        if service_name in errors:
+            result.update({'status': 'error', 'error': errors[service_name]})
+        results.append(result)
+    
+    return results
+
+
+def deregister_service_targets(
+    tg_handler: TargetGroupHandler,
+    config: Dict,
+    task_ips: List[str]
+) -> int:
+    """
+    Deregister task IPs from each of a service's target groups in one batched call
+    
+    All target groups of the service are handled concurrently.
+    
+    Args:
+        tg_handler: Target group handler
+        config: Service configuration
+        task_ips: Private IPs of the service's tasks
+    
+    Returns:
+        Number of targets deregistered across target groups (errors count 0)
+    """
+    def deregister(target_group_arn: str, port: int) -> int:
+        try:
+            tg_handler.deregister_targets(target_group_arn, [(ip, port) for ip in task_ips])
+            logger.info(f"Deregistered {len(task_ips)} targets from {target_group_arn}")
+            return len(task_ips)
+        except TargetGroupError as e:
+            logger.warning(f"Error deregistering targets from {target_group_arn}: {str(e)}")
+            return 0
+    
+    return sum(map_target_groups(deregister, get_target_groups(config)))
+
+
+def wait_for_service_drained(
+    tg_handler: TargetGroupHandler,
+    config: Dict,
+    task_ips: List[str],
+    drain_deadline: float
+) -> bool:
+    """
+    Wait for deregistered task IPs to finish draining in every target group of a service
+    
+    Args:
+        tg_handler: Target group handler
+        config: Service configuration
+        task_ips: Private IPs of the deregistered tasks
+        drain_deadline: time.monotonic() deadline for all waits
+    
+    Returns:
+        True if every target group finished draining in time
+    """
+    return all(map_target_groups(
+        lambda arn, port: tg_handler.wait_for_targets_drained(
+            arn,
+            [(ip, port) for ip in task_ips],
+            timeout=min(
+                tg_handler.get_deregistration_delay(arn) + DRAIN_TIMEOUT_MARGIN,
+                max(0.0, drain_deadline - time.monotonic())
+            )
+        ),
+        get_target_groups(config)
+    ))
+
+
+def list_running_tasks(ecs_client: Any, cluster: str, family: Optional[str] = None) -> List[str]:
+    """
+    List every running task ARN in a cluster, following nextToken pages
+    
+    Args:
+        ecs_client: boto3 ECS client
+        cluster: ECS cluster name
+        family: Only list tasks of this task definition family
+    
+    Returns:
+        List of task ARNs
+    """
+    params = {'cluster': cluster, 'desiredStatus': 'RUNNING'}
+    if family:
+        params['family'] = family
+    
+    task_arns = []
+    paginator = ecs_client.get_paginator('list_tasks')
+    for page in paginator.paginate(**params):
+        task_arns.extend(page.get('taskArns', []))
+    return task_arns
+
+
+def describe_tasks(
+    ecs_client: Any,
+    cluster: str,
+    task_arns: List[str],
+    include: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Describe tasks in chunks of 100 ARNs (the describe_tasks limit)
+    
+    Args:
+        ecs_client: boto3 ECS client
+        cluster: ECS cluster name
+        task_arns: Task ARNs to describe
+        include: Extra task fields to return (e.g. ['TAGS'])
+    
+    Returns:
+        List of task descriptions
+    """
+    extra = {'include': include} if include else {}
+    tasks = []
+    for i in range(0, len(task_arns), DESCRIBE_TASKS_MAX_ARNS):
+        response = ecs_client.describe_tasks(
+            cluster=cluster,
+            tasks=task_arns[i:i + DESCRIBE_TASKS_MAX_ARNS],
+            **extra
+        )
+        tasks.extend(response.get('tasks', []))
+    return tasks
+
+
+def stop_tasks(
+    ecs_client: Any,
+    cluster: str,
+    task_arns: List[str],
+    stop_pool: ThreadPoolExecutor
+) -> Tuple[List[str], List[str]]:
+    """
+    Issue stop_task for every task through the shared worker pool
+    
+    Args:
+        ecs_client: boto3 ECS client
+        cluster: ECS cluster name
+        task_arns: Task ARNs to stop
+        stop_pool: Worker pool bounding concurrent stop_task calls
+    
+    Returns:
+        Tuple of (stopped task IDs, task ARNs that failed to stop)
+    """
+    def stop_one(task_arn: str) -> None:
+        ecs_client.stop_task(
+            cluster=cluster,
+            task=task_arn,
+            reason='Stopped by stop-engines-lambda'
+        )
+    
+    futures = {stop_pool.submit(stop_one, task_arn): task_arn for task_arn in task_arns}
+    
+    stopped, failed = [], []
+    for future in as_completed(futures):
+        task_arn = futures[future]
+        try:
+            future.result()
+            stopped.append(task_arn.split('/')[-1])
+            logger.info(f"Stopped task: {task_arn.split('/')[-1]}")
+        except Exception as e:
+            failed.append(task_arn)
+            logger.error(f"Error stopping task {task_arn}: {str(e)}")
+    
+    return stopped, failed
+
+
 def extract_private_ip(task: Dict) -> str:
     """
     Extract private IP from task details (awsvpc mode)
     
     Args:
         task: Task description from describe_tasks
-        
+    
     Returns:
         Private IP address or None
     """
@@ -2,20 +2,71 @@
 Target Group Management
 Handles registering ECS task IPs with Application Load Balancer target groups
 """
+import contextvars
 import logging
+import threading
 import time
-from typing import Optional
-import boto3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, TypeVar
 from botocore.exceptions import ClientError
 
+from aws_clients import get_client
+from health_watcher import HealthWatcher
+from polling import DEFAULT_SCHEDULER
+from timing import add_api_calls, phase
+
 logger = logging.getLogger()
 
+# AWS default for deregistration_delay.timeout_seconds
+DEFAULT_DEREGISTRATION_DELAY = 300
+
+# Extra time allowed beyond the deregistration delay when waiting for a drain
+DRAIN_TIMEOUT_MARGIN = 10
+
+# Default time to wait for newly registered targets to pass health checks
+HEALTH_CHECK_TIMEOUT = 60
+
 
 class TargetGroupError(Exception):
     """Custom exception for target group operations"""
     pass
 
 
+T = TypeVar('T')
+
+
+def map_target_groups(
+    fn: Callable[[str, int], T],
+    target_groups: List[Tuple[str, int]]
+) -> List[T]:
+    """
+    Call fn(target_group_arn, port) for every target group of a service concurrently
+    
+    Each call runs in a copy of the caller's context, so its phases and API
+    calls are recorded on the active start trace. A single target group is
+    handled inline without a thread.
+    
+    Args:
+        fn: Operation on one target group
+        target_groups: (target_group_arn, port) pairs from config.get_target_groups
+        
+    Returns:
+        Results in target_groups order
+        
+    Raises:
+        The first error in target_groups order, once every call has finished
+    """
+    if len(target_groups) == 1:
+        return [fn(*target_groups[0])]
+    
+    with ThreadPoolExecutor(max_workers=len(target_groups)) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, fn, target_group_arn, port)
+            for target_group_arn, port in target_groups
+        ]
+    return [future.result() for future in futures]
+
+
 class TargetGroupHandler:
     """Handles target group registration operations"""
     
@@ -26,8 +77,32 @@ class TargetGroupHandler:
         Args:
             region: AWS region
         """
-        self.elbv2_client = boto3.client('elbv2', region_name=region)
         self.region = region
+        self.scheduler = DEFAULT_SCHEDULER
+        self._elbv2_client = None
+        self._health_watcher = None
+        self._health_watcher_lock = threading.Lock()
+    
+    @property
+    def elbv2_client(self):
+        """ELBv2 client (pooled, created on first use)"""
+        if self._elbv2_client is None:
+            self._elbv2_client = get_client('elbv2', self.region)
+        return self._elbv2_client
+    
+    @elbv2_client.setter
+    def elbv2_client(self, client) -> None:
+        self._elbv2_client = client
+        self._health_watcher = None
+    
+    @property
+    def health_watcher(self) -> HealthWatcher:
+        """Watcher shared by all health waits of this handler"""
+        if self._health_watcher is None:
+            with self._health_watcher_lock:
+                if self._health_watcher is None:
+                    self._health_watcher = HealthWatcher(self.elbv2_client, scheduler=self.scheduler)
+        return self._health_watcher
     
     def register_target(
         self,
@@ -35,7 +110,7 @@ class TargetGroupHandler:
         private_ip: str,
         port: int,
         wait_for_healthy: bool = False,
-        health_check_timeout: int = 60
+        health_check_timeout: int = HEALTH_CHECK_TIMEOUT
     ) -> bool:
         """
         Register a target (IP) with a target group
@@ -57,26 +132,28 @@ class TargetGroupHandler:
         
         try:
             # Register the target
-            response = self.elbv2_client.register_targets(
-                TargetGroupArn=target_group_arn,
-                Targets=[
-                    {
-                        'Id': private_ip,
-                        'Port': port
-                    }
-                ]
-            )
+            with phase('register_targets'):
+                response = self.elbv2_client.register_targets(
+                    TargetGroupArn=target_group_arn,
+                    Targets=[
+                        {
+                            'Id': private_ip,
+                            'Port': port
+                        }
+                    ]
+                )
             
             logger.info(f"Successfully registered target {private_ip}:{port}")
             
             # Optionally wait for target to become healthy
             if wait_for_healthy:
-                self._wait_for_target_healthy(
-                    target_group_arn,
-                    private_ip,
-                    port,
-                    timeout=health_check_timeout
-                )
+                with phase('health_check'):
+                    self._wait_for_target_healthy(
+                        target_group_arn,
+                        private_ip,
+                        port,
+                        timeout=health_check_timeout
+                    )
             
             return True
             
@@ -98,6 +175,56 @@ class TargetGroupHandler:
             logger.error(error_msg)
             raise TargetGroupError(error_msg) from e
     
+    def register_targets(
+        self,
+        target_group_arn: str,
+        targets: List[Tuple[str, int]],
+        wait_for_healthy: bool = False,
+        health_check_timeout: int = HEALTH_CHECK_TIMEOUT
+    ) -> bool:
+        """
+        Register several targets with a target group in a single call
+        
+        Args:
+            target_group_arn: ARN of the target group
+            targets: List of (private_ip, port) pairs
+            wait_for_healthy: Whether to wait for targets to become healthy
+            health_check_timeout: Max time to wait for health check (seconds)
+            
+        Returns:
+            True if registration successful
+            
+        Raises:
+            TargetGroupError: If registration fails
+        """
+        logger.info(f"Registering {len(targets)} targets with target group {target_group_arn}")
+        
+        try:
+            with phase('register_targets'):
+                self.elbv2_client.register_targets(
+                    TargetGroupArn=target_group_arn,
+                    Targets=[{'Id': ip, 'Port': port} for ip, port in targets]
+                )
+            
+            logger.info(f"Successfully registered {len(targets)} targets")
+            
+            if wait_for_healthy:
+                with phase('health_check'):
+                    self.wait_for_targets_healthy(target_group_arn, targets, timeout=health_check_timeout)
+            
+            return True
+            
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code', '')
+            error_msg = e.response.get('Error', {}).get('Message', '')
+            full_error = f"Failed to register targets: {error_code} - {error_msg}"
+            logger.error(full_error)
+            raise TargetGroupError(full_error) from e
+        except Exception as e:
+            error_msg = f"Unexpected error registering targets: {str(e)}"
+            logger.error(error_msg)
+            raise TargetGroupError(error_msg) from e
+    
     def deregister_target(
         self,
         target_group_arn: str,
@@ -136,6 +263,109 @@ class TargetGroupHandler:
             logger.error(error_msg)
             raise TargetGroupError(error_msg) from e
     
+    def deregister_targets(
+        self,
+        target_group_arn: str,
+        targets: List[Tuple[str, int]]
+    ) -> bool:
+        """
+        Deregister several targets from a target group in a single call
+        
+        Args:
+            target_group_arn: ARN of the target group
+            targets: List of (private_ip, port) pairs
+            
+        Returns:
+            True if deregistration successful
+            
+        Raises:
+            TargetGroupError: If deregistration fails
+        """
+        logger.info(f"Deregistering {len(targets)} targets from target group {target_group_arn}")
+        
+        try:
+            self.elbv2_client.deregister_targets(
+                TargetGroupArn=target_group_arn,
+                Targets=[{'Id': ip, 'Port': port} for ip, port in targets]
+            )
+            
+            logger.info(f"Successfully deregistered {len(targets)} targets")
+            return True
+            
+        except ClientError as e:
+            error_msg = f"Failed to deregister targets: {str(e)}"
+            logger.error(error_msg)
+            raise TargetGroupError(error_msg) from e
+    
+    def get_deregistration_delay(self, target_group_arn: str) -> int:
+        """
+        Get how long the target group keeps deregistered targets draining
+        
+        Args:
+            target_group_arn: ARN of the target group
+            
+        Returns:
+            deregistration_delay.timeout_seconds (AWS default 300 if unavailable)
+        """
+        attributes = self.get_target_group_attributes(target_group_arn)
+        return int(attributes.get('deregistration_delay.timeout_seconds', DEFAULT_DEREGISTRATION_DELAY))
+    
+    def wait_for_targets_drained(
+        self,
+        target_group_arn: str,
+        targets: List[Tuple[str, int]],
+        timeout: Optional[float] = None,
+        poll_interval: Optional[float] = None
+    ) -> bool:
+        """
+        Wait until deregistered targets have left the draining state
+        
+        All targets are checked with one describe_target_health call per poll.
+        
+        Args:
+            target_group_arn: ARN of the target group
+            targets: List of (private_ip, port) pairs that were deregistered
+            timeout: Maximum time to wait in seconds (default: the target
+                group's deregistration delay plus a small margin)
+            poll_interval: Fixed time between polls in seconds (None = POLL_STRATEGY decides)
+            
+        Returns:
+            True if no target is draining any more, False on timeout
+        """
+        if timeout is None:
+            timeout = self.get_deregistration_delay(target_group_arn) + DRAIN_TIMEOUT_MARGIN
+        
+        logger.info(
+            f"Waiting up to {timeout}s for {len(targets)} targets to drain from {target_group_arn}"
+        )
+        
+        start_time = time.monotonic()
+        polls = 0
+        
+        while True:
+            polls += 1
+            try:
+                states = [h['state'] for h in self.get_targets_health(target_group_arn, targets)]
+            except TargetGroupError as e:
+                logger.warning(f"Error checking drain status: {str(e)}")
+                states = ['draining']
+            
+            draining = states.count('draining')
+            elapsed = time.monotonic() - start_time
+            
+            if not draining:
+                logger.info(f"All targets drained from {target_group_arn} after {polls} polls ({elapsed:.1f}s)")
+                return True
+            
+            if elapsed >= timeout:
+                logger.warning(
+                    f"Timeout waiting for {draining} targets to drain from {target_group_arn} after {timeout}s"
+                )
+                return False
+            
+            interval = poll_interval if poll_interval is not None else self.scheduler.next_interval('draining', elapsed)
+            time.sleep(min(interval, max(0.0, timeout - elapsed)))
+    
     def get_target_health(
         self,
         target_group_arn: str,
@@ -196,13 +426,103 @@ class TargetGroupHandler:
             logger.error(error_msg)
             raise TargetGroupError(error_msg) from e
     
+    def get_targets_health(
+        self,
+        target_group_arn: str,
+        targets: List[Tuple[str, int]]
+    ) -> List[dict]:
+        """
+        Get health status of several specific targets with a single call
+        
+        Args:
+            target_group_arn: ARN of the target group
+            targets: List of (private_ip, port) pairs
+            
+        Returns:
+            List of target health dictionaries, in targets order
+        """
+        try:
+            response = self.elbv2_client.describe_target_health(
+                TargetGroupArn=target_group_arn,
+                Targets=[{'Id': ip, 'Port': port} for ip, port in targets]
+            )
+            
+            by_target = {
+                (t.get('Target', {}).get('Id'), t.get('Target', {}).get('Port')): t.get('TargetHealth', {})
+                for t in response.get('TargetHealthDescriptions', [])
+            }
+            
+            results = []
+            for ip, port in targets:
+                health = by_target.get((ip, port))
+                if health is None:
+                    results.append({'ip': ip, 'port': port, 'state': 'not_found'})
+                else:
+                    results.append({
+                        'ip': ip,
+                        'port': port,
+                        'state': health.get('State'),
+                        'reason': health.get('Reason'),
+                        'description': health.get('Description')
+                    })
+            return results
+            
+        except ClientError as e:
+            error_msg = f"Error getting target health: {str(e)}"
+            logger.error(error_msg)
+            raise TargetGroupError(error_msg) from e
+    
+    def wait_for_targets_healthy(
+        self,
+        target_group_arn: str,
+        targets: List[Tuple[str, int]],
+        timeout: float = HEALTH_CHECK_TIMEOUT,
+        poll_interval: Optional[float] = None
+    ) -> List[dict]:
+        """
+        Wait for several targets to pass (or fail) their health checks
+        
+        All pending targets of a target group share one describe_target_health
+        call per poll, across every caller using this handler. Each target is
+        done as soon as it reports healthy or unhealthy.
+        
+        Args:
+            target_group_arn: ARN of the target group
+            targets: List of (private_ip, port) pairs
+            timeout: Maximum time to wait in seconds (shared by all targets)
+            poll_interval: Fixed time between polls in seconds (None = POLL_STRATEGY decides)
+            
+        Returns:
+            Final target health dictionaries, in targets order (the last
+            observed state for targets still initializing at the timeout)
+        """
+        logger.info(f"Waiting for {len(targets)} targets to become healthy in {target_group_arn}...")
+        
+        waiters = self.health_watcher.wait_many(target_group_arn, targets, timeout, poll_interval=poll_interval)
+        # Waiters share the watcher's batched describe_target_health calls
+        add_api_calls(max((waiter.polls for waiter in waiters), default=0))
+        
+        for waiter in waiters:
+            ip, port = waiter.target
+            if waiter.state == 'healthy':
+                logger.info(f"Target {ip}:{port} is healthy after {waiter.polls} polls")
+            elif waiter.state != 'unhealthy':
+                # Timeout reached - log warning but don't fail
+                # Target may still become healthy after Lambda completes
+                logger.warning(
+                    f"Timeout waiting for target {ip}:{port} to become healthy "
+                    f"after {timeout}s ({waiter.polls} polls). Target may still be initializing."
+                )
+        
+        return [waiter.health for waiter in waiters]
+    
     def _wait_for_target_healthy(
         self,
         target_group_arn: str,
         private_ip: str,
         port: int,
-        timeout: int = 60,
-        poll_interval: int = 5
+        timeout: int = HEALTH_CHECK_TIMEOUT,
+        poll_interval: Optional[float] = None
     ) -> bool:
         """
         Wait for target to become healthy
@@ -212,49 +532,19 @@ class TargetGroupHandler:
             private_ip: Private IP of the target
             port: Port number
             timeout: Maximum time to wait (seconds)
-            poll_interval: Time between polls (seconds)
+            poll_interval: Fixed time between polls in seconds (None = POLL_STRATEGY decides)
             
         Returns:
-            True if target becomes healthy
-            
-        Raises:
-            TargetGroupError: If target doesn't become healthy within timeout
+            True if target becomes healthy, False if it is unhealthy or the
+            timeout expires
         """
-        logger.info(f"Waiting for target {private_ip}:{port} to become healthy...")
-        
-        start_time = time.time()
-        
-        while (time.time() - start_time) < timeout:
-            try:
-                health = self.get_target_health(target_group_arn, private_ip, port)
-                state = health.get('state', 'unknown')
-                
-                logger.debug(f"Target {private_ip}:{port} state: {state}")
-                
-                if state == 'healthy':
-                    logger.info(f"Target {private_ip}:{port} is healthy")
-                    return True
-                elif state == 'unhealthy':
-                    reason = health.get('reason', 'Unknown')
-                    description = health.get('description', '')
-                    logger.warning(
-                        f"Target {private_ip}:{port} is unhealthy. "
-                        f"Reason: {reason}, Description: {description}"
-                    )
-                
-                time.sleep(poll_interval)
-                
-            except Exception as e:
-                logger.warning(f"Error checking target health: {str(e)}")
-                time.sleep(poll_interval)
-        
-        # Timeout reached - log warning but don't fail
-        # Target may still become healthy after Lambda completes
-        logger.warning(
-            f"Timeout waiting for target {private_ip}:{port} to become healthy "
-            f"after {timeout}s. Target may still be initializing."
+        health = self.wait_for_targets_healthy(
+            target_group_arn,
+            [(private_ip, port)],
+            timeout=timeout,
+            poll_interval=poll_interval
         )
-        return False
+        return health[0]['state'] == 'healthy'
     
     def list_targets(self, target_group_arn: str) -> list:
         """
@@ -0,0 +1,320 @@
+"""
+Batched ECS Task Status Polling
+Tracks every in-flight task per cluster and checks them with one describe_tasks
+call per cluster per tick, handing each result back to the caller waiting on it
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from polling import BatchedPoller, PollScheduler, DEFAULT_SCHEDULER
+
+logger = logging.getLogger()
+
+# describe_tasks accepts at most 100 task ARNs per call
+DESCRIBE_TASKS_MAX_ARNS = 100
+
+
+class TaskNotFoundError(LookupError):
+    """Raised when ECS reports a tracked task as missing"""
+    pass
+
+
+class TaskWaiter:
+    """State for one caller waiting on one task"""
+    
+    def __init__(
+        self,
+        cluster: str,
+        task_arn: str,
+        ready: Callable[[Dict], bool],
+        poll_interval: Optional[float] = None,
+        history_key: Optional[str] = None
+    ):
+        """
+        Initialize task waiter
+        
+        Args:
+            cluster: ECS cluster name
+            task_arn: Task ARN being waited on
+            ready: Predicate deciding whether a RUNNING task is done waiting
+            poll_interval: Fixed time between polls in seconds (None = scheduler decides)
+            history_key: Key for learned time-to-RUNNING (e.g. task definition)
+        """
+        self.cluster = cluster
+        self.task_arn = task_arn
+        self.ready = ready
+        self.poll_interval = poll_interval
+        self.history_key = history_key
+        self.started_at = time.monotonic()
+        self.next_poll_at = self.started_at
+        self.phase: Optional[str] = None
+        self.transitions: List[Tuple[str, float]] = []
+        self.resolved_at: Optional[float] = None
+        self.polls = 0
+        self.task: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+    
+    def resolve(self, task: Optional[Dict] = None, error: Optional[BaseException] = None) -> None:
+        """Record the final task description or error and wake the caller"""
+        self.resolved_at = time.monotonic()
+        self.task = task
+        self.error = error
+        self.done.set()
+
+
+class TaskPoller(BatchedPoller):
+    """
+    Shared poller for in-flight ECS tasks
+    
+    Callers block in wait() while a single background thread polls all pending
+    tasks. Each tick groups pending task ARNs by cluster and issues one
+    describe_tasks call per cluster (chunked at 100 ARNs). A task is resolved
+    when it reaches STOPPED or when it is RUNNING and the caller's ready
+    predicate accepts it. The thread exits as soon as nothing is pending, so
+    nothing keeps running between Lambda invocations.
+    
+    Each waiter has its own next poll time chosen by the PollScheduler from
+    the task's last observed phase; a tick only describes the tasks that are
+    due, and the thread sleeps until the earliest next poll (see
+    BatchedPoller).
+    """
+    
+    thread_name = 'ecs-task-poller'
+    
+    def __init__(
+        self,
+        ecs_client: Any,
+        poll_interval: Optional[float] = None,
+        scheduler: PollScheduler = DEFAULT_SCHEDULER
+    ):
+        """
+        Initialize task poller
+        
+        Args:
+            ecs_client: boto3 ECS client
+            poll_interval: Default fixed time between polls (None = scheduler decides)
+            scheduler: Scheduler choosing adaptive poll intervals
+        """
+        super().__init__(poll_interval, scheduler)
+        self.ecs_client = ecs_client
+    
+    @staticmethod
+    def _group(waiter: TaskWaiter) -> str:
+        return waiter.cluster
+    
+    @staticmethod
+    def _key(waiter: TaskWaiter) -> str:
+        return waiter.task_arn
+    
+    def wait(
+        self,
+        cluster: str,
+        task_arn: str,
+        timeout: float,
+        ready: Optional[Callable[[Dict], bool]] = None,
+        poll_interval: Optional[float] = None,
+        history_key: Optional[str] = None
+    ) -> TaskWaiter:
+        """
+        Block until a task is ready, stopped, missing or the timeout expires
+        
+        Args:
+            cluster: ECS cluster name
+            task_arn: Task ARN
+            timeout: Maximum time to wait in seconds
+            ready: Predicate for RUNNING tasks (defaults to always ready)
+            poll_interval: Fixed time between polls (None = scheduler decides)
+            history_key: Key for learned time-to-RUNNING (e.g. task definition)
+        
+        Returns:
+            The resolved waiter; waiter.task holds the last task description
+        
+        Raises:
+            TimeoutError: If the task is not resolved within timeout
+            TaskNotFoundError: If ECS reports the task as missing
+            Exception: Any error raised by describe_tasks for this task
+        """
+        waiter = self.submit(
+            cluster,
+            task_arn,
+            ready=ready,
+            poll_interval=poll_interval,
+            history_key=history_key
+        )
+        return self.result(waiter, timeout)
+    
+    def submit(
+        self,
+        cluster: str,
+        task_arn: str,
+        ready: Optional[Callable[[Dict], bool]] = None,
+        poll_interval: Optional[float] = None,
+        history_key: Optional[str] = None
+    ) -> TaskWaiter:
+        """
+        Start tracking a task without blocking
+        
+        Args:
+            cluster: ECS cluster name
+            task_arn: Task ARN
+            ready: Predicate for RUNNING tasks (defaults to always ready)
+            poll_interval: Fixed time between polls (None = scheduler decides)
+            history_key: Key for learned time-to-RUNNING (e.g. task definition)
+        
+        Returns:
+            Waiter to pass to result()
+        """
+        return self.submit_many(
+            cluster,
+            [task_arn],
+            ready=ready,
+            poll_interval=poll_interval,
+            history_key=history_key
+        )[0]
+    
+    def submit_many(
+        self,
+        cluster: str,
+        task_arns: List[str],
+        ready: Optional[Callable[[Dict], bool]] = None,
+        poll_interval: Optional[float] = None,
+        history_key: Optional[str] = None
+    ) -> List[TaskWaiter]:
+        """
+        Start tracking several tasks of one cluster so they share the first tick
+        
+        Args:
+            cluster: ECS cluster name
+            task_arns: Task ARNs
+            ready: Predicate for RUNNING tasks (defaults to always ready)
+            poll_interval: Fixed time between polls (None = scheduler decides)
+            history_key: Key for learned time-to-RUNNING (e.g. task definition)
+        
+        Returns:
+            Waiters to pass to result(), in task_arns order
+        """
+        waiters = [
+            TaskWaiter(
+                cluster,
+                task_arn,
+                ready or (lambda task: True),
+                poll_interval if poll_interval is not None else self.poll_interval,
+                history_key
+            )
+            for task_arn in task_arns
+        ]
+        self._track(cluster, waiters)
+        return waiters
+    
+    def result(self, waiter: TaskWaiter, timeout: float) -> TaskWaiter:
+        """
+        Block until a submitted waiter is resolved
+        
+        Args:
+            waiter: Waiter returned by submit()
+            timeout: Maximum time to wait in seconds
+        
+        Returns:
+            The resolved waiter
+        
+        Raises:
+            TimeoutError: If the task is not resolved within timeout
+            TaskNotFoundError: If ECS reports the task as missing
+            Exception: Any error raised by describe_tasks for this task
+        """
+        if not waiter.done.wait(timeout):
+            self._discard(waiter)
+            raise TimeoutError(
+                f"Task {waiter.task_arn.split('/')[-1]} not resolved after {timeout}s"
+            )
+        
+        if waiter.error is not None:
+            raise waiter.error
+        
+        return waiter
+    
+    def _poll_group(self, cluster: str, tasks: Dict[str, List[TaskWaiter]]) -> None:
+        """Describe all pending tasks of one cluster and resolve finished waiters"""
+        task_arns = list(tasks.keys())
+        
+        for i in range(0, len(task_arns), DESCRIBE_TASKS_MAX_ARNS):
+            chunk = task_arns[i:i + DESCRIBE_TASKS_MAX_ARNS]
+            
+            try:
+                self.describe_calls += 1
+                response = self.ecs_client.describe_tasks(cluster=cluster, tasks=chunk)
+            except Exception as e:
+                logger.error(f"Error describing {len(chunk)} tasks in cluster {cluster}: {str(e)}")
+                for task_arn in chunk:
+                    self._resolve(cluster, task_arn, tasks[task_arn], error=e)
+                continue
+            
+            self._apply_response(cluster, chunk, tasks, response)
+    
+    def _apply_response(
+        self,
+        cluster: str,
+        chunk: List[str],
+        tasks: Dict[str, List[TaskWaiter]],
+        response: Dict[str, Any]
+    ) -> None:
+        """Record one describe_tasks response and resolve the waiters it finishes"""
+        now = time.monotonic()
+        for task_arn in chunk:
+            for waiter in tasks[task_arn]:
+                waiter.polls += 1
+        
+        for task in response.get('tasks', []):
+            task_arn = task.get('taskArn')
+            if task_arn not in tasks:
+                continue
+            
+            last_status = task.get('lastStatus', '')
+            for waiter in tasks[task_arn]:
+                if last_status != waiter.phase:
+                    waiter.transitions.append((last_status, now))
+                waiter.phase = last_status
+            logger.debug(
+                f"Task {task_arn.split('/')[-1]} status: lastStatus={last_status}, "
+                f"desiredStatus={task.get('desiredStatus', '')}"
+            )
+            
+            if last_status == 'STOPPED':
+                self._resolve(cluster, task_arn, tasks[task_arn], task=task)
+            elif last_status == 'RUNNING':
+                ready = [w for w in tasks[task_arn] if w.ready(task)]
+                if ready:
+                    self._resolve(cluster, task_arn, ready, task=task)
+        
+        for failure in response.get('failures', []):
+            task_arn = failure.get('arn')
+            if task_arn in tasks:
+                error = TaskNotFoundError(
+                    f"Task {task_arn.split('/')[-1]} not found: {failure.get('reason', 'Unknown')}"
+                )
+                self._resolve(cluster, task_arn, tasks[task_arn], error=error)
+        
+        for task_arn in chunk:
+            for waiter in tasks[task_arn]:
+                if not waiter.done.is_set():
+                    waiter.next_poll_at = now + self._next_interval(waiter, waiter.phase, now)
+    
+    def _resolve(
+        self,
+        cluster: str,
+        task_arn: str,
+        waiters: List[TaskWaiter],
+        task: Optional[Dict] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """Remove waiters from the pending set and hand them their result"""
+        for waiter in waiters:
+            self._discard(waiter)
+            elapsed = time.monotonic() - waiter.started_at
+            self.scheduler.record_wait(waiter.task_arn, waiter.polls, elapsed)
+            if task is not None and task.get('lastStatus') == 'RUNNING':
+                self.scheduler.record_duration(waiter.history_key, elapsed)
+            waiter.resolve(task=task, error=error)
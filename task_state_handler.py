@@ -0,0 +1,283 @@
+"""
+Event-Driven Start Completion
+Second stage of a deferred start: registers a task with its target group when
+ECS reports it RUNNING, instead of the start Lambda polling describe_tasks
+
+With "deferRegistration": true (or DEFER_REGISTRATION=true) the start Lambda
+only calls run_task. The task itself is the pending-start record: it is
+launched with startedBy=engine-start and tagged with its service, target group
+and port, plus engine-start=pending. The "ECS Task State Change" EventBridge
+rule (filtered on startedBy) invokes lambda_handler below, which reads the
+task's IP from the event, registers it and re-tags it engine-start=registered.
+Both stages finish in milliseconds.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from config import AWS_REGION, get_target_groups
+from ecs_handler import ECSHandler, ECSTaskError, extract_private_ip, stopped_message
+from resolution_cache import launch_task_definition
+from target_group_handler import TargetGroupHandler, TargetGroupError, map_target_groups
+from throttling import DEFAULT_THROTTLE
+from timing import record_phase, start_trace
+from warm_pool import SERVICE_TAG_KEY, task_tags
+
+logger = logging.getLogger()
+
+# startedBy value of deferred starts (the EventBridge rule filters on it)
+PENDING_START_STARTED_BY = 'engine-start'
+
+# Task tags carrying what the second stage needs to register the task.
+# Each target group gets its own pair of tags (suffixed -1, -2, ... after the
+# first) since a tag value holds at most 256 characters, about two ARNs.
+TARGET_GROUP_TAG_KEY = 'engine-target-group'
+PORT_TAG_KEY = 'engine-port'
+START_STATE_TAG_KEY = 'engine-start'
+START_STATE_PENDING = 'pending'
+START_STATE_REGISTERED = 'registered'
+
+
+def target_group_tag_key(key: str, index: int) -> str:
+    """Tag key of the index-th target group of a deferred start (the primary keeps the bare key)"""
+    return f'{key}-{index}' if index else key
+
+
+def pending_start_tags(request: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    Build the tags recording a deferred start on its task
+    
+    Args:
+        request: Resolved start parameters
+    
+    Returns:
+        ECS task tags
+    """
+    tags = [{'key': SERVICE_TAG_KEY, 'value': request['service']}]
+    for index, (target_group_arn, port) in enumerate(get_target_groups(request)):
+        tags.append({'key': target_group_tag_key(TARGET_GROUP_TAG_KEY, index), 'value': target_group_arn})
+        tags.append({'key': target_group_tag_key(PORT_TAG_KEY, index), 'value': str(port)})
+    tags.append({'key': START_STATE_TAG_KEY, 'value': START_STATE_PENDING})
+    return tags
+
+
+def pending_target_groups(tags: Dict[str, str]) -> List[Tuple[str, int]]:
+    """
+    Read the target groups recorded by pending_start_tags
+    
+    Args:
+        tags: Task tags as a key to value dict
+    
+    Returns:
+        (target group ARN, port) pairs, primary first
+    """
+    target_groups: List[Tuple[str, int]] = []
+    while target_group_tag_key(TARGET_GROUP_TAG_KEY, len(target_groups)) in tags:
+        index = len(target_groups)
+        target_groups.append((
+            tags[target_group_tag_key(TARGET_GROUP_TAG_KEY, index)],
+            int(tags[target_group_tag_key(PORT_TAG_KEY, index)])
+        ))
+    return target_groups
+
+
+def start_pending_tasks(request: Dict[str, Any], ecs_handler: ECSHandler) -> Dict[str, Any]:
+    """
+    First stage: launch the tasks of a start without waiting for them
+    
+    Args:
+        request: Resolved start parameters from resolve_start_request
+        ecs_handler: ECS handler used to launch the tasks
+    
+    Returns:
+        Response body with status "pending" and the launched task ARNs
+    
+    Raises:
+        ECSTaskError: If no task could be launched
+    """
+    service_name = request['service']
+    count = request.get('count', 1)
+    
+    task_arns = ecs_handler.launch_tasks(
+        cluster=request['cluster'],
+        task_definition=launch_task_definition(request),
+        subnets=request['subnets'],
+        security_groups=request['security_groups'],
+        count=count,
+        started_by=PENDING_START_STARTED_BY,
+        tags=pending_start_tags(request)
+    )
+    
+    logger.info(
+        f"[{service_name}] Launched {len(task_arns)} task(s); "
+        f"registration deferred until ECS reports RUNNING"
+    )
+    
+    body = {
+        'message': f'Started {service_name} task; it is registered once RUNNING',
+        'service': service_name,
+        'status': 'pending',
+        'taskArn': task_arns[0],
+        'taskId': task_arns[0].split('/')[-1],
+        'port': request['container_port'],
+        'targetGroupArn': request['target_group_arn'],
+        'source': 'run_task'
+    }
+    
+    if count > 1:
+        body['desiredCount'] = count
+        body['taskArns'] = task_arns
+    
+    return body
+
+
+def complete_start(
+    detail: Dict[str, Any],
+    ecs_handler: ECSHandler,
+    tg_handler: TargetGroupHandler
+) -> Dict[str, Any]:
+    """
+    Second stage: register a deferred-start task that reached RUNNING
+    
+    EventBridge delivers at least once, so a task already tagged registered
+    is skipped (registering it again would be harmless, just wasted calls).
+    A pending task that STOPPED before reaching RUNNING is reported as failed.
+    
+    Args:
+        detail: Detail of an "ECS Task State Change" event
+        ecs_handler: ECS handler used to read and re-tag the task
+        tg_handler: Target group handler used to register the task
+    
+    Returns:
+        Result dictionary with status registered, skipped or failed
+    
+    Raises:
+        ECSTaskError: If the task's tags cannot be read
+        TargetGroupError: If registration fails
+    """
+    task_arn = detail['taskArn']
+    cluster = detail['clusterArn']
+    task_id = task_arn.split('/')[-1]
+    result: Dict[str, Any] = {'taskArn': task_arn, 'taskId': task_id, 'lastStatus': detail.get('lastStatus')}
+    
+    try:
+        response = ecs_handler.ecs_client.describe_tasks(cluster=cluster, tasks=[task_arn], include=['TAGS'])
+    except ClientError as e:
+        raise ECSTaskError(f"Error reading tags of task {task_id}: {str(e)}") from e
+    
+    tasks = response.get('tasks', [])
+    tags = task_tags(tasks[0]) if tasks else {}
+    service_name = tags.get(SERVICE_TAG_KEY)
+    result['service'] = service_name
+    
+    # Registered tasks that stop later (and duplicate events) end up here
+    if tags.get(START_STATE_TAG_KEY) != START_STATE_PENDING:
+        logger.info(f"Task {task_id} has no pending start ({tags.get(START_STATE_TAG_KEY)}); skipping")
+        return {**result, 'status': 'skipped'}
+    
+    if detail.get('lastStatus') == 'STOPPED':
+        # Stopped before it was registered: surface why the deferred start failed
+        message = stopped_message(detail)
+        logger.error(f"[{service_name}] {message}")
+        return {**result, 'status': 'failed', 'error': message}
+    
+    private_ip = extract_private_ip(detail)
+    if not private_ip:
+        raise ECSTaskError(f"Task {task_id} is RUNNING but has no private IP")
+    
+    target_groups = pending_target_groups(tags)
+    target_group_arn, port = target_groups[0]
+    
+    with start_trace(service_name, cluster.split('/')[-1]) as trace:
+        waited = seconds_between(detail.get('createdAt'), detail.get('startedAt'))
+        if waited is not None:
+            record_phase('task_wait', waited)
+        
+        map_target_groups(
+            lambda arn, group_port: tg_handler.register_target(
+                target_group_arn=arn,
+                private_ip=private_ip,
+                port=group_port
+            ),
+            target_groups
+        )
+        
+        try:
+            ecs_handler.ecs_client.tag_resource(
+                resourceArn=task_arn,
+                tags=[{'key': START_STATE_TAG_KEY, 'value': START_STATE_REGISTERED}]
+            )
+        except ClientError as e:
+            # Registration succeeded; a duplicate event would only register again
+            logger.warning(f"Could not mark task {task_id} registered: {str(e)}")
+        
+        result['timings'] = trace.timings()
+    trace.emit()
+    
+    logger.info(
+        f"[{service_name}] Registered task {task_id} at {private_ip}:{port} "
+        f"with {len(target_groups)} target group(s)"
+    )
+    result.update({
+        'status': 'registered',
+        'privateIp': private_ip,
+        'port': port,
+        'targetGroupArn': target_group_arn
+    })
+    if len(target_groups) > 1:
+        result['targetGroups'] = [{'targetGroupArn': arn, 'port': p} for arn, p in target_groups]
+    return result
+
+
+def seconds_between(start: Optional[str], end: Optional[str]) -> Optional[float]:
+    """Seconds between two ISO 8601 event timestamps, or None if either is missing"""
+    if not start or not end:
+        return None
+    return (
+        datetime.fromisoformat(end.replace('Z', '+00:00'))
+        - datetime.fromisoformat(start.replace('Z', '+00:00'))
+    ).total_seconds()
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for "ECS Task State Change" EventBridge events
+    
+    Events for tasks not started by a deferred start, or with a lastStatus
+    other than RUNNING/STOPPED, are ignored.
+    
+    Args:
+        event: EventBridge event (source aws.ecs)
+        context: Lambda context
+    
+    Returns:
+        Response dictionary with the registration result
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
+    
+    detail = event.get('detail') or {}
+    if (
+        detail.get('startedBy') != PENDING_START_STARTED_BY
+        or detail.get('lastStatus') not in ('RUNNING', 'STOPPED')
+    ):
+        return {'statusCode': 200, 'body': {'message': 'Ignored event', 'status': 'ignored'}}
+    
+    try:
+        result = complete_start(
+            detail,
+            ECSHandler(region=AWS_REGION),
+            TargetGroupHandler(region=AWS_REGION)
+        )
+    except (ECSTaskError, TargetGroupError) as e:
+        # Raise so the async invocation is retried (and lands in the DLQ if it keeps failing)
+        logger.error(f"Error completing start of {detail.get('taskArn')}: {str(e)}")
+        raise
+    
+    return {
+        'statusCode': 200 if result['status'] != 'failed' else 500,
+        'body': result
+    }
@@ -0,0 +1,30 @@
+"""Shared pytest fixtures"""
+import pytest
+
+from config import invalidate_registry
+from idempotency import DEFAULT_STORE
+from resolution_cache import DEFAULT_RESOLUTION_CACHE
+
+
+@pytest.fixture(autouse=True)
+def clear_idempotency_store():
+    """Keep remembered responses and targets from leaking between tests"""
+    DEFAULT_STORE.clear()
+    yield
+    DEFAULT_STORE.clear()
+
+
+@pytest.fixture(autouse=True)
+def rebuild_service_registry():
+    """Compile config per test so changes to SERVICE_MAPPINGS are picked up"""
+    invalidate_registry()
+    yield
+    invalidate_registry()
+
+
+@pytest.fixture(autouse=True)
+def clear_resolution_cache():
+    """Resolve task definitions and networks again in every test"""
+    DEFAULT_RESOLUTION_CACHE.clear()
+    yield
+    DEFAULT_RESOLUTION_CACHE.clear()
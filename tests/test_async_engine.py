@@ -0,0 +1,252 @@
+"""Unit tests for the async engine"""
+import asyncio
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+
+from async_engine import (
+    AsyncECSHandler,
+    AsyncTargetGroupHandler,
+    ThreadedClient,
+    start_handler,
+    start_services,
+    stop_services,
+)
+from config import STOP_TASK_CONCURRENCY
+from task_poller import DESCRIBE_TASKS_MAX_ARNS
+
+
+def start_request(service, count, cluster=None, wait_for_healthy=False):
+    """Build resolved start parameters"""
+    return {
+        'service': service,
+        'cluster': cluster or f'{service}-cluster',
+        'task_definition': f'{service}-task',
+        'target_group_arn': f'arn:tg/{service}',
+        'additional_target_groups': [],
+        'subnets': ['subnet-1'],
+        'security_groups': ['sg-1'],
+        'container_name': f'{service}-container',
+        'container_port': 8080,
+        'wait_for_healthy': wait_for_healthy,
+        'count': count,
+    }
+
+
+def service_config(service_name):
+    """get_service_config stand-in knowing auth and pdf"""
+    if service_name not in ('auth', 'pdf'):
+        raise ValueError(f"Unknown service: {service_name}")
+    request = start_request(service_name, 1)
+    return {key: request[key] for key in request if key not in ('service', 'wait_for_healthy', 'count')}
+
+
+class FakeAsyncECS:
+    """In-memory async ECS client: tasks are RUNNING with an IP on their second describe"""
+    
+    def __init__(self, fail_task_definitions=()):
+        self.fail_task_definitions = fail_task_definitions
+        self.tasks = {}
+        self.describes = {}
+        self.describe_calls = []
+        self.stopped = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def call(self):
+        """Yield to the loop like a network call, tracking concurrency"""
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+    
+    def add_task(self, cluster, task_definition='task'):
+        task_arn = f'arn:aws:ecs:us-east-2:123:task/{cluster}/task{len(self.tasks)}'
+        index = len(self.tasks)
+        self.tasks[task_arn] = {'taskArn': task_arn, 'taskDefinition': task_definition, 'ip': f'10.0.{index // 250}.{index % 250}'}
+        self.describes[task_arn] = 0
+        return task_arn
+    
+    async def run_task(self, cluster, taskDefinition, count, **params):
+        await self.call()
+        return {'tasks': [{'taskArn': self.add_task(cluster, taskDefinition)} for _ in range(count)], 'failures': []}
+    
+    async def describe_tasks(self, cluster, tasks):
+        await self.call()
+        self.describe_calls.append(list(tasks))
+        response = {'tasks': [], 'failures': []}
+        for task_arn in tasks:
+            self.describes[task_arn] += 1
+            task = self.tasks[task_arn]
+            if self.describes[task_arn] < 2:
+                response['tasks'].append({'taskArn': task_arn, 'lastStatus': 'PROVISIONING'})
+            elif task['taskDefinition'] in self.fail_task_definitions:
+                response['tasks'].append({'taskArn': task_arn, 'lastStatus': 'STOPPED', 'stoppedReason': 'Exited'})
+            else:
+                response['tasks'].append({
+                    'taskArn': task_arn,
+                    'lastStatus': 'RUNNING',
+                    'attachments': [{
+                        'type': 'ElasticNetworkInterface',
+                        'details': [{'name': 'privateIPv4Address', 'value': task['ip']}]
+                    }]
+                })
+        return response
+    
+    async def list_tasks(self, cluster, desiredStatus, nextToken=None):
+        await self.call()
+        arns = [arn for arn in self.tasks if f'/{cluster}/' in arn and arn not in self.stopped]
+        start = int(nextToken or 0)
+        page = {'taskArns': arns[start:start + 100]}
+        if start + 100 < len(arns):
+            page['nextToken'] = str(start + 100)
+        return page
+    
+    async def stop_task(self, cluster, task, reason):
+        await self.call()
+        if task.endswith('task0'):
+            raise ClientError({'Error': {'Code': 'InvalidParameterException', 'Message': 'gone'}}, 'StopTask')
+        self.stopped.append(task)
+        return {}
+
+
+class FakeAsyncELBv2:
+    """In-memory async ELBv2 client: targets are healthy on their second health check"""
+    
+    def __init__(self):
+        self.registered = {}
+        self.deregistered = {}
+        self.health_calls = []
+        self.checks = {}
+    
+    async def register_targets(self, TargetGroupArn, Targets):
+        await asyncio.sleep(0)
+        self.registered.setdefault(TargetGroupArn, []).extend((t['Id'], t['Port']) for t in Targets)
+    
+    async def deregister_targets(self, TargetGroupArn, Targets):
+        await asyncio.sleep(0)
+        self.deregistered.setdefault(TargetGroupArn, []).extend((t['Id'], t['Port']) for t in Targets)
+    
+    async def describe_target_health(self, TargetGroupArn, Targets):
+        await asyncio.sleep(0)
+        self.health_calls.append((TargetGroupArn, len(Targets)))
+        descriptions = []
+        for target in Targets:
+            key = (TargetGroupArn, target['Id'], target['Port'])
+            self.checks[key] = self.checks.get(key, 0) + 1
+            state = 'healthy' if self.checks[key] > 1 else 'initial'
+            descriptions.append({'Target': target, 'TargetHealth': {'State': state}})
+        return {'TargetHealthDescriptions': descriptions}
+
+
+def handlers(ecs=None, elbv2=None):
+    """Build async handlers over fakes with a short fixed poll interval"""
+    return (
+        AsyncECSHandler(ecs or FakeAsyncECS(), poll_interval=0.01),
+        AsyncTargetGroupHandler(elbv2 or FakeAsyncELBv2(), poll_interval=0.01),
+    )
+
+
+class TestStartServices:
+    """Test cases for async_engine.start_services"""
+    
+    def test_hundreds_of_tasks_on_one_loop(self):
+        """Test that 300 task waits share batched describe_tasks calls"""
+        ecs, elbv2 = FakeAsyncECS(), FakeAsyncELBv2()
+        ecs_handler, tg_handler = handlers(ecs, elbv2)
+        requests = [start_request(name, 100) for name in ('auth', 'pdf', 'fa')]
+        
+        results = asyncio.run(start_services(requests, ecs_handler, tg_handler))
+        
+        assert [r['status'] for r in results] == ['success'] * 3
+        assert [r['runningCount'] for r in results] == [100] * 3
+        assert len(elbv2.registered['arn:tg/fa']) == 100
+        assert max(len(call) for call in ecs.describe_calls) <= DESCRIBE_TASKS_MAX_ARNS
+        # Two ticks of one describe per cluster instead of 300 task loops
+        assert len(ecs.describe_calls) == 6
+        assert ecs.max_in_flight >= 3
+    
+    def test_failed_service_does_not_fail_others(self):
+        """Test that a service whose tasks stop is reported as an error"""
+        ecs_handler, tg_handler = handlers(FakeAsyncECS(fail_task_definitions=('pdf-task',)))
+        requests = [start_request('auth', 2), start_request('pdf', 2)]
+        
+        results = asyncio.run(start_services(requests, ecs_handler, tg_handler))
+        
+        assert results[0]['status'] == 'success'
+        assert results[1] == {
+            'service': 'pdf',
+            'status': 'error',
+            'error': 'None of the 2 started tasks reached RUNNING state'
+        }
+    
+    def test_health_waits_share_describe_calls(self):
+        """Test that waiting for healthy uses one describe_target_health per target group per tick"""
+        elbv2 = FakeAsyncELBv2()
+        ecs_handler, tg_handler = handlers(elbv2=elbv2)
+        requests = [start_request('auth', 20, wait_for_healthy=True), start_request('pdf', 5, wait_for_healthy=True)]
+        
+        results = asyncio.run(start_services(requests, ecs_handler, tg_handler))
+        
+        assert all(t['healthStatus']['state'] == 'healthy' for r in results for t in r['tasks'])
+        assert sorted(elbv2.health_calls) == [('arn:tg/auth', 20)] * 2 + [('arn:tg/pdf', 5)] * 2
+    
+    def test_missing_port_is_an_error(self):
+        """Test that a service without a container port is not started"""
+        ecs = FakeAsyncECS()
+        request = {**start_request('ocr', 1), 'container_port': None}
+        
+        results = asyncio.run(start_services([request], *handlers(ecs)))
+        
+        assert results[0]['error'] == 'No container port configured for service ocr'
+        assert not ecs.tasks
+
+
+class TestStopServices:
+    """Test cases for async_engine.stop_services"""
+    
+    @patch('async_engine.get_service_config', side_effect=service_config)
+    def test_deregisters_and_stops_every_task(self, mock_config):
+        """Test that all pages are stopped with bounded concurrency and failures reported"""
+        ecs, elbv2 = FakeAsyncECS(), FakeAsyncELBv2()
+        for _ in range(150):
+            ecs.add_task('auth-cluster')
+        # Already described once, so they report RUNNING with an IP
+        ecs.describes = dict.fromkeys(ecs.tasks, 1)
+        
+        results = asyncio.run(stop_services(['auth', 'nope'], *handlers(ecs, elbv2)))
+        
+        assert results[0]['tasks_stopped'] == 149
+        assert results[0]['targets_deregistered'] == 150
+        assert results[1]['status'] == 'skipped'
+        assert ecs.max_in_flight <= STOP_TASK_CONCURRENCY
+    
+    @patch('async_engine.get_service_config', side_effect=service_config)
+    def test_no_tasks(self, mock_config):
+        """Test that an empty cluster is reported without stop calls"""
+        results = asyncio.run(stop_services(['pdf'], *handlers()))
+        
+        assert results == [{'service': 'pdf', 'cluster': 'pdf-cluster', 'tasks_stopped': 0, 'status': 'no_tasks'}]
+
+
+class TestEntryPoints:
+    """Test cases for the client adapter and Lambda entry points"""
+    
+    def test_threaded_client_runs_boto3_calls(self):
+        """Test that a sync client is awaited through the executor"""
+        client = MagicMock()
+        client.describe_tasks.return_value = {'tasks': []}
+        
+        response = asyncio.run(ThreadedClient(client).describe_tasks(cluster='c', tasks=['arn']))
+        
+        assert response == {'tasks': []}
+        client.describe_tasks.assert_called_once_with(cluster='c', tasks=['arn'])
+    
+    @patch('lambda_function.get_service_config', side_effect=service_config)
+    @patch('async_engine.run_with_clients', new=lambda func: func(*handlers()))
+    def test_start_handler(self, mock_config):
+        """Test that valid entries start on the loop and invalid ones are reported"""
+        response = start_handler({'detail': {'services': ['auth', {'service': 'pdf', 'count': 3}, 'nope']}}, None)
+        
+        assert response['statusCode'] == 207
+        assert [r['status'] for r in response['body']['results']] == ['success', 'success', 'error']
+        assert response['body']['results'][1]['runningCount'] == 3
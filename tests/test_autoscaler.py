@@ -0,0 +1,187 @@
+"""Unit tests for the replica autoscaler"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import autoscaler
+from autoscaler import autoscale, desired_count, lambda_handler
+from metrics_source import InMemoryMetricsSource
+
+NOW = datetime(2026, 10, 5, 12, 0, tzinfo=timezone.utc)
+TG = 'arn:tg/pdf'
+
+
+def service_config(service_name):
+    """get_service_config stand-in: pdf autoscaled between 1 and 10, auth not autoscaled"""
+    if service_name not in ('pdf', 'auth'):
+        raise ValueError(f"Unknown service: {service_name}")
+    return {
+        'cluster': f'{service_name}-cluster',
+        'task_definition': f'{service_name}-task',
+        'target_group_arn': f'arn:tg/{service_name}',
+        'container_name': f'{service_name}-container',
+        'container_port': 9080,
+        'subnets': ['subnet-1'],
+        'security_groups': ['sg-1'],
+        'min_tasks': 1,
+        'max_tasks': 10 if service_name == 'pdf' else 0,
+        'target_requests_per_task': 600,
+        'target_response_ms': 1000,
+        'scale_out_cooldown': 120,
+        'scale_in_cooldown': 600,
+    }
+
+
+def task(index, age_minutes=60, status='RUNNING', **fields):
+    """Task description created age_minutes before NOW"""
+    return {
+        'taskArn': f'arn:aws:ecs:us-east-2:123:task/pdf-cluster/t{index}',
+        'lastStatus': status,
+        'createdAt': NOW - timedelta(minutes=age_minutes),
+        'attachments': [{
+            'type': 'ElasticNetworkInterface',
+            'details': [{'name': 'privateIPv4Address', 'value': f'10.0.0.{index}'}],
+        }],
+        **fields,
+    }
+
+
+def ecs_handler(tasks):
+    """ECS handler whose client lists the given task descriptions"""
+    handler = MagicMock()
+    handler.ecs_client.get_paginator.return_value.paginate.return_value = [
+        {'taskArns': [t['taskArn'] for t in tasks]}
+    ]
+    handler.ecs_client.describe_tasks.return_value = {'tasks': list(tasks)}
+    return handler
+
+
+def load(requests_per_minute=0, response_seconds=None):
+    """Metrics source with five minutes of pdf load"""
+    source = InMemoryMetricsSource()
+    for minute in range(1, 6):
+        if requests_per_minute:
+            source.record(TG, 'RequestCount', requests_per_minute, NOW - timedelta(minutes=minute))
+        if response_seconds is not None:
+            source.record(TG, 'TargetResponseTime', response_seconds, NOW - timedelta(minutes=minute))
+    return source
+
+
+@pytest.fixture(autouse=True)
+def fresh_scale_ins():
+    """Forget scale-ins recorded by other tests"""
+    autoscaler._scale_ins.clear()
+    yield
+    autoscaler._scale_ins.clear()
+
+
+class TestDesiredCount:
+    """Test cases for desired_count"""
+    
+    def test_sized_by_load_within_bounds(self):
+        """Test that the request rate sets the count, clamped to min and max"""
+        config = service_config('pdf')
+        
+        assert desired_count(config, 1, 1300, 200) == 3
+        assert desired_count(config, 4, 0, None) == 1
+        assert desired_count(config, 4, 60000, 200) == 10
+        assert desired_count({**config, 'min_tasks': 0}, 2, 0, None) == 1
+    
+    def test_slow_responses_add_replicas(self):
+        """Test that a response time over target grows the current count"""
+        config = service_config('pdf')
+        
+        assert desired_count(config, 2, 600, 2500) == 5
+        assert desired_count(config, 2, 600, 900) == 1
+
+
+@patch('autoscaler.start_service', return_value={'runningCount': 2})
+@patch('autoscaler.resolve_start_request', side_effect=lambda service, detail: {'service': service, **detail})
+@patch('autoscaler.get_service_config', side_effect=service_config)
+class TestAutoscale:
+    """Test cases for autoscale"""
+    
+    def test_scale_out_starts_replicas_in_one_batch(self, mock_config, mock_resolve, mock_start):
+        """Test that missing replicas are started with one batched start"""
+        handler = ecs_handler([task(1)])
+        
+        [result] = autoscale(['pdf'], ecs_handler=handler, tg_handler=MagicMock(), metrics_source=load(1500, 0.3), now=NOW)
+        
+        assert result['action'] == 'scale_out'
+        assert (result['current'], result['desired'], result['tasksStarted']) == (1, 3, 2)
+        assert result['requestRate'] == 1500
+        assert mock_resolve.call_args.args[1] == {'desiredCount': 2, 'reuseRunning': False, 'useWarmPool': False}
+    
+    def test_scale_out_cooldown(self, mock_config, mock_resolve, mock_start):
+        """Test that no replicas are added shortly after a task was created"""
+        handler = ecs_handler([task(1), task(2, age_minutes=1, status='PENDING')])
+        
+        [result] = autoscale(['pdf'], ecs_handler=handler, tg_handler=MagicMock(), metrics_source=load(3000), now=NOW)
+        
+        assert result['action'] == 'cooldown'
+        assert result['cooldownSeconds'] == 60
+        mock_start.assert_not_called()
+    
+    def test_scale_in_drains_then_stops_newest(self, mock_config, mock_resolve, mock_start):
+        """Test that surplus replicas are drained and stopped, newest first, warm tasks ignored"""
+        tasks = [task(1, age_minutes=90), task(2, age_minutes=30), task(3, age_minutes=20), task(4, startedBy='warm-pool', tags=[{'key': 'engine-pool', 'value': 'warm'}])]
+        handler = ecs_handler(tasks)
+        tg_handler = MagicMock()
+        tg_handler.get_deregistration_delay.return_value = 0
+        tg_handler.wait_for_targets_drained.return_value = True
+        
+        [result] = autoscale(['pdf'], ecs_handler=handler, tg_handler=tg_handler, metrics_source=load(100, 0.1), now=NOW)
+        
+        assert (result['action'], result['current'], result['desired']) == ('scale_in', 3, 1)
+        assert sorted(result['taskIds']) == ['t2', 't3']
+        assert result['drained'] is True
+        deregistered = tg_handler.deregister_targets.call_args.args
+        assert deregistered == ('arn:tg/pdf', [('10.0.0.3', 9080), ('10.0.0.2', 9080)])
+        
+        # A second pass in this container waits for the scale-in cooldown
+        [again] = autoscale(['pdf'], ecs_handler=ecs_handler(tasks[:2]), tg_handler=tg_handler, metrics_source=load(), now=NOW + timedelta(minutes=5))
+        assert again['action'] == 'cooldown'
+    
+    def test_claimed_warm_tasks_are_replicas(self, mock_config, mock_resolve, mock_start):
+        """Test that claimed warm pool tasks are counted and can be scaled in"""
+        claimed = [task(i, startedBy='warm-pool', tags=[{'key': 'engine-pool', 'value': 'claimed'}]) for i in (1, 2)]
+        
+        [result] = autoscale(['pdf'], dry_run=True, ecs_handler=ecs_handler(claimed), tg_handler=MagicMock(), metrics_source=load(), now=NOW)
+        
+        assert (result['action'], result['current'], result['desired']) == ('scale_in', 2, 1)
+    
+    def test_disabled_stopped_and_unknown_services(self, mock_config, mock_resolve, mock_start):
+        """Test that services without max_tasks, without tasks or unknown are left alone"""
+        results = autoscale(['auth', 'pdf', 'nope'], ecs_handler=ecs_handler([]), tg_handler=MagicMock(), metrics_source=load(6000), now=NOW)
+        
+        assert [r['action'] for r in results] == ['disabled', 'skipped', 'skipped']
+        mock_start.assert_not_called()
+    
+    def test_dry_run(self, mock_config, mock_resolve, mock_start):
+        """Test that a dry run reports the decision without acting"""
+        handler = ecs_handler([task(1), task(2)])
+        
+        [result] = autoscale(['pdf'], dry_run=True, ecs_handler=handler, tg_handler=MagicMock(), metrics_source=load(), now=NOW)
+        
+        assert result['action'] == 'scale_in'
+        handler.ecs_client.stop_task.assert_not_called()
+        assert 'pdf' not in autoscaler._scale_ins
+
+
+class TestLambdaHandler:
+    """Test cases for autoscaler.lambda_handler"""
+    
+    @patch('autoscaler.autoscale')
+    def test_errors_give_multi_status(self, mock_autoscale):
+        """Test that a failed service turns the response into a 207"""
+        mock_autoscale.return_value = [
+            {'service': 'pdf', 'action': 'scale_out'},
+            {'service': 'batch', 'action': 'error', 'error': 'boom'},
+        ]
+        
+        response = lambda_handler({'detail': {'services': ['pdf', 'batch'], 'dryRun': True}}, None)
+        
+        assert response['statusCode'] == 207
+        assert response['body']['message'] == 'Would scale 1 of 2 services'
+        assert mock_autoscale.call_args.kwargs['dry_run'] is True
@@ -0,0 +1,57 @@
+"""Unit tests for the shared AWS client pool"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+import aws_clients
+from aws_clients import get_client, clear_clients, client_config
+
+
+class TestAWSClients:
+    """Test cases for the client pool"""
+    
+    @pytest.fixture(autouse=True)
+    def empty_pool(self):
+        """Start and finish every test with an empty pool"""
+        clear_clients()
+        yield
+        clear_clients()
+    
+    def test_client_reused(self):
+        """Test that the same client is returned for the same service and region"""
+        with patch('boto3.client', side_effect=lambda *a, **k: MagicMock()) as mock_client:
+            first = get_client('ecs', 'us-east-2')
+            second = get_client('ecs', 'us-east-2')
+        
+        assert first is second
+        assert mock_client.call_count == 1
+        registered = first.meta.events.register.call_args_list
+        assert registered[0].args == ('before-parameter-build', aws_clients.count_api_call)
+        # Throttling hooks: token bucket before each attempt, retry decision after it
+        assert [c.args[0] for c in registered[1:]] == ['before-send', 'needs-retry']
+    
+    def test_clients_keyed_by_service_and_region(self):
+        """Test that service and region each get their own client"""
+        with patch('boto3.client', side_effect=lambda *a, **k: MagicMock()):
+            ecs_east = get_client('ecs', 'us-east-2')
+            ecs_west = get_client('ecs', 'us-west-2')
+            elbv2_east = get_client('elbv2', 'us-east-2')
+        
+        assert len({id(ecs_east), id(ecs_west), id(elbv2_east)}) == 3
+    
+    def test_client_config(self):
+        """Test the tuned botocore configuration"""
+        config = client_config()
+        
+        assert config.max_pool_connections == aws_clients.BOTO_MAX_POOL_CONNECTIONS
+        assert config.retries['mode'] == aws_clients.BOTO_RETRY_MODE
+        # Retries are left to the throttling layer
+        assert config.retries['total_max_attempts'] == 1
+        assert config.connect_timeout == aws_clients.BOTO_CONNECT_TIMEOUT
+    
+    def test_handlers_share_clients(self):
+        """Test that handler instances reuse pooled clients"""
+        from ecs_handler import ECSHandler
+        from target_group_handler import TargetGroupHandler
+        
+        assert ECSHandler('us-east-2').ecs_client is ECSHandler('us-east-2').ecs_client
+        assert TargetGroupHandler('us-east-2').elbv2_client is get_client('elbv2', 'us-east-2')
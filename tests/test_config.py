@@ -1,8 +1,18 @@
 """Unit tests for configuration module"""
+import json
+import re
 import pytest
 import os
 from unittest.mock import patch
-from config import get_service_config, get_all_service_names, SERVICE_MAPPINGS
+from config import (
+    build_registry,
+    get_registry,
+    get_service_config,
+    get_all_service_names,
+    get_target_groups,
+    invalidate_registry,
+    SERVICE_MAPPINGS,
+)
 
 
 class TestConfig:
@@ -121,4 +131,167 @@ class TestConfig:
         """Test error when security groups are missing"""
         with pytest.raises(ValueError, match="Security groups not configured"):
             get_service_config('auth')
+    
+    def test_get_target_groups(self):
+        """Test that additional target groups follow the primary one"""
+        config = {
+            'target_group_arn': 'arn:primary',
+            'container_port': 2531,
+            'additional_target_groups': [{'arn': 'arn:engine', 'port': 8443}, {'arn': ''}]
+        }
+        
+        assert get_target_groups(config) == [('arn:primary', 2531), ('arn:engine', 8443)]
+        assert get_target_groups({'target_group_arn': 'arn:primary', 'container_port': 80}) == [('arn:primary', 80)]
+    
+    def test_fa_has_engine_target_group(self):
+        """Test that FA is registered with both of its target groups"""
+        arns = [arn for arn, _ in get_target_groups(SERVICE_MAPPINGS['fa'])]
+        
+        assert len(arns) == 2
+        assert arns[0] == SERVICE_MAPPINGS['fa']['target_group_arn']
+
 
+def base_services():
+    """Build a one-service base mapping"""
+    return {
+        'fa': {
+            'cluster': 'fa-engine-cluster',
+            'task_definition': 'fa-engine-task-def',
+            'target_group_arn': 'arn:fa-tg',
+            'container_name': 'faengine-container',
+            'container_port': 2531,
+            'subnets': ['subnet-1'],
+            'security_groups': ['sg-1'],
+        }
+    }
+
+
+class TestServiceRegistry:
+    """Test cases for the compiled service registry"""
+    
+    def test_compiled_config_is_read_only_mapping(self):
+        """Test that compiled configs read like ServiceConfig dicts but cannot change"""
+        config = build_registry(base_services()).get('FA')
+        
+        assert config['cluster'] == 'fa-engine-cluster'
+        assert config.get('additional_target_groups') == ()
+        assert config.subnets == ('subnet-1',)
+        assert dict(config)['container_port'] == 2531
+        with pytest.raises(AttributeError):
+            config.cluster = 'other'
+        with pytest.raises(TypeError):
+            config['cluster'] = 'other'
+    
+    def test_registry_built_once(self):
+        """Test that lookups reuse the registry until it is invalidated"""
+        registry = get_registry()
+        
+        assert get_registry() is registry
+        invalidate_registry()
+        assert get_registry() is not registry
+    
+    def test_validation_errors_are_precomputed(self):
+        """Test that a misconfigured service is listed but cannot be used"""
+        services = base_services()
+        services['fa']['subnets'] = []
+        registry = build_registry(services)
+        
+        assert registry.names == ('fa',)
+        with pytest.raises(ValueError, match="Subnets not configured for service: fa"):
+            registry.get('fa')
+        with pytest.raises(ValueError, match="Unknown service: nope. Valid services: fa"):
+            registry.get('nope')
+    
+    def test_json_source_overlays_and_adds_services(self, tmp_path):
+        """Test that a JSON file overrides fields and defines new services"""
+        source = tmp_path / 'services.json'
+        source.write_text(json.dumps({
+            'fa': {'task_definition': 'fa-engine-task-def:42', 'warm_pool_size': '2'},
+            'OCR': {
+                'cluster': 'ocr-cluster',
+                'task_definition': 'ocr-task-def',
+                'target_group_arn': 'arn:ocr-tg',
+                'container_name': 'ocr-container',
+                'container_port': '8080',
+                'subnets': ['subnet-2'],
+                'security_groups': ['sg-2'],
+            }
+        }))
+        
+        registry = build_registry(base_services(), str(source))
+        
+        assert registry.names == ('fa', 'ocr')
+        assert registry.get('fa').task_definition == 'fa-engine-task-def:42'
+        assert registry.get('fa').cluster == 'fa-engine-cluster'
+        assert registry.get('fa').warm_pool_size == 2
+        assert registry.get('ocr').container_port == 8080
+    
+    def test_source_rejects_unknown_fields_and_incomplete_services(self, tmp_path):
+        """Test that config errors surface when the registry is built"""
+        source = tmp_path / 'services.json'
+        source.write_text(json.dumps({'fa': {'clustr': 'typo'}}))
+        with pytest.raises(ValueError, match="Unknown fields for service fa"):
+            build_registry(base_services(), str(source))
+        
+        source.write_text(json.dumps({'ocr': {'cluster': 'ocr-cluster'}}))
+        with pytest.raises(ValueError, match="Service ocr is missing task_definition"):
+            build_registry(base_services(), str(source))
+    
+    def test_container_fields_are_optional(self, tmp_path):
+        """Test that a service can leave its container name and port to the task definition"""
+        source = tmp_path / 'services.json'
+        source.write_text(json.dumps({
+            'ocr': {'cluster': 'ocr-cluster', 'task_definition': 'ocr-task-def', 'target_group_arn': 'arn:ocr-tg'}
+        }))
+        
+        config = build_registry(base_services(), str(source)).services['ocr']
+        
+        assert config.container_name is None
+        assert config.container_port is None
+    
+    def test_yaml_source(self, tmp_path):
+        """Test loading overlays from YAML"""
+        pytest.importorskip('yaml')
+        source = tmp_path / 'services.yaml'
+        source.write_text("fa:\n  cluster: fa-blue\n  additional_target_groups:\n    - arn: arn:fa-engine-tg\n      port: 2531\n")
+        
+        config = build_registry(base_services(), str(source)).get('fa')
+        
+        assert config.cluster == 'fa-blue'
+        assert get_target_groups(config) == [('arn:fa-tg', 2531), ('arn:fa-engine-tg', 2531)]
+    
+    def test_ssm_source(self, tmp_path):
+        """Test loading overlays from a get-parameters-by-path dump"""
+        source = tmp_path / 'parameters.json'
+        source.write_text(json.dumps({'Parameters': [
+            {'Name': '/engines/fa/cluster', 'Type': 'String', 'Value': 'fa-green'},
+            {'Name': '/engines/fa/subnets', 'Type': 'StringList', 'Value': 'subnet-a,subnet-b'},
+            {'Name': '/engines/fa/container_port', 'Type': 'String', 'Value': '2532'},
+            {'Name': '/other/fa/cluster', 'Type': 'String', 'Value': 'ignored'},
+        ]}))
+        
+        config = build_registry(base_services(), f'ssm:{source}').get('fa')
+        
+        assert config.cluster == 'fa-green'
+        assert config.subnets == ('subnet-a', 'subnet-b')
+        assert config.container_port == 2532
+
+
+class TestTargetGroupPolicies:
+    """Test that IAM policies cover the default target groups"""
+    
+    ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    @staticmethod
+    def target_group_names(path):
+        """Names of the targetgroup/<name>/ ARNs in a file"""
+        with open(path) as f:
+            return set(re.findall(r'targetgroup/([A-Za-z0-9-]+)/', f.read()))
+    
+    @pytest.mark.parametrize('policy', ['template.yaml', 'template-stop.yaml', 'iam-policy.json'])
+    def test_default_target_groups_are_allowed(self, policy):
+        """Test that every target group defaulted in config.py is in the policy"""
+        defaults = self.target_group_names(os.path.join(self.ROOT, 'config.py'))
+        
+        assert defaults
+        assert defaults <= self.target_group_names(os.path.join(self.ROOT, policy))
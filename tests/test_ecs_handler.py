@@ -0,0 +1,127 @@
+"""Unit tests for ECS handler"""
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from ecs_handler import ECSHandler, ECSTaskError
+
+
+def running_task(task_arn, ip):
+    """Build a RUNNING describe_tasks entry with an ENI attachment"""
+    return {
+        'taskArn': task_arn,
+        'lastStatus': 'RUNNING',
+        'attachments': [{
+            'type': 'ElasticNetworkInterface',
+            'details': [{'name': 'privateIPv4Address', 'value': ip}]
+        }]
+    }
+
+
+class TestECSHandler:
+    """Test cases for ECSHandler"""
+    
+    @pytest.fixture
+    def handler(self):
+        """ECS handler with a mocked ECS client"""
+        handler = ECSHandler(region='us-east-2')
+        handler.ecs_client = MagicMock()
+        handler.task_poller.ecs_client = handler.ecs_client
+        handler.task_poller.poll_interval = 0.01
+        return handler
+    
+    def test_task_poller_created_once_across_threads(self):
+        """Test that threads sharing a handler get one poller"""
+        handler = ECSHandler(region='us-east-2')
+        handler.ecs_client = MagicMock()
+        pollers = []
+        
+        def slow_poller(client):
+            time.sleep(0.05)
+            return MagicMock()
+        
+        with patch('ecs_handler.TaskPoller', side_effect=slow_poller) as mock_poller:
+            threads = [threading.Thread(target=lambda: pollers.append(handler.task_poller)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        assert mock_poller.call_count == 1
+        assert all(poller is pollers[0] for poller in pollers)
+    
+    def test_start_tasks_chunks_run_task(self, handler):
+        """Test that counts above 10 are split into several run_task calls"""
+        launched = []
+        
+        def run_task(**kwargs):
+            arns = [f'arn:aws:ecs:us-east-2:123:task/c1/task-{len(launched) + i}' for i in range(kwargs['count'])]
+            launched.extend(arns)
+            return {'tasks': [{'taskArn': arn} for arn in arns], 'failures': []}
+        
+        handler.ecs_client.run_task.side_effect = run_task
+        handler.ecs_client.describe_tasks.side_effect = lambda cluster, tasks: {
+            'tasks': [running_task(arn, f'10.0.0.{i}') for i, arn in enumerate(tasks)]
+        }
+        
+        started = handler.start_tasks('c1', 'task-def', ['subnet-1'], ['sg-1'], 'app', 8080, count=12)
+        
+        counts = [c.kwargs['count'] for c in handler.ecs_client.run_task.call_args_list]
+        assert counts == [10, 2]
+        assert len(started) == 12
+        # All twelve tasks are checked in a single describe_tasks call
+        assert handler.ecs_client.describe_tasks.call_count == 1
+    
+    def test_start_tasks_skips_stopped_tasks(self, handler):
+        """Test that tasks that stop are left out of the result"""
+        handler.ecs_client.run_task.return_value = {
+            'tasks': [{'taskArn': 'arn:aws:ecs:us-east-2:123:task/c1/a'}, {'taskArn': 'arn:aws:ecs:us-east-2:123:task/c1/b'}],
+            'failures': []
+        }
+        handler.ecs_client.describe_tasks.return_value = {
+            'tasks': [
+                running_task('arn:aws:ecs:us-east-2:123:task/c1/a', '10.0.0.1'),
+                {'taskArn': 'arn:aws:ecs:us-east-2:123:task/c1/b', 'lastStatus': 'STOPPED', 'stoppedReason': 'Essential container exited'}
+            ]
+        }
+        
+        started = handler.start_tasks('c1', 'task-def', ['subnet-1'], ['sg-1'], 'app', 8080, count=2)
+        
+        assert started == [('arn:aws:ecs:us-east-2:123:task/c1/a', '10.0.0.1')]
+    
+    def test_start_tasks_all_failed(self, handler):
+        """Test error when run_task launches nothing"""
+        handler.ecs_client.run_task.return_value = {
+            'tasks': [],
+            'failures': [{'reason': 'RESOURCE:MEMORY'}]
+        }
+        
+        with pytest.raises(ECSTaskError, match="No tasks started"):
+            handler.start_tasks('c1', 'task-def', ['subnet-1'], ['sg-1'], 'app', 8080, count=3)
+    
+    def test_wait_for_task_running_stopped(self, handler):
+        """Test that a stopped task raises with its stop reason"""
+        handler.ecs_client.describe_tasks.return_value = {
+            'tasks': [{'taskArn': 'arn:aws:ecs:us-east-2:123:task/c1/a', 'lastStatus': 'STOPPED', 'stoppedReason': 'OutOfMemory'}]
+        }
+        
+        with pytest.raises(ECSTaskError, match="OutOfMemory"):
+            handler._wait_for_task_running('c1', 'arn:aws:ecs:us-east-2:123:task/c1/a', 'app', timeout=5, poll_interval=0.01)
+    
+    def test_find_running_tasks_filters_by_ip_and_definition(self, handler):
+        """Test that only RUNNING tasks of the definition with a wanted IP are returned"""
+        paginator = MagicMock()
+        paginator.paginate.return_value = [{'taskArns': ['arn:t/1', 'arn:t/2', 'arn:t/3']}]
+        handler.ecs_client.get_paginator.return_value = paginator
+        
+        tasks = [running_task(f'arn:t/{i}', f'10.0.0.{i}') for i in (1, 2, 3)]
+        for task in tasks:
+            task['taskDefinitionArn'] = 'arn:aws:ecs:us-east-2:123:task-definition/fa-task:3'
+        tasks[2]['taskDefinitionArn'] = 'arn:aws:ecs:us-east-2:123:task-definition/fa-task:2'
+        handler.ecs_client.describe_tasks.return_value = {'tasks': tasks}
+        
+        found = handler.find_running_tasks('c1', 'fa-task:3', private_ips={'10.0.0.1', '10.0.0.3'})
+        
+        assert found == [('arn:t/1', '10.0.0.1')]
+        paginator.paginate.assert_called_once_with(cluster='c1', family='fa-task', desiredStatus='RUNNING')
@@ -0,0 +1,209 @@
+"""Unit tests for the on-demand front door"""
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from front_door import (
+    DOWN,
+    READY,
+    STARTING,
+    FrontDoor,
+    FrontDoorError,
+    StartCoalescer,
+    launch_start,
+    lambda_handler,
+    parse_request,
+)
+
+
+def service_config(service_name):
+    """get_service_config stand-in knowing auth"""
+    if service_name != 'auth':
+        raise ValueError(f"Unknown service: {service_name}")
+    return {
+        'cluster': 'auth-cluster',
+        'task_definition': 'auth-task',
+        'target_group_arn': 'arn:tg/auth',
+        'subnets': ['subnet-1'],
+        'security_groups': ['sg-1'],
+        'container_name': 'auth-container',
+        'container_port': 8080,
+    }
+
+
+def ecs_handler(tasks=()):
+    """ECS handler whose client lists the given task descriptions"""
+    handler = MagicMock()
+    handler.ecs_client.get_paginator.return_value.paginate.return_value = [
+        {'taskArns': [task['taskArn'] for task in tasks]}
+    ]
+    handler.ecs_client.describe_tasks.return_value = {'tasks': list(tasks)}
+    return handler
+
+
+def tg_handler(*states):
+    """Target group handler reporting the given target states, one list per call (the last repeats)"""
+    handler = MagicMock()
+    responses = [{'targets': [{'ip': '10.0.0.1', 'port': 8080, 'state': s} for s in call]} for call in states]
+    handler.get_target_health.side_effect = lambda arn: responses.pop(0) if len(responses) > 1 else responses[0]
+    return handler
+
+
+def front_door(launch=None, tasks=(), states=((),)):
+    """Build a front door over fakes with a short poll interval"""
+    return FrontDoor(
+        ecs_handler=ecs_handler(tasks),
+        tg_handler=tg_handler(*states),
+        coalescer=StartCoalescer(launch or MagicMock(return_value={})),
+        probe_ttl=0.0,
+        poll_interval=0.01
+    )
+
+
+@patch('front_door.get_service_config', side_effect=service_config)
+class TestFrontDoor:
+    """Test cases for FrontDoor.open"""
+    
+    def test_concurrent_requests_share_one_start(self, mock_config):
+        """Test that a burst of requests for a down service triggers a single start"""
+        release = threading.Event()
+        launch = MagicMock(side_effect=lambda service: release.wait(5))
+        door = front_door(launch)
+        results = []
+        
+        threads = [threading.Thread(target=lambda: results.append(door.open('auth'))) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        release.set()
+        
+        launch.assert_called_once_with('auth')
+        assert sum(r['triggered'] for r in results) == 1
+        assert {r['state'] for r in results} == {STARTING}
+    
+    def test_ready_service_is_not_started(self, mock_config):
+        """Test that a healthy target answers ready without a start"""
+        launch = MagicMock()
+        
+        result = front_door(launch, states=(('healthy',),)).open('auth')
+        
+        assert result['state'] == READY
+        launch.assert_not_called()
+    
+    def test_start_in_flight_elsewhere_is_joined(self, mock_config):
+        """Test that initial targets or recently created tasks count as starting"""
+        launch = MagicMock()
+        recent = {'taskArn': 'arn:task/1', 'lastStatus': 'RUNNING', 'createdAt': datetime.now(timezone.utc)}
+        old = {**recent, 'createdAt': datetime.now(timezone.utc) - timedelta(hours=1)}
+        warm = {'taskArn': 'arn:task/2', 'lastStatus': 'PENDING', 'startedBy': 'warm-pool'}
+        
+        assert front_door(launch, states=(('initial',),)).open('auth')['state'] == STARTING
+        assert front_door(launch, tasks=[recent]).open('auth')['state'] == STARTING
+        launch.assert_not_called()
+        
+        door = front_door(launch, tasks=[old, warm])
+        assert door.service_state('auth', service_config('auth')) == DOWN
+    
+    def test_hold_until_healthy(self, mock_config):
+        """Test that a held request returns once the started target is healthy"""
+        launch = MagicMock(return_value={})
+        door = front_door(launch, states=((), (), ('initial',), ('healthy',)))
+        
+        result = door.open('auth', hold_timeout=5)
+        
+        assert result['state'] == READY
+        assert result['triggered'] is True
+        launch.assert_called_once_with('auth')
+    
+    def test_failed_start_is_reported_and_retried(self, mock_config):
+        """Test that a failed start is reported until the retry delay passes, then triggered again"""
+        launch = MagicMock(side_effect=FrontDoorError('Start of auth failed: no capacity'))
+        door = front_door(launch)
+        
+        with pytest.raises(FrontDoorError, match='no capacity'):
+            door.open('auth', hold_timeout=5)
+        with pytest.raises(FrontDoorError, match='no capacity'):
+            door.open('auth')
+        assert launch.call_count == 1
+        
+        door.coalescer.retry_delay = 0.0
+        with pytest.raises(FrontDoorError):
+            door.open('auth', hold_timeout=5)
+        assert launch.call_count == 2
+    
+    def test_unknown_service(self, mock_config):
+        """Test that unknown services raise ValueError"""
+        with pytest.raises(ValueError, match='Unknown service'):
+            front_door().open('nope')
+
+
+class TestLaunchStart:
+    """Test cases for launch_start"""
+    
+    @patch('front_door.FRONT_DOOR_START_FUNCTION', 'start-engines-lambda-dev')
+    @patch('front_door.get_client')
+    def test_invokes_start_lambda_asynchronously(self, mock_get_client):
+        """Test that a configured start function gets an Event invocation"""
+        assert launch_start('auth') == {'invoked': 'start-engines-lambda-dev'}
+        
+        kwargs = mock_get_client.return_value.invoke.call_args.kwargs
+        assert kwargs['InvocationType'] == 'Event'
+        assert json.loads(kwargs['Payload'])['detail']['service'] == 'auth'
+    
+    @patch('front_door.FRONT_DOOR_START_FUNCTION', '')
+    @patch('front_door.start_lambda_handler')
+    def test_starts_in_process_without_function(self, mock_start):
+        """Test that without a start function the start handler runs here"""
+        mock_start.return_value = {'statusCode': 500, 'body': {'error': 'ECS task error: boom'}}
+        
+        with pytest.raises(FrontDoorError, match='boom'):
+            launch_start('auth')
+        
+        assert mock_start.call_args.args[0]['detail-type'] == 'Start ECS Task'
+
+
+@patch('front_door.get_service_config', side_effect=service_config)
+class TestLambdaHandler:
+    """Test cases for front_door.lambda_handler and request parsing"""
+    
+    def test_alb_request_gets_retry_after(self, mock_config):
+        """Test that an ALB request for a down service gets a 503 with Retry-After"""
+        event = {'requestContext': {'elb': {'targetGroupArn': 'arn:tg/door'}}, 'path': '/engines/auth', 'headers': {}}
+        
+        with patch('front_door.DEFAULT_FRONT_DOOR', front_door()):
+            response = lambda_handler(event, None)
+        
+        assert response['statusCode'] == 503
+        assert response['statusDescription'] == '503 Service Unavailable'
+        assert response['headers']['Retry-After'] == '30'
+        assert json.loads(response['body'])['state'] == STARTING
+    
+    def test_api_gateway_request(self, mock_config):
+        """Test that HTTP API path parameters select the service"""
+        event = {'rawPath': '/start/auth', 'pathParameters': {'service': 'auth'}, 'requestContext': {'http': {}}}
+        
+        with patch('front_door.DEFAULT_FRONT_DOOR', front_door(states=(('healthy',),))):
+            response = lambda_handler(event, None)
+        
+        assert response['statusCode'] == 200
+        assert 'statusDescription' not in response
+    
+    def test_bad_requests(self, mock_config):
+        """Test that unknown and missing services are rejected"""
+        with patch('front_door.DEFAULT_FRONT_DOOR', front_door()):
+            assert lambda_handler({'path': '/nope'}, None)['statusCode'] == 404
+            assert lambda_handler({'path': '/'}, None)['statusCode'] == 400
+    
+    def test_parse_request(self, mock_config):
+        """Test query, header and multi-value forms of the service and hold flag"""
+        assert parse_request({'path': '/x', 'queryStringParameters': {'service': 'PDF', 'wait': 'true'}}) == ('pdf', True)
+        assert parse_request({'path': '/fa', 'headers': {'Prefer': 'wait=20'}}) == ('fa', True)
+        assert parse_request({
+            'path': '/users',
+            'multiValueQueryStringParameters': {'wait': ['false']},
+            'multiValueHeaders': {'accept': ['*/*']}
+        }) == ('users', False)
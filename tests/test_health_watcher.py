@@ -0,0 +1,122 @@
+"""Unit tests for batched target health watching"""
+import threading
+
+from health_watcher import HealthWatcher
+from target_group_handler import TargetGroupHandler
+from timing import phase, start_trace
+
+
+class FakeELBv2Client:
+    """describe_target_health stub that walks each target through a list of states"""
+    
+    def __init__(self, timelines):
+        self.timelines = timelines
+        self.calls = []
+        self.lock = threading.Lock()
+    
+    def describe_target_health(self, TargetGroupArn, Targets):
+        with self.lock:
+            self.calls.append((TargetGroupArn, [(t['Id'], t['Port']) for t in Targets]))
+        descriptions = []
+        for target in Targets:
+            timeline = self.timelines.get((TargetGroupArn, target['Id'], target['Port']))
+            if timeline is None:
+                continue
+            state = timeline.pop(0) if len(timeline) > 1 else timeline[0]
+            descriptions.append({
+                'Target': {'Id': target['Id'], 'Port': target['Port']},
+                'TargetHealth': {'State': state, 'Reason': 'Target.FailedHealthChecks' if state == 'unhealthy' else None}
+            })
+        return {'TargetHealthDescriptions': descriptions}
+
+
+class TestHealthWatcher:
+    """Test cases for HealthWatcher"""
+    
+    def test_targets_share_one_call_per_tick(self):
+        """Test that all pending targets of a group are checked with one call per tick"""
+        targets = [(f'10.0.0.{i}', 8080) for i in range(5)]
+        client = FakeELBv2Client({('tg', ip, port): ['initial', 'initial', 'healthy'] for ip, port in targets})
+        watcher = HealthWatcher(client, poll_interval=0.01)
+        
+        waiters = watcher.wait_many('tg', targets, timeout=5)
+        
+        assert [w.state for w in waiters] == ['healthy'] * 5
+        assert len(client.calls) == 3
+        assert all(len(call_targets) == 5 for _, call_targets in client.calls)
+    
+    def test_resolves_each_target_independently(self):
+        """Test that healthy and unhealthy targets drop out of later calls"""
+        client = FakeELBv2Client({
+            ('tg', '10.0.0.1', 80): ['healthy'],
+            ('tg', '10.0.0.2', 80): ['initial', 'unhealthy'],
+            ('tg', '10.0.0.3', 80): ['initial', 'initial', 'healthy'],
+        })
+        watcher = HealthWatcher(client, poll_interval=0.01)
+        
+        waiters = watcher.wait_many('tg', [('10.0.0.1', 80), ('10.0.0.2', 80), ('10.0.0.3', 80)], timeout=5)
+        
+        assert [w.state for w in waiters] == ['healthy', 'unhealthy', 'healthy']
+        assert waiters[1].health['reason'] == 'Target.FailedHealthChecks'
+        assert [len(call_targets) for _, call_targets in client.calls] == [3, 2, 1]
+    
+    def test_calls_grouped_by_target_group(self):
+        """Test one call per target group per tick"""
+        client = FakeELBv2Client({
+            ('tg-a', '10.0.0.1', 80): ['healthy'],
+            ('tg-b', '10.0.0.2', 80): ['healthy'],
+        })
+        watcher = HealthWatcher(client, poll_interval=0.01)
+        
+        results = {}
+        threads = [
+            threading.Thread(target=lambda tg=tg, ip=ip: results.update({tg: watcher.wait_many(tg, [(ip, 80)], 5)}))
+            for tg, ip in (('tg-a', '10.0.0.1'), ('tg-b', '10.0.0.2'))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert results['tg-a'][0].state == 'healthy'
+        assert results['tg-b'][0].state == 'healthy'
+        assert sorted(tg for tg, _ in client.calls) == ['tg-a', 'tg-b']
+    
+    def test_timeout_returns_last_state(self):
+        """Test that a target still initializing at the timeout reports its last state"""
+        client = FakeELBv2Client({('tg', '10.0.0.1', 80): ['initial']})
+        watcher = HealthWatcher(client, poll_interval=0.01)
+        
+        waiters = watcher.wait_many('tg', [('10.0.0.1', 80)], timeout=0.05)
+        
+        assert waiters[0].state == 'initial'
+        assert not waiters[0].done.is_set()
+        assert watcher._pending == {}
+    
+    def test_handler_wait_returns_final_health(self):
+        """Test that TargetGroupHandler hands back the final states without another call"""
+        client = FakeELBv2Client({
+            ('tg', '10.0.0.1', 80): ['initial', 'healthy'],
+            ('tg', '10.0.0.2', 80): ['healthy'],
+        })
+        handler = TargetGroupHandler(region='us-east-2')
+        handler.elbv2_client = client
+        
+        health = handler.wait_for_targets_healthy('tg', [('10.0.0.1', 80), ('10.0.0.2', 80)], poll_interval=0.01)
+        
+        assert [h['state'] for h in health] == ['healthy', 'healthy']
+        assert health[0]['ip'] == '10.0.0.1'
+        assert len(client.calls) == 2
+        assert handler._wait_for_target_healthy('tg', '10.0.0.2', 80, poll_interval=0.01) is True
+    
+    def test_background_polls_counted_on_trace(self):
+        """Test that the watcher's describe_target_health calls count towards the health_check phase"""
+        client = FakeELBv2Client({('tg', '10.0.0.1', 80): ['initial', 'initial', 'healthy']})
+        handler = TargetGroupHandler(region='us-east-2')
+        handler.elbv2_client = client
+        
+        with start_trace('auth', 'auth-cluster') as trace:
+            with phase('health_check'):
+                handler.wait_for_targets_healthy('tg', [('10.0.0.1', 80)], poll_interval=0.01)
+        
+        assert trace.timings()['phases']['health_check']['calls'] == 3
@@ -0,0 +1,133 @@
+"""Unit tests for idempotent start support"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+from idempotency import MAX_KEY_LOCKS, MAX_KNOWN_TASKS, IdempotencyStore, find_serving_tasks
+
+TG_ARN = 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/fa/abc'
+
+
+def start_request():
+    """Build resolved start parameters for tests"""
+    return {
+        'service': 'fa',
+        'cluster': 'fa-cluster',
+        'task_definition': 'fa-task',
+        'target_group_arn': TG_ARN,
+        'container_port': 2531,
+        'count': 1
+    }
+
+
+def target(ip, state, port=2531):
+    """Build a get_target_health target entry"""
+    return {'ip': ip, 'port': port, 'state': state, 'reason': None}
+
+
+class TestIdempotencyStore:
+    """Test cases for IdempotencyStore"""
+    
+    def test_put_and_get_returns_copy(self):
+        """Test that responses are returned as independent copies"""
+        store = IdempotencyStore(ttl=60)
+        store.put('fa:key', {'taskArn': 'arn:task/1'})
+        
+        first = store.get('fa:key')
+        first['status'] = 'success'
+        
+        assert store.get('fa:key') == {'taskArn': 'arn:task/1'}
+    
+    @patch('idempotency.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        """Test that responses are forgotten after the TTL"""
+        store = IdempotencyStore(ttl=60)
+        mock_monotonic.return_value = 1000.0
+        store.put('fa:key', {'taskArn': 'arn:task/1'})
+        
+        mock_monotonic.return_value = 1059.0
+        assert store.get('fa:key') is not None
+        
+        mock_monotonic.return_value = 1061.0
+        assert store.get('fa:key') is None
+    
+    def test_lock_is_shared_per_key(self):
+        """Test that the same key always maps to the same lock"""
+        store = IdempotencyStore()
+        
+        assert store.lock('a') is store.lock('a')
+        assert store.lock('a') is not store.lock('b')
+    
+    def test_key_locks_and_tasks_are_bounded(self):
+        """Test that per-key locks and known targets stop growing, keeping held locks"""
+        store = IdempotencyStore()
+        held = store.lock('held')
+        
+        with held:
+            for i in range(MAX_KEY_LOCKS + 10):
+                store.lock(f'key-{i}')
+                store.remember_task(TG_ARN, f'10.0.{i // 250}.{i % 250}', 2531, f'arn:task/{i}')
+            
+            assert len(store._key_locks) == MAX_KEY_LOCKS
+            assert store.lock('held') is held
+        
+        assert len(store._tasks) == MAX_KNOWN_TASKS
+        assert store.known_task(TG_ARN, '10.0.0.0', 2531) is None
+        assert store.known_task(TG_ARN, '10.0.4.9', 2531) == f'arn:task/{MAX_KEY_LOCKS + 9}'
+
+
+class TestFindServingTasks:
+    """Test cases for find_serving_tasks"""
+    
+    @pytest.fixture
+    def tg_handler(self):
+        handler = MagicMock()
+        handler.get_target_health.return_value = {'targets': [
+            target('10.0.0.1', 'initial'),
+            target('10.0.0.2', 'healthy'),
+            target('10.0.0.3', 'draining'),
+            target('10.0.0.4', 'healthy', port=8080),
+        ]}
+        return handler
+    
+    def test_no_serving_targets_costs_one_call(self):
+        """Test that an empty target group skips the ECS lookup"""
+        ecs_handler = MagicMock()
+        tg_handler = MagicMock()
+        tg_handler.get_target_health.return_value = {'targets': [target('10.0.0.3', 'draining')]}
+        
+        assert find_serving_tasks(start_request(), ecs_handler, tg_handler, IdempotencyStore()) == []
+        ecs_handler.find_running_tasks.assert_not_called()
+    
+    def test_matches_targets_to_running_tasks(self, tg_handler):
+        """Test that serving targets are matched to tasks, healthy first"""
+        ecs_handler = MagicMock()
+        ecs_handler.find_running_tasks.return_value = [
+            ('arn:task/1', '10.0.0.1'),
+            ('arn:task/2', '10.0.0.2'),
+        ]
+        
+        serving = find_serving_tasks(start_request(), ecs_handler, tg_handler, IdempotencyStore())
+        
+        assert [s['taskArn'] for s in serving] == ['arn:task/2', 'arn:task/1']
+        assert ecs_handler.find_running_tasks.call_args.kwargs['private_ips'] == {'10.0.0.1', '10.0.0.2'}
+    
+    def test_known_targets_skip_ecs_lookup(self, tg_handler):
+        """Test that targets remembered from earlier starts need no ECS calls"""
+        store = IdempotencyStore()
+        store.remember_task(TG_ARN, '10.0.0.1', 2531, 'arn:task/1')
+        store.remember_task(TG_ARN, '10.0.0.2', 2531, 'arn:task/2')
+        ecs_handler = MagicMock()
+        
+        serving = find_serving_tasks(start_request(), ecs_handler, tg_handler, store)
+        
+        assert len(serving) == 2
+        ecs_handler.find_running_tasks.assert_not_called()
+    
+    def test_targets_without_task_are_ignored(self, tg_handler):
+        """Test that a serving IP with no matching RUNNING task is not reused"""
+        ecs_handler = MagicMock()
+        ecs_handler.find_running_tasks.return_value = [('arn:task/2', '10.0.0.2')]
+        
+        serving = find_serving_tasks(start_request(), ecs_handler, tg_handler, IdempotencyStore())
+        
+        assert [s['privateIp'] for s in serving] == ['10.0.0.2']
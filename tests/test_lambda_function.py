@@ -1,5 +1,6 @@
 """Unit tests for Lambda handler"""
 import json
+import os
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from lambda_function import lambda_handler, error_response
@@ -198,4 +199,593 @@ class TestLambdaHandler:
         call_args = mock_ecs_handler.start_task.call_args
         assert call_args.kwargs['cluster'] == 'override-cluster'
         assert call_args.kwargs['container_port'] == 9090
-
+    
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_multi_service_start(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        mock_context
+    ):
+        """Test starting several services in one invocation"""
+        event = {
+            "source": "custom.app",
+            "detail-type": "Start ECS Task",
+            "detail": {
+                "services": ["auth", {"service": "pdf", "port": 9090}, "auth"]
+            }
+        }
+        
+        mock_get_config.side_effect = lambda name: {
+            'cluster': f'{name}-cluster',
+            'task_definition': f'{name}-task',
+            'target_group_arn': f'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/{name}/abc',
+            'container_name': f'{name}-container',
+            'container_port': 8080,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123']
+        }
+        
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.start_task.side_effect = lambda **kwargs: (
+            f"arn:aws:ecs:us-east-2:123:task/{kwargs['cluster']}/task-id",
+            '10.0.1.100'
+        )
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.return_value = {'state': 'initial'}
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        response = lambda_handler(event, mock_context)
+        
+        assert response['statusCode'] == 200
+        results = response['body']['results']
+        assert [r['service'] for r in results] == ['auth', 'pdf']
+        assert all(r['status'] == 'success' for r in results)
+        assert results[1]['port'] == 9090
+        
+        # Handlers are shared across the fan-out, duplicates are dropped
+        mock_ecs_handler_class.assert_called_once()
+        assert mock_ecs_handler.start_task.call_count == 2
+        assert mock_tg_handler.register_target.call_count == 2
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_multi_service_partial_failure(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        mock_context
+    ):
+        """Test that one failing service does not fail the others"""
+        from ecs_handler import ECSTaskError
+        
+        event = {
+            "source": "custom.app",
+            "detail-type": "Start ECS Task",
+            "detail": {
+                "services": ["auth", "pdf", "invalid-service"]
+            }
+        }
+        
+        def get_config(name):
+            if name == 'invalid-service':
+                raise ValueError("Unknown service: invalid-service")
+            return {
+                'cluster': f'{name}-cluster',
+                'task_definition': f'{name}-task',
+                'target_group_arn': f'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/{name}/abc',
+                'container_name': f'{name}-container',
+                'container_port': 8080,
+                'subnets': ['subnet-123'],
+                'security_groups': ['sg-123']
+            }
+        
+        mock_get_config.side_effect = get_config
+        
+        def start_task(**kwargs):
+            if kwargs['cluster'] == 'pdf-cluster':
+                raise ECSTaskError("Task failed to start")
+            return ('arn:aws:ecs:us-east-2:123:task/auth-cluster/task-id', '10.0.1.100')
+        
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.start_task.side_effect = start_task
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.return_value = {'state': 'initial'}
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        response = lambda_handler(event, mock_context)
+        
+        assert response['statusCode'] == 207
+        statuses = {r['service']: r['status'] for r in response['body']['results']}
+        assert statuses == {'auth': 'success', 'pdf': 'error', 'invalid-service': 'error'}
+        assert response['body']['services_started'] == 1
+    
+    def test_multi_service_empty_list(self, mock_context):
+        """Test error when services list is empty"""
+        event = {
+            "source": "custom.app",
+            "detail-type": "Start ECS Task",
+            "detail": {"services": []}
+        }
+        
+        response = lambda_handler(event, mock_context)
+        
+        assert response['statusCode'] == 400
+        assert 'services' in response['body']['error']
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_desired_count_registers_in_bulk(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        valid_event,
+        mock_context
+    ):
+        """Test that desiredCount starts replicas and registers them together"""
+        valid_event['detail']['desiredCount'] = 3
+        
+        mock_get_config.return_value = {
+            'cluster': 'test-cluster',
+            'task_definition': 'test-task',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/test/abc',
+            'container_name': 'test-container',
+            'container_port': 8080,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123']
+        }
+        
+        started = [(f'arn:aws:ecs:us-east-2:123:task/cluster/task-{i}', f'10.0.1.{i}') for i in range(3)]
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.start_tasks.return_value = started
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_targets_health.return_value = [{'state': 'initial'}] * 3
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        response = lambda_handler(valid_event, mock_context)
+        
+        assert response['statusCode'] == 200
+        assert response['body']['runningCount'] == 3
+        assert mock_ecs_handler.start_tasks.call_args.kwargs['count'] == 3
+        mock_ecs_handler.start_task.assert_not_called()
+        mock_tg_handler.register_targets.assert_called_once()
+        assert mock_tg_handler.register_targets.call_args.kwargs['targets'] == [
+            (ip, 8080) for _, ip in started
+        ]
+    
+    @patch('lambda_function.get_service_config')
+    def test_invalid_desired_count(self, mock_get_config, valid_event, mock_context):
+        """Test error when desiredCount is out of range"""
+        valid_event['detail']['count'] = 0
+        mock_get_config.return_value = {
+            'cluster': 'test-cluster',
+            'task_definition': 'test-task',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/test/abc',
+            'container_name': 'test-container',
+            'container_port': 8080,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123']
+        }
+        
+        response = lambda_handler(valid_event, mock_context)
+        
+        assert response['statusCode'] == 400
+        assert 'Invalid task count' in response['body']['error']
+    
+    @patch('lambda_function.WarmPool')
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_warm_pool_hit_skips_run_task(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        mock_pool_class,
+        valid_event,
+        mock_context
+    ):
+        """Test that a warm pool task is registered instead of starting a new one"""
+        mock_get_config.return_value = {
+            'cluster': 'test-cluster',
+            'task_definition': 'test-task',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/test/abc',
+            'container_name': 'test-container',
+            'container_port': 8080,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123'],
+            'warm_pool_size': 2
+        }
+        
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.return_value = {'state': 'initial'}
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        mock_pool = MagicMock()
+        mock_pool.claim.return_value = ('arn:aws:ecs:us-east-2:123:task/cluster/warm-id', '10.0.1.50')
+        mock_pool.refill.return_value = ['arn:aws:ecs:us-east-2:123:task/cluster/new-id']
+        mock_pool_class.return_value = mock_pool
+        
+        response = lambda_handler(valid_event, mock_context)
+        
+        assert response['statusCode'] == 200
+        assert response['body']['source'] == 'warm_pool'
+        assert response['body']['privateIp'] == '10.0.1.50'
+        assert response['body']['warmPool'] == {'launched': 1}
+        mock_ecs_handler.start_task.assert_not_called()
+        mock_tg_handler.register_target.assert_called_once()
+        mock_pool.refill.assert_called_once()
+    
+    @patch('lambda_function.WarmPool')
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_warm_pool_opt_out(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        mock_pool_class,
+        valid_event,
+        mock_context
+    ):
+        """Test that useWarmPool=false always starts a new task"""
+        valid_event['detail']['useWarmPool'] = False
+        mock_get_config.return_value = {
+            'cluster': 'test-cluster',
+            'task_definition': 'test-task',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/test/abc',
+            'container_name': 'test-container',
+            'container_port': 8080,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123'],
+            'warm_pool_size': 2
+        }
+        
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.start_task.return_value = ('arn:aws:ecs:us-east-2:123:task/cluster/task-id', '10.0.1.100')
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.return_value = {'state': 'initial'}
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        response = lambda_handler(valid_event, mock_context)
+        
+        assert response['statusCode'] == 200
+        assert response['body']['source'] == 'run_task'
+        assert 'warmPool' not in response['body']
+        mock_pool_class.assert_not_called()
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_reuses_serving_task(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        valid_event,
+        mock_context
+    ):
+        """Test that a healthy registered task is returned instead of starting a new one"""
+        mock_get_config.return_value = {
+            'cluster': 'test-cluster',
+            'task_definition': 'test-task',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/test/abc',
+            'container_name': 'test-container',
+            'container_port': 8080,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123']
+        }
+        
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.find_running_tasks.return_value = [
+            ('arn:aws:ecs:us-east-2:123:task/cluster/running-id', '10.0.1.7')
+        ]
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.return_value = {
+            'targets': [{'ip': '10.0.1.7', 'port': 8080, 'state': 'healthy', 'reason': None}]
+        }
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        response = lambda_handler(valid_event, mock_context)
+        
+        assert response['statusCode'] == 200
+        assert response['body']['source'] == 'existing'
+        assert response['body']['taskId'] == 'running-id'
+        mock_ecs_handler.start_task.assert_not_called()
+        mock_tg_handler.register_target.assert_not_called()
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_idempotency_key_replays_response(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        valid_event,
+        mock_context
+    ):
+        """Test that a repeated idempotency key returns the first response without API calls"""
+        valid_event['detail']['idempotencyKey'] = 'req-1'
+        mock_get_config.return_value = {
+            'cluster': 'test-cluster',
+            'task_definition': 'test-task',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/test/abc',
+            'container_name': 'test-container',
+            'container_port': 8080,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123']
+        }
+        
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.start_task.return_value = ('arn:aws:ecs:us-east-2:123:task/cluster/task-id', '10.0.1.100')
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.return_value = {'state': 'initial'}
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        first = lambda_handler(valid_event, mock_context)
+        mock_tg_handler.get_target_health.reset_mock()
+        second = lambda_handler(valid_event, mock_context)
+        
+        assert first['body']['source'] == 'run_task'
+        assert second['body']['source'] == 'idempotency_key'
+        assert second['body']['taskId'] == first['body']['taskId']
+        mock_ecs_handler.start_task.assert_called_once()
+        mock_tg_handler.get_target_health.assert_not_called()
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_start_reports_timings(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        valid_event,
+        mock_context,
+        capsys
+    ):
+        """Test that a start returns a timings block and logs an EMF document"""
+        mock_get_config.return_value = {
+            'cluster': 'test-cluster',
+            'task_definition': 'test-task',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/test/abc',
+            'container_name': 'test-container',
+            'container_port': 8080,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123']
+        }
+        
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.start_task.return_value = ('arn:aws:ecs:us-east-2:123:task/cluster/task-id', '10.0.1.100')
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.return_value = {'state': 'initial'}
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        response = lambda_handler(valid_event, mock_context)
+        
+        timings = response['body']['timings']
+        assert set(timings) == {'totalSeconds', 'apiCalls', 'phases'}
+        assert {'reuse_check', 'health_status'} <= set(timings['phases'])
+        emf = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+        assert emf['Service'] == response['body']['service']
+        assert 'HealthStatusSeconds' in emf
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_defer_registration_returns_after_run_task(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        mock_context
+    ):
+        """Test that a deferred start launches the task and registers nothing"""
+        with open(os.path.join(os.path.dirname(__file__), '..', 'example-events', 'start-fa-task-deferred.json')) as f:
+            event = json.load(f)
+        mock_get_config.return_value = {
+            'cluster': 'fa-engine-cluster',
+            'task_definition': 'fa-engine-task-def',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/fa/abc',
+            'container_name': 'faengine-container',
+            'container_port': 2531,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123']
+        }
+        
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.launch_tasks.return_value = ['arn:aws:ecs:us-east-2:123:task/fa-engine-cluster/task-id']
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        mock_tg_handler = MagicMock()
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        response = lambda_handler(event, mock_context)
+        
+        assert response['statusCode'] == 200
+        assert response['body']['status'] == 'pending'
+        assert mock_ecs_handler.launch_tasks.call_args.kwargs['started_by'] == 'engine-start'
+        mock_ecs_handler.start_task.assert_not_called()
+        mock_tg_handler.register_target.assert_not_called()
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_registers_with_every_target_group(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        mock_context
+    ):
+        """Test that a service with several target groups is registered with all of them"""
+        primary = 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/unified-fa-tg/abc'
+        engine = 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/fa-engine-tg/def'
+        mock_get_config.return_value = {
+            'cluster': 'fa-engine-cluster',
+            'task_definition': 'fa-engine-task-def',
+            'target_group_arn': primary,
+            'container_name': 'faengine-container',
+            'container_port': 2531,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123'],
+            'additional_target_groups': [{'arn': engine, 'port': 8443}]
+        }
+        
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.start_task.return_value = ('arn:aws:ecs:us-east-2:123:task/cluster/task-id', '10.0.1.100')
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.side_effect = lambda arn, ip, port: {'ip': ip, 'port': port, 'state': 'initial'}
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        response = lambda_handler({'detail': {'service': 'fa', 'reuseRunning': False}}, mock_context)
+        
+        assert response['statusCode'] == 200
+        registered = sorted(
+            (c.kwargs['target_group_arn'], c.kwargs['port']) for c in mock_tg_handler.register_target.call_args_list
+        )
+        assert registered == sorted([(primary, 2531), (engine, 8443)])
+        assert response['body']['targetGroupArn'] == primary
+        assert [(g['targetGroupArn'], g['port'], g['healthStatus']['port']) for g in response['body']['targetGroups']] == [
+            (primary, 2531, 2531),
+            (engine, 8443, 8443)
+        ]
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_target_group_override_replaces_all_groups(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        mock_context
+    ):
+        """Test that targetGroupArn in the event registers with that target group only"""
+        mock_get_config.return_value = {
+            'cluster': 'fa-engine-cluster',
+            'task_definition': 'fa-engine-task-def',
+            'target_group_arn': 'arn:primary',
+            'container_name': 'faengine-container',
+            'container_port': 2531,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123'],
+            'additional_target_groups': [{'arn': 'arn:engine', 'port': 2531}]
+        }
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.start_task.return_value = ('arn:aws:ecs:us-east-2:123:task/cluster/task-id', '10.0.1.100')
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.return_value = {'state': 'initial'}
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        event = {'detail': {'service': 'fa', 'targetGroupArn': 'arn:override', 'reuseRunning': False}}
+        response = lambda_handler(event, mock_context)
+        
+        assert response['statusCode'] == 200
+        mock_tg_handler.register_target.assert_called_once_with(
+            target_group_arn='arn:override',
+            private_ip='10.0.1.100',
+            port=2531
+        )
+        assert 'targetGroups' not in response['body']
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_container_resolved_from_task_definition(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        valid_event,
+        mock_context
+    ):
+        """Test that the pinned ARN is launched and an unset container port comes from the task definition"""
+        mock_get_config.return_value = {
+            'cluster': 'test-cluster',
+            'task_definition': 'test-task',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/test/abc',
+            'container_name': None,
+            'container_port': None,
+            'subnets': ['subnet-123'],
+            'security_groups': ['sg-123']
+        }
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.resolve_task_definition.return_value = {
+            'taskDefinitionArn': 'arn:aws:ecs:us-east-2:123:task-definition/test-task:4',
+            'containerName': 'test-container',
+            'containerPort': 8080
+        }
+        mock_ecs_handler.start_task.return_value = ('arn:aws:ecs:us-east-2:123:task/cluster/task-id', '10.0.1.100')
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        mock_tg_handler = MagicMock()
+        mock_tg_handler.get_target_health.return_value = {'state': 'initial'}
+        mock_tg_handler_class.return_value = mock_tg_handler
+        
+        response = lambda_handler(valid_event, mock_context)
+        
+        assert response['statusCode'] == 200
+        assert response['body']['port'] == 8080
+        mock_ecs_handler.resolve_task_definition.assert_called_once_with('test-task', None)
+        mock_ecs_handler.check_network.assert_called_once_with(['subnet-123'], ['sg-123'])
+        call_args = mock_ecs_handler.start_task.call_args
+        assert call_args.kwargs['task_definition'] == 'arn:aws:ecs:us-east-2:123:task-definition/test-task:4'
+        assert call_args.kwargs['container_name'] == 'test-container'
+        assert 'resolve_config' in response['body']['timings']['phases']
+    
+    @patch('lambda_function.ECSHandler')
+    @patch('lambda_function.TargetGroupHandler')
+    @patch('lambda_function.get_service_config')
+    def test_invalid_network_fails_before_run_task(
+        self,
+        mock_get_config,
+        mock_tg_handler_class,
+        mock_ecs_handler_class,
+        valid_event,
+        mock_context
+    ):
+        """Test that a bad subnet or security group fails without launching a task"""
+        from ecs_handler import ECSTaskError
+        
+        mock_get_config.return_value = {
+            'cluster': 'test-cluster',
+            'task_definition': 'test-task',
+            'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/test/abc',
+            'container_name': 'test-container',
+            'container_port': 8080,
+            'subnets': ['subnet-typo'],
+            'security_groups': ['sg-123']
+        }
+        mock_ecs_handler = MagicMock()
+        mock_ecs_handler.check_network.side_effect = ECSTaskError('Invalid network configuration: subnet-typo')
+        mock_ecs_handler_class.return_value = mock_ecs_handler
+        
+        response = lambda_handler(valid_event, mock_context)
+        
+        assert response['statusCode'] == 500
+        assert 'subnet-typo' in response['body']['error']
+        mock_ecs_handler.start_task.assert_not_called()
+        mock_tg_handler_class.return_value.get_target_health.assert_not_called()
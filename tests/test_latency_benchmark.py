@@ -0,0 +1,39 @@
+"""Smoke tests for the moto-backed latency benchmark"""
+import pytest
+
+pytest.importorskip('moto')
+
+from latency_benchmark import compare, run_scenario
+
+
+class TestLatencyBenchmark:
+    """Test cases for the latency benchmark"""
+    
+    def test_start_scenario_records_calls_and_sleeps(self):
+        """Test that a single start is measured through the simulated lifecycle"""
+        metrics = run_scenario('start_services_1', speedup=100)
+        
+        assert metrics['statusCode'] == 200
+        assert metrics['apiCalls']['ecs.RunTask'] == 1
+        assert metrics['apiCalls']['elbv2.RegisterTargets'] == 1
+        assert metrics['apiCalls']['ecs.DescribeTasks'] >= 2
+        # Task startup (40s) plus health checks (20s) in simulated time
+        assert metrics['wallSeconds'] >= 60
+        assert metrics['sleepSeconds'] > 0
+    
+    def test_stop_scenario_does_not_sleep(self):
+        """Test that stopping without drain never sleeps"""
+        metrics = run_scenario('stop_services_1', speedup=100)
+        
+        assert metrics['statusCode'] == 200
+        assert metrics['apiCalls']['ecs.StopTask'] == 1
+        assert metrics['sleepSeconds'] == 0
+    
+    def test_compare_flags_regressions(self):
+        """Test that increases beyond the tolerance are reported"""
+        baseline = {'s': {'statusCode': 200, 'apiCallsTotal': 10, 'wallSeconds': 40.0, 'sleepSeconds': 30.0}}
+        within = {'s': {'statusCode': 200, 'apiCallsTotal': 13, 'wallSeconds': 45.0, 'sleepSeconds': 30.0}}
+        worse = {'s': {'statusCode': 200, 'apiCallsTotal': 20, 'wallSeconds': 40.0, 'sleepSeconds': 30.0}}
+        
+        assert compare(within, baseline, tolerance=0.25) == []
+        assert compare(worse, baseline, tolerance=0.25) == ['s: apiCallsTotal 10 -> 20']
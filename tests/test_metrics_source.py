@@ -0,0 +1,85 @@
+"""Unit tests for target group metrics sources"""
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from metrics_source import (
+    CloudWatchMetricsSource,
+    FileMetricsSource,
+    InMemoryMetricsSource,
+    series_average,
+    series_sum,
+)
+
+NOW = datetime(2026, 10, 5, 12, 0, tzinfo=timezone.utc)
+TG = 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/auth-tg/abc'
+LB = 'arn:aws:elasticloadbalancing:us-east-2:123:loadbalancer/app/unified-alb/def'
+
+
+def clients(cloudwatch, elbv2):
+    """get_client stand-in returning the given clients"""
+    return lambda service, region: {'cloudwatch': cloudwatch, 'elbv2': elbv2}[service]
+
+
+class TestCloudWatchMetricsSource:
+    """Test cases for CloudWatchMetricsSource"""
+    
+    def test_batched_queries_with_load_balancer_dimension(self):
+        """Test that all series are read in one paginated get_metric_data pass"""
+        cloudwatch, elbv2 = MagicMock(), MagicMock()
+        elbv2.describe_target_groups.return_value = {
+            'TargetGroups': [{'TargetGroupArn': TG, 'LoadBalancerArns': [LB]}, {'TargetGroupArn': 'arn:tg/x', 'LoadBalancerArns': []}]
+        }
+        cloudwatch.get_metric_data.side_effect = [
+            {'MetricDataResults': [{'Id': 'm0', 'Timestamps': [NOW], 'Values': [3.0]}], 'NextToken': 't'},
+            {'MetricDataResults': [{'Id': 'm0', 'Timestamps': [NOW - timedelta(minutes=1)], 'Values': [2.0]},
+                                   {'Id': 'm1', 'Timestamps': [NOW], 'Values': [0.25]}]},
+            {'MetricDataResults': []},
+        ]
+        source = CloudWatchMetricsSource()
+        
+        with patch('metrics_source.get_client', side_effect=clients(cloudwatch, elbv2)):
+            series = source.get_series([TG, 'arn:tg/x'], ['RequestCountPerTarget', 'TargetResponseTime'], NOW - timedelta(hours=1), NOW)
+            source.get_series([TG], ['RequestCount'], NOW - timedelta(hours=1), NOW)
+        
+        assert series[(TG, 'RequestCountPerTarget')] == [(NOW - timedelta(minutes=1), 2.0), (NOW, 3.0)]
+        assert series[(TG, 'TargetResponseTime')] == [(NOW, 0.25)]
+        assert series[('arn:tg/x', 'RequestCountPerTarget')] == []
+        
+        first_call = cloudwatch.get_metric_data.call_args_list[0].kwargs
+        assert len(first_call['MetricDataQueries']) == 4
+        metric = first_call['MetricDataQueries'][1]['MetricStat']
+        assert metric['Stat'] == 'Average'
+        assert metric['Metric']['Dimensions'] == [
+            {'Name': 'TargetGroup', 'Value': 'targetgroup/auth-tg/abc'},
+            {'Name': 'LoadBalancer', 'Value': 'app/unified-alb/def'},
+        ]
+        assert cloudwatch.get_metric_data.call_args_list[1].kwargs['NextToken'] == 't'
+        # Load balancers are looked up once
+        elbv2.describe_target_groups.assert_called_once()
+
+
+class TestStandIns:
+    """Test cases for the in-memory and file sources and series helpers"""
+    
+    def test_in_memory_window(self):
+        """Test that only points inside the window are returned"""
+        source = InMemoryMetricsSource()
+        source.record(TG, 'RequestCount', 5, NOW - timedelta(hours=2))
+        source.record(TG, 'RequestCount', 1, NOW - timedelta(minutes=5))
+        
+        series = source.get_series([TG], ['RequestCount'], NOW - timedelta(hours=1), NOW)
+        
+        assert series == {(TG, 'RequestCount'): [(NOW - timedelta(minutes=5), 1)]}
+    
+    def test_file_source(self, tmp_path):
+        """Test that a JSON file of ISO timestamps is loaded"""
+        path = tmp_path / 'metrics.json'
+        path.write_text(json.dumps({TG: {'TargetResponseTime': [['2026-10-05T11:59:00Z', 0.5], ['2026-10-05T11:58:00', 1.5]]}}))
+        
+        series = FileMetricsSource(str(path)).get_series([TG], ['TargetResponseTime'], NOW - timedelta(hours=1), NOW)
+        
+        points = series[(TG, 'TargetResponseTime')]
+        assert points[0] == (NOW - timedelta(minutes=2), 1.5)
+        assert series_average(points) == 1.0
+        assert series_sum(points, since=NOW - timedelta(minutes=1)) == 0.5
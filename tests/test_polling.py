@@ -0,0 +1,78 @@
+"""Unit tests for adaptive poll scheduling"""
+import pytest
+
+from polling import MAX_WAIT_STATS, PollScheduler
+
+
+class TestPollScheduler:
+    """Test cases for PollScheduler"""
+    
+    def test_fixed_strategy(self):
+        """Test that the fixed strategy always returns the fixed interval"""
+        scheduler = PollScheduler(strategy='fixed', fixed_interval=5)
+        
+        assert scheduler.next_interval('PROVISIONING', 10) == 5
+        assert scheduler.next_interval('ACTIVATING', 10) == 5
+    
+    def test_invalid_strategy(self):
+        """Test error with unknown strategy"""
+        with pytest.raises(ValueError, match="Unknown poll strategy"):
+            PollScheduler(strategy='sometimes')
+    
+    def test_phase_intervals(self):
+        """Test that early phases poll slowly and ACTIVATING polls fast"""
+        scheduler = PollScheduler(strategy='adaptive', min_interval=1, max_interval=15, jitter=0)
+        
+        assert scheduler.next_interval('PROVISIONING', 0) == 15
+        assert scheduler.next_interval('PENDING', 0) == 11.5
+        assert scheduler.next_interval('ACTIVATING', 0) == 1
+        assert scheduler.next_interval('RUNNING', 0) == 1
+        assert 1 < scheduler.next_interval(None, 0) < 15
+    
+    def test_jitter_bounds(self):
+        """Test that jitter spreads intervals within bounds"""
+        scheduler = PollScheduler(strategy='adaptive', min_interval=1, max_interval=15, jitter=0.2)
+        
+        intervals = {scheduler.next_interval('PENDING', 0) for _ in range(50)}
+        
+        assert len(intervals) > 1
+        assert all(9.2 <= i <= 13.8 for i in intervals)
+    
+    def test_learned_history(self):
+        """Test that learned time-to-RUNNING shortens long-phase intervals"""
+        scheduler = PollScheduler(strategy='adaptive', min_interval=1, max_interval=15, jitter=0)
+        scheduler.record_duration('pdf-task', 20)
+        
+        # Sleep about halfway to the expected completion
+        assert scheduler.next_interval('PROVISIONING', 0, 'pdf-task') == 10
+        # Close to the expected time, poll at the minimum interval
+        assert scheduler.next_interval('PENDING', 17, 'pdf-task') == 1
+        # Other services are unaffected
+        assert scheduler.next_interval('PROVISIONING', 0, 'fa-task') == 15
+    
+    def test_record_duration_smooths(self):
+        """Test that repeated observations are averaged"""
+        scheduler = PollScheduler(strategy='adaptive')
+        scheduler.record_duration('auth-task', 30)
+        scheduler.record_duration('auth-task', 60)
+        
+        assert 30 < scheduler.expected_duration('auth-task') < 60
+    
+    def test_wait_stats(self):
+        """Test recording and popping poll counts"""
+        scheduler = PollScheduler(strategy='adaptive')
+        scheduler.record_wait('task-arn', 4, 12.3456)
+        
+        assert scheduler.pop_wait_stats('task-arn') == {'polls': 4, 'waitSeconds': 12.346}
+        assert scheduler.pop_wait_stats('task-arn') is None
+    
+    def test_unread_wait_stats_are_bounded(self):
+        """Test that stats never popped are evicted oldest first"""
+        scheduler = PollScheduler()
+        
+        for i in range(MAX_WAIT_STATS + 10):
+            scheduler.record_wait(f'task-{i}', 1, 1.0)
+        
+        assert len(scheduler._wait_stats) == MAX_WAIT_STATS
+        assert scheduler.pop_wait_stats('task-0') is None
+        assert scheduler.pop_wait_stats(f'task-{MAX_WAIT_STATS + 9}') == {'polls': 1, 'waitSeconds': 1.0}
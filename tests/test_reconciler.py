@@ -0,0 +1,211 @@
+"""Unit tests for the target group reconciler"""
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+from config import build_registry
+from reconciler import diff_targets, lambda_handler, reconcile
+from target_group_handler import TargetGroupError
+
+
+def service_config(name, port=8080):
+    """Build a service configuration for tests"""
+    return {
+        'cluster': f'{name}-cluster',
+        'task_definition': f'{name}-task',
+        'target_group_arn': f'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/{name}/abc',
+        'container_name': f'{name}-container',
+        'container_port': port,
+        'subnets': [],
+        'security_groups': []
+    }
+
+
+MAPPINGS = {'fa': service_config('fa', 2531), 'pdf': service_config('pdf', 9080)}
+
+
+def make_handlers(running, registered, warm=None):
+    """Build ECS/target group handler mocks from per-service IPs and per-TG targets"""
+    ecs = MagicMock()
+    ecs.find_running_tasks.side_effect = lambda cluster, task_def: [
+        (f'arn:task/{ip}', ip) for ip in running[cluster.split('-')[0]]
+    ]
+    
+    tg = MagicMock()
+    tg.get_target_health.side_effect = lambda arn: {'targets': registered[arn.split('/')[-2]]}
+    
+    warm_pool = MagicMock()
+    warm_pool.list_tasks.side_effect = lambda service, config: [
+        {'attachments': [{'type': 'ElasticNetworkInterface', 'details': [{'name': 'privateIPv4Address', 'value': ip}]}]}
+        for ip in (warm or {}).get(service, [])
+    ]
+    return ecs, tg, warm_pool
+
+
+class TestDiffTargets:
+    """Test cases for diff_targets"""
+    
+    def test_registers_missing_and_deregisters_stale(self):
+        """Test that the diff is running IPs against registered targets"""
+        registered = [
+            {'ip': '10.0.0.1', 'port': 80, 'state': 'healthy'},
+            {'ip': '10.0.0.9', 'port': 80, 'state': 'unhealthy'},
+        ]
+        
+        to_register, to_deregister = diff_targets({'10.0.0.1', '10.0.0.2'}, registered, 80)
+        
+        assert to_register == [('10.0.0.2', 80)]
+        assert to_deregister == [('10.0.0.9', 80)]
+    
+    def test_ignores_draining_targets(self):
+        """Test that draining targets are not deregistered again"""
+        registered = [{'ip': '10.0.0.9', 'port': 80, 'state': 'draining'}]
+        
+        assert diff_targets(set(), registered, 80) == ([], [])
+    
+    def test_running_draining_task_not_registered_again(self):
+        """Test that a task still RUNNING while it drains is not registered again"""
+        registered = [{'ip': '10.0.0.1', 'port': 80, 'state': 'draining'}]
+        
+        assert diff_targets({'10.0.0.1'}, registered, 80) == ([], [])
+    
+    def test_other_ports_are_left_alone(self):
+        """Test that targets on another port are neither counted nor deregistered"""
+        registered = [
+            {'ip': '10.0.0.1', 'port': 8080, 'state': 'healthy'},
+            {'ip': '10.0.0.7', 'port': 8080, 'state': 'healthy'},
+        ]
+        
+        assert diff_targets({'10.0.0.1'}, registered, 80) == ([('10.0.0.1', 80)], [])
+
+
+@patch('reconciler.get_registry', lambda: build_registry(MAPPINGS))
+class TestReconcile:
+    """Test cases for reconcile"""
+    
+    def test_one_batched_call_per_target_group(self):
+        """Test that drift is fixed with one register and one deregister call per target group"""
+        ecs, tg, warm_pool = make_handlers(
+            running={'fa': ['10.0.0.1', '10.0.0.2', '10.0.0.3'], 'pdf': ['10.0.1.1']},
+            registered={
+                'fa': [{'ip': '10.0.0.1', 'port': 2531, 'state': 'healthy'},
+                       {'ip': '10.0.0.8', 'port': 2531, 'state': 'healthy'}],
+                'pdf': [{'ip': '10.0.1.1', 'port': 9080, 'state': 'healthy'}],
+            }
+        )
+        
+        with patch('reconciler.WarmPool', return_value=warm_pool):
+            results = reconcile(ecs_handler=ecs, tg_handler=tg)
+        
+        fa_arn = MAPPINGS['fa']['target_group_arn']
+        tg.register_targets.assert_called_once_with(fa_arn, [('10.0.0.2', 2531), ('10.0.0.3', 2531)])
+        tg.deregister_targets.assert_called_once_with(fa_arn, [('10.0.0.8', 2531)])
+        assert tg.get_target_health.call_count == 2
+        assert [r['status'] for r in results] == ['reconciled', 'in_sync']
+        assert results[0]['register'] == ['10.0.0.2:2531', '10.0.0.3:2531']
+        assert results[0]['deregister'] == ['10.0.0.8:2531']
+    
+    def test_dry_run_reports_without_changes(self):
+        """Test that a dry run only returns the diff"""
+        ecs, tg, warm_pool = make_handlers(
+            running={'fa': ['10.0.0.1'], 'pdf': []},
+            registered={'fa': [], 'pdf': [{'ip': '10.0.1.1', 'port': 9080, 'state': 'healthy'}]}
+        )
+        
+        with patch('reconciler.WarmPool', return_value=warm_pool):
+            results = reconcile(dry_run=True, ecs_handler=ecs, tg_handler=tg)
+        
+        tg.register_targets.assert_not_called()
+        tg.deregister_targets.assert_not_called()
+        assert [r['status'] for r in results] == ['drift', 'drift']
+        assert results[0]['register'] == ['10.0.0.1:2531']
+        assert results[1]['deregister'] == ['10.0.1.1:9080']
+    
+    def test_unclaimed_warm_tasks_stay_unregistered(self):
+        """Test that warm pool tasks are not registered by the reconciler"""
+        ecs, tg, warm_pool = make_handlers(
+            running={'fa': ['10.0.0.1', '10.0.0.5'], 'pdf': []},
+            registered={'fa': [{'ip': '10.0.0.1', 'port': 2531, 'state': 'healthy'}], 'pdf': []},
+            warm={'fa': ['10.0.0.5']}
+        )
+        
+        with patch('reconciler.WarmPool', return_value=warm_pool):
+            results = reconcile(['fa'], ecs_handler=ecs, tg_handler=tg)
+        
+        tg.register_targets.assert_not_called()
+        assert results == [{
+            'service': 'fa',
+            'targetGroupArn': MAPPINGS['fa']['target_group_arn'],
+            'runningTasks': 1,
+            'register': [],
+            'deregister': [],
+            'status': 'in_sync'
+        }]
+    
+    def test_errors_are_per_service(self):
+        """Test that a failing service does not stop the others"""
+        ecs, tg, warm_pool = make_handlers(
+            running={'fa': ['10.0.0.1'], 'pdf': ['10.0.1.1']},
+            registered={'fa': [], 'pdf': []}
+        )
+        
+        def register_targets(arn, targets):
+            if '/fa/' in arn:
+                raise TargetGroupError('throttled')
+            return True
+        
+        tg.register_targets.side_effect = register_targets
+        
+        with patch('reconciler.WarmPool', return_value=warm_pool):
+            results = reconcile(['fa', 'pdf', 'nope'], ecs_handler=ecs, tg_handler=tg)
+        
+        assert [r['status'] for r in results] == ['error', 'reconciled', 'skipped']
+        assert results[0]['error'] == 'throttled'
+    
+    def test_warm_pool_read_error_is_per_service(self):
+        """Test that a failed warm pool read only errors that service"""
+        ecs, tg, warm_pool = make_handlers(
+            running={'fa': ['10.0.0.1'], 'pdf': ['10.0.1.1']},
+            registered={'fa': [], 'pdf': []}
+        )
+        
+        def list_tasks(service, config):
+            if service == 'fa':
+                raise ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'denied'}}, 'ListTasks')
+            return []
+        
+        warm_pool.list_tasks.side_effect = list_tasks
+        
+        with patch('reconciler.WarmPool', return_value=warm_pool):
+            results = reconcile(['fa', 'pdf'], ecs_handler=ecs, tg_handler=tg)
+        
+        assert [r['status'] for r in results] == ['error', 'reconciled']
+        assert 'AccessDenied' in results[0]['error']
+
+
+class TestLambdaHandler:
+    """Test cases for lambda_handler"""
+    
+    @patch('reconciler.reconcile')
+    def test_partial_failure_returns_207(self, mock_reconcile):
+        """Test that any errored service makes the response a 207"""
+        mock_reconcile.return_value = [
+            {'service': 'fa', 'status': 'reconciled'},
+            {'service': 'pdf', 'status': 'error', 'error': 'boom'}
+        ]
+        
+        response = lambda_handler({'detail': {'services': ['fa', 'pdf'], 'dryRun': True}}, None)
+        
+        mock_reconcile.assert_called_once_with(['fa', 'pdf'], dry_run=True)
+        assert response['statusCode'] == 207
+        assert response['body']['dryRun'] is True
+    
+    @patch('reconciler.reconcile')
+    def test_defaults_to_all_services(self, mock_reconcile):
+        """Test that an empty event reconciles every service"""
+        mock_reconcile.return_value = [{'service': 'fa', 'status': 'in_sync'}]
+        
+        response = lambda_handler({}, None)
+        
+        mock_reconcile.assert_called_once_with(None, dry_run=False)
+        assert response['statusCode'] == 200
@@ -0,0 +1,163 @@
+"""Unit tests for the launch configuration resolution cache"""
+import pytest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+
+from ecs_handler import ECSHandler, ECSTaskError
+from resolution_cache import ResolutionCache, ResolutionError, launch_task_definition, with_container_port
+
+TASK_DEF_ARN = 'arn:aws:ecs:us-east-2:123:task-definition/fa-task:7'
+
+
+def client_error(code, operation='DescribeSubnets'):
+    """Build a botocore ClientError"""
+    return ClientError({'Error': {'Code': code, 'Message': code}}, operation)
+
+
+def ecs_client():
+    """Build an ECS client mock with a two-container task definition"""
+    client = MagicMock()
+    client.describe_task_definition.return_value = {'taskDefinition': {
+        'taskDefinitionArn': TASK_DEF_ARN,
+        'containerDefinitions': [
+            {'name': 'log-router'},
+            {'name': 'fa-container', 'portMappings': [{'containerPort': 2531}, {'containerPort': 2532}]},
+        ]
+    }}
+    return client
+
+
+def ec2_client(subnet_vpc='vpc-1', group_vpc='vpc-1'):
+    """Build an EC2 client mock with one subnet and one security group"""
+    client = MagicMock()
+    client.describe_subnets.return_value = {'Subnets': [{'SubnetId': 'subnet-1', 'VpcId': subnet_vpc}]}
+    client.describe_security_groups.return_value = {'SecurityGroups': [{'GroupId': 'sg-1', 'VpcId': group_vpc}]}
+    return client
+
+
+class TestTaskDefinition:
+    """Test cases for ResolutionCache.task_definition"""
+    
+    def test_resolves_first_container_with_a_port(self):
+        """Test that the pinned ARN and first port mapping are returned"""
+        cache = ResolutionCache(ttl=60)
+        
+        assert cache.task_definition(ecs_client(), 'fa-task') == {
+            'taskDefinitionArn': TASK_DEF_ARN,
+            'containerName': 'fa-container',
+            'containerPort': 2531,
+        }
+    
+    def test_repeated_lookups_use_cache(self):
+        """Test that one describe call serves every container of a task definition"""
+        cache = ResolutionCache(ttl=60)
+        client = ecs_client()
+        
+        cache.task_definition(client, 'fa-task')
+        named = cache.task_definition(client, 'fa-task', 'log-router')
+        
+        client.describe_task_definition.assert_called_once_with(taskDefinition='fa-task')
+        assert named['containerPort'] is None
+    
+    @patch('resolution_cache.time.monotonic')
+    def test_entries_expire_and_can_be_invalidated(self, mock_monotonic):
+        """Test that the TTL and invalidate() both force a new lookup"""
+        mock_monotonic.return_value = 100.0
+        cache = ResolutionCache(ttl=60)
+        client = ecs_client()
+        
+        cache.task_definition(client, 'fa-task')
+        mock_monotonic.return_value = 161.0
+        cache.task_definition(client, 'fa-task')
+        cache.invalidate('fa-task')
+        cache.task_definition(client, 'fa-task')
+        
+        assert client.describe_task_definition.call_count == 3
+    
+    def test_unknown_container_fails(self):
+        """Test that a container name missing from the task definition is rejected"""
+        cache = ResolutionCache(ttl=60)
+        
+        with pytest.raises(ResolutionError, match="Container fa not found in task definition"):
+            cache.task_definition(ecs_client(), 'fa-task', 'fa')
+    
+    def test_unknown_task_definition_fails_and_is_not_cached(self):
+        """Test that a missing task definition raises ResolutionError every time"""
+        cache = ResolutionCache(ttl=60)
+        client = MagicMock()
+        client.describe_task_definition.side_effect = client_error('ClientException', 'DescribeTaskDefinition')
+        
+        for _ in range(2):
+            with pytest.raises(ResolutionError, match="Cannot resolve task definition fa-taks"):
+                cache.task_definition(client, 'fa-taks')
+        assert client.describe_task_definition.call_count == 2
+
+
+class TestCheckNetwork:
+    """Test cases for ResolutionCache.check_network"""
+    
+    def test_valid_network_is_checked_once(self):
+        """Test that a passing check is cached regardless of ID order"""
+        cache = ResolutionCache(ttl=60)
+        client = ec2_client()
+        
+        cache.check_network(client, ['subnet-1', 'subnet-2'], ['sg-1'])
+        cache.check_network(client, ['subnet-2', 'subnet-1'], ['sg-1'])
+        
+        client.describe_subnets.assert_called_once_with(SubnetIds=['subnet-1', 'subnet-2'])
+        client.describe_security_groups.assert_called_once_with(GroupIds=['sg-1'])
+    
+    def test_missing_subnet_fails(self):
+        """Test that an unknown subnet raises ResolutionError"""
+        client = ec2_client()
+        client.describe_subnets.side_effect = client_error('InvalidSubnetID.NotFound')
+        
+        with pytest.raises(ResolutionError, match="Invalid network configuration"):
+            ResolutionCache(ttl=60).check_network(client, ['subnet-x'], ['sg-1'])
+    
+    def test_vpc_mismatch_fails(self):
+        """Test that security groups from another VPC are rejected"""
+        with pytest.raises(ResolutionError, match="not in one VPC"):
+            ResolutionCache(ttl=60).check_network(ec2_client(group_vpc='vpc-2'), ['subnet-1'], ['sg-1'])
+    
+    def test_transient_errors_skip_the_check(self):
+        """Test that a throttled or denied check lets the start go ahead uncached"""
+        cache = ResolutionCache(ttl=60)
+        client = ec2_client()
+        client.describe_subnets.side_effect = client_error('UnauthorizedOperation')
+        
+        cache.check_network(client, ['subnet-1'], ['sg-1'])
+        cache.check_network(client, ['subnet-1'], ['sg-1'])
+        
+        assert client.describe_subnets.call_count == 2
+
+
+class TestHelpers:
+    """Test cases for the request helpers and ECSHandler integration"""
+    
+    def test_launch_task_definition_prefers_pinned_arn(self):
+        """Test that the pinned ARN is launched when the request was resolved"""
+        assert launch_task_definition({'task_definition': 'fa-task'}) == 'fa-task'
+        assert launch_task_definition({'task_definition': 'fa-task', 'task_definition_arn': TASK_DEF_ARN}) == TASK_DEF_ARN
+    
+    def test_with_container_port(self):
+        """Test that only configs without a port are resolved"""
+        cache = ResolutionCache(ttl=60)
+        client = ecs_client()
+        configured = {'task_definition': 'fa-task', 'container_name': 'fa', 'container_port': 80}
+        
+        assert with_container_port(configured, client, cache) is configured
+        resolved = with_container_port({'task_definition': 'fa-task', 'container_port': None}, client, cache)
+        
+        assert (resolved['container_name'], resolved['container_port']) == ('fa-container', 2531)
+    
+    def test_handler_wraps_errors(self):
+        """Test that ECSHandler surfaces resolution errors as ECSTaskError"""
+        handler = ECSHandler()
+        handler.resolution_cache = ResolutionCache(ttl=60)
+        handler.ecs_client = ecs_client()
+        handler.ec2_client = ec2_client(group_vpc='vpc-2')
+        
+        assert handler.resolve_task_definition('fa-task')['taskDefinitionArn'] == TASK_DEF_ARN
+        with pytest.raises(ECSTaskError, match="not in one VPC"):
+            handler.check_network(['subnet-1'], ['sg-1'])
@@ -0,0 +1,94 @@
+"""Unit tests for the schedule planner"""
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from schedule_planner import MINUTES_PER_WEEK, load_history, plan, plan_windows
+
+# A Monday
+MONDAY = datetime(2026, 9, 28, tzinfo=timezone.utc)
+
+
+def weekday_history(days=14, latency=120, service='fa'):
+    """Build a history with requests 09:00-17:00 and a start at 08:50 / stop at 20:00 on weekdays"""
+    events = []
+    for offset in range(days):
+        day = MONDAY + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        events.append({'time': day + timedelta(hours=8, minutes=50), 'service': service, 'type': 'start', 'latency': latency})
+        events.append({'time': day + timedelta(hours=20), 'service': service, 'type': 'stop'})
+        for minute in range(9 * 60, 17 * 60, 15):
+            events.append({'time': day + timedelta(minutes=minute), 'service': service, 'type': 'requests', 'count': 10})
+    return sorted(events, key=lambda e: e['time'])
+
+
+class TestPlan:
+    """Test cases for schedule_planner.plan"""
+    
+    def test_weekday_schedule(self):
+        """Test that starts lead traffic by the start latency and stops follow the idle time"""
+        result = plan(weekday_history(latency=150), idle_minutes=30, lead_margin=60)
+        
+        assert result['services'][0]['leadMinutes'] == 4
+        assert result['services'][0]['windows'][0] == {'start': 'MON 08:56', 'serving': 'MON 09:00', 'stop': 'MON 17:30'}
+        assert [s['ScheduleExpression'] for s in result['schedules']] == [
+            'cron(56 8 ? * MON,TUE,WED,THU,FRI *)',
+            'cron(30 17 ? * MON,TUE,WED,THU,FRI *)',
+        ]
+        assert json.loads(result['schedules'][1]['Target']['Input'])['detail'] == {'services': ['fa'], 'drain': True}
+    
+    def test_simulation_report(self):
+        """Test that the plan serves every request warm with fewer idle hours than history"""
+        report = plan(weekday_history(), idle_minutes=30)['report'][0]
+        
+        assert report['coverage'] == 1.0
+        assert report['requests'] == report['warmRequests'] == 10 * 32 * 10
+        assert report['historyHours'] == 10 * 11
+        assert report['plannedIdleHours'] < report['historyIdleHours']
+    
+    def test_rare_traffic_is_not_scheduled(self):
+        """Test that slots busy on too few days stay scaled to zero"""
+        events = weekday_history(days=21) + [
+            {'time': MONDAY + timedelta(hours=3), 'service': 'pdf', 'type': 'requests', 'count': 5}
+        ]
+        
+        result = plan(sorted(events, key=lambda e: e['time']), services=['pdf'])
+        
+        assert result['schedules'] == []
+        assert result['report'][0]['coverage'] == 0.0
+    
+    def test_timezone(self):
+        """Test that schedules are expressed in the requested timezone"""
+        result = plan(weekday_history(), tz_name='Europe/Berlin')
+        
+        assert result['schedules'][0]['ScheduleExpressionTimezone'] == 'Europe/Berlin'
+        assert result['services'][0]['windows'][0]['serving'] == 'MON 11:00'
+
+
+class TestHelpers:
+    """Test cases for windows and history loading"""
+    
+    def test_windows_bridge_short_gaps_and_wrap_the_week(self):
+        """Test that gaps shorter than the bridge are joined, including across Sunday midnight"""
+        slots = {0, 15, 60, 600, MINUTES_PER_WEEK - 15}
+        
+        assert plan_windows(slots, 15, 30) == [(600, 615), (MINUTES_PER_WEEK - 15, MINUTES_PER_WEEK + 75)]
+    
+    def test_load_history(self, tmp_path):
+        """Test that .jsonl histories are parsed and sorted, and bad events rejected"""
+        path = tmp_path / 'history.jsonl'
+        path.write_text(
+            '{"time": "2026-10-05T09:00:00Z", "service": "FA", "type": "requests", "count": 3}\n'
+            '{"time": "2026-10-05T08:00:00", "service": "fa", "type": "start"}\n'
+        )
+        
+        events = load_history(str(path))
+        
+        assert [e['type'] for e in events] == ['start', 'requests']
+        assert events[1]['service'] == 'fa'
+        assert events[0]['time'].tzinfo is not None
+        
+        path.write_text('{"time": "2026-10-05T09:00:00Z", "service": "fa", "type": "scale"}\n')
+        with pytest.raises(ValueError, match="Invalid history event 0"):
+            load_history(str(path))
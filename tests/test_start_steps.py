@@ -0,0 +1,158 @@
+"""Unit tests for the resumable start steps"""
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+from ecs_handler import ECSHandler
+from start_steps import lambda_handler, run_local, run_step, STEP_DONE, STEP_FAILED
+
+
+def service_config():
+    """Build a service configuration"""
+    return {
+        'cluster': 'fa-cluster',
+        'task_definition': 'fa-task',
+        'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/fa/abc',
+        'container_name': 'fa-container',
+        'container_port': 2531,
+        'subnets': ['subnet-123'],
+        'security_groups': ['sg-123']
+    }
+
+
+def task(task_arn, status, ip=None):
+    """Build a describe_tasks entry"""
+    return {
+        'taskArn': task_arn,
+        'lastStatus': status,
+        'attachments': [{
+            'type': 'ElasticNetworkInterface',
+            'details': [{'name': 'privateIPv4Address', 'value': ip}]
+        }] if ip else []
+    }
+
+
+class TestStartSteps:
+    """Test cases for start_steps"""
+    
+    @pytest.fixture(autouse=True)
+    def config(self):
+        with patch('lambda_function.get_service_config', return_value=service_config()):
+            yield
+    
+    @pytest.fixture
+    def ecs_handler(self):
+        handler = ECSHandler()
+        handler.ecs_client = MagicMock()
+        handler.ec2_client = MagicMock()
+        handler.ecs_client.describe_task_definition.return_value = {'taskDefinition': {
+            'taskDefinitionArn': 'arn:aws:ecs:us-east-2:123:task-definition/fa-task:7',
+            'containerDefinitions': [{'name': 'fa-container', 'portMappings': [{'containerPort': 2531}]}]
+        }}
+        handler.ecs_client.run_task.return_value = {'tasks': [{'taskArn': 'arn:task/fa-cluster/t1'}]}
+        handler.ecs_client.describe_tasks.side_effect = [
+            {'tasks': [task('arn:task/fa-cluster/t1', 'PROVISIONING')]},
+            {'tasks': [task('arn:task/fa-cluster/t1', 'PENDING')]},
+            {'tasks': [task('arn:task/fa-cluster/t1', 'RUNNING', '10.0.0.5')]},
+        ]
+        return handler
+    
+    @pytest.fixture
+    def tg_handler(self):
+        handler = MagicMock()
+        handler.get_target_health.return_value = {'targets': []}
+        handler.get_targets_health.side_effect = [
+            [{'ip': '10.0.0.5', 'port': 2531, 'state': 'initial'}],
+            [{'ip': '10.0.0.5', 'port': 2531, 'state': 'healthy'}],
+        ]
+        return handler
+    
+    def test_run_local_completes_start(self, ecs_handler, tg_handler):
+        """Test that the driver runs start, polls, register and health polls to done"""
+        waits = []
+        
+        token = run_local(
+            {'detail': {'service': 'fa', 'waitForHealthy': True}},
+            ecs_handler,
+            tg_handler,
+            sleep=waits.append
+        )
+        
+        assert token['step'] == STEP_DONE
+        assert token['result']['privateIp'] == '10.0.0.5'
+        assert token['result']['healthStatus']['state'] == 'healthy'
+        assert token['result']['polls'] == {'running': 3, 'healthy': 2}
+        assert len(waits) == 5
+        assert all(isinstance(wait, int) and wait >= 1 for wait in waits)
+        tg_handler.register_targets.assert_called_once_with(
+            target_group_arn=service_config()['target_group_arn'],
+            targets=[('10.0.0.5', 2531)]
+        )
+        assert ecs_handler.ecs_client.run_task.call_args.kwargs['taskDefinition'] == (
+            'arn:aws:ecs:us-east-2:123:task-definition/fa-task:7'
+        )
+    
+    def test_bad_container_fails_before_launch(self, ecs_handler, tg_handler):
+        """Test that a container missing from the task definition fails the start step"""
+        token = run_step(
+            {'step': 'start', 'detail': {'service': 'fa', 'containerName': 'fa'}, 'waitSeconds': 0},
+            ecs_handler,
+            tg_handler
+        )
+        
+        assert token['step'] == STEP_FAILED
+        assert 'Container fa not found' in token['error']
+        ecs_handler.ecs_client.run_task.assert_not_called()
+    
+    def test_tokens_are_json_serializable(self, ecs_handler, tg_handler):
+        """Test that each step can resume from a JSON round-tripped token"""
+        token = {'step': 'start', 'detail': {'service': 'fa'}, 'waitSeconds': 0}
+        
+        while token['step'] not in (STEP_DONE, STEP_FAILED):
+            token = json.loads(json.dumps(run_step(token, ecs_handler, tg_handler)))
+        
+        assert token['step'] == STEP_DONE
+        tg_handler.get_targets_health.assert_called_once()
+    
+    def test_stopped_task_fails_start(self, ecs_handler, tg_handler):
+        """Test that a task stopping before RUNNING ends with a failed token"""
+        stopped = task('arn:task/fa-cluster/t1', 'STOPPED')
+        stopped['stoppedReason'] = 'Essential container exited'
+        ecs_handler.ecs_client.describe_tasks.side_effect = [{'tasks': [stopped]}]
+        
+        token = run_local({'service': 'fa'}, ecs_handler, tg_handler, sleep=lambda s: None)
+        
+        assert token['step'] == STEP_FAILED
+        assert 'Essential container exited' in token['error']
+        tg_handler.register_targets.assert_not_called()
+    
+    def test_timeout_fails_start(self, ecs_handler, tg_handler):
+        """Test that the deadline carried in the token ends the wait"""
+        token = run_step({'step': 'start', 'detail': {'service': 'fa'}}, ecs_handler, tg_handler)
+        token['deadline'] = 0
+        
+        token = run_step(token, ecs_handler, tg_handler)
+        
+        assert token['step'] == STEP_FAILED
+        assert 'Timeout' in token['error']
+    
+    def test_unknown_service_fails(self, ecs_handler, tg_handler):
+        """Test that request validation errors end with a failed token"""
+        with patch('lambda_function.get_service_config', side_effect=ValueError('Unknown service: nope')):
+            token = run_step({'step': 'start', 'detail': {'service': 'nope'}}, ecs_handler, tg_handler)
+        
+        assert token['step'] == STEP_FAILED
+        assert 'Unknown service' in token['error']
+    
+    @patch('start_steps.TargetGroupHandler')
+    @patch('start_steps.ECSHandler')
+    def test_lambda_handler_accepts_event_or_token(self, mock_ecs_class, mock_tg_class):
+        """Test that the handler starts from an event and resumes from a token"""
+        with patch('start_steps.run_step', side_effect=lambda token, ecs, tg: token) as mock_run:
+            first = lambda_handler({'source': 'custom.app', 'detail': {'service': 'fa'}}, None)
+            second = lambda_handler({'step': 'poll_task', 'taskArns': []}, None)
+        
+        assert first['step'] == 'start'
+        assert first['detail'] == {'service': 'fa'}
+        assert second['step'] == 'poll_task'
+        assert mock_run.call_count == 2
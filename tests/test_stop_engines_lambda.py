@@ -0,0 +1,323 @@
+"""Unit tests for stop Lambda handler"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from metrics_source import InMemoryMetricsSource
+from stop_engines_lambda import lambda_handler, describe_tasks, list_running_tasks, reap_idle_services
+
+
+def service_config(name):
+    """Build a service configuration for tests"""
+    return {
+        'cluster': f'{name}-cluster',
+        'task_definition': f'{name}-task',
+        'target_group_arn': f'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/{name}/abc',
+        'container_name': f'{name}-container',
+        'container_port': 8080,
+        'subnets': ['subnet-123'],
+        'security_groups': ['sg-123'],
+        'idle_stop_minutes': 30
+    }
+
+
+def task_with_ip(task_arn, ip):
+    """Build a describe_tasks entry with an ENI attachment"""
+    return {
+        'taskArn': task_arn,
+        'attachments': [{
+            'type': 'ElasticNetworkInterface',
+            'details': [{'name': 'privateIPv4Address', 'value': ip}]
+        }]
+    }
+
+
+class FakeECS:
+    """ECS client stub with paginated list_tasks and stop tracking"""
+    
+    def __init__(self, tasks_by_cluster, page_size=100):
+        self.tasks_by_cluster = {c: list(arns) for c, arns in tasks_by_cluster.items()}
+        self.page_size = page_size
+        self.describe_calls = []
+        self.stopped = []
+        # Extra describe_tasks fields per task ARN (e.g. startedAt)
+        self.task_fields = {}
+    
+    def get_paginator(self, operation):
+        assert operation == 'list_tasks'
+        paginator = MagicMock()
+        
+        def paginate(cluster, desiredStatus, family=None):
+            arns = [a for a in self.tasks_by_cluster.get(cluster, []) if a not in self.stopped]
+            for i in range(0, max(len(arns), 1), self.page_size):
+                yield {'taskArns': arns[i:i + self.page_size]}
+        
+        paginator.paginate.side_effect = paginate
+        return paginator
+    
+    def describe_tasks(self, cluster, tasks, include=None):
+        self.describe_calls.append(len(tasks))
+        return {'tasks': [
+            {**task_with_ip(arn, f'10.0.{i // 250}.{i % 250}'), **self.task_fields.get(arn, {})}
+            for i, arn in enumerate(tasks)
+        ]}
+    
+    def stop_task(self, cluster, task, reason):
+        self.stopped.append(task)
+
+
+class TestStopEnginesLambda:
+    """Test cases for stop Lambda handler"""
+    
+    @pytest.fixture(autouse=True)
+    def mock_tg_handler(self):
+        """Patch the target group handler used by the stop Lambda"""
+        with patch('stop_engines_lambda.TargetGroupHandler') as mock_class:
+            handler = MagicMock()
+            handler.get_deregistration_delay.return_value = 30
+            handler.wait_for_targets_drained.return_value = True
+            mock_class.return_value = handler
+            yield handler
+    
+    @pytest.fixture
+    def mock_config(self):
+        """Patch service configuration lookup"""
+        with patch('stop_engines_lambda.get_service_config', side_effect=service_config) as mock:
+            yield mock
+    
+    def test_list_running_tasks_follows_pages(self):
+        """Test that every list_tasks page is read"""
+        arns = [f'arn:aws:ecs:us-east-2:123:task/c1/t{i}' for i in range(250)]
+        ecs = FakeECS({'c1': arns}, page_size=100)
+        
+        assert list_running_tasks(ecs, 'c1') == arns
+    
+    def test_describe_tasks_chunks(self):
+        """Test that describe_tasks is called with at most 100 ARNs"""
+        arns = [f'arn:aws:ecs:us-east-2:123:task/c1/t{i}' for i in range(250)]
+        ecs = FakeECS({'c1': arns})
+        
+        tasks = describe_tasks(ecs, 'c1', arns)
+        
+        assert len(tasks) == 250
+        assert ecs.describe_calls == [100, 100, 50]
+    
+    def test_stops_all_tasks_across_clusters(self, mock_config, mock_tg_handler):
+        """Test that all tasks beyond the first page are stopped and deregistered"""
+        auth_arns = [f'arn:aws:ecs:us-east-2:123:task/auth-cluster/a{i}' for i in range(150)]
+        pdf_arns = [f'arn:aws:ecs:us-east-2:123:task/pdf-cluster/p{i}' for i in range(3)]
+        ecs = FakeECS({'auth-cluster': auth_arns, 'pdf-cluster': pdf_arns})
+        
+        with patch('stop_engines_lambda.get_client', return_value=ecs):
+            response = lambda_handler({'detail': {'services': ['auth', 'pdf']}}, None)
+        
+        assert response['statusCode'] == 200
+        assert response['body']['total_tasks_stopped'] == 153
+        assert sorted(ecs.stopped) == sorted(auth_arns + pdf_arns)
+        results = {r['service']: r for r in response['body']['results']}
+        assert results['auth']['targets_deregistered'] == 150
+        assert mock_tg_handler.deregister_targets.call_count == 2
+        mock_tg_handler.wait_for_targets_drained.assert_not_called()
+    
+    def test_unknown_service_skipped(self, mock_config):
+        """Test that unknown services are reported as skipped"""
+        mock_config.side_effect = lambda name: (_ for _ in ()).throw(ValueError(f"Unknown service: {name}"))
+        
+        with patch('stop_engines_lambda.get_client', return_value=MagicMock()):
+            response = lambda_handler({'detail': {'services': ['nope']}}, None)
+        
+        assert response['statusCode'] == 200
+        assert response['body']['results'][0]['status'] == 'skipped'
+    
+    def test_retries_failed_stops(self, mock_config):
+        """Test that tasks still running after the first pass are stopped again"""
+        from botocore.exceptions import ClientError
+        
+        arns = [f'arn:aws:ecs:us-east-2:123:task/auth-cluster/a{i}' for i in range(3)]
+        ecs = FakeECS({'auth-cluster': arns})
+        original_stop = ecs.stop_task
+        attempts = {}
+        
+        def flaky_stop(cluster, task, reason):
+            attempts[task] = attempts.get(task, 0) + 1
+            if task == arns[0] and attempts[task] == 1:
+                raise ClientError({'Error': {'Code': 'ServerException', 'Message': 'boom'}}, 'StopTask')
+            original_stop(cluster, task, reason)
+        
+        ecs.stop_task = flaky_stop
+        
+        with patch('stop_engines_lambda.get_client', return_value=ecs):
+            response = lambda_handler({'detail': {'services': ['auth'], 'deregister_targets': False}}, None)
+        
+        assert sorted(ecs.stopped) == sorted(arns)
+        assert response['body']['total_tasks_stopped'] == 3
+    
+    def test_service_error_does_not_abort_cluster(self, mock_config, mock_tg_handler):
+        """Test that an unexpected error is reported for its service while the tasks still stop"""
+        arns = [f'arn:aws:ecs:us-east-2:123:task/auth-cluster/a{i}' for i in range(3)]
+        ecs = FakeECS({'auth-cluster': arns})
+        original_stop = ecs.stop_task
+        
+        def broken_stop(cluster, task, reason):
+            if task == arns[0] and task not in ecs.stopped and not getattr(broken_stop, 'failed', False):
+                broken_stop.failed = True
+                raise RuntimeError('connection reset')
+            original_stop(cluster, task, reason)
+        
+        ecs.stop_task = broken_stop
+        mock_tg_handler.deregister_targets.side_effect = RuntimeError('elbv2 unavailable')
+        
+        with patch('stop_engines_lambda.get_client', return_value=ecs):
+            response = lambda_handler({'detail': {'services': ['auth']}}, None)
+        
+        assert sorted(ecs.stopped) == sorted(arns)
+        result = response['body']['results'][0]
+        assert result['tasks_stopped'] == 3
+        assert result['status'] == 'error'
+        assert result['error'] == 'elbv2 unavailable'
+    
+    def test_drain_deregisters_before_stopping(self, mock_config, mock_tg_handler):
+        """Test that drain mode deregisters and waits before any task stops"""
+        arns = [f'arn:aws:ecs:us-east-2:123:task/auth-cluster/a{i}' for i in range(4)]
+        ecs = FakeECS({'auth-cluster': arns})
+        events = []
+        
+        mock_tg_handler.deregister_targets.side_effect = lambda arn, targets: events.append(('deregister', len(targets)))
+        mock_tg_handler.wait_for_targets_drained.side_effect = lambda arn, targets, timeout: events.append(('drained', timeout)) or True
+        original_stop = ecs.stop_task
+        ecs.stop_task = lambda cluster, task, reason: events.append(('stop', task)) or original_stop(cluster, task, reason)
+        
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 300000
+        
+        with patch('stop_engines_lambda.get_client', return_value=ecs):
+            response = lambda_handler({'detail': {'services': ['auth'], 'drain': True}}, context)
+        
+        assert [e[0] for e in events[:2]] == ['deregister', 'drained']
+        assert events[0][1] == 4
+        # Drain wait uses the target group deregistration delay plus margin
+        assert events[1][1] == 40
+        assert all(e[0] == 'stop' for e in events[2:])
+        assert len(events) == 6
+        result = response['body']['results'][0]
+        assert result['drained'] is True
+        assert result['targets_deregistered'] == 4
+    
+    def test_deregisters_from_every_target_group(self, mock_tg_handler):
+        """Test that a service with two target groups is deregistered and drained from both"""
+        def two_group_config(name):
+            config = service_config(name)
+            config['additional_target_groups'] = [{'arn': f'arn:{name}-engine-tg', 'port': 9443}]
+            return config
+        
+        arns = [f'arn:aws:ecs:us-east-2:123:task/fa-cluster/f{i}' for i in range(2)]
+        ecs = FakeECS({'fa-cluster': arns})
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 300000
+        
+        with patch('stop_engines_lambda.get_service_config', side_effect=two_group_config), \
+                patch('stop_engines_lambda.get_client', return_value=ecs):
+            response = lambda_handler({'detail': {'services': ['fa'], 'drain': True}}, context)
+        
+        deregistered = sorted(
+            (c.args[0], c.args[1][0][1]) for c in mock_tg_handler.deregister_targets.call_args_list
+        )
+        assert deregistered == sorted([(two_group_config('fa')['target_group_arn'], 8080), ('arn:fa-engine-tg', 9443)])
+        assert mock_tg_handler.wait_for_targets_drained.call_count == 2
+        result = response['body']['results'][0]
+        assert result['targets_deregistered'] == 4
+        assert result['drained'] is True
+
+
+class TestIdleReaper:
+    """Test cases for the idle_only mode of the stop Lambda"""
+    
+    NOW = datetime(2026, 10, 5, 12, 0, tzinfo=timezone.utc)
+    
+    @pytest.fixture(autouse=True)
+    def mock_config(self):
+        """Patch service configuration lookup; users never stops for being idle"""
+        def config(name):
+            if name == 'nope':
+                raise ValueError(f"Unknown service: {name}")
+            return {**service_config(name), 'idle_stop_minutes': 0 if name == 'users' else 30}
+        
+        with patch('stop_engines_lambda.get_service_config', side_effect=config) as mock:
+            yield mock
+    
+    def tasks(self, ecs, cluster, ages, **fields):
+        """Add tasks that started the given minutes before NOW"""
+        arns = [f'arn:aws:ecs:us-east-2:123:task/{cluster}/{cluster[0]}{i}' for i in range(len(ages))]
+        ecs.tasks_by_cluster[cluster] = ecs.tasks_by_cluster.get(cluster, []) + arns
+        for arn, age in zip(arns, ages):
+            ecs.task_fields[arn] = {'startedAt': self.NOW - timedelta(minutes=age), **fields}
+        return arns
+    
+    def test_stops_only_idle_services_in_one_metrics_read(self):
+        """Test that services with recent requests keep running and idle ones are stopped"""
+        ecs = FakeECS({})
+        auth = self.tasks(ecs, 'auth-cluster', [90, 60])
+        self.tasks(ecs, 'pdf-cluster', [90])
+        metrics = InMemoryMetricsSource()
+        metrics.record(service_config('auth')['target_group_arn'], 'RequestCountPerTarget', 4, self.NOW - timedelta(minutes=45))
+        metrics.record(service_config('pdf')['target_group_arn'], 'RequestCountPerTarget', 2, self.NOW - timedelta(minutes=10))
+        tg_handler = MagicMock()
+        
+        results = reap_idle_services(['auth', 'pdf', 'users', 'nope'], ecs, tg_handler, metrics, True, now=self.NOW)
+        
+        results = {r['service']: r for r in results}
+        assert results['auth']['status'] == 'success'
+        assert results['auth']['tasks_stopped'] == 2
+        assert results['pdf']['status'] == 'active'
+        assert results['pdf']['requests'] == 2
+        assert results['users']['reason'] == 'Idle stop disabled'
+        assert results['nope']['status'] == 'skipped'
+        assert sorted(ecs.stopped) == sorted(auth)
+        assert len(metrics.calls) == 1
+        tg_handler.deregister_targets.assert_called_once()
+    
+    def test_keeps_young_and_warm_pool_tasks(self):
+        """Test that tasks younger than the idle window and unclaimed warm pool tasks are not stopped"""
+        ecs = FakeECS({})
+        old = self.tasks(ecs, 'auth-cluster', [45])
+        self.tasks(ecs, 'pdf-cluster', [5])
+        warm = self.tasks(ecs, 'fa-cluster', [120], startedBy='warm-pool', tags=[{'key': 'engine-pool', 'value': 'warm'}])
+        ecs.task_fields[old[0]]['startedBy'] = 'engine-start'
+        
+        results = reap_idle_services(['auth', 'pdf', 'fa'], ecs, MagicMock(), InMemoryMetricsSource(), True, now=self.NOW)
+        
+        results = {r['service']: r for r in results}
+        assert ecs.stopped == old
+        assert results['pdf']['status'] == 'no_tasks'
+        assert results['fa']['status'] == 'no_tasks'
+        assert warm[0] not in ecs.stopped
+    
+    def test_stops_claimed_warm_pool_tasks(self):
+        """Test that claimed warm pool tasks serve like any other task and are reaped"""
+        ecs = FakeECS({})
+        claimed = self.tasks(ecs, 'fa-cluster', [120], startedBy='warm-pool', tags=[{'key': 'engine-pool', 'value': 'claimed'}])
+        
+        [result] = reap_idle_services(['fa'], ecs, MagicMock(), InMemoryMetricsSource(), True, now=self.NOW)
+        
+        assert result['tasks_stopped'] == 1
+        assert ecs.stopped == claimed
+    
+    def test_handler_drains_by_default(self):
+        """Test that idle_only drains before stopping unless drain is false"""
+        ecs = FakeECS({})
+        self.tasks(ecs, 'auth-cluster', [90])
+        ecs.task_fields = {arn: {'startedAt': datetime.now(timezone.utc) - timedelta(hours=2)} for arn in ecs.task_fields}
+        tg_handler = MagicMock()
+        tg_handler.get_deregistration_delay.return_value = 30
+        tg_handler.wait_for_targets_drained.return_value = True
+        
+        with patch('stop_engines_lambda.get_client', return_value=ecs), \
+                patch('stop_engines_lambda.TargetGroupHandler', return_value=tg_handler), \
+                patch('stop_engines_lambda.get_metrics_source', return_value=InMemoryMetricsSource()):
+            response = lambda_handler({'detail': {'services': ['auth'], 'idle_only': True}}, None)
+        
+        result = response['body']['results'][0]
+        assert result['tasks_stopped'] == 1
+        assert result['drained'] is True
+        assert result['idle_stop_minutes'] == 30
+        tg_handler.wait_for_targets_drained.assert_called_once()
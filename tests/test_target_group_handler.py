@@ -0,0 +1,106 @@
+"""Unit tests for target group handler"""
+import threading
+
+import pytest
+from unittest.mock import MagicMock
+
+from target_group_handler import TargetGroupHandler, map_target_groups
+from timing import count_api_call, phase, start_trace
+
+
+def health_response(states):
+    """Build a describe_target_health response from {(ip, port): state}"""
+    return {
+        'TargetHealthDescriptions': [
+            {'Target': {'Id': ip, 'Port': port}, 'TargetHealth': {'State': state}}
+            for (ip, port), state in states.items()
+        ]
+    }
+
+
+class TestTargetGroupHandler:
+    """Test cases for TargetGroupHandler"""
+    
+    @pytest.fixture
+    def handler(self):
+        """Target group handler with a mocked ELBv2 client"""
+        handler = TargetGroupHandler(region='us-east-2')
+        handler.elbv2_client = MagicMock()
+        return handler
+    
+    def test_register_targets_single_call(self, handler):
+        """Test that all targets are registered with one API call"""
+        handler.register_targets('tg-arn', [('10.0.0.1', 8080), ('10.0.0.2', 8080)])
+        
+        handler.elbv2_client.register_targets.assert_called_once_with(
+            TargetGroupArn='tg-arn',
+            Targets=[{'Id': '10.0.0.1', 'Port': 8080}, {'Id': '10.0.0.2', 'Port': 8080}]
+        )
+    
+    def test_get_deregistration_delay(self, handler):
+        """Test reading the deregistration delay attribute"""
+        handler.elbv2_client.describe_target_group_attributes.return_value = {
+            'Attributes': [{'Key': 'deregistration_delay.timeout_seconds', 'Value': '45'}]
+        }
+        
+        assert handler.get_deregistration_delay('tg-arn') == 45
+    
+    def test_wait_for_targets_drained(self, handler):
+        """Test waiting until no target is draining"""
+        targets = [('10.0.0.1', 8080), ('10.0.0.2', 8080)]
+        handler.elbv2_client.describe_target_health.side_effect = [
+            health_response({targets[0]: 'draining', targets[1]: 'draining'}),
+            health_response({targets[0]: 'unused', targets[1]: 'draining'}),
+            health_response({targets[0]: 'unused', targets[1]: 'unused'}),
+        ]
+        
+        assert handler.wait_for_targets_drained('tg-arn', targets, timeout=5, poll_interval=0.01) is True
+        assert handler.elbv2_client.describe_target_health.call_count == 3
+    
+    def test_wait_for_targets_drained_timeout(self, handler):
+        """Test that a drain that never finishes times out"""
+        targets = [('10.0.0.1', 8080)]
+        handler.elbv2_client.describe_target_health.return_value = health_response({targets[0]: 'draining'})
+        
+        assert handler.wait_for_targets_drained('tg-arn', targets, timeout=0.05, poll_interval=0.01) is False
+
+
+class TestMapTargetGroups:
+    """Test cases for map_target_groups"""
+    
+    def test_runs_groups_concurrently_in_order(self):
+        """Test that every group runs at once and results keep target group order"""
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def register(arn, port):
+            # Both calls must be in flight together to pass the barrier
+            barrier.wait()
+            return f'{arn}:{port}'
+        
+        assert map_target_groups(register, [('tg-a', 80), ('tg-b', 8443)]) == ['tg-a:80', 'tg-b:8443']
+    
+    def test_phases_record_on_callers_trace(self):
+        """Test that concurrent phases are recorded without counting each other's calls"""
+        def register(arn, port):
+            with phase('register_targets'):
+                count_api_call()
+        
+        with start_trace('fa', 'fa-cluster') as trace:
+            map_target_groups(register, [('tg-a', 80), ('tg-b', 80), ('tg-c', 80)])
+        
+        timings = trace.timings()
+        assert timings['apiCalls'] == 3
+        assert timings['phases']['register_targets']['calls'] == 3
+    
+    def test_raises_first_error(self):
+        """Test that an error in one group is raised after all groups ran"""
+        calls = []
+        
+        def register(arn, port):
+            calls.append(arn)
+            if arn == 'tg-a':
+                raise ValueError('boom')
+        
+        with pytest.raises(ValueError, match='boom'):
+            map_target_groups(register, [('tg-a', 80), ('tg-b', 80)])
+        assert sorted(calls) == ['tg-a', 'tg-b']
@@ -0,0 +1,114 @@
+"""Unit tests for batched task poller"""
+import threading
+import pytest
+
+from task_poller import TaskPoller, TaskNotFoundError, DESCRIBE_TASKS_MAX_ARNS
+
+
+def make_task(task_arn, last_status, ip=None):
+    """Build a describe_tasks task entry"""
+    task = {'taskArn': task_arn, 'lastStatus': last_status, 'desiredStatus': 'RUNNING'}
+    if ip:
+        task['attachments'] = [{
+            'type': 'ElasticNetworkInterface',
+            'details': [{'name': 'privateIPv4Address', 'value': ip}]
+        }]
+    return task
+
+
+class FakeECSClient:
+    """describe_tasks stub that walks each task through a list of statuses"""
+    
+    def __init__(self, timelines):
+        self.timelines = timelines
+        self.calls = []
+        self.lock = threading.Lock()
+    
+    def describe_tasks(self, cluster, tasks):
+        with self.lock:
+            self.calls.append((cluster, list(tasks)))
+        response = {'tasks': [], 'failures': []}
+        for arn in tasks:
+            timeline = self.timelines.get(arn)
+            if timeline is None:
+                response['failures'].append({'arn': arn, 'reason': 'MISSING'})
+                continue
+            status = timeline.pop(0) if len(timeline) > 1 else timeline[0]
+            response['tasks'].append(make_task(arn, status, ip='10.0.0.1' if status == 'RUNNING' else None))
+        return response
+
+
+class TestTaskPoller:
+    """Test cases for TaskPoller"""
+    
+    def test_concurrent_waiters_share_describe_calls(self):
+        """Test that tasks in one cluster are checked with one call per tick"""
+        arns = [f'arn:aws:ecs:us-east-2:123:task/c1/task-{i}' for i in range(5)]
+        client = FakeECSClient({arn: ['PROVISIONING', 'PENDING', 'RUNNING'] for arn in arns})
+        poller = TaskPoller(client, poll_interval=0.01)
+        
+        waiters = poller.submit_many('c1', arns)
+        results = [poller.result(w, timeout=5) for w in waiters]
+        
+        assert all(r.task['lastStatus'] == 'RUNNING' for r in results)
+        assert all(r.polls == 3 for r in results)
+        # One describe_tasks call per tick for all five tasks
+        assert len(client.calls) == 3
+        assert all(len(tasks) == 5 for _, tasks in client.calls)
+    
+    def test_calls_grouped_by_cluster_and_chunked(self):
+        """Test per-cluster grouping and the 100-ARN limit"""
+        arns = [f'arn:aws:ecs:us-east-2:123:task/c1/task-{i}' for i in range(DESCRIBE_TASKS_MAX_ARNS + 5)]
+        other = 'arn:aws:ecs:us-east-2:123:task/c2/task-x'
+        timelines = {arn: ['RUNNING'] for arn in arns + [other]}
+        client = FakeECSClient(timelines)
+        poller = TaskPoller(client, poll_interval=0.01)
+        
+        waiters = [poller.submit('c1', arn) for arn in arns] + [poller.submit('c2', other)]
+        for waiter in waiters:
+            poller.result(waiter, timeout=5)
+        
+        assert all(len(tasks) <= DESCRIBE_TASKS_MAX_ARNS for _, tasks in client.calls)
+        assert {cluster for cluster, _ in client.calls} == {'c1', 'c2'}
+    
+    def test_stopped_task_resolves_waiter(self):
+        """Test that STOPPED is handed back to the caller"""
+        arn = 'arn:aws:ecs:us-east-2:123:task/c1/task-1'
+        client = FakeECSClient({arn: ['PENDING', 'STOPPED']})
+        poller = TaskPoller(client, poll_interval=0.01)
+        
+        waiter = poller.wait('c1', arn, timeout=5)
+        
+        assert waiter.task['lastStatus'] == 'STOPPED'
+    
+    def test_missing_task_raises(self):
+        """Test that a MISSING failure is raised to the caller"""
+        poller = TaskPoller(FakeECSClient({}), poll_interval=0.01)
+        
+        with pytest.raises(TaskNotFoundError):
+            poller.wait('c1', 'arn:aws:ecs:us-east-2:123:task/c1/gone', timeout=5)
+    
+    def test_timeout_discards_waiter(self):
+        """Test that a timed-out waiter stops being polled"""
+        arn = 'arn:aws:ecs:us-east-2:123:task/c1/task-1'
+        poller = TaskPoller(FakeECSClient({arn: ['PENDING']}), poll_interval=0.01)
+        
+        with pytest.raises(TimeoutError):
+            poller.wait('c1', arn, timeout=0.05)
+        
+        assert poller._pending == {}
+    
+    def test_ready_predicate(self):
+        """Test that RUNNING tasks wait until the ready predicate accepts them"""
+        arn = 'arn:aws:ecs:us-east-2:123:task/c1/task-1'
+        client = FakeECSClient({arn: ['RUNNING']})
+        poller = TaskPoller(client, poll_interval=0.01)
+        seen = []
+        
+        def ready(task):
+            seen.append(task)
+            return len(seen) >= 2
+        
+        waiter = poller.wait('c1', arn, timeout=5, ready=ready)
+        
+        assert waiter.polls == 2
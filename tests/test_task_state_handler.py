@@ -0,0 +1,151 @@
+"""Unit tests for event-driven start completion"""
+import json
+import os
+import pytest
+from unittest.mock import MagicMock, patch
+
+from ecs_handler import ECSHandler
+from task_state_handler import (
+    complete_start,
+    lambda_handler,
+    pending_start_tags,
+    pending_target_groups,
+    start_pending_tasks,
+    PENDING_START_STARTED_BY,
+    START_STATE_TAG_KEY,
+    START_STATE_REGISTERED,
+)
+
+EVENTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'example-events')
+
+TARGET_GROUP_ARN = 'arn:aws:elasticloadbalancing:us-east-2:486151888818:targetgroup/unified-fa-tg/c1c35818b5273bfc'
+
+
+def load_event(name):
+    """Load a recorded event from example-events/"""
+    with open(os.path.join(EVENTS_DIR, name)) as f:
+        return json.load(f)
+
+
+def fa_request(count=1):
+    """Build resolved start parameters for the fa service"""
+    return {
+        'service': 'fa',
+        'cluster': 'fa-engine-cluster',
+        'task_definition': 'fa-engine-task-def',
+        'target_group_arn': TARGET_GROUP_ARN,
+        'container_port': 2531,
+        'subnets': ['subnet-123'],
+        'security_groups': ['sg-123'],
+        'count': count
+    }
+
+
+class TestTaskStateHandler:
+    """Test cases for the deferred start stages"""
+    
+    @pytest.fixture
+    def ecs_client(self):
+        client = MagicMock()
+        client.describe_tasks.return_value = {
+            'tasks': [{'tags': pending_start_tags(fa_request())}]
+        }
+        return client
+    
+    @pytest.fixture
+    def ecs_handler(self, ecs_client):
+        handler = ECSHandler()
+        handler.ecs_client = ecs_client
+        return handler
+    
+    def test_start_pending_tasks_tags_and_returns(self, ecs_handler, ecs_client):
+        """Test that the first stage only launches tagged tasks"""
+        ecs_client.run_task.return_value = {'tasks': [{'taskArn': 'arn:task/fa-engine-cluster/a'}]}
+        
+        body = start_pending_tasks(fa_request(), ecs_handler)
+        
+        params = ecs_client.run_task.call_args.kwargs
+        assert params['startedBy'] == PENDING_START_STARTED_BY
+        assert {'key': 'engine-port', 'value': '2531'} in params['tags']
+        assert body['status'] == 'pending'
+        assert body['taskId'] == 'a'
+        ecs_client.describe_tasks.assert_not_called()
+    
+    def test_running_event_registers_task(self, ecs_handler, ecs_client):
+        """Test that the recorded RUNNING event registers the ENI IP"""
+        detail = load_event('task-state-change-running.json')['detail']
+        tg_handler = MagicMock()
+        
+        result = complete_start(detail, ecs_handler, tg_handler)
+        
+        assert result['status'] == 'registered'
+        assert result['privateIp'] == '10.0.1.57'
+        assert result['timings']['phases']['task_wait']['seconds'] == pytest.approx(55.709)
+        tg_handler.register_target.assert_called_once_with(
+            target_group_arn=TARGET_GROUP_ARN, private_ip='10.0.1.57', port=2531
+        )
+        ecs_client.tag_resource.assert_called_once_with(
+            resourceArn=detail['taskArn'],
+            tags=[{'key': START_STATE_TAG_KEY, 'value': START_STATE_REGISTERED}]
+        )
+    
+    def test_running_event_registers_every_target_group(self, ecs_handler, ecs_client):
+        """Test that the tags carry all target groups of the start to the second stage"""
+        engine_arn = 'arn:aws:elasticloadbalancing:us-east-2:486151888818:targetgroup/fa-engine-tg/dbcce8724f4dc4bd'
+        request = {**fa_request(), 'additional_target_groups': [{'arn': engine_arn, 'port': 2531}]}
+        ecs_client.describe_tasks.return_value = {'tasks': [{'tags': pending_start_tags(request)}]}
+        tg_handler = MagicMock()
+        
+        result = complete_start(load_event('task-state-change-running.json')['detail'], ecs_handler, tg_handler)
+        
+        assert result['status'] == 'registered'
+        assert result['targetGroupArn'] == TARGET_GROUP_ARN
+        assert [g['targetGroupArn'] for g in result['targetGroups']] == [TARGET_GROUP_ARN, engine_arn]
+        assert sorted(c.kwargs['target_group_arn'] for c in tg_handler.register_target.call_args_list) == sorted(
+            [TARGET_GROUP_ARN, engine_arn]
+        )
+    
+    def test_pending_start_tags_fit_tag_value_limit(self):
+        """Test that each target group gets its own tags so no value exceeds 256 characters"""
+        arns = [f'arn:aws:elasticloadbalancing:us-east-2:486151888818:targetgroup/{"x" * 32}-{i}/dbcce8724f4dc4bd' for i in range(3)]
+        request = {**fa_request(), 'additional_target_groups': [{'arn': arn, 'port': 2531 + i} for i, arn in enumerate(arns)]}
+        
+        tags = pending_start_tags(request)
+        
+        assert all(len(tag['value']) <= 256 for tag in tags)
+        target_groups = pending_target_groups({tag['key']: tag['value'] for tag in tags})
+        assert target_groups == [(TARGET_GROUP_ARN, 2531)] + [(arn, 2531 + i) for i, arn in enumerate(arns)]
+    
+    def test_duplicate_event_skipped(self, ecs_handler, ecs_client):
+        """Test that a task already registered is not registered again"""
+        ecs_client.describe_tasks.return_value = {
+            'tasks': [{'tags': [{'key': START_STATE_TAG_KEY, 'value': START_STATE_REGISTERED}]}]
+        }
+        tg_handler = MagicMock()
+        
+        result = complete_start(load_event('task-state-change-running.json')['detail'], ecs_handler, tg_handler)
+        
+        assert result['status'] == 'skipped'
+        tg_handler.register_target.assert_not_called()
+    
+    def test_stopped_event_reports_failure(self, ecs_handler):
+        """Test that a pending task stopping before RUNNING is reported with its reason"""
+        tg_handler = MagicMock()
+        
+        result = complete_start(load_event('task-state-change-stopped.json')['detail'], ecs_handler, tg_handler)
+        
+        assert result['status'] == 'failed'
+        assert 'CannotPullContainerError' in result['error']
+        tg_handler.register_target.assert_not_called()
+    
+    @patch('task_state_handler.complete_start')
+    def test_lambda_handler_ignores_other_tasks(self, mock_complete):
+        """Test that events for other tasks and statuses are ignored"""
+        event = load_event('task-state-change-running.json')
+        event['detail']['startedBy'] = 'ecs-svc/123'
+        pending = load_event('task-state-change-running.json')
+        pending['detail']['lastStatus'] = 'PENDING'
+        
+        assert lambda_handler(event, None)['body']['status'] == 'ignored'
+        assert lambda_handler(pending, None)['body']['status'] == 'ignored'
+        mock_complete.assert_not_called()
@@ -0,0 +1,125 @@
+"""Unit tests for the throttling-aware AWS call layer"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+from throttling import ApiThrottle, TokenBucket, parse_rates
+
+
+def operation(name='RunTask'):
+    """Build a botocore OperationModel stand-in"""
+    model = MagicMock()
+    model.name = name
+    return model
+
+
+def response(status, code=None):
+    """Build a (http_response, parsed) pair as passed to needs-retry"""
+    http_response = MagicMock(status_code=status)
+    return http_response, ({'Error': {'Code': code}} if code else {})
+
+
+class TestParseRates:
+    """Test cases for parse_rates"""
+    
+    def test_parses_entries(self):
+        """Test that service and operation entries are parsed"""
+        assert parse_rates('ecs.RunTask=10:40, elbv2=5:10') == {'ecs.RunTask': (10.0, 40), 'elbv2': (5.0, 10)}
+        assert parse_rates('') == {}
+    
+    def test_rejects_malformed_entries(self):
+        """Test that a typo in THROTTLE_RATES is reported"""
+        with pytest.raises(ValueError, match="Invalid THROTTLE_RATES entry 'ecs=10'"):
+            parse_rates('ecs=10')
+
+
+class TestTokenBucket:
+    """Test cases for TokenBucket"""
+    
+    @patch('throttling.time')
+    def test_burst_then_paced(self, mock_time):
+        """Test that calls beyond the burst wait for refills in arrival order"""
+        mock_time.monotonic.return_value = 100.0
+        bucket = TokenBucket(rate=10.0, burst=2)
+        
+        waits = [bucket.acquire() for _ in range(4)]
+        
+        assert waits == [0.0, 0.0, pytest.approx(0.1), pytest.approx(0.2)]
+        assert mock_time.sleep.call_count == 2
+    
+    def test_throttle_halves_rate_and_success_recovers(self):
+        """Test the adaptive rate bounds"""
+        bucket = TokenBucket(rate=10.0, burst=2)
+        
+        for _ in range(10):
+            bucket.on_throttle()
+        assert bucket.rate == pytest.approx(1.0)
+        
+        for _ in range(100):
+            bucket.on_success()
+        assert bucket.rate == 10.0
+
+
+class TestApiThrottle:
+    """Test cases for ApiThrottle"""
+    
+    @pytest.fixture
+    def throttle(self):
+        return ApiThrottle(rates={'ecs': (20.0, 50), 'ecs.RunTask': (40.0, 100)}, retry_budget=3, max_retries=2)
+    
+    def test_buckets_per_operation(self, throttle):
+        """Test that operations get their own bucket sized by the most specific entry"""
+        assert throttle.bucket('ecs', 'RunTask').rate == 40.0
+        assert throttle.bucket('ecs', 'DescribeTasks').rate == 20.0
+        assert throttle.bucket('ecs', 'DescribeTasks') is throttle.bucket('ecs', 'DescribeTasks')
+        assert throttle.bucket('ec2', 'DescribeSubnets').rate == 10.0
+    
+    @patch('throttling.random.uniform', side_effect=lambda low, high: high)
+    def test_throttling_is_retried_with_backoff(self, mock_uniform, throttle):
+        """Test that throttling slows the operation down and is retried"""
+        delays = [
+            throttle.retry_delay('ecs', operation(), attempts, response(400, 'ThrottlingException'))
+            for attempts in (1, 2)
+        ]
+        
+        assert delays == [0.5, 1.0]
+        assert throttle.bucket('ecs', 'RunTask').rate == 10.0
+    
+    def test_success_and_client_errors_are_not_retried(self, throttle):
+        """Test that only throttling and transient failures are retried"""
+        assert throttle.retry_delay('ecs', operation(), 1, response(200)) is None
+        assert throttle.retry_delay('ecs', operation(), 1, response(400, 'InvalidParameterException')) is None
+        assert throttle.retry_delay('ecs', operation(), 1, response(503)) is not None
+    
+    def test_connection_errors_are_retried(self, throttle):
+        """Test that errors raised while sending are retried"""
+        from botocore.exceptions import EndpointConnectionError
+        
+        error = EndpointConnectionError(endpoint_url='https://ecs.us-east-2.amazonaws.com')
+        
+        assert throttle.retry_delay('ecs', operation(), 1, caught_exception=error) is not None
+        assert throttle.retry_delay('ecs', operation(), 1, caught_exception=ValueError('bug')) is None
+    
+    def test_attempts_per_call_are_capped(self, throttle):
+        """Test that a call gives up after max_retries retries"""
+        assert throttle.retry_delay('ecs', operation(), 3, response(429)) is None
+    
+    def test_retry_budget_is_per_invocation(self, throttle):
+        """Test that retries stop once the budget is spent until the next invocation"""
+        throttled = response(400, 'Throttling')
+        
+        delays = [throttle.retry_delay('ecs', operation(), 1, throttled) for _ in range(4)]
+        throttle.start_invocation()
+        
+        assert [delay is not None for delay in delays] == [True, True, True, False]
+        assert throttle.retry_delay('ecs', operation(), 1, throttled) is not None
+    
+    def test_register_routes_client_calls(self, throttle):
+        """Test that the hooks take a token per attempt and answer needs-retry"""
+        client = MagicMock()
+        throttle.register(client, 'ecs')
+        hooks = {c.args[0]: c.args[1] for c in client.meta.events.register.call_args_list}
+        
+        hooks['before-send'](event_name='before-send.ecs.RunTask', request=MagicMock())
+        
+        assert throttle.bucket('ecs', 'RunTask')._tokens == pytest.approx(99, abs=0.5)
+        assert hooks['needs-retry'](operation=operation(), attempts=1, response=response(200)) is None
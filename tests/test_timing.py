@@ -0,0 +1,94 @@
+"""Unit tests for start phase timing"""
+import json
+import pytest
+from unittest.mock import patch
+
+import timing
+from timing import (
+    StartTrace,
+    start_trace,
+    current_trace,
+    phase,
+    record_phase,
+    add_api_calls,
+    count_api_call,
+    record_status_phases,
+)
+
+
+class TestStartTrace:
+    """Test cases for StartTrace and the phase helpers"""
+    
+    def test_no_trace_is_noop(self):
+        """Test that helpers do nothing outside a start"""
+        assert current_trace() is None
+        with phase('run_task'):
+            count_api_call()
+        record_phase('pending', 1.0)
+        add_api_calls(3)
+        assert current_trace() is None
+    
+    def test_phase_counts_calls_and_accumulates(self):
+        """Test that repeated phases add up seconds and calls"""
+        with start_trace('fa', 'fa-cluster') as trace:
+            with phase('run_task'):
+                count_api_call()
+            with phase('run_task'):
+                count_api_call()
+                count_api_call()
+            count_api_call()
+        
+        timings = trace.timings()
+        assert timings['apiCalls'] == 4
+        assert timings['phases']['run_task']['calls'] == 3
+        assert current_trace() is None
+    
+    def test_phase_recorded_when_block_raises(self):
+        """Test that a failing phase still shows up"""
+        with start_trace('fa', 'fa-cluster') as trace:
+            with pytest.raises(RuntimeError):
+                with phase('task_wait'):
+                    raise RuntimeError('boom')
+        
+        assert 'task_wait' in trace.timings()['phases']
+    
+    def test_record_status_phases(self):
+        """Test that a task wait is split by lastStatus"""
+        transitions = [('PROVISIONING', 2.0), ('PENDING', 10.0), ('RUNNING', 30.0)]
+        
+        with start_trace('fa', 'fa-cluster') as trace:
+            record_status_phases(transitions, started_at=0.0, resolved_at=33.0)
+        
+        phases = trace.timings()['phases']
+        assert phases['provisioning']['seconds'] == 10.0
+        assert phases['pending']['seconds'] == 20.0
+        assert phases['eni_attachment']['seconds'] == 3.0
+        assert 'activating' not in phases
+    
+    def test_emf_document(self):
+        """Test EMF metric names, units and dimensions"""
+        trace = StartTrace('fa', 'fa-cluster')
+        trace.record('run_task', 0.5, calls=1)
+        trace.record('pending', 12.0)
+        
+        document = trace.emf()
+        metrics = {m['Name']: m['Unit'] for m in document['_aws']['CloudWatchMetrics'][0]['Metrics']}
+        
+        assert document['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [['Service', 'Cluster']]
+        assert document['Service'] == 'fa'
+        assert document['RunTaskSeconds'] == 0.5
+        assert document['RunTaskCalls'] == 1
+        assert 'PendingCalls' not in document
+        assert metrics['RunTaskSeconds'] == 'Seconds'
+        assert metrics['ApiCalls'] == 'Count'
+    
+    def test_emit_prints_json(self, capsys):
+        """Test that emit writes one raw JSON line and respects EMIT_METRICS"""
+        trace = StartTrace('fa', 'fa-cluster')
+        
+        trace.emit()
+        assert json.loads(capsys.readouterr().out)['Service'] == 'fa'
+        
+        with patch.object(timing, 'EMIT_METRICS', False):
+            trace.emit()
+        assert capsys.readouterr().out == ''
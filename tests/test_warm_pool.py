@@ -0,0 +1,164 @@
+"""Unit tests for the warm pool"""
+import pytest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+
+from ecs_handler import ECSHandler
+from warm_pool import (
+    WarmPool,
+    lambda_handler,
+    matches_task_definition,
+    POOL_TAG_KEY,
+    SERVICE_TAG_KEY,
+    WARM_POOL_STARTED_BY,
+)
+
+
+def pool_config(size=2):
+    """Build a service configuration with a warm pool"""
+    return {
+        'cluster': 'fa-cluster',
+        'task_definition': 'fa-task',
+        'target_group_arn': 'arn:aws:elasticloadbalancing:us-east-2:123:targetgroup/fa/abc',
+        'container_name': 'fa-container',
+        'container_port': 2531,
+        'subnets': ['subnet-123'],
+        'security_groups': ['sg-123'],
+        'warm_pool_size': size
+    }
+
+
+class FakeECS:
+    """ECS client stub tracking warm pool tasks and their tags"""
+    
+    def __init__(self):
+        self.tasks = {}
+        self.run_calls = []
+        self.tag_calls = []
+    
+    def add_task(self, service='fa', status='RUNNING', state='warm', ip='10.0.0.1', task_def='fa-task:3'):
+        task_arn = f'arn:aws:ecs:us-east-2:123:task/fa-cluster/task{len(self.tasks)}'
+        self.tasks[task_arn] = {
+            'taskArn': task_arn,
+            'lastStatus': status,
+            'startedAt': f'2026-01-01T00:00:{len(self.tasks):02d}',
+            'taskDefinitionArn': f'arn:aws:ecs:us-east-2:123:task-definition/{task_def}',
+            'tags': [{'key': POOL_TAG_KEY, 'value': state}, {'key': SERVICE_TAG_KEY, 'value': service}],
+            'attachments': [{
+                'type': 'ElasticNetworkInterface',
+                'details': [{'name': 'privateIPv4Address', 'value': ip}]
+            }] if ip else []
+        }
+        return task_arn
+    
+    def get_paginator(self, operation):
+        assert operation == 'list_tasks'
+        paginator = MagicMock()
+        
+        def paginate(cluster, startedBy, desiredStatus):
+            assert startedBy == WARM_POOL_STARTED_BY
+            yield {'taskArns': list(self.tasks)}
+        
+        paginator.paginate.side_effect = paginate
+        return paginator
+    
+    def describe_tasks(self, cluster, tasks, include):
+        assert include == ['TAGS']
+        return {'tasks': [self.tasks[arn] for arn in tasks]}
+    
+    def tag_resource(self, resourceArn, tags):
+        self.tag_calls.append(resourceArn)
+        self.tasks[resourceArn]['tags'] = [
+            t for t in self.tasks[resourceArn]['tags'] if t['key'] != tags[0]['key']
+        ] + tags
+    
+    def run_task(self, count, **params):
+        self.run_calls.append((count, params))
+        return {'tasks': [{'taskArn': f'arn:new/{i}'} for i in range(count)]}
+
+
+class TestWarmPool:
+    """Test cases for WarmPool"""
+    
+    @pytest.fixture
+    def ecs(self):
+        return FakeECS()
+    
+    @pytest.fixture
+    def pool(self, ecs):
+        handler = ECSHandler()
+        handler.ecs_client = ecs
+        return WarmPool(handler)
+    
+    def test_claim_takes_oldest_running_task(self, ecs, pool):
+        """Test that claim re-tags the oldest RUNNING warm task"""
+        first = ecs.add_task(ip='10.0.0.1')
+        ecs.add_task(ip='10.0.0.2')
+        
+        assert pool.claim('fa', pool_config()) == (first, '10.0.0.1')
+        assert ecs.tag_calls == [first]
+        assert len(pool.list_tasks('fa', pool_config())) == 1
+    
+    def test_claim_skips_unready_and_foreign_tasks(self, ecs, pool):
+        """Test that pending, claimed, other-service and other-family tasks are not claimed"""
+        ecs.add_task(status='PENDING', ip=None)
+        ecs.add_task(state='claimed')
+        ecs.add_task(service='pdf')
+        ecs.add_task(task_def='other-task:1')
+        
+        assert pool.claim('fa', pool_config()) is None
+        assert ecs.tag_calls == []
+    
+    def test_claim_returns_none_on_list_error(self, pool):
+        """Test that a failed listing falls back to a cold start"""
+        pool.ecs_handler.ecs_client = MagicMock()
+        pool.ecs_handler.ecs_client.get_paginator.side_effect = ClientError(
+            {'Error': {'Code': 'AccessDenied', 'Message': 'no'}}, 'ListTasks'
+        )
+        
+        assert pool.claim('fa', pool_config()) is None
+    
+    def test_refill_counts_starting_tasks(self, ecs, pool):
+        """Test that refill launches only the deficit, tagged for the pool"""
+        ecs.add_task(status='PENDING', ip=None)
+        ecs.add_task(state='claimed')
+        
+        launched = pool.refill('fa', pool_config(size=3))
+        
+        assert len(launched) == 2
+        count, params = ecs.run_calls[0]
+        assert count == 2
+        assert params['startedBy'] == WARM_POOL_STARTED_BY
+        assert {'key': SERVICE_TAG_KEY, 'value': 'fa'} in params['tags']
+    
+    def test_refill_noop_when_full_or_disabled(self, ecs, pool):
+        """Test that a full or disabled pool launches nothing"""
+        ecs.add_task()
+        
+        assert pool.refill('fa', pool_config(size=1)) == []
+        assert pool.refill('fa', pool_config(size=0)) == []
+        assert ecs.run_calls == []
+    
+    def test_matches_task_definition(self):
+        """Test family, family:revision and ARN matching"""
+        arn = 'arn:aws:ecs:us-east-2:123:task-definition/fa-task:3'
+        
+        assert matches_task_definition(arn, 'fa-task')
+        assert matches_task_definition(arn, 'fa-task:3')
+        assert not matches_task_definition(arn, 'fa-task:2')
+        assert matches_task_definition(arn, arn)
+        assert not matches_task_definition(arn, 'fa')
+    
+    @patch('warm_pool.WarmPool')
+    @patch('warm_pool.get_service_config')
+    def test_lambda_handler_refills_enabled_pools(self, mock_config, mock_pool_class):
+        """Test that the scheduled handler only refills services with a pool"""
+        mock_config.side_effect = lambda name: pool_config(size=2 if name == 'fa' else 0)
+        mock_pool_class.return_value.refill.return_value = ['arn:new/0']
+        
+        response = lambda_handler({'detail': {'services': ['fa', 'pdf']}}, None)
+        
+        assert response['statusCode'] == 200
+        assert response['body']['results'] == [
+            {'service': 'fa', 'status': 'success', 'poolSize': 2, 'launched': 1}
+        ]
@@ -0,0 +1,286 @@
+"""
+Throttling-Aware AWS Call Layer
+Paces every call of the pooled clients with per-operation token buckets and
+retries throttled or transient failures with jittered backoff, within a retry
+budget per Lambda invocation
+
+register() attaches two botocore hooks to a client, so every call, paginator
+page and retry goes through the layer without changes at the call sites:
+
+- before-send takes a token from the operation's bucket, sleeping when the
+  bucket is empty so a burst of starts queues instead of being throttled.
+- needs-retry replaces botocore's retry handler. Throttling errors halve the
+  operation's rate (restored gradually by successful calls) and are retried
+  with full-jitter exponential backoff, as are 5xx responses and connection
+  errors, up to BOTO_MAX_ATTEMPTS retries per call. Every retry spends from
+  a budget reset by start_invocation(); once it is spent, failures surface at
+  once so a throttled burst does not multiply its own load.
+
+Bucket sizes approximate the default per-account ECS, ELBv2 and EC2 API limits
+and can be overridden with THROTTLE_RATES.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config import (
+    BOTO_MAX_ATTEMPTS,
+    THROTTLE_BACKOFF_BASE,
+    THROTTLE_BACKOFF_MAX,
+    THROTTLE_RATES,
+    THROTTLE_RETRY_BUDGET,
+)
+
+logger = logging.getLogger()
+
+# (sustained calls per second, burst) per "<service>.<Operation>" or "<service>"
+DEFAULT_RATES: Dict[str, Tuple[float, int]] = {
+    'ecs': (20.0, 50),
+    'ecs.RunTask': (40.0, 100),
+    'ecs.StopTask': (40.0, 100),
+    'ecs.DescribeTasks': (20.0, 100),
+    'ecs.ListTasks': (20.0, 100),
+    'elbv2': (10.0, 20),
+    'elbv2.DescribeTargetHealth': (20.0, 40),
+    'ec2': (20.0, 100),
+}
+
+# Used for clients of services without an entry
+FALLBACK_RATE = (10.0, 20)
+
+# Error codes AWS services use for throttling
+THROTTLING_ERRORS = (
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'SlowDown',
+)
+
+# HTTP statuses retried as transient server errors
+TRANSIENT_STATUSES = (500, 502, 503, 504)
+
+# Adaptive rate: throttling multiplies the rate by this factor, never going
+# below MIN_RATE_FACTOR of the configured rate; each success adds back
+# RECOVERY_FACTOR of it
+THROTTLE_FACTOR = 0.5
+MIN_RATE_FACTOR = 0.1
+RECOVERY_FACTOR = 0.05
+
+
+def parse_rates(spec: str) -> Dict[str, Tuple[float, int]]:
+    """
+    Parse THROTTLE_RATES
+    
+    Args:
+        spec: Comma-separated "<key>=<rate>:<burst>" entries
+    
+    Returns:
+        Dictionary of key -> (rate, burst)
+    
+    Raises:
+        ValueError: If an entry is malformed
+    """
+    rates: Dict[str, Tuple[float, int]] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            key, value = entry.split('=')
+            rate, burst = value.split(':')
+            rates[key.strip()] = (float(rate), int(burst))
+        except ValueError as e:
+            raise ValueError(f"Invalid THROTTLE_RATES entry {entry!r}: expected <key>=<rate>:<burst>") from e
+    return rates
+
+
+class TokenBucket:
+    """
+    Token bucket with an adaptive refill rate
+    
+    acquire() reserves a token even when the bucket is empty and sleeps until
+    it is due, so concurrent callers are served in arrival order at the
+    current rate.
+    """
+    
+    def __init__(self, rate: float, burst: int):
+        """
+        Initialize token bucket
+        
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        Take one token, waiting for it if necessary
+        
+        Returns:
+            Seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    def on_throttle(self) -> None:
+        """Slow down after a throttling error"""
+        with self._lock:
+            self.rate = max(self.base_rate * MIN_RATE_FACTOR, self.rate * THROTTLE_FACTOR)
+    
+    def on_success(self) -> None:
+        """Speed back up towards the configured rate"""
+        if self.rate < self.base_rate:
+            with self._lock:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_FACTOR)
+
+
+class ApiThrottle:
+    """Token buckets and retry policy shared by all pooled clients in this container"""
+    
+    def __init__(
+        self,
+        rates: Optional[Dict[str, Tuple[float, int]]] = None,
+        retry_budget: int = THROTTLE_RETRY_BUDGET,
+        max_retries: int = BOTO_MAX_ATTEMPTS
+    ):
+        """
+        Initialize the call layer
+        
+        Args:
+            rates: (rate, burst) per "<service>.<Operation>" or "<service>"
+                (default: DEFAULT_RATES updated with THROTTLE_RATES)
+            retry_budget: Retries allowed per invocation
+            max_retries: Retries allowed per call
+        """
+        self.rates = rates if rates is not None else {**DEFAULT_RATES, **parse_rates(THROTTLE_RATES)}
+        self.retry_budget = retry_budget
+        self.max_retries = max_retries
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._retries_left = retry_budget
+        self._lock = threading.Lock()
+    
+    def bucket(self, service_name: str, operation: str) -> TokenBucket:
+        """Get the token bucket of an operation, creating it on first use"""
+        key = f'{service_name}.{operation}'
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    rate, burst = self.rates.get(key) or self.rates.get(service_name) or FALLBACK_RATE
+                    bucket = self._buckets[key] = TokenBucket(rate, burst)
+        return bucket
+    
+    def register(self, client: Any, service_name: str) -> None:
+        """
+        Route every call of a client through the layer
+        
+        Args:
+            client: boto3 client (created with botocore retries disabled)
+            service_name: Service name the client was created for (ecs, elbv2, ...)
+        """
+        def before_send(event_name: str, **kwargs) -> None:
+            waited = self.bucket(service_name, event_name.split('.')[-1]).acquire()
+            if waited > 1:
+                logger.info(f"Waited {waited:.1f}s for a {service_name} {event_name.split('.')[-1]} token")
+        
+        def needs_retry(**kwargs) -> Optional[float]:
+            return self.retry_delay(service_name, **kwargs)
+        
+        client.meta.events.register('before-send', before_send)
+        client.meta.events.register('needs-retry', needs_retry)
+    
+    def retry_delay(
+        self,
+        service_name: str,
+        operation: Any,
+        attempts: int,
+        response: Optional[Tuple[Any, Dict[str, Any]]] = None,
+        caught_exception: Optional[Exception] = None,
+        **kwargs
+    ) -> Optional[float]:
+        """
+        Decide whether a finished attempt is retried
+        
+        Args:
+            service_name: Service name of the client
+            operation: botocore OperationModel
+            attempts: Attempts made so far (1 after the first)
+            response: (http_response, parsed) if a response was received
+            caught_exception: Exception raised while sending, if any
+        
+        Returns:
+            Seconds to sleep before retrying, or None to return the result
+        """
+        bucket = self.bucket(service_name, operation.name)
+        status = response[0].status_code if response is not None else None
+        code = (response[1].get('Error') or {}).get('Code') if response is not None else None
+        
+        if code in THROTTLING_ERRORS or status == 429:
+            bucket.on_throttle()
+            reason = f"throttled ({code or status})"
+        elif status in TRANSIENT_STATUSES or (caught_exception is not None and is_transient(caught_exception)):
+            reason = f"failed ({code or status or type(caught_exception).__name__})"
+        else:
+            if response is not None and status is not None and status < 300:
+                bucket.on_success()
+            return None
+        
+        if attempts > self.max_retries:
+            logger.warning(f"{service_name} {operation.name} {reason}; giving up after {attempts} attempts")
+            return None
+        if not self.spend_retry():
+            logger.warning(f"{service_name} {operation.name} {reason}; retry budget of {self.retry_budget} spent")
+            return None
+        
+        delay = random.uniform(0, min(THROTTLE_BACKOFF_MAX, THROTTLE_BACKOFF_BASE * 2 ** attempts))
+        logger.info(f"{service_name} {operation.name} {reason}; retry {attempts} in {delay:.2f}s")
+        return delay
+    
+    def spend_retry(self) -> bool:
+        """Take one retry from the invocation's budget"""
+        with self._lock:
+            if self._retries_left <= 0:
+                return False
+            self._retries_left -= 1
+            return True
+    
+    def start_invocation(self) -> None:
+        """Reset the retry budget (called at the start of each Lambda invocation)"""
+        with self._lock:
+            self._retries_left = self.retry_budget
+    
+    def reset(self) -> None:
+        """Drop all buckets and reset the budget (used by tests and benchmarks)"""
+        with self._lock:
+            self._buckets.clear()
+            self._retries_left = self.retry_budget
+
+
+def is_transient(error: Exception) -> bool:
+    """Check whether an exception raised while sending is worth retrying"""
+    from botocore.exceptions import ConnectionError as BotocoreConnectionError, HTTPClientError
+    
+    return isinstance(error, (BotocoreConnectionError, HTTPClientError))
+
+
+# Shared by all pooled clients in this container
+DEFAULT_THROTTLE = ApiThrottle()
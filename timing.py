@@ -0,0 +1,238 @@
+"""
+Start Phase Timing
+Collects per-phase durations and API call counts for one service start and
+emits them as CloudWatch Embedded Metric Format (EMF) log lines
+
+A StartTrace is bound to the current context by start_trace(); ECSHandler and
+TargetGroupHandler record into it through record_phase()/phase() without
+needing it passed in, and do nothing when no trace is active. Pooled clients
+call count_api_call() before every request, so API calls made in the thread
+running the start are counted automatically; describe_tasks calls made by the
+task poller thread are added explicitly with add_api_calls().
+"""
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import METRICS_NAMESPACE, EMIT_METRICS
+
+_current: contextvars.ContextVar = contextvars.ContextVar('start_trace', default=None)
+
+# ECS lastStatus values reported as separate task wait phases.
+# RUNNING-but-not-ready is the wait for the ENI private IP.
+STATUS_PHASES = {
+    'PROVISIONING': 'provisioning',
+    'PENDING': 'pending',
+    'ACTIVATING': 'activating',
+    'RUNNING': 'eni_attachment',
+}
+
+
+class StartTrace:
+    """
+    Timings of one service start
+    
+    Phases are recorded in order; recording the same phase again adds to its
+    duration and call count (e.g. run_task chunks).
+    """
+    
+    def __init__(self, service: str, cluster: str):
+        """
+        Initialize start trace
+        
+        Args:
+            service: Service name (EMF dimension)
+            cluster: ECS cluster name (EMF dimension)
+        """
+        self.service = service
+        self.cluster = cluster
+        self.started_at = time.monotonic()
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.api_calls = 0
+        self._thread_calls: Dict[int, int] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, name: str, seconds: float, calls: int = 0) -> None:
+        """
+        Add a measured phase
+        
+        Args:
+            name: Phase name (snake_case)
+            seconds: Duration in seconds
+            calls: AWS API calls made during the phase
+        """
+        with self._lock:
+            phase = self.phases.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            phase['seconds'] += seconds
+            phase['calls'] += calls
+    
+    def add_api_calls(self, calls: int) -> None:
+        """Count API calls made on behalf of this start (attributed to the calling thread)"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self.api_calls += calls
+            self._thread_calls[thread_id] = self._thread_calls.get(thread_id, 0) + calls
+    
+    def thread_api_calls(self) -> int:
+        """API calls counted so far by the calling thread"""
+        with self._lock:
+            return self._thread_calls.get(threading.get_ident(), 0)
+    
+    def timings(self) -> Dict[str, Any]:
+        """
+        Get the timings block for the response body
+        
+        Returns:
+            Dictionary with totalSeconds, apiCalls and per-phase seconds/calls
+        """
+        with self._lock:
+            phases = {
+                name: {'seconds': round(phase['seconds'], 3), 'calls': phase['calls']}
+                for name, phase in self.phases.items()
+            }
+        return {
+            'totalSeconds': round(time.monotonic() - self.started_at, 3),
+            'apiCalls': self.api_calls,
+            'phases': phases
+        }
+    
+    def emf(self) -> Dict[str, Any]:
+        """
+        Build the EMF document for this start
+        
+        Each phase becomes a <Phase>Seconds metric (and <Phase>Calls when it
+        made API calls) with Service and Cluster dimensions.
+        
+        Returns:
+            EMF log document
+        """
+        timings = self.timings()
+        values: Dict[str, float] = {
+            'TotalSeconds': timings['totalSeconds'],
+            'ApiCalls': timings['apiCalls'],
+        }
+        for name, phase in timings['phases'].items():
+            metric = ''.join(part.capitalize() for part in name.split('_'))
+            values[f'{metric}Seconds'] = phase['seconds']
+            if phase['calls']:
+                values[f'{metric}Calls'] = phase['calls']
+        
+        return {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['Service', 'Cluster']],
+                    'Metrics': [
+                        {'Name': name, 'Unit': 'Count' if name.endswith('Calls') else 'Seconds'}
+                        for name in values
+                    ]
+                }]
+            },
+            'Service': self.service,
+            'Cluster': self.cluster,
+            **values
+        }
+    
+    def emit(self) -> None:
+        """
+        Write the EMF document to stdout
+        
+        EMF must be the whole log event, so this prints raw JSON instead of
+        going through the logging formatter (which prefixes level and request id).
+        """
+        if EMIT_METRICS:
+            print(json.dumps(self.emf()), flush=True)
+
+
+@contextmanager
+def start_trace(service: str, cluster: str) -> Iterator[StartTrace]:
+    """
+    Make a new trace current for the duration of a start
+    
+    Args:
+        service: Service name
+        cluster: ECS cluster name
+    
+    Yields:
+        The active StartTrace
+    """
+    trace = StartTrace(service, cluster)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def current_trace() -> Optional[StartTrace]:
+    """Get the trace of the start running in this context, if any"""
+    return _current.get()
+
+
+def record_phase(name: str, seconds: float, calls: int = 0) -> None:
+    """Record a phase on the current trace (no-op without one)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.record(name, seconds, calls)
+
+
+def add_api_calls(calls: int) -> None:
+    """Count API calls made for the current trace by another thread (no-op without one)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.add_api_calls(calls)
+
+
+def count_api_call(**kwargs: Any) -> None:
+    """botocore before-parameter-build hook: count a call on the current trace"""
+    add_api_calls(1)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Time a block as a phase of the current trace
+    
+    API calls made in this thread during the block are counted towards the
+    phase. The phase is recorded even if the block raises, so failed starts
+    still show where the time went.
+    
+    Args:
+        name: Phase name
+    """
+    trace = _current.get()
+    start = time.monotonic()
+    # Per-thread counts keep concurrent phases (e.g. one per target group) from
+    # counting each other's calls
+    calls_before = trace.thread_api_calls() if trace else 0
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.record(name, time.monotonic() - start, trace.thread_api_calls() - calls_before)
+
+
+def record_status_phases(
+    transitions: List[Tuple[str, float]],
+    started_at: float,
+    resolved_at: float
+) -> None:
+    """
+    Split a task wait into per-status phases on the current trace
+    
+    Args:
+        transitions: (lastStatus, first seen at) pairs in order, from TaskWaiter
+        started_at: When the wait started
+        resolved_at: When the wait ended
+    """
+    for i, (status, seen_at) in enumerate(transitions):
+        # Time before the first poll belongs to the first status seen
+        begin = started_at if i == 0 else seen_at
+        end = transitions[i + 1][1] if i + 1 < len(transitions) else resolved_at
+        name = STATUS_PHASES.get(status)
+        if name:
+            record_phase(name, max(0.0, end - begin))
@@ -0,0 +1,263 @@
+"""
+Warm Pool of Pre-Started Engine Tasks
+Keeps a configurable number of tasks per service RUNNING but not registered
+with the target group, so a start request only has to register one of them
+
+Warm tasks are launched with startedBy=warm-pool and tagged
+engine-pool=warm / engine-service=<service>. Claiming a task re-tags it
+engine-pool=claimed, after which it is an ordinary serving task (the stop
+Lambda stops it like any other). The pool is topped up after every claim and
+by the scheduled lambda_handler below.
+"""
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from config import get_service_config, get_all_service_names, AWS_REGION
+from ecs_handler import ECSHandler, ECSTaskError, extract_private_ip, matches_task_definition
+from resolution_cache import launch_task_definition
+from task_poller import DESCRIBE_TASKS_MAX_ARNS
+from throttling import DEFAULT_THROTTLE
+
+logger = logging.getLogger()
+
+# startedBy value of warm pool tasks (list_tasks can filter on it)
+WARM_POOL_STARTED_BY = 'warm-pool'
+
+# Task tags identifying pool membership
+POOL_TAG_KEY = 'engine-pool'
+SERVICE_TAG_KEY = 'engine-service'
+POOL_STATE_WARM = 'warm'
+POOL_STATE_CLAIMED = 'claimed'
+
+# Serializes claims within this container so concurrent starts never share a task
+_claim_lock = threading.Lock()
+
+
+class WarmPool:
+    """
+    Manages warm pool tasks for one or more services
+    
+    Each method takes the service name plus a service configuration (or a
+    resolved start request) with cluster, task_definition, subnets,
+    security_groups and warm_pool_size keys.
+    
+    Claims are serialized within a container. ECS tags have no
+    compare-and-swap, so two containers claiming at the same instant can pick
+    the same task; both then register the same target, which is idempotent,
+    and the pool is simply one task short until the next refill.
+    """
+    
+    def __init__(self, ecs_handler: ECSHandler):
+        """
+        Initialize warm pool
+        
+        Args:
+            ecs_handler: ECS handler whose client and run_task helpers are used
+        """
+        self.ecs_handler = ecs_handler
+    
+    def list_tasks(self, service: str, config: Dict[str, Any]) -> List[Dict]:
+        """
+        List the unclaimed warm tasks of a service (any status except STOPPED)
+        
+        Args:
+            service: Service name
+            config: Service configuration
+        
+        Returns:
+            Task descriptions (with tags) of warm, unclaimed tasks
+        """
+        ecs_client = self.ecs_handler.ecs_client
+        cluster = config['cluster']
+        
+        task_arns: List[str] = []
+        paginator = ecs_client.get_paginator('list_tasks')
+        for page in paginator.paginate(
+            cluster=cluster,
+            startedBy=WARM_POOL_STARTED_BY,
+            desiredStatus='RUNNING'
+        ):
+            task_arns.extend(page.get('taskArns', []))
+        
+        tasks: List[Dict] = []
+        for i in range(0, len(task_arns), DESCRIBE_TASKS_MAX_ARNS):
+            response = ecs_client.describe_tasks(
+                cluster=cluster,
+                tasks=task_arns[i:i + DESCRIBE_TASKS_MAX_ARNS],
+                include=['TAGS']
+            )
+            tasks.extend(response.get('tasks', []))
+        
+        return [
+            task for task in tasks
+            if task.get('lastStatus') != 'STOPPED'
+            and is_warm(task)
+            and task_tags(task).get(SERVICE_TAG_KEY) == service
+            and matches_task_definition(task.get('taskDefinitionArn', ''), config['task_definition'])
+        ]
+    
+    def claim(self, service: str, config: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """
+        Take a RUNNING warm task out of the pool
+        
+        Args:
+            service: Service name
+            config: Service configuration
+        
+        Returns:
+            Tuple of (task_arn, private_ip), or None if no warm task is ready
+        """
+        with _claim_lock:
+            try:
+                tasks = self.list_tasks(service, config)
+            except ClientError as e:
+                logger.error(f"Error listing warm pool tasks for {service}: {str(e)}")
+                return None
+            
+            # Oldest first: it has been warm the longest
+            ready = sorted(
+                (t for t in tasks if t.get('lastStatus') == 'RUNNING' and extract_private_ip(t)),
+                key=lambda t: str(t.get('startedAt', ''))
+            )
+            
+            for task in ready:
+                task_arn = task['taskArn']
+                try:
+                    self.ecs_handler.ecs_client.tag_resource(
+                        resourceArn=task_arn,
+                        tags=[{'key': POOL_TAG_KEY, 'value': POOL_STATE_CLAIMED}]
+                    )
+                except ClientError as e:
+                    logger.warning(f"Could not claim warm task {task_arn.split('/')[-1]}: {str(e)}")
+                    continue
+                
+                private_ip = extract_private_ip(task)
+                logger.info(
+                    f"[{service}] Claimed warm task {task_arn.split('/')[-1]} with IP {private_ip} "
+                    f"({len(ready) - 1} other warm tasks ready)"
+                )
+                return task_arn, private_ip
+        
+        logger.info(f"[{service}] No warm task ready ({len(tasks)} still starting)")
+        return None
+    
+    def refill(self, service: str, config: Dict[str, Any]) -> List[str]:
+        """
+        Launch tasks until the pool holds warm_pool_size unclaimed tasks
+        
+        Tasks still starting count towards the pool. The new tasks are not
+        waited on; they join the pool once they reach RUNNING.
+        
+        Args:
+            service: Service name
+            config: Service configuration
+        
+        Returns:
+            ARNs of the launched tasks
+        
+        Raises:
+            ECSTaskError: If the pool could not be listed or no task could be launched
+        """
+        size = config.get('warm_pool_size', 0)
+        if size <= 0:
+            return []
+        
+        try:
+            current = len(self.list_tasks(service, config))
+        except ClientError as e:
+            raise ECSTaskError(f"Error listing warm pool tasks for {service}: {str(e)}") from e
+        
+        deficit = size - current
+        if deficit <= 0:
+            logger.info(f"[{service}] Warm pool full ({current}/{size})")
+            return []
+        
+        logger.info(f"[{service}] Refilling warm pool: {current}/{size}, launching {deficit}")
+        return self.ecs_handler.launch_tasks(
+            cluster=config['cluster'],
+            task_definition=launch_task_definition(config),
+            subnets=config['subnets'],
+            security_groups=config['security_groups'],
+            count=deficit,
+            started_by=WARM_POOL_STARTED_BY,
+            tags=[
+                {'key': POOL_TAG_KEY, 'value': POOL_STATE_WARM},
+                {'key': SERVICE_TAG_KEY, 'value': service}
+            ]
+        )
+
+
+def task_tags(task: Dict) -> Dict[str, str]:
+    """Get a task's tags (describe_tasks include=['TAGS']) as a dictionary"""
+    return {tag.get('key'): tag.get('value') for tag in task.get('tags', [])}
+
+
+def is_warm(task: Dict) -> bool:
+    """
+    Check whether a task is an unclaimed warm pool task
+    
+    Claimed tasks keep startedBy=warm-pool, so only the pool tag tells them
+    apart from serving tasks.
+    
+    Args:
+        task: Task description from describe_tasks with include=['TAGS']
+    
+    Returns:
+        True if the task is tagged engine-pool=warm
+    """
+    return task_tags(task).get(POOL_TAG_KEY) == POOL_STATE_WARM
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Scheduled handler that tops up the warm pools
+    
+    Refills every service with a warm_pool_size above zero, or only the
+    services listed in detail.services.
+    
+    Args:
+        event: EventBridge scheduled event
+        context: Lambda context
+    
+    Returns:
+        Response with the number of tasks launched per service
+    """
+    logger.info(f"Received event: {json.dumps(event)}")
+    DEFAULT_THROTTLE.start_invocation()
+    
+    detail = event.get('detail') or {}
+    service_names = detail.get('services') or get_all_service_names()
+    
+    pool = WarmPool(ECSHandler(region=AWS_REGION))
+    results = []
+    
+    for service_name in service_names:
+        service_name = service_name.lower()
+        try:
+            config = get_service_config(service_name)
+            if config.get('warm_pool_size', 0) <= 0:
+                continue
+            launched = pool.refill(service_name, config)
+            results.append({
+                'service': service_name,
+                'status': 'success',
+                'poolSize': config['warm_pool_size'],
+                'launched': len(launched)
+            })
+        except (ValueError, ECSTaskError) as e:
+            logger.error(f"Error refilling warm pool for {service_name}: {str(e)}")
+            results.append({'service': service_name, 'status': 'error', 'error': str(e)})
+    
+    failed = sum(1 for r in results if r['status'] == 'error')
+    
+    return {
+        'statusCode': 200 if not failed else 207,
+        'body': {
+            'message': f'Refilled {len(results) - failed} of {len(results)} warm pools',
+            'results': results
+        }
+    }